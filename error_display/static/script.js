@@ -50,7 +50,41 @@ window.addEventListener("load", () => {
 		);
 	}
 
-	async function updateScene(data) {
+	const ORIENTS = "nsewud";
+
+	// Parse the packed tile data produced by user_errors.pack_tiles().
+	function parseTiles(buffer) {
+		const view = new DataView(buffer);
+		const decoder = new TextDecoder("ascii");
+		const magic = decoder.decode(new Uint8Array(buffer, 0, 4));
+		const version = view.getUint32(4, true);
+		if (magic !== "BEE2" || version !== 1) {
+			throw new Error(`Unknown tile data: ${magic} v${version}`);
+		}
+		const kindCount = view.getUint32(8, true);
+		let offset = 12;
+		const align = () => { offset += (4 - offset % 4) % 4; };
+		const tiles = new Map();
+		for (let i = 0; i < kindCount; i++) {
+			const nameLen = view.getUint8(offset);
+			const kind = decoder.decode(new Uint8Array(buffer, offset + 1, nameLen));
+			offset += 1 + nameLen;
+			align();
+			const count = view.getUint32(offset, true);
+			offset += 4;
+			const positions = new Float32Array(buffer, offset, 3 * count);
+			offset += 12 * count;
+			const sizes = new Float32Array(buffer, offset, 2 * count);
+			offset += 8 * count;
+			const orients = new Uint8Array(buffer, offset, count);
+			offset += count;
+			align();
+			tiles.set(kind, {count, positions, sizes, orients});
+		}
+		return tiles;
+	}
+
+	async function updateScene([data, tiles]) {
 		const mats = new Map();
 		const loader_tex = new THREE.TextureLoader();
 		async function load_tex_wrapping(filename) {
@@ -130,30 +164,22 @@ window.addEventListener("load", () => {
 		axes.set("y", new THREE.Quaternion().setFromAxisAngle(new THREE.Vector3(1, 0, 0), Math.PI / 2));
 		axes.set("z", new THREE.Quaternion());
 
-		for (const kind of ["white", "black", "goo", "goopartial", "goofull", "back", "glass", "grating"]) {
-			const tileList = data.tiles[kind];
-			if (tileList === undefined) {
-				continue;
-			}
+		for (const [kind, tileList] of tiles) {
 			// TODO: Maybe use this for efficiency?
-			// const mesh = new THREE.InstancedMesh(tile_geo, mats.get(kind), tileList.length);
-			// const matrix = new THREE.Matrix4();
-			// const scale = new THREE.Vector3(1, 1, 1);
-			for (let i = 0; i < tileList.length; i++) {
-				const tile = tileList[i];
-				// mesh.setMatrixAt(i, matrix.compose(
-				// 	new THREE.Vector3(tile.position[0], tile.position[1], tile.position[2]),
-				// 	rot,
-				// 	scale,
-				// ));
+			// const mesh = new THREE.InstancedMesh(tile_geo, mats.get(kind), tileList.count);
+			for (let i = 0; i < tileList.count; i++) {
+				const orient = ORIENTS[tileList.orients[i]];
+				const width = tileList.sizes[2 * i];
+				const height = tileList.sizes[2 * i + 1];
 				let mat;
-				if ((kind === "black" || kind === "white") && tile.orient !== "u" && tile.orient !== "d") {
+				if ((kind === "black" || kind === "white") && orient !== "u" && orient !== "d") {
 					mat = (kind === "white" ? white_mats : black_mats)[Math.floor(Math.random() * 3)];
 				} else {
 					mat = mats.get(kind);
 				}
 
-				let geo = rect_geo.get({width: tile.width, height: tile.height})
+				const geoKey = `${width}x${height}`;
+				let geo = rect_geo.get(geoKey);
 				if (geo === undefined) {
 					// Can't use PlaneGeometry because we need to resize the UVs.
 					// Data here copied from that.
@@ -161,10 +187,10 @@ window.addEventListener("load", () => {
 					geo = new THREE.BufferGeometry();
 					geo.setIndex([0, 2, 1, 2, 3, 1]);
 					geo.setAttribute("position", new THREE.Float32BufferAttribute([
-						-tile.width/2, tile.height/2, 0,
-						tile.width/2, tile.height/2, 0,
-						-tile.width/2, -tile.height/2, 0,
-						tile.width/2, -tile.height/2, 0,
+						-width/2, height/2, 0,
+						width/2, height/2, 0,
+						-width/2, -height/2, 0,
+						width/2, -height/2, 0,
 					], 3));
 					geo.setAttribute("normal", new THREE.Float32BufferAttribute([
 						0, 0, 1,
@@ -173,21 +199,23 @@ window.addEventListener("load", () => {
 						0, 0, 1,
 					], 3));
 					geo.setAttribute("uv", new THREE.Float32BufferAttribute([
-						0, tile.height,
-						tile.width, tile.height,
+						0, height,
+						width, height,
 						0, 0,
-						tile.width, 0,
+						width, 0,
 					], 2))
-					rect_geo.set({width: tile.width, height: tile.height}, geo);
+					rect_geo.set(geoKey, geo);
 
 				}
 				const mesh = new THREE.Mesh(geo, mat);
-				mesh.position.set(tile.position[0], tile.position[2], -tile.position[1]);
-				mesh.applyQuaternion(orients.get(tile.orient));
+				mesh.position.set(
+					tileList.positions[3 * i],
+					tileList.positions[3 * i + 2],
+					-tileList.positions[3 * i + 1],
+				);
+				mesh.applyQuaternion(orients.get(orient));
 				scene.add(mesh);
 			}
-			// mesh.instanceMatrix.needsUpdate = true;
-			// scene.add(mesh);
 		}
 
 		const voxels_geo = new THREE.BoxGeometry(0.5, 0.5, 0.5);
@@ -258,8 +286,12 @@ window.addEventListener("load", () => {
 		setTimeout(() => renderer.render(scene, camera), 150);
 	}
 
-	fetch("/displaydata")
-		.then((data) => data.json())
+	Promise.all([
+		fetch("/displaydata").then((data) => data.json()),
+		fetch("/displaydata/tiles")
+			.then((data) => data.arrayBuffer())
+			.then(parseTiles),
+	])
 		.then(updateScene)
 		.catch((reason) => {
 			console.error(reason);
@@ -38,6 +38,7 @@ DEFAULT_SETTINGS = {
 import srctools.logger
 from app import localisation, on_error
 from pathlib import Path
+import log_stats
 import utils
 
 if __name__ == '__main__':
@@ -56,11 +57,13 @@ if __name__ == '__main__':
     # We need to initialise logging as early as possible - that way
     # it can record any errors in the initialisation of modules.
     utils.fix_cur_directory()
+    log_path = str(utils.install_path(f'logs/{log_name}.log'))
     LOGGER = srctools.logger.init_logging(
-        str(utils.install_path(f'logs/{log_name}.log')),
+        log_path,
         __name__,
         on_error=on_error,
     )
+    log_stats.install_from_env(log_path)
     LOGGER.info('Arguments: {}', sys.argv)
     LOGGER.info('Running "{}", version {}:', app_name, utils.BEE_VERSION)
 
@@ -336,7 +336,7 @@ async def export_complete_task(
 
             # Save the configs since we're writing to disk lots anyway.
             GEN_OPTS.save_check()
-            config.APP.write_file(config.APP_LOC)
+            await config.APP.save(config.APP_LOC)
 
             if conf.launch_after_export or conf.after_export is not config.gen_opts.AfterExport.NORMAL:
                 do_action = await dialog.ask_yes_no(
@@ -37,8 +37,8 @@ class ItemPickerBase[ParentT](ReflowWindow, ABC):
     """The picker window."""
     # Style ID, referenced from the style window.
     selected_style: AsyncValue[PakRef[Style]]
-    # The current filtering state.
-    cur_filter: AsyncValue[set[SubItemRef] | None]
+    # The current search results, best matches first, or None if not searching.
+    cur_filter: AsyncValue[list[SubItemRef] | None]
     filter_conf: FilterConf
     packset: PackagesSet
 
@@ -239,23 +239,33 @@ class ItemPickerBase[ParentT](ReflowWindow, ABC):
             compress = self.filter_conf.compress
 
             self.slots_picker.reset()
-            for item in self._all_items:
-                await trio.lowlevel.checkpoint()
-                if hide_mandatory and item.needs_unlock:
-                    continue
-
-                ref = item.reference()
-                visible = []
-                for subkey in item.visual_subtypes:
-                    sub_ref = SubItemRef(ref, subkey)
-                    if cur_filter is None or sub_ref in cur_filter:
-                        visible.append(sub_ref)
-
-                if compress:
-                    visible = visible[:1]
-                for ref in visible:
+            if cur_filter is None:
+                for item in self._all_items:
+                    await trio.lowlevel.checkpoint()
+                    if hide_mandatory and item.needs_unlock:
+                        continue
+
+                    ref = item.reference()
+                    visible = [SubItemRef(ref, subkey) for subkey in item.visual_subtypes]
+                    if compress:
+                        visible = visible[:1]
+                    for sub_ref in visible:
+                        await trio.lowlevel.checkpoint()
+                        self.slots_picker.fetch().contents = sub_ref
+            else:
+                # Show search results in the order they were ranked.
+                shown: set[PakRef[Item]] = set()
+                for sub_ref in cur_filter:
                     await trio.lowlevel.checkpoint()
-                    self.slots_picker.fetch().contents = ref
+                    item = sub_ref.item.resolve(self.packset)
+                    if item is None or (hide_mandatory and item.needs_unlock):
+                        continue
+                    if compress:
+                        # Only the best matching subtype for each item.
+                        if sub_ref.item in shown:
+                            continue
+                        shown.add(sub_ref.item)
+                    self.slots_picker.fetch().contents = sub_ref
             self.slots_picker.hide_unused()
             self.item_pos_dirty.set()
 
@@ -5,23 +5,26 @@ import tkinter as tk
 from collections.abc import Callable
 from contextlib import aclosing
 
-from pygtrie import CharTrie
 import srctools.logger
 import trio_util
 import trio
 
 from app import localisation
+from app.search_index import SearchIndex
 from async_util import iterval_cancelling
 from packages import PackagesSet, PakRef, Style
 from packages.item import Item, SubItemRef
+from transtoken import CURRENT_LANG
 from ui_tk.wid_transtoken import set_text
 import packages
 
 
 LOGGER = srctools.logger.get_logger(__name__)
-type Filter = set[SubItemRef]
-type FilterTrie = CharTrie[Filter]
-word_to_ids: FilterTrie = CharTrie()
+# The matching subtypes, best matches first.
+type Filter = list[SubItemRef]
+# For each visual subtype, the tags it has.
+type ItemTags = tuple[tuple[int, tuple[str, ...]], ...]
+INDEX = SearchIndex()
 _type_cback: Callable[[], None] | None = None
 searchbar_wid: ttk.Entry
 
@@ -29,8 +32,8 @@ searchbar_wid: ttk.Entry
 def init(frm: ttk.Frame, refresh_val: trio_util.AsyncValue[Filter | None]) -> None:
     """Initialise the UI objects.
 
-    The callback is triggered whenever the UI changes, passing along
-    the visible items or None if no filter is specified.
+    The callback is triggered whenever the UI changes, passing along the visible items ranked
+    by how well they match, or None if no filter is specified.
     """
     global _type_cback, searchbar_wid
     refresh_tim: str | None = None
@@ -40,24 +43,11 @@ def init(frm: ttk.Frame, refresh_val: trio_util.AsyncValue[Filter | None]) -> No
         """Re-search whenever text is typed."""
         nonlocal refresh_tim, result
         text = search_var.get().casefold()
-        words = text.split()
-        if not words:
+        if not text.split():
             refresh_val.value = None
             return
 
-        found: Filter = set()
-        *words, last = words
-        for word in words:
-            try:
-                found |= word_to_ids[word]
-            except KeyError:
-                pass
-        if last:
-            try:
-                for group in word_to_ids.itervalues(last):
-                    found |= group
-            except KeyError:
-                pass
+        found: Filter = INDEX.search(text) or []
 
         # The callback causes us to be deselected, so delay it until the user
         # stops typing.
@@ -109,9 +99,16 @@ async def update_task(cur_style: trio_util.AsyncValue[PakRef[Style]]) -> None:
             async for style in agen:
                 scope.cancel()
 
+    async def wait_lang() -> None:
+        """Reload if the language changes, since names are translated."""
+        while True:
+            await CURRENT_LANG.wait_transition()
+            scope.cancel()
+
     async with trio.open_nursery() as nursery:
         nursery.start_soon(wait_packset)
         nursery.start_soon(wait_style)
+        nursery.start_soon(wait_lang)
         while True:
             searchbar_wid.state(('disabled', ))
             with trio.CancelScope() as scope:
@@ -121,28 +118,43 @@ async def update_task(cur_style: trio_util.AsyncValue[PakRef[Style]]) -> None:
             LOGGER.info('End scope.')
 
 
-def _build_words(packset: PackagesSet, style: PakRef[Style]) -> FilterTrie:
-    """Build the full filters, for this package set and style."""
-    word_to_ids: FilterTrie = CharTrie()
-    word_set: Filter
-    for item in packset.all_obj(Item):
-        for subtype_ind in item.visual_subtypes:
-            trio.from_thread.check_cancelled()
-            for tag in item.get_tags(style, subtype_ind):
-                for word in tag.split():
-                    word_set = word_to_ids.setdefault(word.casefold(), set())
-                    word_set.add(SubItemRef(item.reference(), subtype_ind))
-    return word_to_ids
+def _compute_tags(packset: PackagesSet, style: PakRef[Style]) -> list[tuple[Item, ItemTags]]:
+    """Compute the tags for every item. This is slow, so it is run in a thread."""
+    return [
+        (item, tuple([
+            (subtype_ind, tuple(item.get_tags(style, subtype_ind)))
+            for subtype_ind in item.visual_subtypes
+        ]))
+        for item in packset.all_obj(Item)
+    ]
 
 
 async def _rebuild_database(packset: PackagesSet, style: PakRef[Style]) -> None:
-    """Rebuild the search database."""
-    global word_to_ids
-    LOGGER.info('Updating search database...')
+    """Update the search database.
 
-    new_words = await trio.to_thread.run_sync(_build_words, packset, style)
-    word_to_ids = new_words
-
-    LOGGER.info('Computed {} tags.', sum(1 for _ in word_to_ids.iterkeys()))
+    Items are keyed by ID and their tags, so only items whose tags changed are re-tokenised,
+    even though reloading packages produces new item objects. Each item is updated entirely
+    between checkpoints, so if cancelled the index is still consistent.
+    """
+    LOGGER.info('Updating search database...')
+    item_tags = await trio.to_thread.run_sync(_compute_tags, packset, style)
+    present: set[str] = set()
+    updated = 0
+    for item, tags in item_tags:
+        present.add(item.id)
+        if INDEX.is_current(item.id, tags):
+            continue
+        await trio.lowlevel.checkpoint()
+        ref = item.reference()
+        INDEX.set_item(item.id, tags, {
+            SubItemRef(ref, subtype_ind): subtype_tags
+            for subtype_ind, subtype_tags in tags
+        })
+        updated += 1
+    for item_id in INDEX.item_ids():
+        if item_id not in present:
+            INDEX.remove_item(item_id)
+
+    LOGGER.info('Updated {} items, {} tags total.', updated, len(INDEX))
     if _type_cback is not None:
         _type_cback()
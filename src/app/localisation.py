@@ -6,7 +6,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Any, Protocol, override
 
 from collections import defaultdict
-from collections.abc import AsyncGenerator, Callable, Iterable, Iterator
+from collections.abc import AsyncGenerator, Callable, Iterable, Iterator, Sequence
 from contextlib import aclosing
 from pathlib import Path
 import datetime
@@ -17,6 +17,7 @@ import itertools
 import locale
 import string
 import sys
+import time
 import weakref
 
 from babel.dates import format_date, format_datetime, format_skeleton
@@ -27,11 +28,13 @@ from babel.messages.mofile import write_mo
 from babel.messages.pofile import read_po, write_po
 from babel.numbers import format_decimal
 from srctools import FileSystem, logger
-from srctools.filesys import RawFileSystem
+from srctools.filesys import File, RawFileSystem
+from trio_util import AsyncValue
 import attrs
 import babel
 import trio
 
+from app import trans_cache
 from config.gen_opts import GenOptions
 from transtoken import (
     DUMMY, NS_UI, PETI_KEY_PREFIX, Language, PluralTransToken, TransToken,
@@ -49,7 +52,7 @@ if TYPE_CHECKING:
 
 __all__ = [
     'TransToken',
-    'add_callback', 'gradual_iter',
+    'add_callback', 'gradual_iter', 'RetranslateJob', 'retranslate', 'RETRANSLATE_PROGRESS',
     'DUMMY', 'Language', 'set_language', 'load_aux_langs',
     'setup', 'expand_langcode',
     'TransTokenSource', 'rebuild_app_langs', 'rebuild_package_langs',
@@ -63,8 +66,15 @@ BASEMODUI_PATH = 'portal2_dlc2/resource/basemodui_{}.txt'
 # For anything else, this is called which will apply tokens.
 _langchange_callback: list[Callable[[], object]] = []
 
+# When retranslating widgets, the time spent before yielding to the event loop.
+RETRANSLATE_BUDGET = 1 / 120
+# The number of widgets retranslated, and the total. This allows displaying progress.
+RETRANSLATE_PROGRESS = AsyncValue((0, 0))
+
 FOLDER = utils.install_path('i18n')
 PARSE_CANCEL = trio.CancelScope()
+# The translation cache used by the current language, closed when replaced.
+_LOADED_CACHE: trans_cache.TransCache | None = None
 
 PACKAGE_HEADER = """\
 # Translations template for BEEmod package "PROJECT".
@@ -190,6 +200,86 @@ async def gradual_iter[K, V](wdict: weakref.WeakKeyDictionary[K, V]) -> AsyncGen
     await trio.lowlevel.checkpoint()
 
 
+def _always_visible(key: object, /) -> bool:
+    """Default visibility check, treating all widgets as visible."""
+    return True
+
+
+@attrs.frozen
+class RetranslateJob[K, V]:
+    """A group of widgets to re-apply tokens to when the language changes."""
+    widgets: weakref.WeakKeyDictionary[K, V]
+    # Called with the widget, stored value and a function which translates tokens.
+    apply: Callable[[K, V, Callable[[TransToken], str]], object]
+    # Checks if the widget is currently visible, so those can be updated first.
+    is_visible: Callable[[K], bool] = _always_visible
+
+
+async def retranslate(
+    jobs: Sequence[RetranslateJob[Any, Any]],
+    budget: float = RETRANSLATE_BUDGET,
+) -> bool:
+    """Re-apply the current language to the widgets in each job.
+
+    Like gradual_iter(), the widgets are collected first, then each is looked up again when
+    processed. Visible widgets are done first, then the remainder. Work is done in batches,
+    yielding to the event loop whenever the budget (in seconds) is exceeded. Each token is only
+    translated once, since many widgets share the same token.
+
+    If the language changes part way through, this returns False and needs to be restarted.
+    """
+    lang = transtoken.CURRENT_LANG.value
+    memo: dict[TransToken, str] = {}
+
+    def translate(token: TransToken) -> str:
+        """Translate a token, reusing the result."""
+        try:
+            return memo[token]
+        except KeyError:
+            text = memo[token] = str(token)
+            return text
+
+    await trio.lowlevel.checkpoint()
+    pending = [(job, ref) for job in jobs for ref in job.widgets.keyrefs()]
+    total = len(pending)
+    done = 0
+    RETRANSLATE_PROGRESS.value = (0, total)
+    visible: list[tuple[RetranslateJob[Any, Any], weakref.ref[Any]]] = []
+    hidden: list[tuple[RetranslateJob[Any, Any], weakref.ref[Any]]] = []
+    deadline = time.perf_counter() + budget
+
+    for job, ref in pending:
+        key = ref()
+        if key is not None:
+            (visible if job.is_visible(key) else hidden).append((job, ref))
+        if time.perf_counter() > deadline:
+            await trio.lowlevel.checkpoint()
+            if transtoken.CURRENT_LANG.value is not lang:
+                return False
+            deadline = time.perf_counter() + budget
+    del pending
+
+    for job, ref in itertools.chain(visible, hidden):
+        key = ref()
+        if key is None:
+            continue  # It was destroyed in the meantime.
+        try:
+            value = job.widgets[key]
+        except KeyError:
+            continue  # Was cleared in the meantime.
+        job.apply(key, value, translate)
+        done += 1
+        if time.perf_counter() > deadline:
+            RETRANSLATE_PROGRESS.value = (done, total)
+            await trio.lowlevel.checkpoint()
+            if transtoken.CURRENT_LANG.value is not lang:
+                return False
+            deadline = time.perf_counter() + budget
+    RETRANSLATE_PROGRESS.value = (total, total)
+    LOGGER.debug('Retranslated {} widgets, using {} unique tokens.', done, len(memo))
+    return True
+
+
 class CallbackProto(Protocol):
     """Type of add_callback()."""
     def __call__[CBackT: Callable[..., object]](self, func: CBackT, /) -> CBackT: ...
@@ -461,6 +551,7 @@ async def load_aux_langs(
     if lang is DUMMY:
         # Dummy does not need to load these files.
         set_language(lang)
+        _replace_cache(None)
         return
 
     # Preserve only the UI translations.
@@ -473,14 +564,20 @@ async def load_aux_langs(
         # Continue to load, will likely just produce errors and fall back but that's fine.
         LOGGER.warning('Loading lang "{}" which has no UI translations!', lang.lang_code)
 
-    # The parsed game translations.
-    game_dict: dict[str, str] = {}
-
     # Expand to a generic country code.
     expanded = expand_langcode(lang.lang_code)
+    # First locate the files, so we can check if the cache is still valid.
+    sources: trans_cache.Sources = {'langs': ','.join(expanded)}
+    pack_files: dict[str, File] = {}
+    basemod_loc: trio.Path | None = None
+    cacheable = True
+    cache: trans_cache.TransCache | None = None
+    # If the cache was rebuilt, the data to write.
+    built: bytes | None = None
 
     async def package_lang(pak_id: str, fsys: FileSystem) -> None:
-        """Load the package language in the background."""
+        """Find the package language file in the background."""
+        nonlocal cacheable
         for code in expanded:
             await trio.lowlevel.checkpoint()
             try:
@@ -488,19 +585,101 @@ async def load_aux_langs(
             except FileNotFoundError:
                 continue
             LOGGER.debug('Found localisation file {}:{}', pak_id, file.path)
-            try:
-                with file.open_bin() as f:
-                    lang_map[pak_id] = await trio.to_thread.run_sync(gettext_mod.GNUTranslations, f)
-                return
-            except (OSError, UnicodeDecodeError) as exc:
-                LOGGER.warning('Invalid localisation file {}:{}', pak_id, file.path, exc_info=exc)
+            cache_key = await trio.to_thread.run_sync(file.cache_key)
+            if cache_key == -1:
+                cacheable = False
+            pack_files[pak_id] = file
+            sources[f'pak:{pak_id}'] = f'{file.path}:{cache_key}'
+            return
 
     async def game_lang(game_it: Iterable[gameMan.Game], expanded_langs: list[str]) -> None:
-        """Load the game language in the background."""
+        """Find the game language file in the background."""
+        nonlocal basemod_loc
         basemod_loc = await find_basemodui(game_it, expanded_langs)
         if basemod_loc is None:
             LOGGER.warning('Could not find BaseModUI file for Portal 2!')
             return
+        try:
+            stat = await basemod_loc.stat()
+        except FileNotFoundError:
+            LOGGER.warning('BaseModUI file "{}" does not exist!', basemod_loc)
+            basemod_loc = None
+        else:
+            sources['game'] = f'{basemod_loc}:{stat.st_mtime_ns}:{stat.st_size}'
+
+    with trio.CancelScope() as PARSE_CANCEL:
+        async with trio.open_nursery() as nursery:
+            nursery.start_soon(game_lang, games, expanded)
+            for pack in packset.packages.values():
+                nursery.start_soon(package_lang, pack.id, pack.fsys)
+
+        cache_loc = utils.conf_location(f'cache/translations/{lang.lang_code}.bin')
+        if cacheable:
+            cache = await trio.to_thread.run_sync(load_trans_cache, cache_loc, sources)
+        if cache is None:
+            built = await build_trans_cache(sources, basemod_loc, pack_files)
+            cache = trans_cache.TransCache(built)
+    if cache is None:  # Cancelled.
+        return
+    # We're not canceled, replace the global language with our new translations.
+    lang_map.update(cache.catalogs)
+    set_language(attrs.evolve(lang, trans=lang_map, game_trans=cache.game))
+    _replace_cache(cache)
+    if built is not None and cacheable:
+        # Only write once the previous cache is closed, since a mapped file can't be replaced on Windows.
+        await trio.to_thread.run_sync(trans_cache.write, cache_loc, built)
+
+
+def _replace_cache(cache: trans_cache.TransCache | None) -> None:
+    """Record the cache used by the current language, closing the previous one."""
+    global _LOADED_CACHE
+    old, _LOADED_CACHE = _LOADED_CACHE, cache
+    if old is not None and old is not cache:
+        old.close()
+
+
+def load_trans_cache(filename: Path, sources: trans_cache.Sources) -> trans_cache.TransCache | None:
+    """Load the translation cache, if it was built from the same sources."""
+    try:
+        cache = trans_cache.TransCache.load(filename)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        LOGGER.warning('Could not load translation cache:', exc_info=exc)
+        return None
+    if cache.sources != sources:
+        LOGGER.debug('Translation cache "{}" is out of date.', filename)
+        cache.close()
+        return None
+    LOGGER.info('Loaded translations from cache "{}"', filename)
+    return cache
+
+
+async def build_trans_cache(
+    sources: trans_cache.Sources,
+    basemod_loc: trio.Path | None,
+    pack_files: dict[str, File],
+) -> bytes:
+    """Parse all the translation files, then compile the cache."""
+    # The parsed game translations.
+    game_dict: dict[str, str] = {}
+    catalogs: dict[str, tuple[dict[str, str], str]] = {}
+
+    def read_package(pak_id: str, file: File) -> None:
+        """Parse a package language file, in a thread."""
+        with file.open_bin() as f:
+            data = f.read()
+        catalogs[pak_id] = trans_cache.parse_mo(data)
+
+    async def package_lang(pak_id: str, file: File) -> None:
+        """Load the package language in the background."""
+        try:
+            await trio.to_thread.run_sync(read_package, pak_id, file)
+        except (OSError, UnicodeDecodeError, ValueError) as exc:
+            LOGGER.warning('Invalid localisation file {}:{}', pak_id, file.path, exc_info=exc)
+
+    async def game_lang(basemod_loc: trio.Path) -> None:
+        """Load the game language in the background."""
         try:
             # BaseModUI files are encoded in UTF-16. But it's kinda broken, with line endings
             # sometimes 1-char long.
@@ -512,13 +691,13 @@ async def load_aux_langs(
         except (OSError, UnicodeDecodeError, ValueError) as exc:
             LOGGER.warning('Invalid BaseModUI file "{}"', basemod_loc, exc_info=exc)
 
-    with trio.CancelScope() as PARSE_CANCEL:
-        async with trio.open_nursery() as nursery:
-            nursery.start_soon(game_lang, games, expanded)
-            for pack in packset.packages.values():
-                nursery.start_soon(package_lang, pack.id, pack.fsys)
-    # We're not canceled, replace the global language with our new translations.
-    set_language(attrs.evolve(lang, trans=lang_map, game_trans=game_dict))
+    async with trio.open_nursery() as nursery:
+        if basemod_loc is not None:
+            nursery.start_soon(game_lang, basemod_loc)
+        for pak_id, file in pack_files.items():
+            nursery.start_soon(package_lang, pak_id, file)
+
+    return await trio.to_thread.run_sync(trans_cache.build, sources, game_dict, catalogs)
 
 
 async def get_package_tokens(packset: packages.PackagesSet) -> AsyncGenerator[TransTokenSource, None]:
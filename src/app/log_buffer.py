@@ -0,0 +1,88 @@
+"""Batches log messages for the log window in the background process.
+
+Messages are collected from the queue, then all rendered with a single insert into the text widget.
+Only a limited number of messages are kept, if more arrive than would fit, older ones are dropped
+without being rendered.
+"""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable
+import multiprocessing
+import queue
+import time
+
+from ipc_types import ARGS_SEND_LOGGING
+
+
+# The number of lines kept in the log window.
+MAX_LINES = 5000
+type InsertArgs = list[str | tuple[str, ...]]
+
+
+class LogBuffer:
+    """Log messages waiting to be displayed."""
+    def __init__(self, max_lines: int = MAX_LINES) -> None:
+        self.pending: deque[tuple[str, str]] = deque(maxlen=max_lines)
+        # The number of messages discarded before being displayed.
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def add(self, level_name: str, text: str) -> None:
+        """Add a message to be displayed."""
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append((level_name, text))
+
+    def render(self, has_text: bool) -> InsertArgs:
+        """Produce the arguments for Text.insert() to add all pending messages, then clear them.
+
+        If has_text is set, the widget already contains text so a newline needs to be added first.
+        """
+        args: InsertArgs = []
+        for level_name, text in self.pending:
+            # We don't want to indent the first line.
+            firstline, *lines = text.split('\n')
+            if has_text:
+                # Add a newline to the existing text, since we don't end with it.
+                args += ('\n', ())
+            args += (firstline, (level_name,))
+            for line in lines:
+                # Indent lines after the first.
+                args += ('\n', ('INDENT',), line, (level_name, 'INDENT'))
+            has_text = True
+        self.pending.clear()
+        return args
+
+
+def drain_queue(
+    log_queue: multiprocessing.Queue[ARGS_SEND_LOGGING] | queue.Queue[ARGS_SEND_LOGGING],
+    buffer: LogBuffer,
+    handle: Callable[[ARGS_SEND_LOGGING], object],
+    timeout: float,
+) -> bool:
+    """Pop all messages from the queue, adding logs to the buffer and passing others to handle().
+
+    This stops once the timeout expires. Returns whether any messages were received.
+    :raises BrokenPipeError: If the queue was closed.
+    """
+    had_values = False
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            msg = log_queue.get_nowait()
+        except queue.Empty:
+            break
+        except ValueError as exc:
+            raise BrokenPipeError from exc
+        had_values = True
+        match msg:
+            case ['log', str() as level, str() as message]:
+                buffer.add(level, message)
+            case _:
+                handle(msg)
+        if time.monotonic() > deadline:
+            break
+    return had_values
@@ -142,7 +142,7 @@ async def clear_caches(dialogs: Dialogs) -> None:
         message = TRANS_CACHE_RESET
 
     gameMan.CONFIG.save_check()
-    config.APP.write_file(config.APP_LOC)
+    await config.APP.save(config.APP_LOC)
 
     # Since we've saved, dismiss this window.
     win.withdraw()
@@ -1,9 +1,9 @@
 """Defines the palette data structure and file saving/loading logic."""
 from __future__ import annotations
 
-from typing import IO, TypeGuard, Literal, Final, assert_never, cast
+from typing import IO, Self, TypeGuard, Literal, Final, assert_never, cast
 
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
 from pathlib import Path
 from uuid import UUID, uuid4, uuid5
 import os
@@ -13,8 +13,10 @@ import random
 import io
 import sys
 
-from srctools import Keyvalues, NoKeyError, KeyValError
+from srctools import AtomicWriter, Keyvalues, NoKeyError, KeyValError
+import attrs
 import srctools.logger
+import trio
 
 from app.dialogs import Dialogs, TRANS_BTN_QUIT, TRANS_BTN_SKIP, TRANS_BTN_DISCARD
 from transtoken import TransToken
@@ -26,9 +28,12 @@ import utils
 
 LOGGER = srctools.logger.get_logger(__name__)
 PAL_DIR = utils.conf_location('palettes/')
+# Stores the header of each palette file, so they don't need to be parsed until selected.
+PAL_INDEX_LOC = utils.conf_location('config/palette_index.vdf')
 GROUP_BUILTIN: Final = '<BUILTIN>'
 PAL_EXT: Final = '.bee2_palette'
 CUR_VERSION: Final = 3
+INDEX_VERSION: Final = 1
 
 type HorizInd = Literal[0, 1, 2, 3]
 type VertInd = Literal[0, 1, 2, 3, 4, 5, 6, 7]
@@ -245,16 +250,152 @@ class FutureVersionError(Exception):
         self.version = version
 
 
+@attrs.frozen(kw_only=True)
+class IndexEntry:
+    """The header of a palette file, stored in the index."""
+    mtime: int
+    size: int
+    name: str
+    trans_name: str
+    group: str
+    uuid: UUID
+    readonly: bool
+    has_settings: bool
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """Check if the file is unchanged since it was indexed."""
+        return stat.st_mtime_ns == self.mtime and stat.st_size == self.size
+
+    @classmethod
+    def parse(cls, kv: Keyvalues) -> Self:
+        """Parse from the index file."""
+        return cls(
+            mtime=int(kv['mtime']),
+            size=int(kv['size']),
+            name=kv['name', ''],
+            trans_name=kv['transname', ''],
+            group=kv['group', ''],
+            uuid=UUID(hex=kv['uuid']),
+            readonly=kv.bool('readonly'),
+            has_settings=kv.bool('settings'),
+        )
+
+    def export(self, filename: str) -> Keyvalues:
+        """Produce the keyvalues for the index file."""
+        return Keyvalues(filename, [
+            Keyvalues('mtime', str(self.mtime)),
+            Keyvalues('size', str(self.size)),
+            Keyvalues('name', self.name),
+            Keyvalues('transname', self.trans_name),
+            Keyvalues('group', self.group),
+            Keyvalues('uuid', self.uuid.hex),
+            Keyvalues('readonly', srctools.bool_as_int(self.readonly)),
+            Keyvalues('settings', srctools.bool_as_int(self.has_settings)),
+        ])
+
+
+def load_index(path: Path) -> dict[str, IndexEntry]:
+    """Read the palette index, returning filename -> entry.
+
+    If the index is missing, invalid or written by a different version, it is ignored.
+    """
+    try:
+        with path.open(encoding='utf8') as f:
+            kv = Keyvalues.parse(f, str(path))
+    except FileNotFoundError:
+        return {}
+    except (OSError, KeyValError) as exc:
+        LOGGER.warning('Could not read palette index:', exc_info=exc)
+        return {}
+    if kv.int('version') != INDEX_VERSION or kv['bee_version', ''] != utils.BEE_VERSION:
+        # Palette settings may be parsed differently.
+        return {}
+    index = {}
+    for child in kv.find_children('Palettes'):
+        try:
+            index[child.real_name] = IndexEntry.parse(child)
+        except (LookupError, ValueError) as exc:
+            LOGGER.warning('Invalid palette index entry "{}":', child.real_name, exc_info=exc)
+    return index
+
+
+def write_index(path: Path, index: Mapping[str, IndexEntry]) -> None:
+    """Write out the palette index."""
+    kv = Keyvalues.root(
+        Keyvalues('version', str(INDEX_VERSION)),
+        Keyvalues('bee_version', utils.BEE_VERSION),
+        Keyvalues('Palettes', [
+            entry.export(filename)
+            for filename, entry in index.items()
+        ]),
+    )
+    try:
+        with AtomicWriter(path) as f:
+            kv.serialise(f)
+    except OSError as exc:
+        LOGGER.warning('Could not write palette index:', exc_info=exc)
+
+
+def parse_positions(kv: Keyvalues, version: int, path: str) -> ItemPos:
+    """Parse the item positions in a palette file."""
+    items: ItemPos = {}
+
+    # v2 reused the Items key, v3 restores a copy of the old block for backward compat.
+    if version in (2, 3):
+        for item_prop in kv.find_children('Positions' if version == 3 else 'Items'):
+            try:
+                x_str, y_str = item_prop.name.split()
+                x = int(x_str)
+                y = int(y_str)
+                if not validate_x(x) or not validate_y(y):
+                    raise ValueError
+            except ValueError:
+                LOGGER.warning('Invalid position {} in palette "{}"!', item_prop.name, path)
+                continue
+            try:
+                item_id = utils.obj_id(item_prop['id'])
+            except LookupError:
+                LOGGER.warning('No item in position ({}, {})', x, y)
+                continue
+            except ValueError as exc:
+                LOGGER.warning('Invalid item ID:', exc_info=exc)
+                continue
+            items[x, y] = (item_id, item_prop.int('subtype', 0))
+
+    elif version == 1:
+        for pos, item in zip(COORDS, kv.find_children('Items'), strict=False):
+            items[pos] = (utils.obj_id(item.name), int(item.value))
+    elif version < 1:
+        raise ValueError(f'Invalid version {version}!')
+    else:
+        raise FutureVersionError(str(version))
+    return items
+
+
+def _parse_file(path: str) -> tuple[os.stat_result, Keyvalues]:
+    """Parse a palette file, along with the file info to index it with. This runs in a thread."""
+    stat = os.stat(path)
+    with open(path, encoding='utf8') as f:
+        return stat, Keyvalues.parse(f, path)
+
+
 class Palette:
     """A palette, saving an arrangement of items for editoritems.txt"""
-    settings: config.Config | None
     filename: str | None
     uuid: UUID
     group: str
     readonly: bool
     trans_name: str
-    items: ItemPos
     name: TransToken
+    # Palettes loaded from the index only read the positions and settings when required.
+    _loaded: bool
+    _items: ItemPos
+    _settings: config.Config | None
+    _has_settings: bool
+    # If set, unknown settings were discarded when parsing, so this should not be indexed.
+    _unknown_settings: bool = False
+    # If set, the file could not be parsed when required. It must never be saved over.
+    _load_failed: bool = False
 
     def __init__(
         self,
@@ -290,7 +431,8 @@ class Palette:
         # None determines a filename automatically.
         self.filename = filename
         # x/y -> item, subtype tuple.
-        self.items = items
+        self._items = items
+        self._loaded = True
         # If true, prevent overwriting the original file
         # (premade palettes or <LAST EXPORT>)
         self.readonly = readonly
@@ -298,11 +440,95 @@ class Palette:
             self.group = GROUP_BUILTIN
 
         # If not None, settings associated with the palette.
-        self.settings = settings
+        self._settings = settings
+        self._has_settings = settings is not None
 
     def __repr__(self) -> str:
         return f'<Palette {self.name!r} @ {self.uuid}>'
 
+    @classmethod
+    def from_index(cls, filename: str, entry: IndexEntry) -> Palette:
+        """Create a palette from an index entry. The rest of the file is parsed when required."""
+        pal = cls(
+            entry.name,
+            {},
+            trans_name=entry.trans_name,
+            readonly=entry.readonly,
+            group=entry.group,
+            filename=filename,
+            uuid=entry.uuid,
+        )
+        pal._loaded = False
+        pal._has_settings = entry.has_settings
+        return pal
+
+    @property
+    def items(self) -> ItemPos:
+        """The x/y -> item, subtype positions."""
+        if not self._loaded:
+            self._load_body()
+        return self._items
+
+    @items.setter
+    def items(self, items: ItemPos) -> None:
+        if not self._loaded:
+            self._load_body()
+        self._items = items
+
+    @property
+    def settings(self) -> config.Config | None:
+        """If not None, settings associated with the palette."""
+        if not self._loaded:
+            self._load_body()
+        return self._settings
+
+    @settings.setter
+    def settings(self, settings: config.Config | None) -> None:
+        if not self._loaded:
+            self._load_body()
+        self._settings = settings
+        self._has_settings = settings is not None
+
+    @property
+    def has_settings(self) -> bool:
+        """Check if settings are present, without needing to parse them."""
+        return self._has_settings
+
+    def _load_body(self) -> None:
+        """Parse the positions and settings for a palette loaded from the index.
+
+        If the file is no longer valid, the palette is left empty and made readonly, so that the
+        original file is not overwritten.
+        """
+        # Even if this fails, don't try again every time the palette is accessed.
+        self._loaded = True
+        assert self.filename is not None
+        path = os.path.join(PAL_DIR, self.filename)
+        LOGGER.info('Loading "{}"', self.filename)
+        try:
+            with srctools.logger.context(self.filename):
+                with open(path, encoding='utf8') as f:
+                    kv = Keyvalues.parse(f, path)
+                self._items = parse_positions(kv, kv.int('version', 1), path)
+        except (OSError, KeyValError, FutureVersionError, ValueError) as exc:
+            LOGGER.warning('Could not parse palette file "{}":', path, exc_info=exc)
+            self._items = {}
+            self._settings = None
+            self._has_settings = False
+            self._load_failed = True
+            self.readonly = True
+            return
+        try:
+            settings_conf = kv.find_key('Settings')
+        except NoKeyError:
+            self._settings = None
+        else:
+            self._settings, _, unknown = config.PALETTE.parse_kv1(settings_conf)
+            if unknown:
+                # It was indexed, so this shouldn't happen. We can't ask, so just skip these.
+                LOGGER.warning('Palette "{}" has unknown settings {}, ignoring.', path, unknown)
+        self._has_settings = self._settings is not None
+
     @classmethod
     async def parse(
         cls,
@@ -319,37 +545,7 @@ class Palette:
         name = kv['Name', '??']
         readonly = kv.bool('readonly')
 
-        items: ItemPos = {}
-
-        # v2 reused the Items key, v3 restores a copy of the old block for backward compat.
-        if version in (2, 3):
-            for item_prop in kv.find_children('Positions' if version == 3 else 'Items'):
-                try:
-                    x_str, y_str = item_prop.name.split()
-                    x = int(x_str)
-                    y = int(y_str)
-                    if not validate_x(x) or not validate_y(y):
-                        raise ValueError
-                except ValueError:
-                    LOGGER.warning('Invalid position {} in palette "{}"!', item_prop.name, path)
-                    continue
-                try:
-                    item_id = utils.obj_id(item_prop['id'])
-                except LookupError:
-                    LOGGER.warning('No item in position ({}, {})', x, y)
-                    continue
-                except ValueError as exc:
-                    LOGGER.warning('Invalid item ID:', exc_info=exc)
-                    continue
-                items[x, y] = (item_id, item_prop.int('subtype', 0))
-
-        elif version == 1:
-            for pos, item in zip(COORDS, kv.find_children('Items'), strict=False):
-                items[pos] = (utils.obj_id(item.name), int(item.value))
-        elif version < 1:
-            raise ValueError(f'Invalid version {version}!')
-        else:
-            raise FutureVersionError(str(version))
+        items = parse_positions(kv, version, path)
 
         if version != CUR_VERSION:
             needs_upgrade = True
@@ -366,6 +562,7 @@ class Palette:
                 needs_upgrade = True
 
         settings: config.Config | None
+        unknown: config.VersionMismatchList = []
         try:
             settings_conf = kv.find_key('Settings')
         except NoKeyError:
@@ -405,6 +602,7 @@ class Palette:
             uuid=uuid,
             settings=settings,
         )
+        pal._unknown_settings = bool(unknown)
         return pal, needs_upgrade
 
     def save(self, ignore_readonly: bool = False) -> None:
@@ -458,7 +656,7 @@ class Palette:
         # We need to write a new file, determine a valid path.
         # Use a hash to ensure it's a valid path (without '-' if negative).
         # If a conflict occurs, add a character and hash again to get a different value.
-        if self.filename is None or (self.readonly and not ignore_readonly):
+        if self.filename is None or self._load_failed or (self.readonly and not ignore_readonly):
             hash_src = self.name.token
             while True:
                 hash_filename = str(abs(hash(hash_src))) + PAL_EXT
@@ -498,23 +696,60 @@ class Palette:
 
 
 async def load_palettes(dialogs: Dialogs) -> list[Palette]:
-    """Scan and read in all palettes. Legacy files will be converted in the process."""
+    """Scan and read in all palettes. Legacy files will be converted in the process.
+
+    Palettes which are unchanged since the last scan are created from the index, and only read
+    fully when required. The remaining palette files are parsed in parallel.
+    """
     palettes = []
     for name, items in DEFAULT_PALETTES.items():
         palettes.append(Palette.builtin(name, items))
 
-    for name in os.listdir(PAL_DIR):  # this is both files and dirs
-        LOGGER.info('Loading "{}"', name)
+    old_index = load_index(PAL_INDEX_LOC)
+    index: dict[str, IndexEntry] = {}
+    names = os.listdir(PAL_DIR)  # this is both files and dirs
+    parsed: dict[str, tuple[os.stat_result, Keyvalues] | Exception] = {}
+
+    async def parse_task(name: str, path: str) -> None:
+        """Parse a palette file in a thread."""
+        try:
+            parsed[name] = await trio.to_thread.run_sync(_parse_file, path)
+        except (KeyValError, OSError) as exc:
+            parsed[name] = exc
+
+    async with trio.open_nursery() as nursery:
+        for name in names:
+            if not name.endswith(PAL_EXT):
+                continue
+            path = os.path.join(PAL_DIR, name)
+            try:
+                entry = old_index[name]
+                indexed = entry.matches(os.stat(path))
+            except (KeyError, OSError):
+                indexed = False
+            if indexed:
+                index[name] = entry
+            else:
+                nursery.start_soon(parse_task, name, path)
+
+    for name in names:
         path = os.path.join(PAL_DIR, name)
+        if name in index:
+            LOGGER.debug('Indexed "{}"', name)
+            palettes.append(Palette.from_index(name, index[name]))
+            continue
+        LOGGER.info('Loading "{}"', name)
 
         pos_file: IO[str] | None = None
         prop_file: IO[str] | None = None
         try:
             if name.endswith(PAL_EXT):
                 try:
+                    result = parsed[name]
+                    if isinstance(result, Exception):
+                        raise result
+                    stat, kv = result
                     with srctools.logger.context(name):
-                        with open(path, encoding='utf8') as f:
-                            kv = Keyvalues.parse(f, path)
                         pal, needs_upgrade = await Palette.parse(kv, path, dialogs)
                 except KeyValError as exc:
                     # We don't need the traceback, this isn't an error in the app
@@ -527,6 +762,17 @@ async def load_palettes(dialogs: Dialogs) -> list[Palette]:
                         LOGGER.info('Resaving older palette file {}', pal.filename)
                         config.backup_conf(Path(path), ".bak")
                         pal.save(ignore_readonly=True)
+                    elif not pal._unknown_settings:
+                        index[name] = IndexEntry(
+                            mtime=stat.st_mtime_ns,
+                            size=stat.st_size,
+                            name=kv['Name', '??'],
+                            trans_name=pal.trans_name,
+                            group=pal.group,
+                            uuid=pal.uuid,
+                            readonly=pal.readonly,
+                            has_settings=pal.has_settings,
+                        )
                     palettes.append(pal)
                 continue
             elif name.endswith('.zip'):
@@ -568,6 +814,9 @@ async def load_palettes(dialogs: Dialogs) -> list[Palette]:
             pal.readonly = True
             pal.save()
             shutil.rmtree(path)
+
+    if index != old_index:
+        await trio.to_thread.run_sync(write_index, PAL_INDEX_LOC, index)
     return palettes
 
 
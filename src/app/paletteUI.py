@@ -269,7 +269,7 @@ class PaletteUI:
                 grp_menu = self.ui_menu
                 grp_tree = ''  # Root.
             for pal in sorted(palettes, key=lambda p: str(p.name)):
-                gear_img: TkImg | str = self.tk_img.sync_load(ICO_GEAR) if pal.settings is not None else ''
+                gear_img: TkImg | str = self.tk_img.sync_load(ICO_GEAR) if pal.has_settings else ''
                 grp_menu.add_radiobutton(
                     label=str(pal.name),
                     value=pal.uuid.hex,
@@ -423,7 +423,7 @@ class PaletteUI:
             self.selected_uuid = uuid
             if set_save_settings and not pal.readonly:
                 # Propagate the save-settings option to the palette, so saving does the same thing.
-                self.var_save_settings.set(pal.settings is not None)
+                self.var_save_settings.set(pal.has_settings)
             self._store_configuration()
 
     async def event_change_group(self, dialogs: Dialogs) -> None:
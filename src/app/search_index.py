@@ -0,0 +1,123 @@
+"""The index used by the item searchbar.
+
+For each item, the words for each subtype are cached, along with a key identifying what produced
+them (the tags for each subtype). When packages, styles or the language change, only items whose
+key differs are re-tokenised. Searches intersect the posting lists for each word typed, treating each as a prefix
+but ranking exact matches higher.
+"""
+from __future__ import annotations
+
+from collections.abc import Hashable, Iterable, Iterator, Mapping
+import bisect
+
+import attrs
+
+from packages.item import SubItemRef
+
+
+@attrs.frozen
+class _Entry:
+    """The words cached for an item."""
+    key: Hashable
+    words: Mapping[SubItemRef, frozenset[str]]
+
+
+class SearchIndex:
+    """Maps words to the subtypes which contain them."""
+    def __init__(self) -> None:
+        self._entries: dict[str, _Entry] = {}
+        # Word -> subtypes with that word.
+        self._postings: dict[str, set[SubItemRef]] = {}
+        # Sorted list of all words, for prefix searches.
+        self._sorted: list[str] = []
+
+    def __len__(self) -> int:
+        """Return the number of distinct words."""
+        return len(self._postings)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._entries
+
+    def is_current(self, item_id: str, key: Hashable) -> bool:
+        """Check if the item is already indexed with this key."""
+        try:
+            return self._entries[item_id].key == key
+        except KeyError:
+            return False
+
+    def item_ids(self) -> Iterator[str]:
+        """Iterate over all item IDs currently indexed."""
+        return iter(list(self._entries))
+
+    def set_item(self, item_id: str, key: Hashable, tags: Mapping[SubItemRef, Iterable[str]]) -> None:
+        """Index the tags for each subtype of an item, replacing previous ones."""
+        self.remove_item(item_id)
+        words = {
+            ref: frozenset(word.casefold() for tag in ref_tags for word in tag.split())
+            for ref, ref_tags in tags.items()
+        }
+        self._entries[item_id] = _Entry(key, words)
+        for ref, ref_words in words.items():
+            for word in ref_words:
+                try:
+                    self._postings[word].add(ref)
+                except KeyError:
+                    self._postings[word] = {ref}
+                    bisect.insort(self._sorted, word)
+
+    def remove_item(self, item_id: str) -> None:
+        """Remove an item from the index, if present."""
+        try:
+            entry = self._entries.pop(item_id)
+        except KeyError:
+            return
+        for ref, ref_words in entry.words.items():
+            for word in ref_words:
+                posting = self._postings[word]
+                posting.discard(ref)
+                if not posting:
+                    del self._postings[word]
+                    del self._sorted[bisect.bisect_left(self._sorted, word)]
+
+    def _prefixed(self, prefix: str) -> Iterator[str]:
+        """Iterate over all words starting with this prefix."""
+        words = self._sorted
+        for i in range(bisect.bisect_left(words, prefix), len(words)):
+            word = words[i]
+            if not word.startswith(prefix):
+                break
+            yield word
+
+    def _matches(self, query: str) -> dict[SubItemRef, int]:
+        """Find all subtypes with words starting with this query, and the quality of the match."""
+        matches: dict[SubItemRef, int] = {}
+        postings = self._postings
+        for word in self._prefixed(query):
+            if word != query:
+                matches.update(dict.fromkeys(postings[word], 1))
+        # Exact matches override prefixes.
+        if query in postings:
+            matches.update(dict.fromkeys(postings[query], 2))
+        return matches
+
+    def search(self, text: str) -> list[SubItemRef] | None:
+        """Find the subtypes matching all the words in the text.
+
+        Each word may be a prefix, but exact matches are ranked first. If no words were provided,
+        None is returned.
+        """
+        query = set(text.casefold().split())
+        if not query:
+            return None
+        # Intersect starting with the smallest set of matches.
+        matches = sorted(map(self._matches, query), key=len)
+        scores = matches[0]
+        for other in matches[1:]:
+            if not scores:
+                break
+            scores = {
+                ref: score + other[ref]
+                for ref, score in scores.items()
+                if ref in other
+            }
+        return sorted(scores, key=lambda ref: (-scores[ref], ref.item.id, ref.subtype))
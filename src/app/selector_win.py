@@ -9,9 +9,10 @@ from typing import Final, Literal, assert_never
 
 from abc import abstractmethod
 from collections import defaultdict
-from collections.abc import Awaitable, Callable, Container, Iterable, Iterator
+from collections.abc import Awaitable, Callable, Container, Iterable, Iterator, Mapping, Sequence
 from contextlib import aclosing
 from enum import Enum, auto as enum_auto
+import bisect
 import functools
 import math
 import random
@@ -61,6 +62,7 @@ class NavKeys(Enum):
 
 
 # Callbacks used to get the info for items in the window.
+type IDGetterFunc = Callable[[packages.PackagesSet], Awaitable[list[utils.SpecialID]]]
 type GetterFunc[T] = Callable[[packages.PackagesSet, utils.SpecialID], T]
 
 # The kinds of font for the display textbox.
@@ -79,6 +81,8 @@ TRANS_AUTHORS = TransToken.ui_plural('Author: {authors}', 'Authors: {authors}')
 TRANS_NO_AUTHORS = TransToken.ui('Authors: Unknown')
 TRANS_DEV_ITEM_ID = TransToken.untranslated('**ID:** {item}')
 TRANS_LOADING = TransToken.ui('Loading...')
+# While rebuilding, how many items to process between each checkpoint.
+REBUILD_BATCH = 32
 
 
 async def _store_results_task(chosen: trio_util.AsyncValue[utils.SpecialID], save_id: str) -> None:
@@ -120,7 +124,7 @@ class Options:
     - modal: If True, the window will block others while open.
     """
     func_get_data: GetterFunc[SelitemData]
-    func_get_ids: Callable[[packages.PackagesSet], Awaitable[list[utils.SpecialID]]]
+    func_get_ids: IDGetterFunc
     save_id: str  # Required!
     store_last_selected: bool = True
     has_def: bool = True
@@ -136,6 +140,168 @@ class Options:
     func_get_attr: GetterFunc[AttrMap] = lambda packset, item_id: EmptyMapping
 
 
+class SelectorIndex:
+    """The sorted order and groups for the items displayed in a selector window.
+
+    This is computed when packages are loaded, and kept if reloading produces equal data.
+    Finding the position of an item or its neighbours is then a simple lookup.
+    """
+    # The data for each item.
+    data: dict[utils.SpecialID, SelitemData]
+    # All items, sorted by their sort key. Special items are first.
+    item_list: list[utils.SpecialID]
+    # A map from folded name -> display name
+    group_names: dict[str, TransToken]
+    # Group name -> items in that group.
+    grouped_items: dict[str, list[utils.SpecialID]]
+    # A list of casefolded group names in the display order.
+    group_order: list[str]
+    # Item ID -> the index of its group in the group order, and its index in that group.
+    positions: dict[utils.SpecialID, tuple[int, int]]
+    # The previous and next items in the display order, ignoring closed groups.
+    # The first and last items are their own neighbours.
+    neighbours: dict[utils.SpecialID, tuple[utils.SpecialID, utils.SpecialID]]
+
+    def __init__(self, data: dict[utils.SpecialID, SelitemData]) -> None:
+        def sort_func(item_id: utils.SpecialID) -> str:
+            """Sort the item list. Special items go to the start, otherwise sort by the sort key."""
+            if utils.is_special_id(item_id):
+                return f'0{item_id}'
+            else:
+                return f'1{data[item_id].sort_key}'
+
+        self.data = data
+        self.item_list = sorted(data, key=sort_func)
+        grouped_items: defaultdict[str, list[utils.SpecialID]] = defaultdict(list)
+        self.group_names = {'': TRANS_GROUPLESS}
+        for item_id in self.item_list:
+            item_data = data[item_id]
+            grouped_items[item_data.group_id].append(item_id)
+            self.group_names.setdefault(item_data.group_id, item_data.group)
+        # Figure out the order for the groups - alphabetical.
+        # Note - empty string should sort to the beginning!
+        self.group_order = sorted(grouped_items.keys())
+        self.grouped_items = {group_key: grouped_items[group_key] for group_key in self.group_order}
+
+        self.positions = {}
+        display_order: list[utils.SpecialID] = []
+        for group_ind, group_key in enumerate(self.group_order):
+            group_items = self.grouped_items[group_key]
+            self.positions.update({item_id: (group_ind, i) for i, item_id in enumerate(group_items)})
+            display_order += group_items
+        self.neighbours = {
+            item_id: (prev_id, next_id)
+            for prev_id, item_id, next_id in zip(
+                display_order[:1] + display_order[:-1],
+                display_order,
+                display_order[1:] + display_order[-1:],
+                strict=True,
+            )
+        }
+
+    @classmethod
+    async def build(
+        cls,
+        packset: packages.PackagesSet,
+        func_get_ids: IDGetterFunc,
+        func_get_data: GetterFunc[SelitemData],
+        previous: SelectorIndex | None = None,
+    ) -> SelectorIndex:
+        """Fetch the data for these items, then build the index.
+
+        If the data is equal to that in the previous index, that is reused.
+        """
+        data: dict[utils.SpecialID, SelitemData] = {}
+        for ind, item_id in enumerate(await func_get_ids(packset)):
+            if ind % REBUILD_BATCH == 0:
+                await trio.lowlevel.checkpoint()
+            try:
+                data[item_id] = func_get_data(packset, item_id)
+            except KeyError:
+                # obj_by_id should have warned.
+                data[item_id] = packages.SEL_DATA_MISSING
+        if previous is not None and previous.data == data:
+            return previous
+        return cls(data)
+
+
+@attrs.frozen
+class LayoutMetrics:
+    """The sizes used to position items in the window, supplied by the UI implementation."""
+    item_width: int
+    # The height of each row of items.
+    item_height: int
+    header_height: int
+    # Additional space after the items in each group.
+    group_gap: int = 0
+
+
+class ItemLayout:
+    """The positions of group headers and items, for a specific number of columns.
+
+    Item positions are computed when required, so only rows which are scrolled into view need
+    to be processed.
+    """
+    # Each group header and its Y position.
+    headers: list[tuple[str, int]]
+    # The total height used.
+    height: int
+
+    def __init__(
+        self,
+        groups: Iterable[tuple[str, Sequence[utils.SpecialID]]],
+        visible: Mapping[str, bool],
+        show_headers: bool,
+        columns: int,
+        metrics: LayoutMetrics,
+    ) -> None:
+        self.columns = max(1, columns)
+        self.metrics = metrics
+        self.headers = []
+        # For each open group, the Y position of the first row and the items.
+        self._starts: list[int] = []
+        self._groups: list[Sequence[utils.SpecialID]] = []
+        self._group_start: dict[str, int] = {}
+
+        y = 0
+        for group_key, items in groups:
+            # If headers are not shown, there's no way to close the group.
+            if show_headers:
+                self.headers.append((group_key, y))
+                y += metrics.header_height
+                if not visible.get(group_key):
+                    continue
+            self._group_start[group_key] = y
+            self._starts.append(y)
+            self._groups.append(items)
+            y += math.ceil(len(items) / self.columns) * metrics.item_height + metrics.group_gap
+        self.height = y
+
+    def position(self, group_key: str, index: int) -> tuple[int, int] | None:
+        """Return the position of an item in a group, or None if the group is closed."""
+        try:
+            start = self._group_start[group_key]
+        except KeyError:
+            return None
+        row, col = divmod(index, self.columns)
+        return col * self.metrics.item_width, start + row * self.metrics.item_height
+
+    def visible(self, top: int, bottom: int) -> Iterator[tuple[utils.SpecialID, int, int]]:
+        """Yield each item overlapping this vertical range, along with its position."""
+        columns = self.columns
+        width = self.metrics.item_width
+        height = self.metrics.item_height
+        first_group = max(0, bisect.bisect_right(self._starts, top) - 1)
+        for start, items in zip(self._starts[first_group:], self._groups[first_group:], strict=True):
+            if start >= bottom:
+                break
+            first_row = max(0, (top - start) // height)
+            last_row = (bottom - start - 1) // height
+            for ind in range(first_row * columns, min(len(items), (last_row + 1) * columns)):
+                row, col = divmod(ind, columns)
+                yield items[ind], col * width, start + row * height
+
+
 # noinspection PyProtectedMember
 class GroupHeaderBase:
     """Base logic for the widget used for group headers."""
@@ -218,16 +384,10 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
     modal: bool
     attrs: list[AttrDef]
 
-    # Current list of item IDs we display.
-    item_list: list[utils.SpecialID]
-    # A map from folded name -> display name
-    group_names: dict[str, TransToken]
-    # Group name -> items in that group.
-    grouped_items: dict[str, list[utils.SpecialID]]
+    # The order and groups of the items we display, when last rebuilt.
+    _index: SelectorIndex
     # Group name -> is visible.
     group_visible: dict[str, bool]
-    # A list of casefolded group names in the display order.
-    group_order: list[str]
     # A map from group name -> header widget
     group_widgets: dict[str, GroupHeaderT]
     # Recycles existing group headers. Must be constructed in subclass!
@@ -235,10 +395,14 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
     # Maps item ID to the menu position.
     _menu_index: dict[utils.SpecialID, int]
 
-    # Buttons we have constructed, corresponding to the same in the item list.
+    # Buttons are only assigned to items which are scrolled into view. These are all the buttons
+    # we have constructed, and the item each is currently assigned to.
     _item_buttons: list[ButtonT]
-    # And a lookup from ID -> button
+    _button_items: list[utils.SpecialID | None]
+    # And a lookup from ID -> button, for assigned items.
     _id_to_button: dict[utils.SpecialID, ButtonT]
+    # The positions of items, for the current column count.
+    _layout: ItemLayout | None
 
     # The ID used to persist our window state across sessions.
     save_id: str
@@ -288,18 +452,15 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
 
         self._packset = packages.PackagesSet.blank()
 
-        self.item_list = []
+        self._index = SelectorIndex({})
         self._item_buttons = []
+        self._button_items = []
         self._id_to_button = {}
+        self._layout = None
         self._menu_index = {}
 
-        # A map from folded name -> display name
-        self.group_names = {}
         self.group_visible = {}
-        self.grouped_items = {}
         self.group_widgets = {}
-        # A list of casefolded group names in the display order.
-        self.group_order = []
 
         # The ID used to persist our window state across sessions.
         self.save_id = opt.save_id.casefold()
@@ -347,6 +508,26 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
         self._readonly = bool(value)
         self.set_disp()
 
+    @property
+    def item_list(self) -> list[utils.SpecialID]:
+        """Current list of item IDs we display."""
+        return self._index.item_list
+
+    @property
+    def group_names(self) -> dict[str, TransToken]:
+        """A map from folded name -> display name."""
+        return self._index.group_names
+
+    @property
+    def grouped_items(self) -> dict[str, list[utils.SpecialID]]:
+        """Group name -> items in that group."""
+        return self._index.grouped_items
+
+    @property
+    def group_order(self) -> list[str]:
+        """A list of casefolded group names in the display order."""
+        return self._index.group_order
+
     def _get_data(self, item_id: utils.SpecialID) -> SelitemData:
         """Call func_get_data, handling KeyError."""
         try:
@@ -371,84 +552,191 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
                 LOGGER.debug('Reload complete for selectorwin {}', self.save_id)
 
     async def _rebuild_items(self, packset: packages.PackagesSet) -> None:
-        """Rebuild the menus and options based on the item list."""
-        get_data = self._get_data
-
-        def sort_func(item_id: utils.SpecialID) -> str:
-            """Sort the item list. Special items go to the start, otherwise sort by the sort key."""
-            if utils.is_special_id(item_id):
-                return f'0{item_id}'
-            else:
-                return f'1{get_data(item_id).sort_key}'
+        """Update the menus and options to match the item list.
 
-        self.item_list = await self.func_get_ids(self._packset)
-        self.item_list.sort(key=sort_func)
-        grouped_items = defaultdict(list)
-        self.group_names = {'':  TRANS_GROUPLESS}
-        self._menu_index.clear()
-        self._id_to_button.clear()
+        Only the entries whose data has changed are updated. If the set of groups is unchanged,
+        only the menus for groups containing changes are rebuilt.
+        """
+        old = self._index
+        index = await SelectorIndex.build(packset, self.func_get_ids, self.func_get_data, old)
+        if index is old and self.group_widgets:
+            LOGGER.debug('No changes for selectorwin {}', self.save_id)
+            return
+        self._index = index
+
+        # Items which were removed or changed need to be reassigned buttons. Buttons are assigned
+        # when the items are scrolled into view.
+        changed: set[utils.SpecialID] = set()
+        for item_id, data in old.data.items():
+            new = index.data.get(item_id)
+            if new is not data and new != data:
+                changed.add(item_id)
+        self._release_buttons(changed)
+        for item_id in changed:
+            self._menu_index.pop(item_id, None)
+        self._layout = None
+
+        if (
+            index.group_names != old.group_names
+            or index.grouped_items.get('') != old.grouped_items.get('')
+            or not self.group_widgets
+        ):
+            # Groups were added or removed, or ungrouped items changed. These are all in the
+            # main menu, so rebuild that entirely.
+            await self._rebuild_menus()
+        else:
+            # Only rebuild the menus for groups which were changed.
+            refresh = [
+                group_key for group_key, items in index.grouped_items.items()
+                if items != old.grouped_items[group_key] or not changed.isdisjoint(items)
+            ]
+            LOGGER.debug('Updating groups {} for selectorwin {}', refresh, self.save_id)
+            # Clear first, since items may have moved between groups.
+            for group_key in refresh:
+                self._ui_menu_clear_group(self.group_widgets[group_key], old.grouped_items[group_key])
+            for group_key in refresh:
+                group = self.group_widgets[group_key]
+                for ind, item_id in enumerate(index.grouped_items[group_key]):
+                    if ind % REBUILD_BATCH == 0:
+                        await trio.lowlevel.checkpoint()
+                    self._ui_menu_add(
+                        group,
+                        item_id,
+                        functools.partial(self.sel_item_id, item_id),
+                        index.data[item_id].context_lbl,
+                    )
+
+        # Rebuilt menus use the normal font.
+        for item_id in self.suggested:
+            if item_id in index.data:
+                self._ui_menu_set_font(item_id, True)
+        for group_key in index.group_order:
+            self.group_visible[group_key] = True
+        if self._visible:
+            self.item_pos_dirty.set()
 
-        # First, clear everything.
+    async def _rebuild_menus(self) -> None:
+        """Clear and rebuild the menus and group headers entirely."""
         self._ui_menu_clear()
-        for button in self._item_buttons:
-            self._ui_button_hide(button)
-
-        # Reset groups.
+        self._menu_index.clear()
         self.group_cache.reset()
         self.group_widgets.clear()
 
-        # Create additional buttons so we have enough.
-        while len(self._item_buttons) < len(self.item_list):
-            await trio.lowlevel.checkpoint()
-            self._item_buttons.append(self._ui_button_create(len(self._item_buttons)))
-
-        for item_id, button in zip(self.item_list, self._item_buttons, strict=False):
-            await trio.lowlevel.checkpoint()
-            data = self.func_get_data(self._packset, item_id)
-            self._id_to_button[item_id] = button
-            await trio.lowlevel.checkpoint()
-            # Special icons have no text.
-            if utils.is_special_id(item_id):
-                self._ui_button_set_text(button, TransToken.BLANK)
-            else:
-                self._ui_button_set_text(button, data.short_name)
+        index = self._index
+        for group_key in index.group_order:
+            self.group_widgets[group_key] = group = self.group_cache.fetch()
+            # noinspection PyProtectedMember
+            group._ui_reassign(group_key, index.group_names[group_key])
+            for ind, item_id in enumerate(index.grouped_items[group_key]):
+                if ind % REBUILD_BATCH == 0:
+                    await trio.lowlevel.checkpoint()
+                self._ui_menu_add(
+                    group,
+                    item_id,
+                    functools.partial(self.sel_item_id, item_id),
+                    index.data[item_id].context_lbl,
+                )
 
-            group_key = data.group_id
-            grouped_items[group_key].append(item_id)
-            await trio.lowlevel.checkpoint()
+        await trio.lowlevel.checkpoint()
+        for group_key, group in self.group_widgets.items():
+            # Don't add the ungrouped menu to itself!
+            if group_key != '':
+                self._ui_group_add(group, index.group_names[group_key])
+        self.group_cache.hide_unused()
 
-            if group_key not in self.group_names:
-                self.group_names[group_key] = data.group
-            try:
-                group = self.group_widgets[group_key]
-            except KeyError:
-                self.group_widgets[group_key] = group = self.group_cache.fetch()
-                await trio.lowlevel.checkpoint()
-                # noinspection PyProtectedMember
-                group._ui_reassign(group_key, self.group_names[group_key])
-
-            await trio.lowlevel.checkpoint()
-            self._ui_menu_add(
-                group,
-                item_id,
-                functools.partial(self.sel_item_id, item_id),
-                data.context_lbl,
-            )
+    def _release_buttons(self, item_ids: Container[utils.SpecialID] | None = None) -> None:
+        """Unassign and hide buttons, returning them to the pool.
 
-        # Convert to a normal dictionary, after adding all items.
-        self.grouped_items = dict(grouped_items)
+        If item IDs are specified, only buttons for those items are released.
+        """
+        for ind, item_id in enumerate(self._button_items):
+            if item_id is not None and (item_ids is None or item_id in item_ids):
+                self._ui_button_hide(self._item_buttons[ind])
+                self._button_items[ind] = None
+                del self._id_to_button[item_id]
+
+    def _update_layout(self) -> ItemLayout:
+        """Recompute the positions of items, after groups or the column count change."""
+        self._layout = ItemLayout(
+            [(group_key, self.grouped_items[group_key]) for group_key in self.group_order],
+            self.group_visible,
+            self.group_order != [''],
+            self.column_count,
+            self._ui_layout_metrics(),
+        )
+        return self._layout
 
-        # Figure out the order for the groups - alphabetical.
-        # Note - empty string should sort to the beginning!
-        self.group_order[:] = sorted(self.grouped_items.keys())
+    def _assign_buttons(self, top: int, bottom: int) -> list[tuple[ButtonT, utils.SpecialID, int, int]]:
+        """Assign buttons to the items between these positions in the current layout.
 
-        for group_key in self.group_order:
-            self.group_visible[group_key] = True
-            await trio.lowlevel.checkpoint()
-            # Don't add the ungrouped menu to itself!
-            if group_key != '':
-                self._ui_group_add(self.group_widgets[group_key], self.group_names[group_key])
-        self.group_cache.hide_unused()
+        A row is added above and below, so items are ready when scrolled. Buttons stay assigned
+        to the same item if still visible, the rest are reused or hidden. This returns each
+        button, its item and position, so the UI can place them.
+        """
+        layout = self._layout
+        if layout is None:
+            layout = self._update_layout()
+        margin = layout.metrics.item_height
+        visible = list(layout.visible(top - margin, bottom + margin))
+        wanted = {item_id for item_id, x, y in visible}
+
+        free: list[int] = []
+        for ind, item_id in enumerate(self._button_items):
+            if item_id is None or item_id not in wanted:
+                if item_id is not None:
+                    del self._id_to_button[item_id]
+                    self._button_items[ind] = None
+                free.append(ind)
+        # Use lower indexes first.
+        free.reverse()
+
+        placed = []
+        for item_id, x, y in visible:
+            try:
+                button = self._id_to_button[item_id]
+            except KeyError:
+                if free:
+                    ind = free.pop()
+                else:
+                    ind = len(self._item_buttons)
+                    self._item_buttons.append(self._ui_button_create(ind))
+                    self._button_items.append(None)
+                button = self._item_buttons[ind]
+                self._bind_button(ind, item_id)
+            placed.append((button, item_id, x, y))
+
+        for ind in free:
+            self._ui_button_hide(self._item_buttons[ind])
+        return placed
+
+    def _bind_button(self, ind: int, item_id: utils.SpecialID) -> None:
+        """Assign a button to display this item."""
+        button = self._item_buttons[ind]
+        self._button_items[ind] = item_id
+        self._id_to_button[item_id] = button
+        data = self._get_data(item_id)
+        # Special icons have no text.
+        if utils.is_special_id(item_id):
+            self._ui_button_set_text(button, TransToken.BLANK)
+        else:
+            self._ui_button_set_text(button, data.short_name)
+        # Icons are only loaded while the window is open.
+        self._ui_button_set_img(button, data.icon if self._visible else None)
+        self._ui_button_set_selected(button, item_id == self.selected)
+
+    def _scroll_to_item(self, item_id: utils.SpecialID) -> None:
+        """Scroll the window so this item is visible."""
+        if self._layout is None:
+            return
+        try:
+            group_ind, item_ind = self._index.positions[item_id]
+        except KeyError:
+            return
+        pos = self._layout.position(self._index.group_order[group_ind], item_ind)
+        if pos is not None:
+            self._ui_scroll_to(pos[1])
+            # Assign buttons to the items now in view.
+            self.item_pos_dirty.set()
 
     def _attr_widget_positions(self) -> Iterator[tuple[
         AttrDef, int,
@@ -571,9 +859,11 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
         If it's already selected, save and close the window.
         """
         try:
-            item_id = self.item_list[index]
+            item_id = self._button_items[index]
         except IndexError:
             return  # Shouldn't be visible.
+        if item_id is None:
+            return
         if item_id == self.selected:
             self.save()
         else:
@@ -612,7 +902,7 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
         if self._readonly or self._loading:
             return
 
-        for item_id, button in zip(self.item_list, self._item_buttons, strict=False):
+        for item_id, button in self._id_to_button.items():
             self._ui_button_set_img(button, self._get_data(item_id).icon)
 
         # Restore configured states.
@@ -650,6 +940,7 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
 
         self._ui_win_show()
         self._visible = True
+        self._update_layout()
         self.sel_item(self.chosen.value)
         self.item_pos_dirty.set()
         return
@@ -672,7 +963,7 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
     def sel_item_id(self, it_id: str) -> bool:
         """Select the item with the given ID."""
         item_id = utils.special_id(it_id)
-        if item_id in self.item_list:
+        if item_id in self._index.data:
             self.choose_item(item_id)
             return True
         return False
@@ -725,11 +1016,10 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
         try:
             button = self._id_to_button[item_id]
         except KeyError:
-            # Should never happen, but don't crash...
-            LOGGER.warning('No button for item {}??', item_id)
+            pass  # Not scrolled into view, will be selected when assigned.
         else:
             self._ui_button_set_selected(button, True)
-            self._ui_button_scroll_to(button)
+        self._scroll_to_item(item_id)
 
         self.selected = item_id
 
@@ -801,89 +1091,63 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
             self.save()
             return
 
-        cur_group_name = self._get_data(self.selected).group_id
-        cur_group = self.grouped_items[cur_group_name]
+        index = self._index
+        try:
+            group_ind, item_ind = index.positions[self.selected]
+        except KeyError:
+            return  # Not present?
         # Force the current group to be visible, so you can see what's
         # happening.
-        self.group_visible[cur_group_name] = True
-
-        # A list of groups names, in the order that they're visible onscreen
-        # (skipping hidden ones). Force-include
-        ordered_groups = [
-            group_name
-            for group_name in self.group_order
-            if self.group_visible.get(group_name)
-        ]
-
-        if not ordered_groups:
-            return  # No visible items!
+        self.group_visible[index.group_order[group_ind]] = True
 
         if key is NavKeys.HOME:
-            self._offset_select(
-                ordered_groups,
-                group_ind=-1,
-                item_ind=0,
-            )
+            self.sel_item(index.grouped_items[index.group_order[0]][0])
             return
         elif key is NavKeys.END:
-            self._offset_select(
-                ordered_groups,
-                group_ind=len(ordered_groups),
-                item_ind=0,
-            )
+            self.sel_item(index.grouped_items[index.group_order[-1]][-1])
             return
-
-        # The index in the current group for an item
-        try:
-            item_ind = cur_group.index(self.selected)
-        except IndexError:
-            return  # Not present?
-        # The index in the visible groups
-        group_ind = ordered_groups.index(cur_group_name)
-
-        if key is NavKeys.LEFT:
-            item_ind -= 1
-        elif key is NavKeys.RIGHT:
-            item_ind += 1
+        elif key is NavKeys.LEFT or key is NavKeys.RIGHT:
+            prev_id, next_id = index.neighbours[self.selected]
+            neighbour = prev_id if key is NavKeys.LEFT else next_id
+            if self.group_visible.get(index.group_order[index.positions[neighbour][0]]):
+                self.sel_item(neighbour)
+            else:
+                # Skip over closed groups.
+                self._offset_select(group_ind, item_ind + (-1 if key is NavKeys.LEFT else 1))
         elif key is NavKeys.UP:
-            item_ind -= self.column_count
+            self._offset_select(group_ind, item_ind - self.column_count, True)
         elif key is NavKeys.DOWN:
-            item_ind += self.column_count
+            self._offset_select(group_ind, item_ind + self.column_count, True)
         else:
             assert_never(key)
 
-        self._offset_select(
-            ordered_groups,
-            group_ind,
-            item_ind,
-            key is NavKeys.UP or key is NavKeys.DOWN,
-        )
-
-    def _offset_select(self, group_list: list[str], group_ind: int, item_ind: int, is_vert: bool = False) -> None:
+    def _open_group(self, group_ind: int, offset: int) -> int | None:
+        """Find the index of the closest open group before or after the specified one."""
+        group_order = self._index.group_order
+        group_ind += offset
+        while 0 <= group_ind < len(group_order):
+            if self.group_visible.get(group_order[group_ind]):
+                return group_ind
+            group_ind += offset
+        return None
+
+    def _offset_select(self, group_ind: int, item_ind: int, is_vert: bool = False) -> None:
         """Helper for key_navigate(), jump to the given index in a group.
 
-        group_list is sorted list of group names.
-        group_ind is the index of the current group, and item_ind is the index
+        group_ind is the index of the current group in the group order, and item_ind is the index
         in that group to move to.
-        If the index is above or below, it will jump to neighbouring groups.
+        If the index is above or below, it will jump to neighbouring open groups.
         """
-        if group_ind < 0:  # Jump to the first item, out of bounds
-            first_group = self.grouped_items[self.group_order[0]]
-            self.sel_item(first_group[0])
-            return
-        elif group_ind >= len(group_list):  # Ditto, last group
-            last_group = self.grouped_items[self.group_order[-1]]
-            self.sel_item(last_group[-1])
-            return
-
-        cur_group = self.grouped_items[group_list[group_ind]]
+        index = self._index
+        cur_group = index.grouped_items[index.group_order[group_ind]]
 
         # Go back a group...
         if item_ind < 0:
-            if group_ind == 0:  # First group - can't go back further!
+            prev_ind = self._open_group(group_ind, -1)
+            if prev_ind is None:  # First group - can't go back further!
                 self.sel_item(cur_group[0])
             else:
-                prev_group = self.grouped_items[group_list[group_ind - 1]]
+                prev_group = index.grouped_items[index.group_order[prev_ind]]
                 if is_vert:
                     # Jump to the same horizontal position..
                     row_num = math.ceil(len(prev_group) / self.column_count)
@@ -895,16 +1159,12 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
                 else:
                     item_ind += len(prev_group)
                 # Recurse to check the previous group..
-                self._offset_select(
-                    group_list,
-                    group_ind - 1,
-                    item_ind,
-                )
+                self._offset_select(prev_ind, item_ind)
 
         # Go forward a group...
         elif item_ind >= len(cur_group):
-            #  Last group - can't go forward further!
-            if group_ind == len(group_list):
+            next_ind = self._open_group(group_ind, +1)
+            if next_ind is None:  # Last group - can't go forward further!
                 self.sel_item(cur_group[-1])
             else:
                 # Recurse to check the next group...
@@ -913,12 +1173,7 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
                     item_ind %= self.column_count
                 else:
                     item_ind -= len(cur_group)
-
-                self._offset_select(
-                    group_list,
-                    group_ind + 1,
-                    item_ind,
-                )
+                self._offset_select(next_ind, item_ind)
 
         else:  # Within this group
             self.sel_item(cur_group[item_ind])
@@ -981,11 +1236,17 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
         """Apply size from configs."""
         raise NotImplementedError
 
+    @abstractmethod
+    def _ui_layout_metrics(self, /) -> LayoutMetrics:
+        """Return the sizes used to lay out items."""
+        raise NotImplementedError
+
     @abstractmethod
     def _ui_button_create(self, ind: int, /) -> ButtonT:
         """Create a new button widget for the main item list.
 
-        The index should be passed to `_evt_button_click()`.
+        The index should be passed to `_evt_button_click()`. Buttons are reused for different
+        items as the window is scrolled.
         """
         raise NotImplementedError
 
@@ -1010,8 +1271,8 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
         raise NotImplementedError
 
     @abstractmethod
-    def _ui_button_scroll_to(self, button: ButtonT, /) -> None:
-        """Scroll to an item so it's visible."""
+    def _ui_scroll_to(self, y: int, /) -> None:
+        """Scroll so an item at this position in the layout is visible."""
         raise NotImplementedError
 
     @abstractmethod
@@ -1064,6 +1325,14 @@ class SelectorWinBase[ButtonT, GroupHeaderT: GroupHeaderBase](ReflowWindow):
         """Remove all items from the main context menu, as well as clear the group widgets."""
         raise NotImplementedError
 
+    @abstractmethod
+    def _ui_menu_clear_group(self, group: GroupHeaderT, items: Iterable[utils.SpecialID], /) -> None:
+        """Remove these items from a group's menu, so it can be rebuilt.
+
+        This is never called for the ungrouped items in the main menu.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def _ui_menu_set_font(self, item_id: utils.SpecialID, /, suggested: bool) -> None:
         """Set the font of an item, and its parent group."""
@@ -0,0 +1,286 @@
+"""A compiled cache of the game and package translations for a language.
+
+Loading a language requires decoding the UTF-16 BaseModUI file, and parsing the .mo file inside
+every package. Instead, the results are merged into a single file, recording the sources used.
+If those are unchanged, the file is memory-mapped and strings are looked up directly from it,
+without needing to build dictionaries for every translation.
+
+The file consists of a header, a JSON block, then each table. The JSON block records the
+sources, plus the location and plural forms of each table. Each table is an array of
+(key offset, key length, value offset, value length) records sorted by key, followed by the
+UTF-8 strings themselves. Offsets are relative to the start of the file.
+"""
+from __future__ import annotations
+
+from typing import Self, overload
+from collections.abc import Callable, Iterator, Mapping
+from pathlib import Path
+from types import TracebackType
+import gettext as gettext_mod
+import io
+import json
+import mmap
+import struct
+
+from babel.messages.mofile import read_mo
+from srctools import AtomicWriter, logger
+
+
+LOGGER = logger.get_logger(__name__)
+MAGIC = b'BEE2TRNS'
+VERSION = 1
+_HEADER = struct.Struct('<8sII')  # Magic, version, JSON length.
+_RECORD = struct.Struct('<IIII')
+# Table name used for the BaseModUI translations.
+TABLE_GAME = '<game>'
+# Plural messages are stored with this suffix on the singular form.
+PLURAL_SUFFIX = '\x00'
+# Separates context from the message, matching GNU gettext.
+CONTEXT_SEP = '\x04'
+
+type Sources = dict[str, str]
+
+
+class CacheTable(Mapping[str, str]):
+    """A table of strings in the cache, looked up by binary search."""
+    def __init__(self, data: bytes | mmap.mmap, offset: int, count: int) -> None:
+        self._data = data
+        self._offset = offset
+        self._count = count
+
+    def _find(self, key: bytes) -> str | None:
+        """Search for the key, returning the value if present."""
+        data = self._data
+        offset = self._offset
+        unpack = _RECORD.unpack_from
+        low = 0
+        high = self._count
+        while low < high:
+            mid = (low + high) // 2
+            key_off, key_len, val_off, val_len = unpack(data, offset + mid * _RECORD.size)
+            found = data[key_off:key_off + key_len]
+            if found < key:
+                low = mid + 1
+            elif found > key:
+                high = mid
+            else:
+                return data[val_off:val_off + val_len].decode('utf8')
+        return None
+
+    def __getitem__(self, key: str) -> str:
+        value = self._find(key.encode('utf8'))
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._find(key.encode('utf8')) is not None
+
+    @overload
+    def get(self, key: str, /) -> str | None: ...
+    @overload
+    def get[T](self, key: str, default: str | T, /) -> str | T: ...
+    def get(self, key: str, default: object = None, /) -> object:
+        """Fetch a value, or return the default if not present."""
+        value = self._find(key.encode('utf8'))
+        return default if value is None else value
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[str]:
+        data = self._data
+        for i in range(self._count):
+            key_off, key_len, _, _ = _RECORD.unpack_from(data, self._offset + i * _RECORD.size)
+            yield data[key_off:key_off + key_len].decode('utf8')
+
+    def _release(self) -> None:
+        """Drop the reference to the data, making the table empty."""
+        self._data = b''
+        self._count = 0
+
+
+class CacheCatalog:
+    """Implements the GetText protocol, using a table in the cache."""
+    def __init__(self, table: CacheTable, plural_expr: str) -> None:
+        self.table = table
+        self._plural: Callable[[int], int] = gettext_mod.c2py(plural_expr)
+
+    def __repr__(self) -> str:
+        return f'<CacheCatalog, {len(self.table)} messages>'
+
+    def gettext(self, message: str, /) -> str:
+        """Translate a message.
+
+        Like GNUTranslations, if only a plural form is present, the singular form of that is used.
+        """
+        result = self.table.get(message)
+        if result is not None:
+            return result
+        result = self.table.get(message + PLURAL_SUFFIX)
+        if result is not None:
+            forms = result.split('\x00')
+            try:
+                return forms[self._plural(1)]
+            except IndexError:
+                pass
+        return message
+
+    def ngettext(self, single: str, plural: str, n: int, /) -> str:
+        """Translate a message with a plural form."""
+        result = self.table.get(single + PLURAL_SUFFIX)
+        if result is not None:
+            forms = result.split('\x00')
+            try:
+                return forms[self._plural(n)]
+            except IndexError:
+                pass
+        return single if n == 1 else plural
+
+
+class TransCache:
+    """A loaded translation cache.
+
+    If memory-mapped from a file, this must be closed before the file can be replaced on Windows.
+    After closing, any tables still in use are empty, so lookups fall back to the untranslated text.
+    """
+    sources: Sources
+    game: CacheTable
+    catalogs: dict[str, CacheCatalog]
+
+    def __init__(self, data: bytes | mmap.mmap) -> None:
+        magic, version, json_len = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError('Not a translation cache!')
+        if version != VERSION:
+            raise ValueError(f'Unknown translation cache version {version}!')
+        start = _HEADER.size
+        info = json.loads(data[start:start + json_len].decode('utf8'))
+        self._data = data
+        self._closed = False
+        self.sources = info['sources']
+        self.catalogs = {}
+        self.game = CacheTable(data, 0, 0)
+        for name, (offset, count, plural_expr) in info['tables'].items():
+            table = CacheTable(data, offset, count)
+            if name == TABLE_GAME:
+                self.game = table
+            else:
+                self.catalogs[name] = CacheCatalog(table, plural_expr)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        """Check if the cache has been closed."""
+        return self._closed
+
+    def close(self) -> None:
+        """Release the memory map, if loaded from a file."""
+        self._closed = True
+        self.game._release()
+        for catalog in self.catalogs.values():
+            catalog.table._release()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    @classmethod
+    def load(cls, filename: Path) -> TransCache:
+        """Memory-map a cache file.
+
+        :raises OSError: If the file could not be read.
+        :raises ValueError: If the file is not valid.
+        """
+        with filename.open('rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(data)
+        except (ValueError, LookupError, TypeError, struct.error):
+            data.close()
+            raise ValueError(f'Invalid translation cache "{filename}"!') from None
+
+
+def parse_mo(data: bytes) -> tuple[dict[str, str], str]:
+    """Parse a .mo file, producing the messages in the form the cache stores, and the plural expression."""
+    catalog = read_mo(io.BytesIO(data))
+    messages: dict[str, str] = {}
+    for message in catalog:
+        if not message.id:
+            continue  # The header.
+        string = message.string
+        if isinstance(message.id, tuple | list):
+            key = message.id[0] + PLURAL_SUFFIX
+            value = '\x00'.join(string) if isinstance(string, tuple | list) else string or ''
+        else:
+            key = message.id
+            value = string if isinstance(string, str) else ''
+        context = message.context
+        if isinstance(context, bytes):  # Babel doesn't decode this.
+            context = context.decode(catalog.charset or 'utf8')
+        if context:
+            key = context + CONTEXT_SEP + key
+        messages[key] = value
+    return messages, catalog.plural_expr
+
+
+def build(
+    sources: Sources,
+    game: Mapping[str, str],
+    catalogs: Mapping[str, tuple[Mapping[str, str], str]],
+) -> bytes:
+    """Compile the cache file.
+
+    The catalogs map each namespace to the messages and plural expression.
+    """
+    tables: list[tuple[str, Mapping[str, str], str]] = [(TABLE_GAME, game, '0')]
+    tables += [
+        (name, messages, plural_expr)
+        for name, (messages, plural_expr) in catalogs.items()
+    ]
+    # First compute the table sizes, so we can produce the header.
+    encoded = [
+        (name, sorted((key.encode('utf8'), value.encode('utf8')) for key, value in messages.items()), plural_expr)
+        for name, messages, plural_expr in tables
+    ]
+    # The header contains offsets, which may change the length of the JSON.
+    # Reserve space using the largest offset possible.
+    info_size = len(json.dumps({
+        'sources': sources,
+        'tables': {name: [0xFFFF_FFFF, len(items), expr] for name, items, expr in encoded},
+    }).encode('utf8'))
+    offset = _HEADER.size + info_size
+    table_info: dict[str, list[int | str]] = {}
+    records = bytearray()
+    pool = bytearray()
+    pool_start = offset + sum(len(items) for _, items, _ in encoded) * _RECORD.size
+    for name, items, plural_expr in encoded:
+        table_info[name] = [offset + len(records), len(items), plural_expr]
+        for key, value in items:
+            key_off = pool_start + len(pool)
+            pool += key
+            val_off = pool_start + len(pool)
+            pool += value
+            records += _RECORD.pack(key_off, len(key), val_off, len(value))
+    info = json.dumps({'sources': sources, 'tables': table_info}).encode('utf8')
+    info = info.ljust(info_size)
+    if pool_start + len(pool) > 0xFFFF_FFFF:
+        raise ValueError('Translation cache is too large!')
+    return _HEADER.pack(MAGIC, VERSION, info_size) + info + records + pool
+
+
+def write(filename: Path, data: bytes) -> None:
+    """Write out a compiled cache. Failure is not fatal, the cache will just be rebuilt next time."""
+    try:
+        with AtomicWriter(filename, is_bytes=True) as f:
+            f.write(data)
+    except OSError as exc:
+        LOGGER.warning('Could not write translation cache "{}":', filename, exc_info=exc)
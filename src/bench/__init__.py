@@ -0,0 +1,205 @@
+"""Shared code for the performance benchmarks.
+
+Each benchmark is a module runnable with ``python -m bench.<name>``, from the ``src/`` folder.
+They collect a set of named timings (each measured several times), print a summary, and can
+write the results to a JSON file. Passing ``--compare`` with a previous results file checks for
+regressions, exiting with a non-zero status if any timing got slower by more than the threshold.
+"""
+from __future__ import annotations
+from typing import Any
+
+from collections.abc import Callable, Iterable, Mapping
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+
+from srctools import AtomicWriter
+import attrs
+
+import utils
+
+
+RESULTS_VERSION = 1
+# Timings faster than this are too noisy to compare.
+MIN_COMPARE_TIME = 0.005
+
+
+@attrs.define
+class Timing:
+    """The samples recorded for one measurement."""
+    name: str
+    samples: list[float] = attrs.Factory(list)
+    # Additional information about what was measured, for instance item counts.
+    extra: dict[str, Any] = attrs.Factory(dict)
+
+    @property
+    def median(self) -> float:
+        """The median of all the samples, which is used for comparisons."""
+        return statistics.median(self.samples) if self.samples else 0.0
+
+    @property
+    def best(self) -> float:
+        """The fastest sample."""
+        return min(self.samples, default=0.0)
+
+
+@attrs.define
+class Results:
+    """All the timings recorded by a benchmark run."""
+    benchmark: str
+    params: dict[str, Any] = attrs.Factory(dict)
+    timings: dict[str, Timing] = attrs.Factory(dict)
+
+    def timing(self, name: str) -> Timing:
+        """Fetch or create the timing with this name."""
+        try:
+            return self.timings[name]
+        except KeyError:
+            timing = self.timings[name] = Timing(name)
+            return timing
+
+    def add(self, name: str, duration: float) -> None:
+        """Record a sample for the given timing."""
+        self.timing(name).samples.append(duration)
+
+    def measure(self, name: str, func: Callable[[], object], repeat: int = 1) -> None:
+        """Call the function repeatedly, recording how long it takes."""
+        timing = self.timing(name)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timing.samples.append(time.perf_counter() - start)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Produce the JSON form of the results."""
+        return {
+            'version': RESULTS_VERSION,
+            'benchmark': self.benchmark,
+            'bee_version': utils.BEE_VERSION,
+            'python': sys.version,
+            'platform': platform.platform(),
+            'params': self.params,
+            'timings': {
+                name: {
+                    'median': timing.median,
+                    'best': timing.best,
+                    'samples': timing.samples,
+                    'extra': timing.extra,
+                }
+                for name, timing in self.timings.items()
+            },
+        }
+
+    def write(self, filename: str) -> None:
+        """Write the results to a JSON file."""
+        with AtomicWriter(filename) as f:
+            json.dump(self.as_dict(), f, indent='\t')
+
+    def summary(self) -> str:
+        """Produce a table of the results."""
+        width = max((len(name) for name in self.timings), default=4)
+        lines = [f'{"Name":<{width}}  {"Median":>10}  {"Best":>10}  Runs']
+        for name, timing in self.timings.items():
+            lines.append(
+                f'{name:<{width}}  {timing.median * 1000:>8.2f}ms  '
+                f'{timing.best * 1000:>8.2f}ms  {len(timing.samples)}'
+            )
+        return '\n'.join(lines)
+
+
+@attrs.frozen
+class Regression:
+    """A timing which got slower than the baseline."""
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        """How much slower the current timing is."""
+        return self.current / self.baseline
+
+    def __str__(self) -> str:
+        return (
+            f'{self.name}: {self.baseline * 1000:.2f}ms -> {self.current * 1000:.2f}ms '
+            f'(+{(self.ratio - 1.0) * 100:.1f}%)'
+        )
+
+
+def load_results(filename: str) -> Mapping[str, float]:
+    """Load a previous result file, returning the median for each timing."""
+    with open(filename, encoding='utf8') as f:
+        data = json.load(f)
+    if data.get('version') != RESULTS_VERSION:
+        raise ValueError(f'Unknown benchmark results version {data.get("version")!r} in "{filename}"!')
+    return {
+        name: float(timing['median'])
+        for name, timing in data['timings'].items()
+    }
+
+
+def compare(baseline: Mapping[str, float], results: Results, threshold: float) -> list[Regression]:
+    """Find timings which are slower than the baseline by more than the threshold (a fraction).
+
+    Timings missing from either set are ignored, as are those too small to measure reliably.
+    """
+    regressions: list[Regression] = []
+    for name, timing in results.timings.items():
+        try:
+            base = baseline[name]
+        except KeyError:
+            continue
+        current = timing.median
+        if max(base, current) < MIN_COMPARE_TIME:
+            continue
+        if current > base * (1.0 + threshold):
+            regressions.append(Regression(name, base, current))
+    return regressions
+
+
+def parse_args(
+    description: str,
+    args: Iterable[str] | None = None,
+    setup: Callable[[argparse.ArgumentParser], None] | None = None,
+) -> argparse.Namespace:
+    """Parse the standard benchmark arguments. The setup function can add additional ones."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        '-n', '--repeat', type=int, default=3,
+        help='Number of times to repeat each measurement.',
+    )
+    parser.add_argument(
+        '-o', '--output', default='',
+        help='Write the results as JSON to this file.',
+    )
+    parser.add_argument(
+        '--compare', default='',
+        help='Compare against a previous JSON results file, failing if any timing regressed.',
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='Allowed slowdown when comparing, as a fraction. Defaults to 0.1 (10%%).',
+    )
+    if setup is not None:
+        setup(parser)
+    return parser.parse_args(None if args is None else list(args))
+
+
+def finish(args: argparse.Namespace, results: Results) -> int:
+    """Display and save the results, then compare if requested. This returns the exit code."""
+    print(results.summary())
+    if args.output:
+        results.write(args.output)
+        print(f'Wrote results to "{args.output}"')
+    if args.compare:
+        regressions = compare(load_results(args.compare), results, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} timings regressed by more than {args.threshold:.0%}:')
+            for regress in regressions:
+                print(f' - {regress}')
+            return 1
+        print(f'No regressions compared to "{args.compare}".')
+    return 0
@@ -0,0 +1,631 @@
+"""Benchmark the compiler, using synthetic PeTI maps.
+
+This generates maps with a configurable number of voxels and items, along with stub versions of
+the files the app exports (vbsp_config, editor.bin, etc.) and a fake game folder. That allows the
+compiler to run without Portal 2 or any packages being installed. Each compile runs ``vbsp.main``
+in a separate process with ``-skip_vbsp``, since the compiler keeps a lot of global state. The
+timings for each stage are read from the report produced by ``precomp.profiler``.
+
+Run with ``python -m bench.compiler`` from the ``src/`` folder.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+from srctools import Matrix, VMF, Vec
+from srctools.dmx import Attribute, Element, ValueType
+from srctools.vmf import Output, Side, make_overlay
+import attrs
+
+from editoritems import Item
+import editoritems_db
+from quote_pack import QuoteInfo
+import config
+import consts
+import corridor
+import utils
+
+from . import Results, finish, parse_args
+
+
+PAK_ID = utils.obj_id('BEE2_BENCHMARK')
+MAP_NAME = 'bench_map'
+TEX_WHITE = consts.WhitePan.WHITE_FLOOR
+TEX_BLACK = consts.BlackPan.BLACK_FLOOR
+TEX_NODRAW = consts.Tools.NODRAW
+TEX_GOO = 'nature/toxicslime_a2_bridge_intro'
+TILING_TEMPLATE = '__TILING_TEMPLATE__'
+THICKNESS_NAMES = {2: 'thin', 4: 'norm', 8: 'thick'}
+
+# The editoritems definitions for the items we place. The instances don't exist, but they're
+# never read by the precompiler.
+ITEM_IO = '''
+"Inputs" {
+    "CONNECTION_STANDARD" {
+        "Activate" "instance:bench_relay;Trigger"
+        "Deactivate" "instance:bench_relay;CancelPending"
+    }
+}
+"Outputs" {
+    "CONNECTION_STANDARD" {
+        "Activate" "instance:bench_relay;OnTrigger"
+        "Deactivate" "instance:bench_relay;OnSpawn"
+    }
+}
+'''
+ITEM_DEFS: dict[str, tuple[str, str, list[str]]] = {
+    # ID: (class, extra config, instances)
+    'ITEM_ENTRY_DOOR': ('ItemEntranceDoor', '', [
+        *[f'instances/bee2_corridor/sp/entry/corr_{i}.vmf' for i in range(1, 8)],
+        'instances/bench/door_frame_white.vmf',
+        'instances/bench/door_frame_black.vmf',
+        'instances/bench/elevator_entry.vmf',
+        'instances/bench/elevator_exit.vmf',
+        'instances/bench/transition_ents.vmf',
+    ]),
+    'ITEM_EXIT_DOOR': ('ItemExitDoor', '', [
+        *[f'instances/bee2_corridor/sp/exit/corr_{i}.vmf' for i in range(1, 5)],
+        'instances/bench/door_frame_white.vmf',
+        'instances/bench/door_frame_black.vmf',
+    ]),
+    'ITEM_COOP_ENTRY_DOOR': ('ItemCoopEntranceDoor', '', [
+        'instances/bee2_corridor/coop/entry/corr_1.vmf',
+        '', '',
+        'instances/bench/coop_elevator_exit.vmf',
+        'instances/bench/transition_ents.vmf',
+    ]),
+    'ITEM_COOP_EXIT_DOOR': ('ItemCoopExitDoor', '', [
+        *[f'instances/bee2_corridor/coop/exit/corr_{i}.vmf' for i in range(1, 5)],
+        'instances/bench/door_frame_white_coop.vmf',
+        'instances/bench/door_frame_black_coop.vmf',
+    ]),
+    'ITEM_INDICATOR_TOGGLE': ('ItemBase', '', ['instances/bench/indicator_toggle.vmf']),
+    'ITEM_INDICATOR_PANEL': ('ItemBase', '', ['instances/bench/indicator_check.vmf']),
+    'ITEM_INDICATOR_PANEL_TIMER': ('ItemBase', '', ['instances/bench/indicator_timer.vmf']),
+    'ITEM_BARRIER': ('ItemBarrier', '', [
+        'instances/bench/glass_128.vmf',
+        *[f'instances/bench/glass_frame_{i}.vmf' for i in range(1, 9)],
+    ]),
+    'ITEM_BARRIER_HAZARD': ('ItemBarrierHazard', ITEM_IO, [
+        'instances/bench/fizzler_base.vmf',
+        'instances/bench/fizzler_model.vmf',
+    ]),
+    'ITEM_POINT_LIGHT': ('ItemBase', '', ['instances/bench/point_light.vmf']),
+    'BENCH_ITEM': ('ItemBase', ITEM_IO, ['instances/bench/item.vmf']),
+}
+
+GAMEINFO = '''\
+"GameInfo"
+{
+    "game" "BEE2 Benchmark"
+    "FileSystem"
+    {
+        "SteamAppId" "620"
+        "SearchPaths"
+        {
+            "Game" "|gameinfo_path|."
+        }
+    }
+}
+'''
+VBSP_CONFIG = '''
+"Options" {
+    "game_id" "620"
+}
+"Barriers" {
+    "VALVE_GLASS" {
+        "Brush" {
+            "Thickness" "4"
+            "Offset" "0.5"
+            "Material" "glass/glasswindow007a_less_shiny"
+        }
+    }
+    "VALVE_GRATING" {
+        "Brush" {
+            "Thickness" "4"
+            "Offset" "0.5"
+            "Material" "metal/metalgrate018"
+        }
+    }
+}
+"Fizzlers" {
+    "Fizzler" {
+        "ID" "BENCH_FIZZLER"
+        "item_id" "ITEM_BARRIER_HAZARD:fizzler"
+        "model_left" "instances/bench/fizzler_left.vmf"
+        "model_right" "instances/bench/fizzler_right.vmf"
+        "model_mid" "instances/bench/fizzler_mid.vmf"
+        "Brush" {
+            "Name" "brush"
+            "Keys" {
+                "classname" "trigger_portal_cleanser"
+                "spawnflags" "1"
+            }
+            "tex_left" "effects/fizzler_l"
+            "tex_right" "effects/fizzler_r"
+            "tex_center" "effects/fizzler_center"
+            "tex_short" "effects/fizzler"
+        }
+    }
+}
+'''
+
+
+@attrs.frozen(kw_only=True)
+class MapParams:
+    """Parameters controlling the generated map."""
+    name: str
+    # Size of the chamber in voxels.
+    width: int
+    length: int
+    height: int
+    items: int = 0
+    # Each antline connects a pair of items.
+    antlines: int = 0
+    fizzlers: int = 0
+    # Number of glass walls spanning the chamber.
+    glass: int = 0
+    # Number of voxels on the floor which are filled with goo.
+    goo: int = 0
+
+    @property
+    def voxels(self) -> int:
+        """The number of voxels inside the chamber."""
+        return self.width * self.length * self.height
+
+
+PRESETS: dict[str, MapParams] = {
+    params.name: params
+    for params in [
+        MapParams(name='empty', width=4, length=4, height=3),
+        MapParams(
+            name='small', width=8, length=8, height=4,
+            items=16, antlines=4, fizzlers=1, glass=1, goo=8,
+        ),
+        MapParams(
+            name='medium', width=16, length=16, height=8,
+            items=64, antlines=16, fizzlers=3, glass=2, goo=32,
+        ),
+        MapParams(
+            name='large', width=28, length=28, height=12,
+            items=200, antlines=48, fizzlers=6, glass=4, goo=96,
+        ),
+    ]
+}
+
+
+def grid_center(x: int, y: int, z: int) -> Vec:
+    """Return the world position of the center of this voxel."""
+    return Vec(x, y, z) * 128 + (64, 64, 64)
+
+
+def floor_positions(params: MapParams) -> Iterator[tuple[int, int]]:
+    """Iterate over all the floor positions, row by row."""
+    for y in range(1, params.length + 1):
+        for x in range(1, params.width + 1):
+            yield x, y
+
+
+def build_map(params: MapParams) -> VMF:
+    """Generate a map in the same form as the puzzlemaker produces."""
+    vmf = VMF()
+    vmf.spawn['mapversion'] = '1'
+    # Floor faces, for attaching antline overlays.
+    floor_faces: dict[tuple[int, int], Side] = {}
+    # Positions of goo, which removes the floor.
+    goo_pos: set[tuple[int, int]] = set()
+
+    # Goo is placed in the last rows of the map, items and antlines in the first.
+    for x, y in floor_positions(params):
+        if len(goo_pos) >= params.goo:
+            break
+        goo_pos.add((x, params.length + 1 - y))
+
+    # Build the outer shell of solid voxels.
+    size = (params.width, params.length, params.height)
+    for x in range(params.width + 2):
+        for y in range(params.length + 2):
+            for z in range(params.height + 2):
+                outside = [not (1 <= pos <= max_pos) for pos, max_pos in zip((x, y, z), size, strict=True)]
+                if sum(outside) != 1:
+                    # Inside the chamber, or on an edge/corner which isn't visible.
+                    continue
+                if z == 1 and (x, y) in goo_pos:
+                    continue
+                brush = vmf.make_prism(
+                    Vec(x, y, z) * 128,
+                    Vec(x + 1, y + 1, z + 1) * 128,
+                    TEX_NODRAW,
+                ).solid
+                # Alternate white and black walls, with a white floor and black ceiling.
+                if z == 0:
+                    mat = TEX_WHITE
+                elif z == params.height + 1:
+                    mat = TEX_BLACK
+                else:
+                    mat = TEX_WHITE if (x + y + z) % 2 else TEX_BLACK
+                for face in brush.sides:
+                    # Faces pointing into the chamber are visible.
+                    neighbour = Vec(x, y, z) - face.normal()
+                    if all(1 <= pos <= max_pos for pos, max_pos in zip(neighbour, size, strict=True)):
+                        face.mat = mat
+                        if z == 0:
+                            floor_faces[x, y] = face
+                vmf.add_brush(brush)
+
+    for x, y in goo_pos:
+        # Goo fills the floor voxel, with floor below.
+        vmf.add_brush(vmf.make_prism(
+            Vec(x, y, 1) * 128,
+            Vec(x + 1, y + 1, 1) * 128 + (0, 0, 96),
+            TEX_GOO,
+        ).solid)
+        vmf.add_brush(vmf.make_prism(
+            Vec(x, y, 0) * 128,
+            Vec(x + 1, y + 1, 1) * 128,
+            TEX_WHITE,
+        ).solid)
+
+    add_corridors(vmf, params)
+    add_items(vmf, params, floor_faces)
+    add_fizzlers(vmf, params)
+    add_glass(vmf, params)
+    return vmf
+
+
+def add_corridors(vmf: VMF, params: MapParams) -> None:
+    """Add the entry and exit corridors, placed outside the chamber."""
+    for direction, offset in [('entry', -1), ('exit', params.width + 1)]:
+        vmf.create_ent(
+            'func_instance',
+            targetname=f'{direction}_corridor',
+            file=f'instances/bee2_corridor/sp/{direction}/corr_1.vmf',
+            origin=grid_center(offset, 1, 1) - (0, 0, 64),
+            angles='0 0 0',
+        ).fixup['no_player_start'] = '0'
+
+
+def add_items(vmf: VMF, params: MapParams, floor_faces: dict[tuple[int, int], Side]) -> None:
+    """Add generic items to the floor, with antlines connecting some of them."""
+    positions = list(floor_positions(params))
+    # Antlines run along the Y axis from the item to the one 3 voxels away, which is the target.
+    ant_items: list[tuple[int, int]] = []
+    for x, y in positions:
+        if len(ant_items) >= params.antlines:
+            break
+        if y % 4 == 1 and y + 3 <= params.length and x % 2 == 1:
+            ant_items.append((x, y))
+
+    names: dict[tuple[int, int], str] = {}
+    placed = 0
+    for pos in ant_items:
+        x, y = pos
+        for item_pos in [pos, (x, y + 3)]:
+            names[item_pos] = f'item_{placed}'
+            placed += 1
+    for pos in positions:
+        if placed >= params.items:
+            break
+        if pos not in names:
+            names[pos] = f'item_{placed}'
+            placed += 1
+
+    items = {}
+    for (x, y), name in names.items():
+        items[x, y] = vmf.create_ent(
+            'func_instance',
+            targetname=name,
+            file='instances/bench/item.vmf',
+            origin=grid_center(x, y, 1) - (0, 0, 64),
+            angles='0 0 0',
+        )
+        items[x, y].fixup['connectioncount'] = '0'
+
+    for i, (x, y) in enumerate(ant_items):
+        source = items[x, y]
+        target = items[x, y + 3]
+        target.fixup['connectioncount'] = '1'
+        source.add_out(Output('OnTrigger', target['targetname'], 'Trigger'))
+        toggle_name = f'toggle_{i}'
+        ant_name = f'antline_{i}'
+        source.add_out(Output('OnTrigger', toggle_name, 'Trigger'))
+        vmf.create_ent(
+            'func_instance',
+            targetname=toggle_name,
+            file='instances/bench/indicator_toggle.vmf',
+            origin=grid_center(x, y, 1) - (0, 0, 64),
+            angles='0 0 0',
+        ).fixup['indicator_name'] = ant_name
+        # Two 128-long segments, running between the items.
+        for seg in range(2):
+            face = floor_faces.get((x, y + 1 + seg))
+            # Antlines are positioned on the 16-unit grid, offset by half.
+            center = grid_center(x, y + 1 + seg, 0) + (8, 64, 64)
+            make_overlay(
+                vmf,
+                Vec(0, 0, 1),
+                center,
+                Vec(16, 0, 0),
+                Vec(0, 128, 0),
+                consts.Antlines.STRAIGHT,
+                [face] if face is not None else [],
+            )['targetname'] = ant_name
+
+
+def add_fizzlers(vmf: VMF, params: MapParams) -> None:
+    """Add fizzlers spanning the chamber along the X axis, on the floor."""
+    orient = Matrix.from_angle(90.0, 0.0, 0.0)  # Up points along +X.
+    angles = orient.to_angle()
+    for i in range(params.fizzlers):
+        y = params.length - 2 * i
+        if y < 1:
+            break
+        name = f'fizzler_{i}'
+        base = vmf.create_ent(
+            'func_instance',
+            targetname=name,
+            file='instances/bench/fizzler_base.vmf',
+            origin=grid_center(1, y, 1),
+            angles=angles,
+        )
+        base.fixup['$skin'] = '0'
+        for suffix, x in [('_modelStart', 1), ('_modelEnd', params.width)]:
+            vmf.create_ent(
+                'func_instance',
+                targetname=name + suffix,
+                file='instances/bench/fizzler_model.vmf',
+                origin=grid_center(x, y, 1),
+                angles=angles,
+            ).fixup['$skin'] = '0'
+
+
+def add_glass(vmf: VMF, params: MapParams) -> None:
+    """Add glass walls spanning the chamber, on the X axis."""
+    for i in range(params.glass):
+        y = 2 + 3 * i
+        if y > params.length:
+            break
+        name = f'glass_{i}'
+        for x in range(1, params.width + 1):
+            for z in range(1, params.height + 1):
+                center = grid_center(x, y, z)
+                # Glass faces -Y, on the +Y side of the voxel.
+                vmf.create_ent(
+                    'func_instance',
+                    targetname=name,
+                    file='instances/bench/glass_128.vmf',
+                    origin=center,
+                    angles='0 270 0',
+                )
+                brush = vmf.make_prism(
+                    center + (-64, 60, -64),
+                    center + (64, 64, 64),
+                    TEX_NODRAW,
+                )
+                brush.south.mat = consts.Special.GLASS
+                vmf.create_ent('func_detail').solids.append(brush.solid)
+
+
+def build_tiling_template() -> VMF:
+    """Produce the template used to generate tiles.
+
+    This is a single brush for each thickness, centered on the origin and facing +X.
+    """
+    vmf = VMF()
+    vmf.create_ent(
+        'bee2_template_conf',
+        template_id=TILING_TEMPLATE,
+        temp_type='world',
+        discard_brushes='0',
+    )
+    for thickness in [2, 4, 8]:
+        for bevel in [True, False]:
+            group = vmf.create_visgroup(f'{'bevel' if bevel else 'flat'}_{THICKNESS_NAMES[thickness]}')
+            prism = vmf.make_prism(
+                Vec(-thickness / 2, -16, -16),
+                Vec(thickness / 2, 16, 16),
+                consts.Special.SQUAREBEAMS,
+            )
+            prism.east.mat = TEX_WHITE
+            prism.west.mat = consts.Special.BACKPANELS
+            # World brushes don't save their visgroups, so use detail and force it back.
+            vmf.create_ent('func_detail').solids.append(prism.solid)
+            vmf.entities[-1].visgroup_ids.add(group.id)
+    return vmf
+
+
+def build_editoritems() -> list[Item]:
+    """Produce the item definitions."""
+    text = []
+    for item_id, (item_class, extra, instances) in ITEM_DEFS.items():
+        inst_block = '\n'.join([
+            f'"{i}" "{filename}"'
+            for i, filename in enumerate(instances)
+        ])
+        text.append(f'''
+        "Item" {{
+            "Type" "{item_id}"
+            "ItemClass" "{item_class}"
+            "Editor" {{ "SubType" {{ "Name" "{item_id}" }} }}
+            "Exporting" {{
+                "TargetName" "item"
+                "Instances" {{ {inst_block} }}
+                {extra}
+            }}
+        }}''')
+    items, renderables = Item.parse('\n'.join(text), PAK_ID)
+    return items
+
+
+def build_corridors() -> corridor.ExportedConf:
+    """Produce the corridor configuration, using the same corridor for every kind."""
+    corridors: dict[corridor.CorrKind, list[corridor.Corridor]] = {}
+    for mode in corridor.GameMode:
+        for direction in corridor.Direction:
+            for attach in corridor.Attachment:
+                corridors[mode, direction, attach] = [corridor.Corridor(
+                    instance=f'instances/bench/corr_{mode.value}_{direction.value}.vmf',
+                    fixups={},
+                    default_enabled=True,
+                    legacy=False,
+                    option_ids=frozenset(),
+                )]
+    return corridor.ExportedConf(
+        corridors=corridors,
+        global_opt_ids={
+            (mode, direction): frozenset()
+            for mode in corridor.GameMode
+            for direction in corridor.Direction
+        },
+        options={},
+    )
+
+
+def write_environment(folder: Path, params: MapParams) -> Path:
+    """Write the stub game folder and exported configs, returning the path to the map."""
+    game = folder / 'portal2'
+    game.mkdir(parents=True)
+    (game / 'gameinfo.txt').write_text(GAMEINFO)
+    bee2 = folder / 'bin' / 'bee2'
+    bee2.mkdir(parents=True)
+    (bee2 / 'vbsp_config.cfg').write_text(VBSP_CONFIG)
+    (bee2 / 'pack_list.cfg').write_text('')
+    (bee2 / 'editor.bin').write_bytes(editoritems_db.write_database(build_editoritems()))
+    (bee2 / 'corridors.bin').write_bytes(pickle.dumps(build_corridors(), pickle.HIGHEST_PROTOCOL))
+    (bee2 / 'voice.bin').write_bytes(pickle.dumps(QuoteInfo(
+        id='',
+        cave_skin=None,
+        use_dings=False,
+        use_microphones=False,
+        global_bullseye='',
+        chars=set(),
+        base_inst='',
+        position=Vec(),
+        groups={},
+        events={},
+        response_use_dings=False,
+        responses={},
+        midchamber=[],
+        monitor=None,
+    ), pickle.HIGHEST_PROTOCOL))
+
+    with open(bee2 / 'config.dmx', 'wb') as f:
+        config.COMPILER.build_dmx(config.Config()).export_binary(
+            f, fmt_name=config.DMX_NAME, fmt_ver=config.DMX_VERSION, unicode='format',
+        )
+    templates = Element('Templates', 'DMERoot')
+    templates['temp'] = template_list = Attribute.array('list', ValueType.ELEMENT)
+    template_pack = folder / 'package'
+    (template_pack / 'templates').mkdir(parents=True)
+    with open(template_pack / 'templates' / 'tiling.vmf', 'w', encoding='utf8') as f:
+        build_tiling_template().export(f)
+    tiling_elem = Element(TILING_TEMPLATE, 'DMETemplate')
+    tiling_elem['package'] = template_pack.as_posix()
+    tiling_elem['path'] = 'templates/tiling.vmf'
+    template_list.append(tiling_elem)
+    with open(bee2 / 'templates.lst', 'wb') as f:
+        templates.export_binary(f, fmt_name='bee_templates', unicode='format')
+
+    maps = folder / 'sdk_content' / 'maps'
+    maps.mkdir(parents=True)
+    map_path = maps / f'{MAP_NAME}.vmf'
+    vmf = build_map(params)
+    with open(map_path, 'w', encoding='utf8') as f:
+        vmf.export(f)
+    return map_path
+
+
+def run_compile(folder: Path, map_path: Path) -> dict[str, float]:
+    """Run the compiler in a subprocess, then return the time taken for each stage."""
+    proc = subprocess.run(
+        [
+            sys.executable, '-m', 'bench.compiler', '--worker',
+            str(folder / 'bin'), str(folder / 'portal2'), str(map_path),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        check=False,
+        env={**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)},
+    )
+    report_path = map_path.parent / 'styled' / f'{MAP_NAME}.profile.json'
+    # If a user error occurred, the partially compiled map is saved. That means the map is
+    # invalid, so we're not benchmarking the full compile.
+    error_path = map_path.parent / 'styled' / f'{MAP_NAME}.error.vmf'
+    if proc.returncode != 0 or not report_path.exists() or error_path.exists():
+        sys.stdout.write(proc.stdout.decode('utf8', 'replace'))
+        raise RuntimeError(f'Compile failed with exit code {proc.returncode}!')
+    with report_path.open(encoding='utf8') as f:
+        report = json.load(f)
+    report_path.unlink()
+    stages = {phase['name']: phase['wall'] for phase in report['phases']}
+    stages['total'] = report['total']
+    return stages
+
+
+def worker(bin_folder: str, game_folder: str, map_path: str) -> None:
+    """Run the compiler, inside the subprocess."""
+    os.chdir(bin_folder)
+    from srctools.logger import init_logging
+    init_logging('bee2/vbsp.log')
+
+    import trio
+    import vbsp
+    trio.run(vbsp.main, [
+        'vbsp', '-entity_limit', '1750', '-skip_vbsp',
+        '-game', game_folder, map_path,
+    ])
+
+
+def main(argv: list[str]) -> int:
+    """Run the benchmark."""
+    if argv[:1] == ['--worker']:
+        worker(*argv[1:])
+        return 0
+
+    def setup(parser: argparse.ArgumentParser) -> None:
+        """Add our arguments."""
+        parser.add_argument(
+            'presets', nargs='*', default=['small', 'medium'],
+            choices=[*PRESETS, 'custom'],
+            help='Maps to compile. "custom" uses the sizes specified by the options below.',
+        )
+        custom = parser.add_argument_group('custom map')
+        custom.add_argument('--size', default='8x8x4', help='Chamber size in voxels, as WxLxH.')
+        for name in ['items', 'antlines', 'fizzlers', 'glass', 'goo']:
+            custom.add_argument(f'--{name}', type=int, default=0, help=f'Number of {name} to place.')
+
+    args = parse_args('Benchmark compiling synthetic maps.', argv, setup)
+    width, length, height = map(int, args.size.split('x'))
+    presets = {
+        **PRESETS,
+        'custom': MapParams(
+            name='custom', width=width, length=length, height=height,
+            items=args.items, antlines=args.antlines, fizzlers=args.fizzlers,
+            glass=args.glass, goo=args.goo,
+        ),
+    }
+    results = Results('compiler', params={'repeat': args.repeat})
+    for preset in args.presets:
+        params = presets[preset]
+        results.params[preset] = attrs.asdict(params)
+        with tempfile.TemporaryDirectory(prefix='bee2_bench_') as temp_dir:
+            folder = Path(temp_dir)
+            map_path = write_environment(folder, params)
+            for _ in range(args.repeat):
+                for stage, duration in run_compile(folder, map_path).items():
+                    results.add(f'{preset}/{stage}', duration)
+                print('.', end='', flush=True)
+        print(f' {preset} done.')
+    return finish(args, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,136 @@
+"""Benchmark storing values in the app configuration.
+
+``ConfigSpec.store_conf()`` is called whenever an item property, window position or other option
+changes. This fills the config with a large number of item defaults and widget values, then times
+storing, fetching and discarding individual values, along with exporting the whole config.
+``map/copy`` times just the map updates, copying the dict for the changed class each time as
+``Config`` previously did, while ``map/chunked`` updates the chunked maps ``Config`` now uses.
+
+Run with ``python -m bench.config_store`` from the ``src/`` folder.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+import argparse
+import random
+import sys
+
+from config.item_defaults import ItemDefault
+from config.widgets import WidgetConfig
+from config.windows import WindowState
+import config
+
+from . import Results, finish, parse_args
+
+
+def setup_args(parser: argparse.ArgumentParser) -> None:
+    """Add the options for the config size."""
+    parser.add_argument('--ids', type=int, default=500, help='Number of IDs stored for each type.')
+    parser.add_argument('--ops', type=int, default=5000, help='Number of operations timed in each test.')
+
+
+def make_spec() -> config.ConfigSpec:
+    """Produce a blank config spec containing the types we use."""
+    spec = config.ConfigSpec()
+    classes: list[type[config.Data]] = [ItemDefault, WidgetConfig, WindowState]
+    for cls in classes:
+        spec.register(cls)
+    return spec
+
+
+def fill(spec: config.ConfigSpec, count: int) -> None:
+    """Store values for every ID."""
+    for i in range(count):
+        spec.store_conf(ItemDefault(), f'BENCH_ITEM_{i}')
+        spec.store_conf(WidgetConfig(str(i)), f'BENCH_PAK:widget_{i}')
+        spec.store_conf(WindowState(i, i), f'window_{i}')
+
+
+def dict_store(
+    data: Mapping[type[config.Data], Mapping[str, config.Data]],
+    values: list[tuple[config.Data, str]],
+) -> None:
+    """Store values in the same way as Config, copying the dict for the class each time."""
+    for value, data_id in values:
+        cls = type(value)
+        data_map = dict(data[cls])
+        data_map[data_id] = value
+        data = {**data, cls: data_map}
+
+
+def chunked_store(
+    data: Mapping[type[config.Data], config.ChunkedMap[config.Data]],
+    values: list[tuple[config.Data, str]],
+) -> None:
+    """Store values in the chunked maps, copying only the changed chunk."""
+    for value, data_id in values:
+        cls = type(value)
+        data = {**data, cls: data[cls].set(data_id, value)}
+
+
+def run(count: int, ops: int, repeat: int) -> Results:
+    """Run each test."""
+    results = Results('config_store', {'ids': count, 'ops': ops})
+    rand = random.Random(4815162342)
+    spec = make_spec()
+    fill(spec, count)
+    full = spec.get_full_conf()
+
+    values: list[tuple[config.Data, str]] = []
+    ids: list[tuple[type[config.Data], str]] = []
+    for i in range(ops):
+        num = rand.randrange(count)
+        if i % 2:
+            values.append((WidgetConfig(str(i)), f'BENCH_PAK:widget_{num}'))
+            ids.append((WidgetConfig, f'BENCH_PAK:widget_{num}'))
+        else:
+            values.append((ItemDefault(), f'BENCH_ITEM_{num}'))
+            ids.append((ItemDefault, f'BENCH_ITEM_{num}'))
+
+    def test_fill() -> None:
+        """Fill a blank config."""
+        fill(make_spec(), count)
+
+    def test_store() -> None:
+        """Update existing values."""
+        spec.merge_conf(full)
+        for value, data_id in values:
+            spec.store_conf(value, data_id)
+
+    def test_get() -> None:
+        """Fetch existing values."""
+        for cls, data_id in ids:
+            full.get(cls, data_id)
+
+    def test_discard() -> None:
+        """Discard and then restore values."""
+        spec.merge_conf(full)
+        for value, data_id in values:
+            spec.discard_conf(type(value), data_id)
+            spec.store_conf(value, data_id)
+
+    def test_export() -> None:
+        """Export the entire config."""
+        list(spec.build_kv1(full))
+
+    plain = {cls: dict(data_map) for cls, data_map in full.items()}
+    chunked = {cls: config.ChunkedMap.from_map(data_map) for cls, data_map in full.items()}
+    results.measure('fill', test_fill, repeat)
+    results.measure('store', test_store, repeat)
+    results.measure('get', test_get, repeat)
+    results.measure('discard', test_discard, repeat)
+    results.measure('export', test_export, repeat)
+    results.measure('map/copy', lambda: dict_store(plain, values), repeat)
+    results.measure('map/chunked', lambda: chunked_store(chunked, values), repeat)
+    return results
+
+
+def main(argv: list[str]) -> int:
+    """Run the benchmark."""
+    args = parse_args(__doc__.splitlines()[0], argv, setup_args)
+    config.DISABLE_WRITE = True
+    return finish(args, run(args.ids, args.ops, args.repeat))
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
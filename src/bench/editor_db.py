@@ -0,0 +1,114 @@
+"""Benchmark loading the editoritems database at compiler startup.
+
+A full set of item definitions is generated, similar in complexity to the items in the default
+packages. These are written both as the original pickled list of every item and as the indexed
+``editoritems_db`` database. ``pickle`` then loads the list and builds the ID mapping, as the
+compiler previously did. ``indexed`` loads the database, resolves instances from the summaries and
+decodes only the items placed in the map. The peak memory allocated by each is also recorded.
+
+Run with ``python -m bench.editor_db`` from the ``src/`` folder.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+import argparse
+import pickle
+import pickletools
+import random
+import sys
+import tempfile
+import tracemalloc
+
+from editoritems import Item
+from sample_data.items import build_items
+import editoritems_db
+import utils
+
+from . import Results, finish, parse_args
+
+
+def setup_args(parser: argparse.ArgumentParser) -> None:
+    """Add the options for the item counts."""
+    parser.add_argument('--items', type=int, default=400, help='Number of item definitions.')
+    parser.add_argument('--placed', type=int, default=30, help='Number of item types placed in the map.')
+
+
+def load_pickle(filename: Path) -> dict[utils.ObjectID, Item]:
+    """Load the original pickled list, as the compiler previously did."""
+    with open(filename, 'rb') as f:
+        editor_list = pickle.load(f)
+    id_to_item: dict[utils.ObjectID, Item] = {}
+    for item in editor_list:
+        if isinstance(item, Item):
+            id_to_item[item.id] = item
+        else:
+            raise ValueError(f'Invalid editor item, got: {item!r}')
+    for item in id_to_item.values():
+        # Equivalent to what instanceLocs needs.
+        for inst in item.instances:
+            str(inst.inst).casefold()
+    return id_to_item
+
+
+def load_indexed(filename: Path, placed: list[utils.ObjectID]) -> editoritems_db.ItemDatabase:
+    """Load the database, then decode only the placed items."""
+    database = editoritems_db.ItemDatabase.load(filename)
+    for summary in database.summaries():
+        for fname in summary.instances:
+            fname.casefold()
+    for item_id in placed:
+        database[item_id]
+    return database
+
+
+def peak_memory(func: Callable[[], object]) -> int:
+    """Measure the peak memory allocated while running the function, including the result."""
+    tracemalloc.start()
+    try:
+        result = func()
+        size, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def run(count: int, placed_count: int, repeat: int) -> Results:
+    """Run each test."""
+    results = Results('editor_db', {'items': count, 'placed': placed_count})
+    items = build_items(count)
+    rand = random.Random(1234)
+    placed = [item.id for item in rand.sample(items, min(placed_count, count))]
+    with tempfile.TemporaryDirectory(prefix='bee2_bench_') as temp_dir:
+        pickle_file = Path(temp_dir, 'editor_pickle.bin')
+        pickle_file.write_bytes(pickletools.optimize(pickle.dumps(items, pickle.HIGHEST_PROTOCOL)))
+        db_file = Path(temp_dir, 'editor.bin')
+        db_file.write_bytes(editoritems_db.write_database(items))
+
+        def indexed() -> None:
+            """Load the database."""
+            database = load_indexed(db_file, placed)
+            assert database.decoded == len(placed)
+
+        results.measure('pickle', lambda: load_pickle(pickle_file), repeat)
+        results.measure('indexed', indexed, repeat)
+        results.timing('pickle').extra.update(
+            bytes=pickle_file.stat().st_size,
+            peak_memory=peak_memory(lambda: load_pickle(pickle_file)),
+        )
+        results.timing('indexed').extra.update(
+            bytes=db_file.stat().st_size,
+            peak_memory=peak_memory(lambda: load_indexed(db_file, placed)),
+        )
+    return results
+
+
+def main(argv: list[str]) -> int:
+    """Run the benchmark."""
+    args = parse_args(__doc__.splitlines()[0], argv, setup_args)
+    return finish(args, run(args.items, args.placed, args.repeat))
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,80 @@
+"""Benchmark building the game filesystem at compiler startup.
+
+A synthetic game folder is generated, containing a gameinfo with a set of VPKs. For each, the
+filesystem is built and a number of materials are looked up and read, as ``texturing.setup()``
+does. ``plain`` uses ``Game.get_filesystem()`` which parses every VPK, ``cold`` uses
+``fsys_index.get_filesystem()`` without an existing index, and ``warm`` with a valid index.
+
+Run with ``python -m bench.fsys_index`` from the ``src/`` folder.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from pathlib import Path
+import argparse
+import random
+import sys
+import tempfile
+
+from srctools.filesys import FileSystemChain
+
+from sample_data.game import build_game, material_name
+import fsys_index
+
+from . import Results, finish, parse_args
+
+
+def setup_args(parser: argparse.ArgumentParser) -> None:
+    """Add the options for the game size."""
+    parser.add_argument('--files', type=int, default=20_000, help='Number of files in each VPK.')
+    parser.add_argument('--vpks', type=int, default=2, help='Number of VPKs in the game folder.')
+    parser.add_argument('--lookups', type=int, default=200, help='Number of materials looked up.')
+
+
+def lookup(fsys: FileSystemChain, names: list[str]) -> None:
+    """Look up and read materials."""
+    for name in names:
+        with fsys[name].open_str() as f:
+            f.read()
+
+
+def run(vpks: int, files: int, lookups: int, repeat: int) -> Results:
+    """Run each test."""
+    results = Results('fsys_index', {'vpks': vpks, 'files': files, 'lookups': lookups})
+    rand = random.Random(1234)
+    names = [material_name(rand.randrange(files)) for _ in range(lookups)]
+    with tempfile.TemporaryDirectory(prefix='bee2_bench_') as temp_dir:
+        root = Path(temp_dir)
+        game = build_game(root, vpks, files)
+        index_file = root / 'bin' / 'bee2' / 'fsys_index.bin'
+
+        def plain() -> None:
+            """Parse each VPK."""
+            lookup(game.get_filesystem(), names)
+
+        def indexed(cold: bool) -> Callable[[], None]:
+            """Build using the index, first removing it if cold."""
+            def func() -> None:
+                """Run the test."""
+                if cold:
+                    index_file.unlink(missing_ok=True)
+                fsys, stats = fsys_index.get_filesystem(game, index_file)
+                assert (stats.misses if cold else stats.hits) == vpks, stats
+                lookup(fsys, names)
+            return func
+
+        results.measure('plain', plain, repeat)
+        results.measure('cold', indexed(True), repeat)
+        results.measure('warm', indexed(False), repeat)
+        results.timing('warm').extra['index_bytes'] = index_file.stat().st_size
+    return results
+
+
+def main(argv: list[str]) -> int:
+    """Run the benchmark."""
+    args = parse_args(__doc__.splitlines()[0], argv, setup_args)
+    return finish(args, run(args.vpks, args.files, args.lookups, args.repeat))
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
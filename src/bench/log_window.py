@@ -0,0 +1,151 @@
+"""Benchmark sending a large stream of log messages to the log window.
+
+Messages are pushed through a multiprocessing queue using the same protocol as
+``app.logWindow.TextHandler``, then received using ``log_buffer.drain_queue()`` as the background
+process does. ``render/single`` and ``render/batched`` compare rendering each message individually
+against rendering the whole stream at once. If a display is available, ``tk/single`` and
+``tk/batched`` time inserting into an actual text widget, the first in the way the log window
+originally did.
+
+Run with ``python -m bench.log_window`` from the ``src/`` folder.
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import random
+import sys
+import threading
+
+from app.log_buffer import MAX_LINES, LogBuffer, drain_queue
+from ipc_types import ARGS_SEND_LOGGING
+
+from . import Results, finish, parse_args
+
+
+LEVELS = ['DEBUG', 'DEBUG', 'DEBUG', 'INFO', 'WARNING']
+
+
+def setup_args(parser: argparse.ArgumentParser) -> None:
+    """Add the options for the log stream."""
+    parser.add_argument('--messages', type=int, default=50_000, help='Number of messages sent.')
+
+
+def make_messages(count: int) -> list[tuple[str, str]]:
+    """Generate a set of synthetic log messages, some spanning multiple lines."""
+    rand = random.Random(1234)
+    messages = []
+    for i in range(count):
+        text = f'[{i}] exporting.items.export_editoritems(): Processed item ITEM_{rand.randrange(500)}'
+        if rand.random() < 0.05:
+            text += '\n' + '\n'.join(f'  Detail {j}' for j in range(rand.randrange(1, 5)))
+        messages.append((rand.choice(LEVELS), text))
+    return messages
+
+
+def send_receive(messages: list[tuple[str, str]]) -> None:
+    """Push the messages through a queue from another thread, while draining it here."""
+    log_queue: multiprocessing.Queue[ARGS_SEND_LOGGING] = multiprocessing.Queue()
+    buffer = LogBuffer()
+    received = 0
+
+    def count(msg: ARGS_SEND_LOGGING) -> None:
+        """Record the end marker."""
+        nonlocal received
+        received += 1
+
+    def produce() -> None:
+        """Send all messages, then a non-log message to mark the end."""
+        for level, text in messages:
+            log_queue.put_nowait(('log', level, text))
+        log_queue.put_nowait(('visible', True))
+
+    thread = threading.Thread(target=produce)
+    thread.start()
+    while not received:
+        drain_queue(log_queue, buffer, count, 0.125)
+        buffer.render(True)
+    thread.join()
+    log_queue.close()
+
+
+def render_single(messages: list[tuple[str, str]]) -> None:
+    """Render each message individually."""
+    buffer = LogBuffer()
+    for level, text in messages:
+        buffer.add(level, text)
+        buffer.render(True)
+
+
+def render_batched(messages: list[tuple[str, str]]) -> None:
+    """Render all messages at once."""
+    buffer = LogBuffer()
+    for level, text in messages:
+        buffer.add(level, text)
+    buffer.render(True)
+
+
+def measure_tk(results: Results, messages: list[tuple[str, str]], repeat: int) -> None:
+    """If a display is available, time inserting into a real text widget."""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        print('No display available, skipping Tk timings.')
+        return
+    root.withdraw()
+    text = tk.Text(root)
+    # The original implementation had no limit, so only time the first chunk.
+    messages = messages[:MAX_LINES]
+
+    def single() -> None:
+        """Insert each message in the way the window originally did."""
+        text.delete('1.0', tk.END)
+        for level, msg in messages:
+            text['state'] = 'normal'
+            firstline, *lines = msg.split('\n')
+            text.insert(tk.END, '\n', ())
+            text.insert(tk.END, firstline, (level,))
+            for line in lines:
+                text.insert(tk.END, '\n', ('INDENT',), line, (level, 'INDENT'))
+            text.see(tk.END)
+            text['state'] = 'disabled'
+        root.update()
+
+    def batched() -> None:
+        """Insert all messages at once."""
+        text['state'] = 'normal'
+        text.delete('1.0', tk.END)
+        buffer = LogBuffer()
+        for level, msg in messages:
+            buffer.add(level, msg)
+        # Alternating text and tags, but the stubs require the first to be text.
+        text.insert(tk.END, *buffer.render(False))  # type: ignore[arg-type]
+        text.see(tk.END)
+        text['state'] = 'disabled'
+        root.update()
+
+    results.measure('tk/single', single, repeat)
+    results.measure('tk/batched', batched, repeat)
+    root.destroy()
+
+
+def run(count: int, repeat: int) -> Results:
+    """Run each test."""
+    results = Results('log_window', {'messages': count})
+    messages = make_messages(count)
+    results.measure('queue', lambda: send_receive(messages), repeat)
+    results.measure('render/single', lambda: render_single(messages), repeat)
+    results.measure('render/batched', lambda: render_batched(messages), repeat)
+    measure_tk(results, messages, repeat)
+    return results
+
+
+def main(argv: list[str]) -> int:
+    """Run the benchmark."""
+    args = parse_args(__doc__.splitlines()[0], argv, setup_args)
+    return finish(args, run(args.messages, args.repeat))
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,370 @@
+"""Benchmark loading packages, the main cost of starting the app.
+
+A set of synthetic packages is generated, either as folders or zips. They are then loaded the same
+way ``app.lifecycle`` does, but without any UI. The wall time of each phase is recorded, along with
+the time tasks spent running for each object type using the ``trio_debug.Tracer`` instrument.
+Image loading is not included, since that requires a UI toolkit to be running.
+The number of translation tokens parsed and how many were shared is also recorded, along with
+an estimate of the memory that saved.
+
+Run with ``python -m bench.packages`` from the ``src/`` folder.
+"""
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from pathlib import Path
+import argparse
+import io
+import sys
+import tempfile
+import time
+import zipfile
+
+from babel.messages.catalog import Catalog
+from babel.messages.mofile import write_mo
+from srctools import VMF, Keyvalues
+import attrs
+import srctools.logger
+import trio
+
+from app import localisation
+from app.errors import ErrorUI, Result, console_handler
+from trio_debug import Tracer
+import packages
+import transtoken
+
+from . import Results, finish, parse_args
+
+
+LOGGER = srctools.logger.get_logger(__name__)
+STYLE_ID = 'BEE2_CLEAN'
+# Used to estimate the size of tokens.
+TOKEN_SAMPLE = transtoken.TransToken.untranslated('Sample text')
+# Files are either text or binary.
+type PackFiles = dict[str, str | bytes]
+
+
+@attrs.frozen(kw_only=True)
+class PackParams:
+    """The contents of each generated package."""
+    packages: int
+    items: int
+    stylevars: int
+    skyboxes: int
+    templates: int
+    zipped: bool
+    translations: bool
+
+    @property
+    def objects(self) -> int:
+        """The number of objects defined in the generated packages."""
+        return self.packages * (self.items + self.stylevars + self.skyboxes)
+
+
+class PhaseTracer(Tracer):
+    """Additionally total up the time tasks spent running, categorised by what they're parsing."""
+    def __init__(self) -> None:
+        super().__init__()
+        self.category: dict[trio.lowlevel.Task, str] = {}
+        self.totals: dict[str, float] = defaultdict(float)
+        self.counts: Counter[str] = Counter()
+
+    def task_spawned(self, task: trio.lowlevel.Task) -> None:
+        """Decide the category when spawned, since the arguments are discarded later."""
+        super().task_spawned(task)
+        args = self.args.get(task, {})
+        func = self._get_coro(task).cr_code.co_name
+        match func:
+            case 'parse_object' | 'parse_type':
+                obj_class = args['obj_class']
+                assert isinstance(obj_class, type), obj_class
+                kind = 'objects' if func == 'parse_object' else 'post_parse'
+                self.category[task] = f'{kind}/{obj_class.__name__}'
+            case 'parse_package':
+                self.category[task] = 'packages'
+            case 'parse_template' | 'find_temp':
+                self.category[task] = 'templates'
+            case 'package_lang' | 'game_lang':
+                self.category[task] = 'localisation'
+
+    def task_finished(self, task: trio.lowlevel.Task, elapsed: float) -> None:
+        """Add the time to the total for this category."""
+        try:
+            category = self.category.pop(task)
+        except KeyError:
+            return
+        self.totals[category] += elapsed
+        self.counts[category] += 1
+
+
+def build_info(pak_id: str, name: str, objects: Iterable[Keyvalues]) -> str:
+    """Produce an info.txt file."""
+    kv = Keyvalues.root(
+        Keyvalues('ID', pak_id),
+        Keyvalues('Name', name),
+        Keyvalues('Desc', f'Generated package "{name}", for benchmarking.'),
+        *objects,
+    )
+    return ''.join(kv.export())
+
+
+def build_template(temp_id: str) -> str:
+    """Produce a simple template file."""
+    vmf = VMF()
+    vmf.create_ent('bee2_template_conf', template_id=temp_id, temp_type='default')
+    vmf.add_brush(vmf.make_prism(
+        srctools.Vec(-64, -64, -64),
+        srctools.Vec(64, 64, 64),
+        'tools/toolsnodraw',
+    ).solid)
+    with io.StringIO() as f:
+        vmf.export(f)
+        return f.getvalue()
+
+
+def build_translations(names: Iterable[str]) -> bytes:
+    """Produce a compiled translation file, which translates the object names."""
+    catalog = Catalog(locale='en')
+    for name in names:
+        catalog.add(name, name.upper())
+    with io.BytesIO() as f:
+        write_mo(f, catalog)
+        return f.getvalue()
+
+
+def core_packages() -> Iterator[tuple[str, PackFiles]]:
+    """Produce the packages which are required to be present."""
+    yield 'BEE2_CORE', {
+        'info.txt': build_info('BEE2_CORE', 'Core', []),
+    }
+    yield 'BEE2_CLEAN_STYLE', {
+        'info.txt': build_info('BEE2_CLEAN_STYLE', 'Clean Style', [
+            Keyvalues('Style', [
+                Keyvalues('ID', STYLE_ID),
+                Keyvalues('Name', 'Clean'),
+                Keyvalues('Folder', 'clean'),
+                Keyvalues('Description', 'The clean style.'),
+            ]),
+        ]),
+        'styles/clean/items.txt': '',
+        'styles/clean/vbsp_config.cfg': '',
+    }
+
+
+def bench_package(index: int, params: PackParams) -> tuple[str, PackFiles]:
+    """Produce one of the generated packages."""
+    pak_id = f'BENCH_PAK_{index}'
+    files: PackFiles = {}
+    objects: list[Keyvalues] = []
+    names: list[str] = []
+
+    for i in range(params.items):
+        item_id = f'BENCH_ITEM_{index}_{i}'
+        folder = f'bench_{index}_{i}'
+        name = f'Bench Item {index}-{i}'
+        names.append(name)
+        objects.append(Keyvalues('Item', [
+            Keyvalues('ID', item_id),
+            Keyvalues('Version', [
+                Keyvalues('Styles', [Keyvalues(STYLE_ID, folder)]),
+            ]),
+        ]))
+        files[f'items/{folder}/editoritems.txt'] = f'''\
+"Item"
+	{{
+	"Type" "{item_id}"
+	"ItemClass" "ItemBase"
+	"Editor"
+		{{
+		"SubType"
+			{{
+			"Name" "{name}"
+			"Model" {{ "ModelName" "bench/item_{index}_{i}.mdl" }}
+			"Palette"
+				{{
+				"Tooltip" "{name.upper()}"
+				"Image" "palette/bench/item_{index}_{i}.png"
+				"Position" "{i % 4} {i // 4} 0"
+				}}
+			}}
+		"MovementHandle" "HANDLE_4_DIRECTIONS"
+		}}
+	"Exporting"
+		{{
+		"Instances" {{ "0" {{ "Name" "instances/bench/item_{index}_{i}.vmf" }} }}
+		"TargetName" "bench"
+		"Offset" "64 64 64"
+		"OccupiedVoxels" {{ "Voxel" {{ "Pos" "0 0 0" }} }}
+		}}
+	}}
+'''
+        files[f'items/{folder}/properties.txt'] = f'''\
+"Properties"
+	{{
+	"Authors" "Benchmark"
+	"Description" "The generated item {name}."
+	"Icon" {{ "0" "bench/item_{index}_{i}.png" }}
+	}}
+'''
+
+    for i in range(params.stylevars):
+        name = f'Bench StyleVar {index}-{i}'
+        names.append(name)
+        objects.append(Keyvalues('StyleVar', [
+            Keyvalues('ID', f'BenchVar_{index}_{i}'),
+            Keyvalues('Name', name),
+            Keyvalues('Style', STYLE_ID),
+            Keyvalues('Description', 'A generated stylevar.'),
+        ]))
+
+    for i in range(params.skyboxes):
+        name = f'Bench Skybox {index}-{i}'
+        names.append(name)
+        objects.append(Keyvalues('Skybox', [
+            Keyvalues('ID', f'BENCH_SKY_{index}_{i}'),
+            Keyvalues('Name', name),
+            Keyvalues('Material', f'bench/sky_{i}'),
+            Keyvalues('Description', 'A generated skybox.'),
+        ]))
+
+    for i in range(params.templates):
+        files[f'templates/bench_{i}.vmf'] = build_template(f'BENCH_TEMPLATE_{index}_{i}')
+
+    if params.translations:
+        files['resources/i18n/en.mo'] = build_translations(names)
+
+    files['info.txt'] = build_info(pak_id, f'Benchmark Package {index}', objects)
+    return pak_id, files
+
+
+def write_package(folder: Path, pak_id: str, files: PackFiles, zipped: bool) -> None:
+    """Write out a package, either as a zip or folder."""
+    if zipped:
+        with zipfile.ZipFile(folder / f'{pak_id.casefold()}.bee_pack', 'w') as zipf:
+            for filename, data in files.items():
+                zipf.writestr(filename, data)
+    else:
+        for filename, data in files.items():
+            path = folder / pak_id.casefold() / filename
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(data, str):
+                path.write_text(data, encoding='utf8')
+            else:
+                path.write_bytes(data)
+
+
+def generate(folder: Path, params: PackParams) -> None:
+    """Write out all the packages."""
+    for pak_id, files in core_packages():
+        write_package(folder, pak_id, files, params.zipped)
+    for i in range(params.packages):
+        pak_id, files = bench_package(i, params)
+        write_package(folder, pak_id, files, params.zipped)
+
+
+async def load(pak_dir: Path, results: Results) -> packages.PackagesSet:
+    """Load the packages in the same way as the app does, timing each phase."""
+    async def timed(name: str, func: Callable[..., Awaitable[object]], *args: object) -> None:
+        """Run a load function, recording how long it took."""
+        start = time.perf_counter()
+        await func(*args)
+        results.add(f'phase/{name}', time.perf_counter() - start)
+
+    packset = packages.PackagesSet()
+    start = time.perf_counter()
+    async with ErrorUI() as error_ui:
+        # noinspection PyProtectedMember
+        await timed('load_packages', packages._load_packages, packset, [pak_dir], error_ui)
+        async with trio.open_nursery() as nursery:
+            # noinspection PyProtectedMember
+            nursery.start_soon(timed, 'load_objects', packages._load_objects, packset, error_ui)
+            # noinspection PyProtectedMember
+            nursery.start_soon(timed, 'load_templates', packages._load_templates, packset)
+    if error_ui.result is not Result.SUCCEEDED:
+        raise ValueError(f'Loading packages failed: {error_ui.result}')
+    for pack_cls in packages.OBJ_TYPES.values():
+        await packset.ready(pack_cls).wait()
+    await timed('localisation', localisation.load_aux_langs, [], packset, localisation.Language(lang_code='en', trans={}))
+    results.add('total', time.perf_counter() - start)
+    return packset
+
+
+def run(params: PackParams, repeat: int) -> Results:
+    """Generate the packages, then load them repeatedly."""
+    results = Results('packages', attrs.asdict(params))
+    with tempfile.TemporaryDirectory(prefix='bee_bench_') as temp_dir:
+        pak_dir = Path(temp_dir)
+        generate(pak_dir, params)
+
+        requested = 0
+        for _ in range(repeat):
+            tracer = PhaseTracer()
+            requested = transtoken.intern_stats()[0]
+            with ErrorUI.install_handler(console_handler):
+                packset = trio.run(load, pak_dir, results, instruments=[tracer])
+            for category, elapsed in sorted(tracer.totals.items()):
+                timing = results.timing(f'tasks/{category}')
+                timing.samples.append(elapsed)
+                timing.extra['tasks'] = tracer.counts[category]
+
+    # Tokens from the last run are still alive, since packset is.
+    total_requests, unique = transtoken.intern_stats()
+    shared = total_requests - requested - unique
+    counts = {
+        obj_type.__name__: len(objs)
+        for obj_type, objs in packset.objects.items()
+        if objs
+    }
+    results.timing('total').extra.update(
+        objects=sum(counts.values()),
+        templates=len(packset.templates),
+        packages=len(packset.packages),
+        object_counts=counts,
+        tokens_parsed=total_requests - requested,
+        tokens_unique=unique,
+        # Each shared token avoids an instance, plus the copy of the text.
+        tokens_saved_bytes=max(0, shared) * (
+            sys.getsizeof(TOKEN_SAMPLE) + sys.getsizeof(TOKEN_SAMPLE.token)
+        ),
+    )
+    return results
+
+
+def setup_args(parser: argparse.ArgumentParser) -> None:
+    """Add the options for the generated packages."""
+    group = parser.add_argument_group('generated packages')
+    group.add_argument('-k', '--packages', type=int, default=8, help='Number of packages to generate.')
+    group.add_argument('--items', type=int, default=20, help='Number of items in each package.')
+    group.add_argument('--stylevars', type=int, default=10, help='Number of stylevars in each package.')
+    group.add_argument('--skyboxes', type=int, default=5, help='Number of skyboxes in each package.')
+    group.add_argument('--templates', type=int, default=10, help='Number of templates in each package.')
+    group.add_argument(
+        '--zip', action='store_true',
+        help='Write the packages as zip files, instead of folders.',
+    )
+    group.add_argument(
+        '--no-translations', dest='translations', action='store_false',
+        help="Don't include translation files in each package.",
+    )
+
+
+def main(argv: list[str]) -> int:
+    """Run the benchmark."""
+    args = parse_args(__doc__.splitlines()[0], argv, setup_args)
+    srctools.logger.init_logging(main_logger=__name__)
+    params = PackParams(
+        packages=args.packages,
+        items=args.items,
+        stylevars=args.stylevars,
+        skyboxes=args.skyboxes,
+        templates=args.templates,
+        zipped=args.zip,
+        translations=args.translations,
+    )
+    LOGGER.info('Generating {} packages with {} objects...', params.packages, params.objects)
+    return finish(args, run(params, args.repeat))
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
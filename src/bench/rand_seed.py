@@ -0,0 +1,126 @@
+"""Benchmark deriving seeded random generators with ``precomp.rand.seed()``.
+
+Calls are made with the kinds of arguments the compiler uses - a name followed by instances,
+positions, angles and strings. ``seed/<kind>`` times the current implementation, ``original/<kind>``
+a copy of the implementation before prefixes were cached and values were encoded in a batch.
+
+Run with ``python -m bench.rand_seed`` from the ``src/`` folder.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from random import Random
+import argparse
+import functools
+import random
+import sys
+
+from srctools import VMF, Angle, Entity, FrozenAngle, FrozenMatrix, FrozenVec, Matrix, Vec
+
+from precomp import rand
+
+from . import Results, finish, parse_args
+
+
+NAMES = [b'tile', b'temp', b'rand_res', b'antline', b'tex_rand']
+
+
+def setup_args(parser: argparse.ArgumentParser) -> None:
+    """Add the options for the number of calls."""
+    parser.add_argument('--calls', type=int, default=20_000, help='Number of seeds derived in each test.')
+
+
+def seed_original(name: bytes, *values: object) -> Random:
+    """The implementation of seed() before it was optimised."""
+    algo = rand.MAP_HASH.copy()
+    algo.update(name)
+    for val in values:
+        match val:
+            case str():
+                algo.update(val.encode('utf8'))
+            case Vec() | FrozenVec() | Angle() | FrozenAngle():
+                a, b, c = val
+                algo.update(rand.THREE_FLOATS.pack(round(a, 6), round(b, 6), round(c, 6)))
+            case float():
+                algo.update(rand.ONE_FLOAT.pack(val))
+            case int():
+                algo.update(rand.ONE_INT.pack(hash(val)))
+            case Matrix() | FrozenMatrix():
+                algo.update(rand.NINE_FLOATS.pack(
+                    val[0, 0], val[0, 1], val[0, 2],
+                    val[1, 0], val[1, 1], val[1, 2],
+                    val[2, 0], val[2, 1], val[2, 2],
+                ))
+            case Entity():
+                algo.update(val['targetname'].encode('ascii', 'replace'))
+                x, y, z = round(Vec.from_str(val['origin']), 6)
+                algo.update(rand.THREE_FLOATS.pack(x, y, z))
+                p, y, r = Vec.from_str(val['origin'])
+                algo.update(rand.THREE_FLOATS.pack(round(p, 6), round(y, 6), round(r, 6)))
+            case _:
+                algo.update(val)  # type: ignore[arg-type]
+    return Random(int.from_bytes(algo.digest(), 'little'))
+
+
+def make_calls(count: int) -> dict[str, list[tuple[bytes, tuple[object, ...]]]]:
+    """Generate the arguments for each kind of call."""
+    rng = random.Random(1234)
+    vmf = VMF()
+
+    def pos() -> Vec:
+        """Positions are usually on the grid, sometimes offset."""
+        vec = Vec(rng.randrange(-64, 64), rng.randrange(-64, 64), rng.randrange(-64, 64)) * 16
+        if rng.random() < 0.1:
+            vec.x += 0.25
+        return vec
+
+    insts = [
+        vmf.create_ent(
+            'func_instance',
+            targetname=f'inst_{i}',
+            origin=str(pos()),
+            angles=str(Angle(0, rng.choice([0, 90, 180, 270]), 0)),
+        )
+        for i in range(200)
+    ]
+    calls: dict[str, list[tuple[bytes, tuple[object, ...]]]] = {
+        'name': [], 'inst': [], 'vec': [], 'mixed': [],
+    }
+    for _ in range(count):
+        name = rng.choice(NAMES)
+        calls['name'].append((name, ()))
+        calls['inst'].append((name, (rng.choice(insts), '')))
+        calls['vec'].append((name, (pos(), pos())))
+        calls['mixed'].append((name, (
+            'TEMPLATE_ID', pos(), Matrix.from_yaw(rng.choice([0, 90, 180, 270])), 0.5,
+        )))
+    return calls
+
+
+def run_calls(func: Callable[..., Random], calls: list[tuple[bytes, tuple[object, ...]]]) -> None:
+    """Seed a generator for each set of arguments."""
+    for name, values in calls:
+        func(name, *values)
+
+
+def run(count: int, repeat: int) -> Results:
+    """Run each test."""
+    results = Results('rand_seed', {'calls': count})
+    rand.MAP_HASH.update(b'benchmark')
+    rand._PREFIXES.clear()
+    for kind, calls in make_calls(count).items():
+        for name, values in calls:
+            assert seed_original(name, *values).getstate() == rand.seed(name, *values).getstate()  # type: ignore[arg-type]
+        results.measure(f'seed/{kind}', functools.partial(run_calls, rand.seed, calls), repeat)
+        results.measure(f'original/{kind}', functools.partial(run_calls, seed_original, calls), repeat)
+    return results
+
+
+def main(argv: list[str]) -> int:
+    """Run the benchmark."""
+    args = parse_args(__doc__.splitlines()[0], argv, setup_args)
+    return finish(args, run(args.calls, args.repeat))
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,133 @@
+"""Benchmark rebuilding and laying out selector windows with a large number of items.
+
+A headless selector window is constructed, where each UI operation simply records the call. It
+is given a set of synthetic items spread over several groups, similar to large music or style
+package sets. ``rebuild`` times ``_rebuild_items()`` building the items from scratch, while
+``reload`` is reloading equal items and ``reload/changed`` alters one item, as when packages are
+reloaded. ``reposition`` lays out
+the window and assigns buttons to the visible rows, while ``scroll`` repositions at every row of
+the window, reusing the pooled buttons. ``all`` assigns a button to every item, as the window
+previously did when rebuilding. ``index`` builds the sort order and group index,
+``set_disp`` times updating the display textbox, ``open`` opens and lays out the window, and
+``navigate`` moves through every item with the arrow keys.
+
+Run with ``python -m bench.selector_win`` from the ``src/`` folder.
+"""
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+import argparse
+import sys
+
+import attrs
+import trio
+
+from app.selector_win import NavKeys, SelectorIndex
+from packages import PackagesSet
+from sample_data.selector_win import METRICS, build_items, make_window
+import utils
+
+from . import Results, finish, parse_args
+
+
+def setup_args(parser: argparse.ArgumentParser) -> None:
+    """Add the options for the item counts."""
+    parser.add_argument('--items', type=int, default=5000, help='Number of items.')
+    parser.add_argument('--groups', type=int, default=20, help='Number of groups.')
+
+
+def run_async(func: Callable[[], Awaitable[object]]) -> Callable[[], None]:
+    """Wrap an async function to run it in Trio."""
+    def wrapper() -> None:
+        """Run the function."""
+        trio.run(func)
+    return wrapper
+
+
+def run(count: int, groups: int, repeat: int) -> Results:
+    """Run each test."""
+    results = Results('selector_win', {'items': count, 'groups': groups})
+    items = build_items(count, groups)
+    win = make_window(items)
+
+    async def rebuild() -> None:
+        """Rebuild the window from scratch."""
+        win._index = SelectorIndex({})
+        win.group_widgets.clear()
+        await win._rebuild_items(PackagesSet.blank())
+
+    # Reloading packages produces new data objects, which are equal to the originals.
+    reloaded = [build_items(count, groups), dict(items)]
+
+    async def reload() -> None:
+        """Reload equal data."""
+        reloaded.reverse()
+        items.update(reloaded[0])
+        await win._rebuild_items(PackagesSet.blank())
+
+    changed_id = utils.special_id(f'BENCH_ITEM_{count // 2}')
+    original = items[changed_id]
+
+    async def reload_changed() -> None:
+        """Reload, with one item moved to the end of its group."""
+        if items[changed_id] == original:
+            items[changed_id] = attrs.evolve(original, sort_key='999999')
+        else:
+            items[changed_id] = original
+        await win._rebuild_items(PackagesSet.blank())
+
+    async def open_win() -> None:
+        """Open the window, lay it out then close it again."""
+        win.open_win()
+        await win._ui_reposition_items()
+        win.exit()
+
+    def navigate() -> None:
+        """Move through every item using the arrow keys, then jump back to the start."""
+        win.sel_item(win.item_list[0])
+        for _ in range(count):
+            win.key_navigate(NavKeys.RIGHT)
+        for _ in range(count // win.column_count):
+            win.key_navigate(NavKeys.UP)
+        win.key_navigate(NavKeys.HOME)
+
+    async def scroll() -> None:
+        """Scroll through the whole window, one row at a time."""
+        assert win._layout is not None
+        for top in range(0, win._layout.height, METRICS.item_height):
+            win.view_top = top
+            await win._ui_reposition_items()
+        win.view_top = 0
+
+    async def assign_all() -> None:
+        """Assign a button to every item."""
+        layout = win._update_layout()
+        win._assign_buttons(0, layout.height)
+        win._release_buttons()
+
+    results.measure('index', lambda: SelectorIndex(dict(items)), repeat)
+    results.measure('rebuild', run_async(rebuild), repeat)
+    results.measure('reload', run_async(reload), repeat)
+    results.measure('reload/changed', run_async(reload_changed), repeat)
+    results.measure('reposition', run_async(win._ui_reposition_items), repeat)
+    results.timing('reposition').extra['buttons'] = win.buttons_created
+    results.measure('scroll', run_async(scroll), repeat)
+    results.timing('scroll').extra['buttons'] = win.buttons_created
+    results.measure('all', run_async(assign_all), repeat)
+    results.timing('all').extra['buttons'] = win.buttons_created
+    win._loading = False
+    results.measure('set_disp', win.set_disp, repeat)
+    results.measure('open', run_async(open_win), repeat)
+    results.measure('navigate', navigate, repeat)
+    results.timing('navigate').extra['keys'] = count + count // win.column_count + 1
+    return results
+
+
+def main(argv: list[str]) -> int:
+    """Run the benchmark."""
+    args = parse_args(__doc__.splitlines()[0], argv, setup_args)
+    return finish(args, run(args.items, args.groups, args.repeat))
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -20,6 +20,7 @@ from PIL import ImageTk
 
 from ui_tk import TK_ROOT, tk_tools
 from app import img
+from app.log_buffer import MAX_LINES, LogBuffer, drain_queue
 from ipc_types import (
     ScreenID, StageID,
     ARGS_SEND_LOAD, ARGS_REPLY_LOAD, ARGS_SEND_LOGGING,  ARGS_REPLY_LOGGING,
@@ -31,6 +32,7 @@ import utils
 SCREENS: dict[ScreenID, LoadScreen | SplashScreen] = {}
 QUEUE_REPLY_LOAD: multiprocessing.Queue[ARGS_REPLY_LOAD]
 TIMEOUT = 0.125  # New iteration if we take more than this long.
+FRAME_TIME = 16  # While busy, delay in ms before checking the queues again.
 
 # Stores translated strings, which are done in the main process.
 TRANSLATION = {
@@ -654,6 +656,7 @@ class LogWindow:
         window.withdraw()
 
         self.has_text = False
+        self.buffer = LogBuffer()
         self.text = tk.Text(
             window,
             name='text_box',
@@ -757,24 +760,21 @@ class LogWindow:
 
     def log(self, level_name: str, text: str) -> None:
         """Write a log message to the window."""
+        self.buffer.add(level_name, text)
+        self.flush()
+
+    def flush(self) -> None:
+        """Write all pending log messages to the window, then trim old lines."""
+        if not self.buffer:
+            return
+        args = self.buffer.render(self.has_text)
         self.text['state'] = "normal"
-        # We don't want to indent the first line.
-        firstline, *lines = text.split('\n')
-
-        if self.has_text:
-            # Add a newline to the existing text, since we don't end with it.
-            self.text.insert(tk.END, '\n', ())
-
-        self.text.insert(tk.END, firstline, (level_name,))
-        for line in lines:
-            self.text.insert(
-                tk.END,
-                '\n',
-                ('INDENT',),
-                line,
-                # Indent lines after the first.
-                (level_name, 'INDENT'),
-            )
+        # Alternating text and tags, but the stubs require the first to be text.
+        self.text.insert(tk.END, *args)  # type: ignore[arg-type]
+        # Only keep the most recent lines.
+        line_count = int(self.text.index('end-1c').partition('.')[0])
+        if line_count > MAX_LINES:
+            self.text.delete(START, f'{line_count - MAX_LINES + 1}.0')
         self.text.see(tk.END)  # Scroll to the end
         self.text['state'] = "disabled"
         self.has_text = True
@@ -815,6 +815,7 @@ class LogWindow:
             case ['log', str() as level, str() as message]:
                 self.log(level, message)
             case ['visible', bool() as visible]:
+                self.flush()
                 if visible:
                     self.win.deiconify()
                 else:
@@ -912,18 +913,10 @@ def run_background(
                     cur_time = time.monotonic()
                     break
                 force_ontop = handle_load_cmd(op, log_window, force_ontop)
-            while True:  # Pop off all the values.
-                try:
-                    rec_args = queue_rec_log.get_nowait()
-                except queue.Empty:
-                    break
-                except ValueError as exc:
-                    raise BrokenPipeError from exc
-                if time.monotonic() - cur_time > TIMEOUT:
-                    break
-
+            # Collect all the logs, then render them in one batch.
+            if drain_queue(queue_rec_log, log_window.buffer, log_window.handle, TIMEOUT):
                 had_values = True
-                log_window.handle(rec_args)
+            log_window.flush()
 
         except BrokenPipeError:
             # A pipe failed, means the main app quit. Terminate ourselves.
@@ -934,7 +927,7 @@ def run_background(
         # Continually re-run this function in the TK loop.
         # If we didn't find anything in the queues, wait longer.
         # Otherwise, we hog the CPU.
-        TK_ROOT.after(1 if had_values else 200, check_queue)
+        TK_ROOT.after(FRAME_TIME if had_values else 200, check_queue)
 
     TK_ROOT.after(10, check_queue)
     TK_ROOT.mainloop()  # Infinite loop, until the entire process tree quits.
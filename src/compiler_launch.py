@@ -29,6 +29,9 @@ if app_name == 'vrad' and '--errorserver' in sys.argv:
 
 from srctools.logger import init_logging
 LOGGER = init_logging(f'bee2/{app_name}.log')
+
+import log_stats
+log_stats.install_from_env(f'bee2/{app_name}.log')
 LOGGER.info('Arguments: {}', sys.argv)
 
 import utils
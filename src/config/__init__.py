@@ -12,6 +12,7 @@ import datetime
 import abc
 import contextlib
 import os
+import threading
 
 from srctools import AtomicWriter, EmptyMapping, KeyValError, Keyvalues, logger
 from srctools.dmx import Element, ValueType as DMXTypes
@@ -32,6 +33,10 @@ DMX_NAME = 'BEEConfig'
 DMX_VERSION = 1
 # For tests or other reasons, allow globally disabling saving.
 DISABLE_WRITE: bool = False
+# When saving in the background, wait this long after a change so more changes can be written together.
+WRITE_DELAY = 2.0
+# The maximum number of IDs stored in each chunk of a ChunkedMap.
+CHUNK_SIZE = 32
 
 
 @attrs.define
@@ -184,13 +189,113 @@ class Data(abc.ABC):
         return Element.from_kv1(self.export_kv1())
 
 
+class ChunkedMap[D: Data](Mapping[str, D]):
+    """An immutable mapping of IDs to data, split into chunks of CHUNK_SIZE values.
+
+    Replacing the value for an existing ID only copies the chunk containing it, sharing the
+    rest with the original. Adding or removing IDs copies the index of IDs, like copying a dict.
+    Iteration is in insertion order, like a dict.
+    """
+    __slots__ = ['_chunks', '_index']
+    # ID -> position of the chunk containing it. In insertion order.
+    _index: dict[str, int]
+    _chunks: tuple[dict[str, D], ...]
+
+    def __init__(self, index: dict[str, int], chunks: tuple[dict[str, D], ...]) -> None:
+        """Neither the index nor the chunks can be modified after this is constructed."""
+        self._index = index
+        self._chunks = chunks
+
+    @classmethod
+    def from_map(cls, data: Mapping[str, D]) -> ChunkedMap[D]:
+        """Build from another mapping, reusing it if it's already chunked."""
+        if isinstance(data, ChunkedMap):
+            return data
+        index: dict[str, int] = {}
+        chunks: list[dict[str, D]] = []
+        for ind, (data_id, value) in enumerate(data.items()):
+            if ind % CHUNK_SIZE == 0:
+                chunks.append({})
+            chunks[-1][data_id] = value
+            index[data_id] = len(chunks) - 1
+        return cls(index, tuple(chunks))
+
+    @override
+    def __getitem__(self, data_id: str, /) -> D:
+        return self._chunks[self._index[data_id]][data_id]
+
+    @override
+    def __contains__(self, data_id: object, /) -> bool:
+        return data_id in self._index
+
+    @override
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    @override
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @override
+    def __repr__(self) -> str:
+        return f'ChunkedMap({dict(self.items())!r})'
+
+    def set(self, data_id: str, value: D) -> ChunkedMap[D]:
+        """Return a copy with the value for this ID replaced.
+
+        If an equal value is already present, this is returned unchanged.
+        """
+        try:
+            chunk_ind = self._index[data_id]
+        except KeyError:
+            # A new ID, append to the last chunk if it has room.
+            chunks = list(self._chunks)
+            if chunks and len(chunks[-1]) < CHUNK_SIZE:
+                chunks[-1] = {**chunks[-1], data_id: value}
+            else:
+                chunks.append({data_id: value})
+            index = self._index.copy()
+            index[data_id] = len(chunks) - 1
+            return ChunkedMap(index, tuple(chunks))
+        chunk = self._chunks[chunk_ind]
+        if chunk[data_id] == value:
+            return self
+        chunks = list(self._chunks)
+        chunks[chunk_ind] = {**chunk, data_id: value}
+        return ChunkedMap(self._index, tuple(chunks))
+
+    def discard(self, data_id: str) -> tuple[ChunkedMap[D], D]:
+        """Return a copy with this ID removed, and the value removed.
+
+        :raises KeyError: if not present.
+        """
+        chunk_ind = self._index[data_id]
+        index = self._index.copy()
+        del index[data_id]
+        chunk = self._chunks[chunk_ind].copy()
+        value = chunk.pop(data_id)
+        chunks = list(self._chunks)
+        chunks[chunk_ind] = chunk
+        return ChunkedMap(index, tuple(chunks)), value
+
+
+def _conv_data(data: Mapping[type[Data], Mapping[str, Data]]) -> dict[type[Data], ChunkedMap[Data]]:
+    """Convert the data passed to Config(), so each class is chunked."""
+    return {
+        cls: ChunkedMap.from_map(data_map)
+        for cls, data_map in data.items()
+    }
+
+
 @attrs.frozen(repr=False)
 class Config:
     """The current data loaded from the config file.
 
     This maps an ID to each value, or is {'': data} if no key is used.
+    The values for each class are stored in a ChunkedMap, so updating a value only copies the
+    small chunk containing it. Everything else is shared with the original config.
     """
-    _data: Mapping[type[Data], Mapping[str, Data]] = attrs.Factory(dict)
+    _data: Mapping[type[Data], ChunkedMap[Data]] = attrs.field(converter=_conv_data, factory=dict)
 
     def __repr__(self) -> str:
         vals = ', '.join([
@@ -201,10 +306,7 @@ class Config:
 
     def copy(self) -> Config:
         """Copy the config, assuming values are immutable."""
-        return Config({
-            cls: dict(data_map)
-            for cls, data_map in self._data.items()
-        })
+        return Config(dict(self._data))
 
     def is_blank(self) -> bool:
         """Check if we have any values assigned."""
@@ -222,26 +324,31 @@ class Config:
         info = cls.get_conf_info()
         if data_id and not info.uses_id:
             raise ValueError(f'Data type "{info.name}" does not support IDs!')
-        data_map = cast('dict[str, D]', self._data[cls])
+        data_map = cast('ChunkedMap[D]', self._data[cls])
         return data_map[data_id]
 
     def with_value(self, data: Data, data_id: str = '') -> Config:
-        """Return a copy of the config with the data stored under the specified ID."""
+        """Return a copy of the config with the data stored under the specified ID.
+
+        If an equal value is already stored, this config is returned, so callers can check
+        whether anything changed with an identity comparison.
+        """
         cls = type(data)
         info = cls.get_conf_info()
 
         if data_id and not info.uses_id:
             raise ValueError(f'Data type "{info.name}" does not support IDs!')
-        LOGGER.debug('Storing conf {}[{}] = {!r}', info.name, data_id, data)
         try:
-            data_map = dict(self._data[cls])
+            data_map = self._data[cls]
         except KeyError:
-            data_map = {data_id: data}
-        else:
-            data_map[data_id] = data
+            data_map = ChunkedMap({}, ())
+        new_map = data_map.set(data_id, data)
+        if new_map is data_map:
+            return self
+        LOGGER.debug('Storing conf {}[{}] = {!r}', info.name, data_id, data)
         return Config({
             **self._data,
-            cls: data_map,
+            cls: new_map,
         })
 
     def with_cls_map[D: Data](self, cls: type[D], data_map: Mapping[str, D]) -> Config:
@@ -255,8 +362,7 @@ class Config:
         """Remove the specified data ID, returning the value or None if not present."""
         try:
             # If cls or data_id is not present, raises.
-            data_map = dict(self._data[cls])
-            popped = cast(D, data_map.pop(data_id))
+            data_map, popped = self._data[cls].discard(data_id)
         except KeyError:
             return self, None
 
@@ -267,7 +373,7 @@ class Config:
         else:
             # Last ID for this class, remove entirely.
             del copy[cls]
-        return Config(copy), popped
+        return Config(copy), cast(D, popped)
 
     def classes(self) -> KeysView[type[Data]]:
         """Return a view over the types present in the config."""
@@ -279,7 +385,7 @@ class Config:
 
     def items_cls[D: Data](self, cls: type[D]) -> ItemsView[str, D]:
         """Return a view over the items for a specific class."""
-        data_map = cast('dict[str, D]', self._data[cls])
+        data_map = cast('ChunkedMap[D]', self._data[cls])
         return data_map.items()
 
 
@@ -302,6 +408,16 @@ class ConfigSpec:
     # When parsing, stash any too-new section names here, for later printing.
     extra_sections: VersionMismatchList = attrs.field(init=False, factory=list)
 
+    # Types which have changed since the config was last written.
+    _dirty: set[type[Data]] = attrs.field(init=False, factory=set, repr=False)
+    # Incremented for every change, so we can tell if a write is out of date.
+    _generation: int = attrs.field(init=False, default=0, repr=False)
+    _written_generation: int = attrs.field(init=False, default=0, repr=False)
+    # Set whenever a change is made, to wake up the background writer.
+    _changed: trio.Event = attrs.field(init=False, factory=trio.Event, repr=False)
+    # Held while the file is being written, since both a background thread and the main thread can.
+    _write_lock: threading.Lock = attrs.field(init=False, factory=threading.Lock, repr=False)
+
     def datatype_for_name(self, name: str) -> type[Data]:
         """Lookup the data type for a specific name."""
         return self._name_to_type[name.casefold()]
@@ -424,6 +540,7 @@ class ConfigSpec:
             if cls not in self._registered:
                 continue
             self._current = self._current.with_cls_map(cls, opt_map)
+            self._mark_dirty(cls)
 
     async def apply_multi(self, config: Config) -> None:
         """Merge the values into our config, then apply the changed types.
@@ -499,7 +616,10 @@ class ConfigSpec:
         """Update the current data for this ID. """
         if type(data) not in self._registered:
             raise ValueError(f'Unregistered data type {type(data)!r}')
-        self._current = self._current.with_value(data, data_id)
+        new_conf = self._current.with_value(data, data_id)
+        if new_conf is not self._current:
+            self._current = new_conf
+            self._mark_dirty(type(data))
 
     def discard_conf(self, cls: type[Data], data_id: str = '') -> None:
         """Remove the specified ID."""
@@ -513,6 +633,18 @@ class ConfigSpec:
         if popped is not None:
             LOGGER.debug('Discarding conf {}[{}]', info.name, data_id)
             self._current = new_conf
+            self._mark_dirty(cls)
+
+    def _mark_dirty(self, cls: type[Data]) -> None:
+        """Record that this type changed, and needs to be written."""
+        self._dirty.add(cls)
+        self._generation += 1
+        self._changed.set()
+
+    @property
+    def is_dirty(self) -> bool:
+        """Check if any changes have not yet been written."""
+        return bool(self._dirty)
 
     def parse_kv1(self, kv: Keyvalues) -> tuple[Config, bool, VersionMismatchList]:
         """Parse a configuration file into individual data.
@@ -776,16 +908,65 @@ class ConfigSpec:
                 backup_conf(filename, ".bak")
 
     def write_file(self, filename: Path) -> None:
-        """Write the settings to disk."""
-        if self._current.is_blank() or DISABLE_WRITE:
+        """Write the settings to disk, immediately."""
+        self._dirty.clear()
+        self._write_conf(filename, self._current, self._generation)
+
+    def flush(self, filename: Path) -> None:
+        """Write the settings to disk immediately, but only if any changes have been made."""
+        if self._dirty:
+            self.write_file(filename)
+
+    async def save(self, filename: Path) -> None:
+        """Write any changes to disk in a background thread."""
+        if not self._dirty:
+            return
+        conf = self._current
+        generation = self._generation
+        changed = self._dirty
+        self._dirty = set()
+        LOGGER.debug(
+            'Saving {} for changes to {}', filename.name,
+            ', '.join(sorted([cls.get_conf_info().name for cls in changed])),
+        )
+        try:
+            await trio.to_thread.run_sync(self._write_conf, filename, conf, generation)
+        except Exception:
+            LOGGER.exception('Could not save {}:', filename.name)
+            # Try again next time.
+            self._dirty |= changed
+
+    async def persist(self, filename: Path, delay: float = WRITE_DELAY) -> None:
+        """Write changes to disk in the background, until cancelled.
+
+        Changes made within the delay are coalesced into a single write. When cancelled, any
+        remaining changes are written immediately, so nothing is lost on shutdown.
+        """
+        try:
+            while True:
+                await self._changed.wait()
+                await trio.sleep(delay)
+                self._changed = trio.Event()
+                await self.save(filename)
+        finally:
+            self.flush(filename)
+
+    def _write_conf(self, filename: Path, conf: Config, generation: int) -> None:
+        """Build and write the file. This may be called from a background thread."""
+        if conf.is_blank() or DISABLE_WRITE:
             # We don't have any data saved, abort!
             # This could happen while parsing, for example.
             return
 
         kv = Keyvalues.root()
-        kv.extend(self.build_kv1(self._current))
-        with AtomicWriter(filename) as file:
-            kv.serialise(file)
+        kv.extend(self.build_kv1(conf))
+        with self._write_lock:
+            if generation < self._written_generation:
+                # A more recent config was already written, don't overwrite it.
+                return
+            with AtomicWriter(filename) as file:
+                kv.serialise(file)
+            self._written_generation = generation
 
 
 # The configuration files we use.
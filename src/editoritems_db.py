@@ -0,0 +1,165 @@
+"""The editoritems database passed from the app to the compiler.
+
+Each item is pickled individually, preceded by an index which lists where each is located, along
+with the few attributes required for every item at startup (used to resolve instances). The
+compiler then only needs to decode the full definitions for items that are actually placed.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping
+import os
+import pickle
+import pickletools
+import struct
+
+import attrs
+
+from editoritems import Item, ItemClass
+import utils
+
+
+MAGIC = b'BEE2EDIT'
+DB_VERSION = 1
+# Magic, version, length of the index.
+HEADER = struct.Struct('<8sII')
+
+
+@attrs.frozen
+class ItemSummary:
+    """The attributes of an item required for every item, and the location of its definition."""
+    id: utils.ObjectID
+    cls: ItemClass
+    # The filename of each instance, and custom instances. These are strings, not paths, since
+    # constructing paths is comparatively slow.
+    instances: tuple[str, ...]
+    cust_instances: Mapping[str, str]
+    # Position and length of the definition, relative to the end of the index.
+    offset: int = 0
+    length: int = 0
+
+    @classmethod
+    def from_item(cls, item: Item, offset: int = 0, length: int = 0) -> ItemSummary:
+        """Produce the summary for an item."""
+        return cls(
+            item.id, item.cls,
+            tuple([str(inst.inst) for inst in item.instances]),
+            {name: str(filename) for name, filename in item.cust_instances.items()},
+            offset, length,
+        )
+
+
+def write_database(items: Iterable[Item], optimise: bool = True) -> bytes:
+    """Produce the database for the specified items.
+
+    If optimise is set, the pickles are optimised to reduce the size, at the cost of extra time.
+    """
+    index: list[tuple[object, ...]] = []
+    chunks: list[bytes] = []
+    offset = 0
+    seen: set[utils.ObjectID] = set()
+    for item in items:
+        if item.id in seen:
+            raise ValueError(f'Duplicate item type "{item.id}"')
+        seen.add(item.id)
+        data = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+        if optimise:
+            data = pickletools.optimize(data)
+        summary = ItemSummary.from_item(item, offset, len(data))
+        # Tuples are much quicker to unpickle than classes.
+        index.append((
+            summary.id, summary.cls,
+            summary.instances, summary.cust_instances,
+            summary.offset, summary.length,
+        ))
+        chunks.append(data)
+        offset += len(data)
+    index_data = pickle.dumps(index, pickle.HIGHEST_PROTOCOL)
+    if optimise:
+        index_data = pickletools.optimize(index_data)
+    return b''.join([HEADER.pack(MAGIC, DB_VERSION, len(index_data)), index_data, *chunks])
+
+
+class ItemDatabase(Mapping[utils.ObjectID, Item]):
+    """The loaded database, mapping item IDs to the definitions.
+
+    Definitions are decoded when first accessed.
+    """
+    _data: memoryview
+    _summaries: dict[utils.ObjectID, ItemSummary]
+    _items: dict[utils.ObjectID, Item]
+
+    def __init__(self, data: bytes) -> None:
+        try:
+            magic, version, index_len = HEADER.unpack_from(data)
+        except struct.error:
+            raise ValueError('Editoritems database is truncated!') from None
+        if magic != MAGIC:
+            raise ValueError('Not an editoritems database!')
+        if version != DB_VERSION:
+            raise ValueError(f'Unknown editoritems database version {version}, expected {DB_VERSION}!')
+        data_start = HEADER.size + index_len
+        # The pickle could have produced anything, check the types.
+        index = pickle.loads(data[HEADER.size:data_start])
+        if not isinstance(index, list):
+            raise ValueError(f'Invalid list of editor items, got: {index!r}')
+        self._summaries = {}
+        for entry in index:
+            try:
+                item_id, item_cls, instances, cust_instances, offset, length = entry
+            except (TypeError, ValueError):
+                raise ValueError(f'Invalid editor item, got: {entry!r}') from None
+            if not (
+                isinstance(item_id, str) and isinstance(item_cls, ItemClass)
+                and isinstance(instances, tuple) and isinstance(cust_instances, dict)
+                and isinstance(offset, int) and isinstance(length, int)
+            ):
+                raise ValueError(f'Invalid editor item, got: {entry!r}')
+            summary = ItemSummary(
+                utils.obj_id(item_id, 'editor item'), item_cls,
+                instances, cust_instances,
+                offset, length,
+            )
+            if summary.id in self._summaries:
+                raise ValueError(f'Duplicate item type "{summary.id}"')
+            if summary.offset < 0 or data_start + summary.offset + summary.length > len(data):
+                raise ValueError(f'Editor item "{summary.id}" is outside the database!')
+            self._summaries[summary.id] = summary
+        self._data = memoryview(data)[data_start:]
+        self._items = {}
+
+    @classmethod
+    def load(cls, filename: str | os.PathLike[str]) -> ItemDatabase:
+        """Read the database from a file."""
+        with open(filename, 'rb') as f:
+            return cls(f.read())
+
+    def __getitem__(self, item_id: utils.ObjectID) -> Item:
+        """Fetch an item, decoding it if required."""
+        try:
+            return self._items[item_id]
+        except KeyError:
+            pass
+        summary = self._summaries[item_id]
+        item = pickle.loads(self._data[summary.offset:summary.offset + summary.length])
+        if not isinstance(item, Item) or item.id != summary.id:
+            raise ValueError(f'Invalid editor item for "{summary.id}", got: {item!r}')
+        self._items[item_id] = item
+        return item
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self._summaries
+
+    def __iter__(self) -> Iterator[utils.ObjectID]:
+        return iter(self._summaries)
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+    def summaries(self) -> Iterable[ItemSummary]:
+        """Return the summary for each item, without decoding them."""
+        return self._summaries.values()
+
+    @property
+    def decoded(self) -> int:
+        """The number of items decoded so far."""
+        return len(self._items)
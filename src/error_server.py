@@ -3,16 +3,20 @@
 If an error is detected in VBSP, the map is swapped with one which uses a VScript hook to pop open
 the Steam Overlay and navigate to a webpage hosted by this server, which can show the error.
 
-This has 3 endpoints:
+The main endpoints are:
 - / displays the current error.
-- /refresh causes it to reload the error from a text file on disk, if a new compile runs.
-- /ping is triggered by the webpage repeatedly while open, to ensure the server stays alive.
+- /displaydata and /displaydata/tiles provide the geometry to render, the latter in a packed
+  binary form.
+- /reload causes it to reload the error from a text file on disk, if a new compile runs.
+- /heartbeat is triggered by the webpage repeatedly while open, to ensure the server stays alive.
 """
 from typing import override
 
 from zipfile import ZIP_DEFLATED, ZipFile
 import functools
 import gettext
+import gzip
+import hashlib
 import http
 import io
 import json
@@ -30,7 +34,7 @@ import quart
 import trio
 
 from user_errors import (
-    ErrorInfo, DATA_LOC, SERVER_INFO_FILE, ServerInfo, PackageTranslations,
+    ErrorInfo, DATA_LOC, SERVER_INFO_FILE, ServerInfo, PackageTranslations, pack_tiles,
     TOK_ERR_FAIL_LOAD, TOK_ERR_MISSING, TOK_COOP_SHOWURL,
     TOK_WEBPAGE_ARCHIVE_INFO, TOK_WEBPAGE_ARCHIVE_BTN,
     TOK_WEBPAGE_TITLE_PREVIEW, TOK_WEBPAGE_TITLE_VBSP, TOK_WEBPAGE_TITLE_VRAD,
@@ -61,6 +65,28 @@ ARCHIVE_LOC = utils.conf_location('error_dump/map_dump.zip')
 current_error = ErrorInfo(message=TOK_ERR_MISSING)
 
 
+@attrs.frozen
+class PackedTiles:
+    """The tile data for the current error, packed and compressed ahead of time."""
+    data: bytes
+    compressed: bytes
+    etag: str
+
+    @classmethod
+    def build(cls, error: ErrorInfo) -> 'PackedTiles':
+        """Pack the tiles for this error."""
+        data = pack_tiles(error.faces)
+        return cls(
+            data,
+            gzip.compress(data, compresslevel=6),
+            hashlib.sha1(data, usedforsecurity=False).hexdigest(),
+        )
+
+
+# Built when first requested, then cleared when the error is reloaded.
+packed_tiles: PackedTiles | None = None
+
+
 @app.route('/')
 async def route_display_errors() -> str:
     """Display the current error."""
@@ -92,7 +118,7 @@ async def route_render_data() -> dict[str, object]:
     """Return the geometry for rendering the current error."""
     await trio.lowlevel.checkpoint()
     return {
-        'tiles': current_error.faces,
+        # Tiles are sent via /displaydata/tiles.
         'voxels': current_error.voxels,
         'points': current_error.points,
         'leak': current_error.leakpoints,
@@ -101,6 +127,31 @@ async def route_render_data() -> dict[str, object]:
     }
 
 
+@app.route('/displaydata/tiles')
+async def route_render_tiles() -> quart.ResponseReturnValue:
+    """Return the tile geometry in the packed binary format."""
+    global packed_tiles
+    tiles = packed_tiles
+    if tiles is None:
+        error = current_error
+        tiles = await trio.to_thread.run_sync(PackedTiles.build, error)
+        # If the error was reloaded while we were building, these are stale, don't store them.
+        if current_error is error:
+            packed_tiles = tiles
+
+    if quart.request.if_none_match.contains(tiles.etag):
+        resp = await app.make_response(('', http.HTTPStatus.NOT_MODIFIED))
+    elif quart.request.accept_encodings['gzip']:
+        resp = await app.make_response(tiles.compressed)
+        resp.content_encoding = 'gzip'
+    else:
+        resp = await app.make_response(tiles.data)
+    resp.mimetype = 'application/octet-stream'
+    resp.set_etag(tiles.etag)
+    resp.vary.add('Accept-Encoding')
+    return resp
+
+
 @app.route('/heartbeat', methods=['GET', 'POST', 'HEAD'])
 async def route_heartbeat() -> quart.ResponseReturnValue:
     """This route is continually accessed to keep the server alive while the page is visible."""
@@ -249,7 +300,8 @@ class PackageLang(transtoken.GetText):
 async def load_info() -> None:
     """Load the error info from disk."""
     LOGGER.info('Loading data: {}', DATA_LOC)
-    global current_error
+    global current_error, packed_tiles
+    packed_tiles = None
     try:
         data = pickle.loads(await trio.Path(DATA_LOC).read_bytes())
         if not isinstance(data, ErrorInfo):
@@ -2,8 +2,6 @@
 from typing import Final
 from pathlib import Path
 import os
-import pickle
-import pickletools
 import shutil
 
 from srctools import AtomicWriter, Keyvalues, logger
@@ -16,6 +14,7 @@ from transtoken import TransToken
 from . import STAGE_RESOURCES, STAGE_AUTO_BACKUP, ExportData, STEPS, StepResource
 import config
 import editoritems
+import editoritems_db
 
 
 LOGGER = logger.get_logger(__name__)
@@ -80,9 +79,8 @@ async def step_write_editoritems_script(exp: ExportData) -> None:
 @STEPS.add_step(prereq=[StepResource.EI_DATA, StepResource.STYLE], results=[StepResource.EI_FILE])
 async def step_write_editoritems_db(exp: ExportData) -> None:
     """Write the editoritems database, including all our information ready for the compiler."""
-    pick = await trio.to_thread.run_sync(pickle.dumps, exp.all_items, pickle.HIGHEST_PROTOCOL)
-    pick = await trio.to_thread.run_sync(pickletools.optimize, pick)
-    await trio.Path(exp.game.abs_path('bin/bee2/editor.bin')).write_bytes(pick)
+    data = await trio.to_thread.run_sync(editoritems_db.write_database, exp.all_items)
+    await trio.Path(exp.game.abs_path('bin/bee2/editor.bin')).write_bytes(data)
 
 
 @STEPS.add_step(prereq=[StepResource.CONFIG_DATA], results=[StepResource.CONFIG_FILE])
@@ -0,0 +1,268 @@
+"""A persistent index of the VPKs mounted by the game, so they don't need to be parsed each compile.
+
+Building the game's filesystem requires reading the directory of every VPK, which for Portal 2
+lists tens of thousands of files. Both VBSP and VRAD build the filesystem, but only look up a
+small fraction of those. Instead, the location of every file inside each VPK is stored in
+``bin/bee2/fsys_index.bin``, keyed by the modification time and size of the directory file.
+If these are unchanged, the VPK is mounted using the index, and files are read directly from the
+archives without parsing the directory. Folders are always checked directly, since a lookup there
+is no more expensive than validating a cached listing.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+import itertools
+import os
+import pickle
+
+from srctools import AtomicWriter
+from srctools.filesys import FileSystem, FileSystemChain, RawFileSystem, VPKFileSystem
+from srctools.game import Game
+from srctools.vpk import VPK, get_arch_filename
+import attrs
+import srctools.logger
+
+
+LOGGER = srctools.logger.get_logger(__name__)
+INDEX_VERSION = 1
+# The modification time and size of a directory file.
+type FileKey = tuple[int, int]
+# Filename, CRC, archive index, offset, archive length, preloaded data.
+type EntryTuple = tuple[str, int, int | None, int, int, bytes]
+
+
+@attrs.frozen
+class VPKIndex:
+    """The files stored in a VPK."""
+    key: FileKey
+    # Offset in the directory file where file data starts.
+    footer: int
+    # Casefolded filename -> file.
+    files: dict[str, EntryTuple]
+
+
+@attrs.define
+class IndexStats:
+    """Statistics for how effective the index was."""
+    hits: int = 0
+    misses: int = 0
+
+
+@attrs.frozen
+class _Archive:
+    """The files which make up a VPK."""
+    dir_path: str
+    folder: str
+    prefix: str
+    footer: int
+
+
+@attrs.frozen
+class IndexEntry:
+    """The location of a file inside a VPK.
+
+    This has the same attributes as :py:class:`srctools.vpk.FileInfo` used by ``VPKFileSystem``.
+    """
+    archive: _Archive
+    filename: str
+    crc: int
+    arch_index: int | None
+    offset: int
+    arch_len: int
+    preload: bytes
+
+    @property
+    def dir(self) -> str:
+        """The folder containing this file."""
+        return self.filename.rpartition('/')[0]
+
+    def read(self) -> bytes:
+        """Return the contents for this file."""
+        if not self.arch_len:
+            return self.preload
+        archive = self.archive
+        if self.arch_index is None:
+            filename = archive.dir_path
+            offset = archive.footer + self.offset
+        else:
+            filename = os.path.join(archive.folder, get_arch_filename(archive.prefix, self.arch_index))
+            offset = self.offset
+        with open(filename, 'rb') as f:
+            f.seek(offset)
+            return self.preload + f.read(self.arch_len)
+
+
+class _EntryTable(Mapping[str, IndexEntry]):
+    """Produces entries from the index only when they are looked up."""
+    def __init__(self, archive: _Archive, files: dict[str, EntryTuple]) -> None:
+        self._archive = archive
+        self._files = files
+
+    def __getitem__(self, key: str) -> IndexEntry:
+        return IndexEntry(self._archive, *self._files[key])
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._files
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._files)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+
+class IndexedVPKFileSystem(VPKFileSystem):
+    """A VPK filesystem using the stored index, instead of parsing the directory."""
+    _name_to_file: _EntryTable  # type: ignore[assignment]
+    _vpk: VPK | None
+
+    def __init__(self, path: str | os.PathLike[str], index: VPKIndex) -> None:
+        FileSystem.__init__(self, path)  # Skip parsing the VPK.
+        self._vpk = None
+        folder, filename = os.path.split(self.path)
+        prefix = filename.removesuffix('.vpk').removesuffix('_dir')
+        self._name_to_file = _EntryTable(_Archive(self.path, folder, prefix, index.footer), index.files)
+
+    @property
+    def vpk(self) -> VPK:
+        """The VPK itself is only parsed if required."""
+        if self._vpk is None:
+            self._vpk = VPK(self.path)
+        return self._vpk
+
+    @vpk.setter
+    def vpk(self, vpk: VPK) -> None:
+        """Replace the VPK, as the base class allows."""
+        self._vpk = vpk
+
+
+def file_key(path: str | os.PathLike[str]) -> FileKey | None:
+    """Compute the key used to check if a VPK has changed, or None if missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def index_vpk(fsys: VPKFileSystem, key: FileKey) -> VPKIndex:
+    """Record the files in a parsed VPK."""
+    vpk = fsys.vpk
+    return VPKIndex(key, key[1] - len(vpk.footer_data), {
+        info.filename.replace('\\', '/').casefold(): (
+            info.filename, info.crc, info.arch_index, info.offset, info.arch_len, info.start_data,
+        )
+        for info in vpk
+    })
+
+
+def load_index(filename: str | os.PathLike[str]) -> dict[str, VPKIndex]:
+    """Load the stored index. If the file is invalid, this is empty."""
+    try:
+        with open(filename, 'rb') as f:
+            version, vpks = pickle.load(f)
+        if version != INDEX_VERSION:
+            LOGGER.info('Filesystem index is version {}, discarding.', version)
+            return {}
+        return {
+            path: VPKIndex(tuple(key), footer, files)
+            for path, (key, footer, files) in vpks.items()
+        }
+    except FileNotFoundError:
+        return {}
+    except Exception:
+        LOGGER.warning('Could not load filesystem index "{}"!', filename, exc_info=True)
+        return {}
+
+
+def save_index(filename: str | os.PathLike[str], vpks: dict[str, VPKIndex]) -> None:
+    """Write the index back to disk."""
+    data = {
+        path: (index.key, index.footer, index.files)
+        for path, index in vpks.items()
+    }
+    with AtomicWriter(filename, is_bytes=True) as f:
+        pickle.dump((INDEX_VERSION, data), f, pickle.HIGHEST_PROTOCOL)
+
+
+def _iter_layers(game: Game) -> Iterator[tuple[bool, Path]]:
+    """Yield each filesystem mounted by the game, and whether it is a VPK.
+
+    This matches the order used by ``Game.get_filesystem()``.
+    """
+    vpks: list[Path] = []
+    raw_folders: list[Path] = []
+    mounts_head, mounts = game.parse_strata_mounts()
+
+    for path in mounts_head:
+        yield path.suffix == '.vpk' and path.is_file(), path
+
+    for path in game.search_paths:
+        if path.is_dir():
+            raw_folders.append(path)
+            for ind in itertools.count(1):
+                vpk = path / f'pak{ind:02}_dir.vpk'
+                if vpk.is_file():
+                    vpks.append(vpk)
+                else:
+                    break
+            continue
+        if not path.suffix:
+            path = path.with_suffix('.vpk')
+        if not path.name.endswith('_dir.vpk'):
+            path = path.with_name(path.name[:-4] + '_dir.vpk')
+        if path.is_file() and path.suffix == '.vpk':
+            vpks.append(path)
+
+    for path in vpks:
+        yield True, path
+    for path in raw_folders:
+        yield False, path
+    for path in mounts:
+        yield path.suffix == '.vpk' and path.is_file(), path
+
+
+def get_filesystem(
+    game: Game,
+    index_file: str | os.PathLike[str] | None = None,
+) -> tuple[FileSystemChain, IndexStats]:
+    """Build the filesystem for the game, using and updating the stored index.
+
+    By default, the index is stored in the ``bin/bee2/`` folder.
+    """
+    if index_file is None:
+        index_file = game.root / 'bin' / 'bee2' / 'fsys_index.bin'
+    stats = IndexStats()
+    old_index = load_index(index_file)
+    new_index: dict[str, VPKIndex] = {}
+    fsys = FileSystemChain()
+    for is_vpk, path in _iter_layers(game):
+        if not is_vpk:
+            fsys.add_sys(RawFileSystem(path))
+            continue
+        key = file_key(path)
+        folded = os.path.normcase(os.path.abspath(path))
+        index = old_index.get(folded)
+        vpk_sys: VPKFileSystem
+        if key is not None and index is not None and index.key == key:
+            stats.hits += 1
+            vpk_sys = IndexedVPKFileSystem(path, index)
+        else:
+            stats.misses += 1
+            vpk_sys = VPKFileSystem(path)
+            if key is not None:
+                index = index_vpk(vpk_sys, key)
+        if index is not None and key is not None:
+            new_index[folded] = index
+        fsys.add_sys(vpk_sys)
+
+    if stats.misses or new_index.keys() != old_index.keys():
+        LOGGER.info('Updating filesystem index ({} VPKs reindexed)', stats.misses)
+        try:
+            save_index(index_file, new_index)
+        except OSError:
+            LOGGER.warning('Could not write filesystem index "{}"!', index_file, exc_info=True)
+    else:
+        LOGGER.debug('Filesystem index up to date, {} VPKs', stats.hits)
+    return fsys, stats
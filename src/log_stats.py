@@ -0,0 +1,197 @@
+"""A structured log sink, for finding which modules produce the most log messages.
+
+If the ``BEE_LOG_STATS`` environment variable is set to ``1``, each log record is additionally written to a
+JSON Lines file next to the regular log, recording the level, logger, function, timestamp and the
+time spent formatting the message. Run ``python -m log_stats logs/bee2.jsonl`` from the ``src/``
+folder to summarise the message counts and formatting time for each module.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import Any, override
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from srctools import conv_bool
+from srctools.logger import LogMessage
+import attrs
+
+
+ENV_VAR = 'BEE_LOG_STATS'
+
+
+@attrs.define
+class ModuleStats:
+    """The totals for all the messages logged by a module."""
+    count: int = 0
+    # Counts of each level name.
+    levels: Counter[str] = attrs.Factory(Counter)
+    # Time spent formatting, in nanoseconds.
+    format_ns: int = 0
+    # Total length of the formatted messages.
+    chars: int = 0
+
+    def add(self, level: str, format_ns: int, chars: int) -> None:
+        """Record a single message."""
+        self.count += 1
+        self.levels[level] += 1
+        self.format_ns += format_ns
+        self.chars += chars
+
+
+# Orderings for the summary report.
+SORT_KEYS: dict[str, Callable[[ModuleStats], int]] = {
+    'count': lambda stats: stats.count,
+    'time': lambda stats: stats.format_ns,
+    'size': lambda stats: stats.chars,
+}
+
+
+def record_to_json(record: logging.LogRecord, format_ns: int, chars: int) -> dict[str, Any]:
+    """Produce the structured form of a record."""
+    return {
+        't': record.created,
+        'level': record.levelname,
+        'logger': record.name,
+        'func': record.funcName,
+        'line': record.lineno,
+        'fmt_ns': format_ns,
+        'chars': chars,
+    }
+
+
+def format_message(record: logging.LogRecord) -> tuple[str, int]:
+    """Format the message of a record, returning it and the time taken in nanoseconds.
+
+    Formatted log messages are cached, so this needs to run before any other handlers for the
+    time to be meaningful.
+    """
+    start = time.perf_counter_ns()
+    if isinstance(record.msg, LogMessage):
+        message = record.msg.format_msg()
+    else:
+        message = record.getMessage()
+    return message, time.perf_counter_ns() - start
+
+
+class StatsHandler(logging.Handler):
+    """Writes a JSON object for each record to a file, and accumulates statistics for each module."""
+    stats: dict[str, ModuleStats]
+
+    def __init__(self, filename: str | os.PathLike[str]) -> None:
+        super().__init__(logging.NOTSET)
+        self.stats = {}
+        self._file = open(filename, 'w', encoding='utf8')
+
+    @override
+    def emit(self, record: logging.LogRecord) -> None:
+        """Record a log message."""
+        try:
+            message, format_ns = format_message(record)
+            try:
+                stats = self.stats[record.name]
+            except KeyError:
+                stats = self.stats[record.name] = ModuleStats()
+            stats.add(record.levelname, format_ns, len(message))
+            self._file.write(json.dumps(record_to_json(record, format_ns, len(message)), separators=(',', ':')))
+            self._file.write('\n')
+        except Exception:
+            self.handleError(record)
+
+    @override
+    def flush(self) -> None:
+        """Flush the file."""
+        self.acquire()
+        try:
+            if not self._file.closed:
+                self._file.flush()
+        finally:
+            self.release()
+
+    @override
+    def close(self) -> None:
+        """Close the file."""
+        self.acquire()
+        try:
+            self._file.close()
+        finally:
+            self.release()
+        super().close()
+
+
+def install(filename: str | os.PathLike[str]) -> StatsHandler:
+    """Add the handler to the root logger.
+
+    It is placed before other handlers, so that it is the first to format messages.
+    """
+    handler = StatsHandler(filename)
+    root = logging.getLogger()
+    root.handlers.insert(0, handler)
+    return handler
+
+
+def install_from_env(log_filename: str | os.PathLike[str]) -> StatsHandler | None:
+    """If enabled by the environment variable, install the handler next to the specified log."""
+    if not conv_bool(os.environ.get(ENV_VAR)):
+        return None
+    return install(Path(log_filename).with_suffix('.jsonl'))
+
+
+def read_records(lines: Iterable[str]) -> Iterator[dict[str, Any]]:
+    """Parse each record from a JSONL log, skipping blank lines."""
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def summarise(records: Iterable[Mapping[str, Any]]) -> dict[str, ModuleStats]:
+    """Compute the statistics for each module from structured records."""
+    result: dict[str, ModuleStats] = {}
+    for record in records:
+        try:
+            stats = result[record['logger']]
+        except KeyError:
+            stats = result[record['logger']] = ModuleStats()
+        stats.add(record['level'], record['fmt_ns'], record['chars'])
+    return result
+
+
+def format_report(stats: Mapping[str, ModuleStats], sort: str = 'count', limit: int | None = None) -> str:
+    """Produce a table of the modules, sorted by the specified key in descending order."""
+    key = SORT_KEYS[sort]
+    modules = sorted(stats.items(), key=lambda kv: key(kv[1]), reverse=True)
+    total_count = sum(mod.count for mod in stats.values()) or 1
+    if limit is not None:
+        modules = modules[:limit]
+    width = max([len('Module'), *(len(name) for name, _ in modules)])
+    lines = [f'{"Module":<{width}} {"Count":>8} {"%":>6} {"Format ms":>10} {"Chars":>10}  Levels']
+    for name, mod in modules:
+        levels = ', '.join(f'{level}={count}' for level, count in mod.levels.most_common())
+        lines.append(
+            f'{name:<{width}} {mod.count:>8} {100.0 * mod.count / total_count:>6.1f} '
+            f'{mod.format_ns / 1e6:>10.3f} {mod.chars:>10}  {levels}'
+        )
+    return '\n'.join(lines)
+
+
+def main(argv: list[str]) -> int:
+    """Summarise a structured log file."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('filename', type=Path, help='The JSONL log to summarise.')
+    parser.add_argument('--sort', choices=list(SORT_KEYS), default='count', help='Order to sort modules in.')
+    parser.add_argument('-n', '--limit', type=int, default=None, help='Only show this many modules.')
+    args = parser.parse_args(argv)
+    with open(args.filename, encoding='utf8') as f:
+        stats = summarise(read_records(f))
+    print(format_report(stats, args.sort, args.limit))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -15,6 +15,7 @@ from pathlib import PurePosixPath as FSPath
 import copy
 import re
 from weakref import WeakKeyDictionary
+import weakref
 
 from aioresult import ResultCapture
 from srctools import VMF, FileSystem, Keyvalues, logger, conv_int
@@ -33,7 +34,6 @@ from packages import (
     desc_parse, get_config, sep_values,
 )
 from transtoken import TransToken, TransTokenSource
-import async_util
 import collisions
 import config
 import editoritems_vmf
@@ -123,16 +123,20 @@ class ItemVariant:
         self._inst_desc: MarkdownData | None = None
 
     def copy(self) -> ItemVariant:
-        """Make a copy of all the data."""
+        """Make a copy of all the data.
+
+        The editoritems, lists and dicts are shared with the original (copy-on-write), so they must
+        be replaced rather than modified in-place. modify() takes care to copy what it changes.
+        """
         return ItemVariant(
             self.pak_id,
             self.editor,
             self.vbsp_config,
-            self.editor_extra.copy(),
-            self.authors.copy(),
-            self.tags.copy(),
+            self.editor_extra,
+            self.authors,
+            self.tags,
             self.desc,
-            self.icons.copy(),
+            self.icons,
             self.ent_count,
             self.url,
             self.all_name,
@@ -146,8 +150,8 @@ class ItemVariant:
 
     def override_from_folder(self, other: ItemVariant) -> None:
         """Perform the override from another item folder."""
-        self.authors.extend(other.authors)
-        self.tags.extend(self.tags)
+        self.authors = [*self.authors, *other.authors]
+        self.tags = [*self.tags, *other.tags]
         self.vbsp_config = lazy_conf.concat(self.vbsp_config, other.vbsp_config)
         self.desc += other.desc
 
@@ -209,16 +213,18 @@ class ItemVariant:
         if 'tags' in kv:
             tags = sep_values(kv['tags', ''])
         else:
-            tags = self.tags.copy()
+            tags = self.tags
 
         variant = ItemVariant(
             pak_id,
             self.editor,
             vbsp_config,
-            self.editor_extra.copy(),
+            # Replaced by _modify_editoritems() if changed.
+            self.editor_extra,
             authors=authors,
             tags=tags,
             desc=desc,
+            # This is modified by _modify_editoritems().
             icons=self.icons.copy(),
             ent_count=kv['ent_count', self.ent_count],
             url=kv['url', self.url],
@@ -754,6 +760,10 @@ class Item(PakObject, needs_foreground=True):
         packset = ctx.packset
         # This has to be done after styles.
         await packset.ready(Style).wait()
+        # Discard parsed folders which are no longer used by any item.
+        for key, parsed in list(_FOLDER_CACHE.items()):
+            if parsed.packset() is not packset:
+                del _FOLDER_CACHE[key]
         LOGGER.info('Allocating styled items...')
         styles = packset.all_obj(Style)
         async with trio.open_nursery() as nursery:
@@ -1004,76 +1014,90 @@ class SubItemRef:
         return SubItemRef(self.item, ind)
 
 
-async def parse_item_folder(
-    data: ParseData,
-    fold: str,
-) -> ItemVariant:
-    """Parse through data in item/ folders, and return the result."""
+@attrs.define(eq=False)
+class _ParsedFolder:
+    """The files parsed from an item folder.
+
+    These are cached, so reloading packages can reuse them if the files are unchanged.
+    They're shared, so must not be modified.
+    """
+    # The cache keys for editoritems.txt, editoritems.vmf and properties.txt.
+    file_keys: tuple[int, int, int]
+    editor: EditorItem
+    extra: list[EditorItem]
+    props: Keyvalues
+    # Set if any extra items had palette definitions, which were removed.
+    extra_palettes: bool
+    # The last package set which used this, so unused folders can be discarded.
+    packset: weakref.ref[PackagesSet]
+
+
+# (package path, folder) -> parsed files.
+_FOLDER_CACHE: dict[tuple[str, str], _ParsedFolder] = {}
+
+
+def _file_key(fsys: FileSystem, path: str) -> int:
+    """Fetch the cache key for a file, or -2 if it's missing."""
+    try:
+        return fsys[path].cache_key()
+    except FileNotFoundError:
+        return -2
+
+
+def _parse_folder_files(data: ParseData, fold: str) -> _ParsedFolder:
+    """Parse the editoritems, VMF and properties files in an item folder.
+
+    This is run in a thread. If the files are unchanged since last time, the previous result is reused.
+    """
     prop_path = f'items/{fold}/properties.txt'
     editor_path = f'items/{fold}/editoritems.txt'
     vmf_path = f'items/{fold}/editoritems.vmf'
-    config_path = f'items/{fold}/vbsp_config.cfg'
+    fsys = data.fsys
 
-    def parse_items(path: str) -> list[EditorItem]:
-        """Parse the editoritems in order in a file."""
-        items: list[EditorItem] = []
+    cache_key = (fsys.path, fold)
+    file_keys = (_file_key(fsys, editor_path), _file_key(fsys, vmf_path), _file_key(fsys, prop_path))
+    cacheable = -1 not in file_keys
+    if cacheable:
         try:
-            f = data.fsys[path].open_str()
-        except FileNotFoundError as err:
-            raise OSError(f'"{data.pak_id}:items/{fold}" not valid! Folder likely missing! ') from err
-        with f:
-            tok = Tokenizer(f, path)
-            for tok_type, tok_value in tok:
-                if tok_type is Token.STRING:
-                    if tok_value.casefold() != 'item':
-                        raise tok.error('Unknown item option "{}"!', tok_value)
-                    items.append(EditorItem.parse_one(tok, data.pak_id))
-                elif tok_type is not Token.NEWLINE:
-                    raise tok.error(tok_type)
-        return items
-
-    def parse_vmf(path: str) -> VMF | None:
-        """Parse the VMF portion."""
-        try:
-            vmf_keyvalues = data.fsys.read_kv1(path)
-        except FileNotFoundError:
-            return None
-        else:
-            return VMF.parse(vmf_keyvalues)
-
-    def parse_props(path: str) -> Keyvalues:
-        """Parse the keyvalues file containing extra metadata."""
-        try:
-            prop = data.fsys.read_kv1(path)
-        except FileNotFoundError:
-            return Keyvalues('Properties', [])
+            cached = _FOLDER_CACHE[cache_key]
+        except KeyError:
+            pass
         else:
-            return prop.find_key('Properties', or_blank=True)
-
-    async with trio.open_nursery() as nursery:
-        props_res = async_util.sync_result(nursery, parse_props, prop_path, abandon_on_cancel=True)
-        all_items = async_util.sync_result(nursery, parse_items, editor_path, abandon_on_cancel=True)
-        editor_vmf_res = async_util.sync_result(nursery, parse_vmf, vmf_path, abandon_on_cancel=True)
-    props = props_res.result()
+            if cached.file_keys == file_keys:
+                cached.packset = weakref.ref(data.packset)
+                return cached
 
+    items: list[EditorItem] = []
     try:
-        first_item, *extra_items = all_items.result()
+        f = fsys[editor_path].open_str()
+    except FileNotFoundError as err:
+        raise OSError(f'"{data.pak_id}:items/{fold}" not valid! Folder likely missing! ') from err
+    with f:
+        tok = Tokenizer(f, editor_path)
+        for tok_type, tok_value in tok:
+            if tok_type is Token.STRING:
+                if tok_value.casefold() != 'item':
+                    raise tok.error('Unknown item option "{}"!', tok_value)
+                items.append(EditorItem.parse_one(tok, data.pak_id))
+            elif tok_type is not Token.NEWLINE:
+                raise tok.error(tok_type)
+    try:
+        first_item, *extra_items = items
     except ValueError:
         raise ValueError(
             f'"{data.pak_id}:items/{fold}/editoritems.txt has no '
             '"Item" block!'
         ) from None
+    trio.from_thread.check_cancelled()
 
-    if first_item.id.casefold() != data.id.casefold():
-        LOGGER.warning(
-            'Item ID "{}" does not match "{}" in "{}:items/{}/editoritems.txt"! '
-            'Info.txt ID will override, update editoritems!',
-            data.id, first_item.id, data.pak_id, fold,
-        )
-
-    editor_vmf = editor_vmf_res.result()
-    if editor_vmf is not None:
-        editoritems_vmf.load(first_item, editor_vmf)
+    try:
+        vmf_keyvalues = fsys.read_kv1(vmf_path)
+    except FileNotFoundError:
+        pass
+    else:
+        editoritems_vmf.load(first_item, VMF.parse(vmf_keyvalues))
+        del vmf_keyvalues
+        trio.from_thread.check_cancelled()
     # elif isinstance(filesystem, RawFileSystem):
     #     # Write out editoritems.vmf.
     #     editor_vmf = editoritems_vmf.save(first_item)
@@ -1081,23 +1105,61 @@ async def parse_item_folder(
     #         LOGGER.info('Writing {}', f.name)
     #         await trio.to_thread.run_sync(editor_vmf.export, f)
 
-    del editor_vmf, editor_vmf_res
+    try:
+        props = fsys.read_kv1(prop_path).find_key('Properties', or_blank=True)
+    except FileNotFoundError:
+        props = Keyvalues('Properties', [])
 
     first_item.generate_collisions()
 
     # extra_items is any extra blocks (offset catchers, extent items).
     # These must not have a palette section - it'll override any the user
     # chooses.
+    extra_palettes = False
     for extra_item in extra_items:
         extra_item.generate_collisions()
         for subtype in extra_item.subtypes:
             if subtype.pal_pos is not None:
-                data.warn_auth(data.pak_id, TRANS_EXTRA_PALETTES.format(
-                    filename=f'{data.pak_id}:items/{fold}/editoritems.txt'
-                ))
+                extra_palettes = True
                 subtype.pal_icon = subtype.pal_pos = None
                 subtype.pal_name = TransToken.BLANK
 
+    parsed = _ParsedFolder(
+        file_keys, first_item, extra_items, props,
+        extra_palettes, weakref.ref(data.packset),
+    )
+    if cacheable:
+        _FOLDER_CACHE[cache_key] = parsed
+    return parsed
+
+
+async def parse_item_folder(
+    data: ParseData,
+    fold: str,
+) -> ItemVariant:
+    """Parse through data in item/ folders, and return the result."""
+    prop_path = f'items/{fold}/properties.txt'
+    config_path = f'items/{fold}/vbsp_config.cfg'
+
+    parsed = await trio.to_thread.run_sync(
+        _parse_folder_files, data, fold,
+        abandon_on_cancel=True,
+    )
+    first_item = parsed.editor
+    extra_items = parsed.extra
+    props = parsed.props
+
+    if first_item.id.casefold() != data.id.casefold():
+        LOGGER.warning(
+            'Item ID "{}" does not match "{}" in "{}:items/{}/editoritems.txt"! '
+            'Info.txt ID will override, update editoritems!',
+            data.id, first_item.id, data.pak_id, fold,
+        )
+    if parsed.extra_palettes:
+        data.warn_auth(data.pak_id, TRANS_EXTRA_PALETTES.format(
+            filename=f'{data.pak_id}:items/{fold}/editoritems.txt'
+        ))
+
     # In files this is specified as PNG, but it's always really VTF.
     try:
         all_icon = FSPath(props['all_icon']).with_suffix('.vtf')
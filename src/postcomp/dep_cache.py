@@ -0,0 +1,362 @@
+"""Caches PackList dependency analysis between compiles.
+
+Evaluating dependencies requires parsing every model and material which is packed, but when
+iterating on a chamber these are almost always the same files. For each analysed file we record
+the files it referenced, keyed by the cache key of the source (the modification time for loose
+files, or the CRC for files inside VPKs). We also record the keys of every other file looked up
+while analysing (model components, textures found in each cdmaterials folder, patch parents),
+including those which were missing. On the next compile, files where all of those are unchanged
+simply replay their references instead of being reparsed. Entries which were not used in a compile
+are discarded when the cache is saved.
+"""
+from __future__ import annotations
+from typing import Literal, Self
+from collections.abc import Callable
+import os
+import time
+
+from srctools.const import FileType
+from srctools.dmx import Attribute, Element, ValueType
+from srctools.filesys import CACHE_KEY_INVALID, File, FileSystemChain
+from srctools.packlist import PackFile, PackList
+import attrs
+import srctools.logger
+
+
+LOGGER = srctools.logger.get_logger(__name__)
+CACHE_FMT_NAME = 'BEE2DependencyCache'
+CACHE_FMT_VERSION = 2
+# DMX only allows 32-bit integers.
+KEY_TRUNC = 0x7FFF_FFFF
+
+type DepKind = Literal['file', 'sound', 'particle']
+
+
+@attrs.frozen
+class Dependency:
+    """A call made to the packlist while a file was being analysed."""
+    kind: DepKind
+    name: str
+    type: FileType = FileType.GENERIC
+    optional: bool = False
+    # For files, the skinset. For particles, this is unused.
+    skinset: frozenset[int] | None = None
+    preload: bool = False
+
+    def replay(self, packlist: PackList) -> None:
+        """Repeat this call on the packlist."""
+        if self.kind == 'sound':
+            packlist.pack_soundscript(self.name)
+        elif self.kind == 'particle':
+            packlist.pack_particle(self.name, self.preload)
+        else:
+            packlist.pack_file(
+                self.name, self.type,
+                skinset=set(self.skinset) if self.skinset is not None else None,
+                optional=self.optional,
+            )
+
+
+@attrs.frozen
+class CacheEntry:
+    """The dependencies found for a file."""
+    key: int
+    optional: bool
+    skinset: frozenset[int] | None
+    # Other files looked up during analysis, and their keys. Missing files are CACHE_KEY_INVALID.
+    sources: tuple[tuple[str, int], ...]
+    deps: tuple[Dependency, ...]
+    # How long the analysis originally took, to compute time saved.
+    duration: float
+
+
+@attrs.define
+class CacheStats:
+    """Statistics for how effective the cache was."""
+    hits: int = 0
+    misses: int = 0
+    uncacheable: int = 0
+    time_saved: float = 0.0
+    time_spent: float = 0.0
+
+
+def _skinset_to_str(skinset: frozenset[int] | None) -> str:
+    """Encode a skinset to store in the cache."""
+    if skinset is None:
+        return '*'
+    return ','.join(map(str, sorted(skinset)))
+
+
+def _skinset_from_str(value: str) -> frozenset[int] | None:
+    """Decode a skinset stored in the cache."""
+    if value == '*':
+        return None
+    return frozenset(map(int, filter(None, value.split(','))))
+
+
+def _mask_key(key: int) -> int:
+    """Truncate a cache key to fit in the DMX file."""
+    if key == CACHE_KEY_INVALID:
+        return key
+    return key & KEY_TRUNC
+
+
+class _RecordingChain(FileSystemChain):
+    """Shares the systems of another chain, recording the key of every file which is looked up."""
+    accessed: dict[str, int]
+
+    def __init__(self, parent: FileSystemChain) -> None:
+        super().__init__()
+        self.systems = parent.systems
+        self.accessed = {}
+
+    def _get_file(self, name: str) -> File[Self]:
+        """Locate a file, recording whether it was present."""
+        try:
+            file = super()._get_file(name)
+        except FileNotFoundError:
+            self.accessed[name] = CACHE_KEY_INVALID
+            raise
+        self.accessed[name] = _mask_key(file.cache_key())
+        return file
+
+
+class CachedPackList(PackList):
+    """A packlist which stores the result of dependency analysis for models and materials."""
+    dep_cache: dict[str, CacheEntry]
+    cache_stats: CacheStats
+    # While analysing a file, the calls made to the packlist.
+    _recording: list[Dependency] | None
+    # Incremented when inside a packlist method, so we only record the outermost calls.
+    _record_depth: int
+    # Set if something was done which we can't replay.
+    _record_failed: bool
+    # Entries which were checked or analysed this compile, the rest are pruned when saving.
+    _cache_used: set[str]
+
+    def __init__(self, fsys: FileSystemChain) -> None:
+        super().__init__(fsys)
+        self.dep_cache = {}
+        self.cache_stats = CacheStats()
+        self._recording = None
+        self._record_depth = 0
+        self._record_failed = False
+        self._cache_used = set()
+
+    def load_dependency_cache(self, filename: str | os.PathLike[str]) -> None:
+        """Load the cache data. If the file is invalid, this does nothing."""
+        try:
+            with open(filename, 'rb') as f:
+                root, fmt_name, fmt_version = Element.parse(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            LOGGER.warning('Could not parse dependency cache "{}"!', filename, exc_info=True)
+            return
+        if fmt_name != CACHE_FMT_NAME or fmt_version != CACHE_FMT_VERSION:
+            LOGGER.warning(
+                'Unknown dependency cache "{}" with type {} v{}!',
+                filename, fmt_name, fmt_version,
+            )
+            return
+        try:
+            for elem in root['files'].iter_elem():
+                deps = tuple(
+                    Dependency(
+                        kind,
+                        name,
+                        FileType[type_name],
+                        optional,
+                        _skinset_from_str(skinset),
+                        preload,
+                    )
+                    for kind, name, type_name, optional, skinset, preload in zip(
+                        elem['dep_kind'].iter_str(),
+                        elem['dep_name'].iter_str(),
+                        elem['dep_type'].iter_str(),
+                        elem['dep_optional'].iter_bool(),
+                        elem['dep_skinset'].iter_str(),
+                        elem['dep_preload'].iter_bool(),
+                        strict=True,
+                    )
+                )
+                self.dep_cache[elem.name] = CacheEntry(
+                    elem['key'].val_int,
+                    elem['optional'].val_bool,
+                    _skinset_from_str(elem['skinset'].val_str),
+                    tuple(zip(
+                        elem['src_name'].iter_str(),
+                        elem['src_key'].iter_int(),
+                        strict=True,
+                    )),
+                    deps,
+                    elem['duration'].val_float,
+                )
+        except (KeyError, ValueError):
+            LOGGER.warning('Invalid dependency cache "{}", discarding!', filename, exc_info=True)
+            self.dep_cache.clear()
+            return
+        LOGGER.info('Loaded {} cached file dependencies.', len(self.dep_cache))
+
+    def save_dependency_cache(self, filename: str | os.PathLike[str]) -> None:
+        """Write back the cache data, discarding entries which weren't used in this compile."""
+        unused = self.dep_cache.keys() - self._cache_used
+        for pack_name in unused:
+            del self.dep_cache[pack_name]
+        if unused:
+            LOGGER.info('Pruned {} unused cached file dependencies.', len(unused))
+        root = Element('DependencyCache', 'BEE2DependencyCache')
+        file_arr = Attribute.array('files', ValueType.ELEMENT)
+        root['files'] = file_arr
+        for pack_name, entry in self.dep_cache.items():
+            elem = Element(pack_name, 'BEE2DependencyFile')
+            elem['key'] = entry.key
+            elem['optional'] = entry.optional
+            elem['skinset'] = _skinset_to_str(entry.skinset)
+            elem['duration'] = entry.duration
+            elem['src_name'] = Attribute('src_name', ValueType.STR, [name for name, key in entry.sources])
+            elem['src_key'] = Attribute('src_key', ValueType.INT, [key for name, key in entry.sources])
+            elem['dep_kind'] = Attribute('dep_kind', ValueType.STR, [dep.kind for dep in entry.deps])
+            elem['dep_name'] = Attribute('dep_name', ValueType.STR, [dep.name for dep in entry.deps])
+            elem['dep_type'] = Attribute('dep_type', ValueType.STR, [dep.type.name for dep in entry.deps])
+            elem['dep_optional'] = Attribute('dep_optional', ValueType.BOOL, [dep.optional for dep in entry.deps])
+            elem['dep_skinset'] = Attribute(
+                'dep_skinset', ValueType.STR,
+                [_skinset_to_str(dep.skinset) for dep in entry.deps],
+            )
+            elem['dep_preload'] = Attribute('dep_preload', ValueType.BOOL, [dep.preload for dep in entry.deps])
+            file_arr.append(elem)
+        # No need to be atomic, if we corrupt this it'll just be rebuilt.
+        try:
+            with open(filename, 'wb') as f:
+                root.export_binary(f, fmt_name=CACHE_FMT_NAME, fmt_ver=CACHE_FMT_VERSION, unicode='format')
+        except OSError:
+            LOGGER.warning('Could not write dependency cache "{}"!', filename, exc_info=True)
+
+    def log_cache_stats(self) -> None:
+        """Log how effective the cache was."""
+        stats = self.cache_stats
+        LOGGER.info(
+            'Dependency cache: {} hits, {} misses, {} uncacheable. '
+            'Spent {:.2f}s analysing, saved ~{:.2f}s.',
+            stats.hits, stats.misses, stats.uncacheable,
+            stats.time_spent, stats.time_saved,
+        )
+
+    def pack_file(
+        self,
+        filename: str | os.PathLike[str],
+        data_type: FileType = FileType.GENERIC,
+        data: bytes | None = None,
+        skinset: set[int] | None = None,
+        optional: bool = False,
+    ) -> None:
+        """Queue the given file to be packed, recording if we're analysing a file."""
+        if self._recording is not None and self._record_depth == 0:
+            if data is not None:
+                self._record_failed = True
+            else:
+                self._recording.append(Dependency(
+                    'file', os.fspath(filename), data_type, optional,
+                    frozenset(skinset) if skinset is not None else None,
+                ))
+        self._record_depth += 1
+        try:
+            super().pack_file(filename, data_type, data, skinset, optional)
+        finally:
+            self._record_depth -= 1
+
+    def pack_soundscript(self, sound_name: str) -> None:
+        """Pack a soundscript or raw sound file, recording if we're analysing a file."""
+        if self._recording is not None and self._record_depth == 0:
+            self._recording.append(Dependency('sound', sound_name))
+        self._record_depth += 1
+        try:
+            super().pack_soundscript(sound_name)
+        finally:
+            self._record_depth -= 1
+
+    def pack_particle(self, particle_name: str, preload: bool = False) -> None:
+        """Pack a particle system, recording if we're analysing a file."""
+        if self._recording is not None and self._record_depth == 0:
+            self._recording.append(Dependency('particle', particle_name, preload=preload))
+        self._record_depth += 1
+        try:
+            super().pack_particle(particle_name, preload)
+        finally:
+            self._record_depth -= 1
+
+    def _get_model_files(self, file: PackFile) -> None:
+        """Find any needed files for a model, using the cache if possible."""
+        self._analyse_cached(file, super()._get_model_files)
+
+    def _get_material_files(self, file: PackFile) -> None:
+        """Find any needed files for a material, using the cache if possible."""
+        self._analyse_cached(file, super()._get_material_files)
+
+    def _file_key(self, filename: str) -> int:
+        """Fetch the cache key for a file, or CACHE_KEY_INVALID if not present."""
+        try:
+            return _mask_key(self.fsys[filename].cache_key())
+        except FileNotFoundError:
+            return CACHE_KEY_INVALID
+
+    def _analyse_cached(self, file: PackFile, func: Callable[[PackFile], None]) -> None:
+        """Run the analysis function, or replay the cached results."""
+        if file.data is not None or self._recording is not None:
+            # Virtual files can't be cached.
+            self.cache_stats.uncacheable += 1
+            func(file)
+            return
+        key = self._file_key(file.filename)
+        if key == CACHE_KEY_INVALID:
+            self.cache_stats.uncacheable += 1
+            func(file)
+            return
+        skinset: frozenset[int] | None = None
+        if file.type is FileType.MODEL:
+            cur_skins = self.skinsets.get(file.filename)
+            if cur_skins is not None:
+                skinset = frozenset(cur_skins)
+
+        self._cache_used.add(file.filename)
+        entry = self.dep_cache.get(file.filename)
+        if (
+            entry is not None
+            and entry.key == key
+            and entry.optional == file.optional
+            and entry.skinset == skinset
+            and all(self._file_key(src) == src_key for src, src_key in entry.sources)
+        ):
+            self.cache_stats.hits += 1
+            self.cache_stats.time_saved += entry.duration
+            for dep in entry.deps:
+                dep.replay(self)
+            return
+
+        self.cache_stats.misses += 1
+        deps: list[Dependency] = []
+        fsys = self.fsys
+        recorder = _RecordingChain(fsys)
+        self._recording = deps
+        self._record_failed = False
+        # Swap in the recorder, so model components and texture searches are tracked too.
+        self.fsys = recorder
+        start = time.perf_counter()
+        try:
+            func(file)
+        finally:
+            self.fsys = fsys
+            self._recording = None
+        duration = time.perf_counter() - start
+        self.cache_stats.time_spent += duration
+        if self._record_failed:
+            self.dep_cache.pop(file.filename, None)
+            return
+
+        recorder.accessed.pop(file.filename, None)
+        self.dep_cache[file.filename] = CacheEntry(
+            key, file.optional, skinset,
+            tuple(recorder.accessed.items()), tuple(deps), duration,
+        )
+
@@ -0,0 +1,151 @@
+"""Records the antigel materials generated by previous compiles.
+
+To generate antigel materials, each source material needs to be parsed and patches applied to find
+its ``$basetexture``. The manifest records the result for each material, keyed by the cache key of
+the material and every patch parent (modification time or CRC). It also records each generated
+material, so those don't need to be reparsed to find which textures they use. If all keys match,
+no parsing is required.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import os
+import pickle
+
+from srctools import AtomicWriter
+from srctools.filesys import CACHE_KEY_INVALID, FileSystem
+import attrs
+import srctools.logger
+
+from fsys_index import FileKey, file_key
+
+
+LOGGER = srctools.logger.get_logger(__name__)
+MANIFEST_NAME = 'manifest.bin'
+MANIFEST_VERSION = 1
+
+
+@attrs.frozen
+class SourceEntry:
+    """The information we need from a source material."""
+    # The VMT and each patch parent, with their cache keys.
+    sources: tuple[tuple[str, int], ...]
+    # None if there is no $basetexture.
+    texture: str | None
+    noportal: bool
+
+
+@attrs.frozen
+class Generated:
+    """A generated antigel material."""
+    texture: str
+    key: FileKey
+
+
+@attrs.define
+class AntigelStats:
+    """Statistics for how effective the manifest was."""
+    hits: int = 0
+    misses: int = 0
+    generated: int = 0
+
+
+def source_key(fsys: FileSystem, filename: str) -> int:
+    """Fetch the cache key for a source file, or CACHE_KEY_INVALID if not present."""
+    try:
+        return fsys[filename].cache_key()
+    except FileNotFoundError:
+        return CACHE_KEY_INVALID
+
+
+@attrs.define
+class AntigelManifest:
+    """The materials used in previous compiles."""
+    # Casefolded source material -> result.
+    sources: dict[str, SourceEntry] = attrs.Factory(dict)
+    # Generated antigel material -> info.
+    generated: dict[str, Generated] = attrs.Factory(dict)
+    stats: AntigelStats = attrs.Factory(AntigelStats)
+    changed: bool = False
+
+    @classmethod
+    def load(cls, filename: str | os.PathLike[str]) -> AntigelManifest | None:
+        """Load the manifest. If it is missing or invalid, this returns None."""
+        try:
+            with open(filename, 'rb') as f:
+                version, sources, generated = pickle.load(f)
+            if version != MANIFEST_VERSION:
+                return None
+            return cls(
+                {
+                    mat: SourceEntry(tuple(map(tuple, src)), texture, noportal)
+                    for mat, (src, texture, noportal) in sources.items()
+                },
+                {
+                    mat: Generated(texture, tuple(key))
+                    for mat, (texture, key) in generated.items()
+                },
+            )
+        except FileNotFoundError:
+            return None
+        except Exception:
+            LOGGER.warning('Could not load antigel manifest "{}"!', filename, exc_info=True)
+            return None
+
+    def save(self, filename: str | os.PathLike[str]) -> None:
+        """Write the manifest back to disk."""
+        sources = {
+            mat: (entry.sources, entry.texture, entry.noportal)
+            for mat, entry in self.sources.items()
+        }
+        generated = {
+            mat: (gen.texture, gen.key)
+            for mat, gen in self.generated.items()
+        }
+        with AtomicWriter(filename, is_bytes=True) as f:
+            pickle.dump((MANIFEST_VERSION, sources, generated), f, pickle.HIGHEST_PROTOCOL)
+
+    def check_generated(self, material_folder: Path) -> None:
+        """Discard any generated materials which have been modified or deleted."""
+        for mat_name, gen in list(self.generated.items()):
+            if file_key(material_folder / f'{mat_name}.vmt') != gen.key:
+                LOGGER.info('Antigel material {} was modified, regenerating.', mat_name)
+                del self.generated[mat_name]
+                self.changed = True
+
+    def add_generated(self, mat_name: str, texture: str, filename: Path) -> None:
+        """Record a material that was written."""
+        key = file_key(filename)
+        if key is not None:
+            self.generated[mat_name] = Generated(texture, key)
+            self.changed = True
+
+    def lookup(self, fsys: FileSystem, mat_name: str) -> SourceEntry | None:
+        """Fetch the information for a material, if its sources are unchanged."""
+        entry = self.sources.get(mat_name.casefold())
+        if entry is not None and all(
+            key != CACHE_KEY_INVALID and source_key(fsys, filename) == key
+            for filename, key in entry.sources
+        ):
+            self.stats.hits += 1
+            return entry
+        self.stats.misses += 1
+        return None
+
+    def record(
+        self,
+        fsys: FileSystem, mat_name: str, filenames: list[str],
+        texture: str | None, noportal: bool,
+    ) -> SourceEntry:
+        """Record the information found for a material, and the files it was parsed from."""
+        entry = self.sources[mat_name.casefold()] = SourceEntry(
+            tuple([(filename, source_key(fsys, filename)) for filename in filenames]),
+            texture, noportal,
+        )
+        self.changed = True
+        return entry
+
+    def discard(self, mat_name: str) -> None:
+        """Remove a material which no longer exists."""
+        if self.sources.pop(mat_name.casefold(), None) is not None:
+            self.changed = True
@@ -371,7 +371,7 @@ class IndicatorStyle:
         return build
 
     @classmethod
-    def from_legacy(cls, id_to_item: dict[utils.ObjectID, editoritems.Item]) -> IndicatorStyle:
+    def from_legacy(cls, id_to_item: Mapping[utils.ObjectID, editoritems.Item]) -> IndicatorStyle:
         """Produce the original legacy configs by reading from editoritems."""
         check_item = id_to_item[INDICATOR_CHECK_ID]
         timer_item = id_to_item[INDICATOR_TIMER_ID]
@@ -3,7 +3,7 @@
 """
 from __future__ import annotations
 
-from collections.abc import Iterable, Iterator, ItemsView, MutableMapping
+from collections.abc import Iterable, Iterator, ItemsView, Mapping, MutableMapping
 from collections import deque
 from typing import Any, Self
 from enum import Enum
@@ -272,7 +272,7 @@ class Grid(MutableMapping[_GridKeys, Block]):
         """Return a view over the grid items."""
         return _GridItemsView(self._grid)
 
-    def read_from_map(self, vmf: VMF, items: dict[utils.ObjectID, editoritems.Item]) -> set[str]:
+    def read_from_map(self, vmf: VMF, items: Mapping[utils.ObjectID, editoritems.Item]) -> set[str]:
         """Given the map file, set blocks. This returns some voice attributes that may be set."""
         from precomp.instance_traits import get_item_id
         from precomp import bottomlessPit
@@ -32,6 +32,7 @@ from __future__ import annotations
 from typing import Protocol, Any, Final, overload, cast, get_type_hints
 from collections.abc import Callable, Iterable, Mapping, MutableMapping
 from collections import defaultdict
+from contextlib import nullcontext
 from decimal import Decimal
 from enum import Enum
 import decimal
@@ -55,6 +56,7 @@ import trio
 from precomp import instanceLocs, rand
 from precomp.collisions import Collisions
 from precomp.corridor import Info as MapInfo
+from precomp.profiler import CompileProfile
 from quote_pack import QuoteInfo
 import consts
 import utils
@@ -756,8 +758,12 @@ def check_all(
     coll: Collisions,
     info: MapInfo,
     voice_data: QuoteInfo,
+    profile: CompileProfile | None = None,
 ) -> None:
-    """Check all conditions."""
+    """Check all conditions.
+
+    If a profile is provided, the time taken by each condition source is recorded.
+    """
     ALL_INST.update({
         inst['file'].casefold()
         for inst in vmf.by_class['func_instance']
@@ -777,7 +783,10 @@ def check_all(
     LOGGER.info('-----------------------')
     skipped_cond = 0
     for condition in conditions:
-        with srctools.logger.context(condition.source or ''):
+        with (
+            srctools.logger.context(condition.source or ''),
+            profile.condition(condition.source or '<unknown>') if profile is not None else nullcontext(),
+        ):
             for inst in vmf.by_class['func_instance']:
                 try:
                     condition.test(coll, info, voice_data, inst)
@@ -837,11 +846,7 @@ def check_all(
     LOGGER.info('Map has attributes: {}', sorted(info.iter_attrs()))
     # '' is always present, which sorts first, conveniently adding a \n at the start.
     LOGGER.debug('All instances referenced:{}', '\n'.join(sorted(ALL_INST)))
-    LOGGER.info(
-        'instanceLocs cache: {} & {}',
-        instanceLocs.resolve_cache_info(),
-        instanceLocs.resolve_filter.cache_info(),
-    )
+    LOGGER.info('instanceLocs lookups: {}', instanceLocs.resolve_cache_info())
     LOGGER.info('Style Vars: {}', dict(vbsp.settings['style_vars']))
     LOGGER.info('Global instances: {}', GLOBAL_INSTANCES)
 
@@ -1,7 +1,7 @@
 """Generate random quarter tiles, like in Destroyed or Retro maps."""
 import random
 from collections import defaultdict, namedtuple
-from typing import Tuple, Set, Dict, List
+from typing import Tuple, Set, Dict, List, Optional, Sequence, Iterable
 
 import srctools.logger
 import utils
@@ -151,6 +151,8 @@ def res_cutout_tile(vmf: srctools.VMF, res: Keyvalues):
     # placing tiles - blocks away from the sides generate fewer tiles.
     # all_floors[z][x,y] = count
     floor_neighbours = defaultdict(dict)  # type: Dict[float, Dict[Tuple[float, float], int]]
+    # Noise samples, shared between neighbouring floor sections.
+    noise_cache: Dict[Tuple[float, float, float], float] = {}
 
     for mat_prop in res.find_key('Materials', []):
         MATS[mat_prop.name].append(mat_prop.value)
@@ -372,6 +374,7 @@ def res_cutout_tile(vmf: srctools.VMF, res: Keyvalues):
                 detail_ent,
                 noise_weight=weights[x, y],
                 noise_func=noise,
+                noise_cache=noise_cache,
             )
 
     add_floor_sides(vmf, floor_edges)
@@ -379,18 +382,59 @@ def res_cutout_tile(vmf: srctools.VMF, res: Keyvalues):
     return conditions.RES_EXHAUSTED
 
 
+# The neighbouring offsets averaged together by get_noise(), in order.
+NOISE_OFFSETS = [
+    (x, y)
+    for x in (-1, 0, 1)
+    for y in (-1, 0, 1)
+]
+
+
+def noise3_many(noise_func: SimplexNoise, points: Iterable[Tuple[float, float, float]]) -> List[float]:
+    """Evaluate the noise function at many points at once."""
+    noise3 = noise_func.noise3
+    return [noise3(x, y, z) for x, y, z in points]
+
+
 def get_noise(loc: Vec, noise_func: SimplexNoise):
     """Generate a number between 0 and 1.
 
     This is used to determine where tiles are placed.
     """
+    [value] = get_noise_many([loc], noise_func)
+    return value
+
+
+def get_noise_many(
+    locs: Sequence[Vec],
+    noise_func: SimplexNoise,
+    cache: Optional[Dict[Tuple[float, float, float], float]] = None,
+) -> List[float]:
+    """Compute get_noise() for many locations at once.
+
+    Neighbouring locations share most of their samples, so each is only evaluated once.
+    If a cache is passed, samples are also shared between calls using the same noise function.
+    """
+    if cache is None:
+        cache = {}
+    points = [
+        (loc.x + x, loc.y + y, loc.z)
+        for loc in locs
+        for x, y in NOISE_OFFSETS
+    ]
+    missing = list(dict.fromkeys(point for point in points if point not in cache))
+    cache.update(zip(missing, noise3_many(noise_func, missing)))
+
     # Average between the neighbouring locations, to smooth out changes.
-    return sum(
-        # + 1 / 2 fixes the value range (originally -1,1 -> 0,1)
-        (noise_func.noise3(loc.x + x, loc.y + y, loc.z) + 1) / 2
-        for x in (-1, 0, 1)
-        for y in (-1, 0, 1)
-    ) / 9
+    step = len(NOISE_OFFSETS)
+    return [
+        sum(
+            # + 1 / 2 fixes the value range (originally -1,1 -> 0,1)
+            (cache[point] + 1) / 2
+            for point in points[i:i + step]
+        ) / step
+        for i in range(0, len(points), step)
+    ]
 
 
 def convert_floor(
@@ -403,6 +447,7 @@ def convert_floor(
     detail,
     noise_weight,
     noise_func: SimplexNoise,
+    noise_cache: Dict[Tuple[float, float, float], float],
 ):
     """Cut out tiles at the specified location."""
     # We pop it, so the face isn't detected by other logic - otherwise it'll
@@ -446,8 +491,13 @@ def convert_floor(
     loc.x -= 64
     loc.y -= 64
 
-    for x, y in utils.iter_grid(max_x=4, max_y=4):
-        tile_loc = loc + (x * 32 + 16, y * 32 + 16, 0)
+    tile_locs = [
+        loc + (x * 32 + 16, y * 32 + 16, 0)
+        for x, y in utils.iter_grid(max_x=4, max_y=4)
+    ]
+    tile_noise = get_noise_many([tile_loc // 32 for tile_loc in tile_locs], noise_func, noise_cache)
+
+    for tile_loc, noise in zip(tile_locs, tile_noise):
         if tile_loc.as_tuple() in signage_loc:
             # Force the tile to be present under signage..
             should_make_tile = True
@@ -456,7 +506,7 @@ def convert_floor(
             signage_loc.remove(tile_loc.as_tuple())
         else:
             # Create a number between 0-100
-            rand = 100 * get_noise(tile_loc // 32, noise_func) + 10
+            rand = 100 * noise + 10
 
             # Adjust based on the noise_weight value, so boundries have more tiles
             rand *= 0.1 + 0.9 * (1 - noise_weight)
@@ -757,18 +807,19 @@ def make_displacement(
         # We can duplicate immutable strings fine..
         face.disp_data[key] = [val * grid_size] * grid_size
 
+    alphas = get_noise_many([
+        Vec(
+            bbox_min.x + x * x_vert,
+            bbox_min.y + y * y_vert,
+            bbox_min.z,
+        ) // max(x_vert, y_vert)
+        for y in range(grid_size)
+        for x in range(grid_size)
+    ], noise)
     face.disp_data['alphas'] = [
         ' '.join(
-            str(512 * get_noise(
-                Vec(
-                    bbox_min.x + x * x_vert,
-                    bbox_min.y + y * y_vert,
-                    bbox_min.z,
-                ) // max(x_vert, y_vert),
-                noise,
-            ))
-            for x in
-            range(grid_size)
+            str(512 * alpha)
+            for alpha in alphas[y * grid_size:(y + 1) * grid_size]
         )
         for y in range(grid_size)
     ]
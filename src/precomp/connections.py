@@ -6,10 +6,10 @@ the outputs with optimisations and custom settings.
 from __future__ import annotations
 from typing import assert_never
 from collections import defaultdict
-from collections.abc import Iterable, Iterator, Sequence
+from collections.abc import Iterable, Iterator, Mapping, Sequence
 import string
 
-from srctools import conv_bool
+from srctools import EmptyMapping, conv_bool
 from srctools.math import FrozenVec, Vec, Angle, format_float
 from srctools.vmf import VMF, EntityFixup, Entity, Output
 import srctools.logger
@@ -33,7 +33,44 @@ __all__ = [
 
 COND_MOD_NAME = "Item Connections"
 LOGGER = srctools.logger.get_logger(__name__)
-ITEM_TYPES: dict[utils.ObjectID, Config] = {}
+
+
+class ItemTypes(Mapping[utils.ObjectID, Config]):
+    """The connection configuration for each item type.
+
+    This is fetched from the item definition only when first required, so unused items
+    don't need to be decoded.
+    """
+    def __init__(self) -> None:
+        self._items: Mapping[utils.ObjectID, editoritems.Item] = EmptyMapping
+        self._configs: dict[utils.ObjectID, Config] = {}
+
+    def load(self, items: Mapping[utils.ObjectID, editoritems.Item]) -> None:
+        """Set the item definitions to use."""
+        self._items = items
+        self._configs.clear()
+
+    def __getitem__(self, item_id: utils.ObjectID) -> Config:
+        try:
+            return self._configs[item_id]
+        except KeyError:
+            pass
+        item = self._items[item_id]
+        # Generate a blank config if not present.
+        conf = self._configs[item_id] = item.conn_config if item.conn_config is not None else Config(item.id)
+        return conf
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self._items
+
+    def __iter__(self) -> Iterator[utils.ObjectID]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+ITEM_TYPES = ItemTypes()
 
 # Targetname -> item
 ITEMS: dict[str, Item] = {}
@@ -504,16 +541,9 @@ def collapse_item(item: Item) -> None:
     item.inst.remove()
 
 
-def read_configs(all_items: Iterable[editoritems.Item]) -> None:
+def read_configs(all_items: Mapping[utils.ObjectID, editoritems.Item]) -> None:
     """Load our connection configuration from the config files."""
-    for item in all_items:
-        if item.id in ITEM_TYPES:
-            raise ValueError(f'Duplicate item type "{item.id}"')
-        if item.conn_config is None:
-            # Generate a blank config.
-            ITEM_TYPES[item.id] = Config(item.id)
-        else:
-            ITEM_TYPES[item.id] = item.conn_config
+    ITEM_TYPES.load(all_items)
 
     # These must exist.
     for def_item in [consts.DefaultItems.indicator_check, consts.DefaultItems.indicator_timer]:
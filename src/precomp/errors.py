@@ -3,13 +3,14 @@ from __future__ import annotations
 from typing import Final, Literal
 
 from pathlib import Path
+from collections import defaultdict
 from collections.abc import Iterable, Mapping
 import pickle
 
 from srctools import FrozenVec, Vec, VMF, AtomicWriter, logger
 import attrs
 
-from user_errors import DATA_LOC, UserError, TOK_VBSP_LEAK
+from user_errors import DATA_LOC, UserError, TileArrays, TOK_VBSP_LEAK
 from precomp.tiling import TileDef
 from precomp.brushLoc import Grid as BrushLoc
 from precomp import options, barriers, grid_optim
@@ -36,12 +37,16 @@ def _vec2tup(vec: Vec | FrozenVec) -> tuple[float, float, float]:
 
 
 def load_tiledefs(tiles: Iterable[TileDef], grid: BrushLoc) -> None:
-    """Load tiledef info into a simplified tiles list."""
+    """Load tiledef info into a simplified tiles list.
 
+    Tiles are merged into rectangles, to reduce the amount of data the error display needs.
+    """
     tiles_white = UserError.simple_tiles["white"]
     tiles_black = UserError.simple_tiles["black"]
     tiles_goo_partial = UserError.simple_tiles["goopartial"]
     tiles_goo_full = UserError.simple_tiles["goofull"]
+    # For each plane, the tile list each voxel face should be added to.
+    planes: dict[PlaneKey, dict[tuple[int, int], TileArrays]] = defaultdict(dict)
     for tile in tiles:
         if not tile.base_type.is_tile:
             continue
@@ -58,21 +63,44 @@ def load_tiledefs(tiles: Iterable[TileDef], grid: BrushLoc) -> None:
             tile_list = tiles_white
         else:
             tile_list = tiles_black
-        tile_list.append({
-            'orient': NORM_2_ORIENT[tile.normal.freeze()],
-            'position': _vec2tup((tile.pos + 64 * tile.normal) / 128),
-            'width': 1.0,
-            'height': 1.0,
-        })
+        face_pos = tile.pos + 64 * tile.normal
+        plane = PlaneKey(tile.normal, face_pos)
+        local = plane.world_to_plane(face_pos)
+        # Tiles are centered on 128 + 64, convert to voxel indexes.
+        planes[plane][round((local.x - 64) / 128), round((local.y - 64) / 128)] = tile_list
+
+    for plane, plane_tiles in planes.items():
+        orient = NORM_2_ORIENT[plane.normal]
+        for min_u, min_v, max_u, max_v, tile_list in grid_optim.optimise(plane_tiles):
+            max_u += 1
+            max_v += 1
+            pos = plane.plane_to_world(
+                64.0 * (min_u + max_u),
+                64.0 * (min_v + max_v),
+            )
+            tile_list.append(
+                orient,
+                _vec2tup(pos / 128),
+                float(max_u - min_u),
+                float(max_v - min_v),
+            )
+
     goo_tiles = UserError.simple_tiles["goo"]
+    # Goo surfaces for each height level.
+    goo_levels: dict[float, dict[tuple[int, int], TileArrays]] = defaultdict(dict)
     for pos, block in grid.items():
         if block.is_top:  # Both goo and bottomless pits.
-            goo_tiles.append({
-                'orient': 'd',
-                'position': _vec2tup(pos + (0.5, 0.5, 0.75)),
-                'width': 1.0,
-                'height': 1.0,
-            })
+            goo_levels[pos.z][round(pos.x), round(pos.y)] = goo_tiles
+    for z, level in goo_levels.items():
+        for min_x, min_y, max_x, max_y, tile_list in grid_optim.optimise(level):
+            max_x += 1
+            max_y += 1
+            tile_list.append(
+                'd',
+                _vec2tup(Vec((min_x + max_x) / 2, (min_y + max_y) / 2, z + 0.75)),
+                float(max_x - min_x),
+                float(max_y - min_y),
+            )
     LOGGER.info('Stored map geometry for error display.')
 
 
@@ -94,12 +122,12 @@ def load_barriers(barrier_map: dict[PlaneKey, PlaneGrid[barriers.Barrier]]) -> N
                 32.0 * (min_v + max_v) / 2.0,
                 1.0,
             )
-            tile_list.append({
-                'orient': orient,
-                'position': _vec2tup(pos / 128.0),
-                'width': 0.25 * (max_u - min_u),
-                'height': 0.25 * (max_v - min_v),
-            })
+            tile_list.append(
+                orient,
+                _vec2tup(pos / 128.0),
+                0.25 * (max_u - min_u),
+                0.25 * (max_v - min_v),
+            )
 
 
 def make_map(error: UserError) -> VMF:
@@ -15,12 +15,14 @@ Valid path styles:
 """
 from __future__ import annotations
 from typing import overload
-from collections.abc import Callable, Iterable
+from collections.abc import Iterable
 from collections import defaultdict
-from functools import lru_cache
 import logging
 import re
 
+import attrs
+
+from editoritems_db import ItemSummary
 import editoritems
 import srctools.logger
 import corridor
@@ -228,19 +230,48 @@ SPECIAL_INST_FOLDED = {
     SPECIAL_INST.items()
 }
 
+# Every selector known after the config is loaded, mapped to the instances it produces.
+# Keys are casefolded. This is "<ITEM_ID>", "<ITEM_ID:index>", "<ITEM_ID:bee2_custom>" and "[special]".
+_TABLE: dict[str, list[str]] = {}
+_TABLE_FILTER: dict[str, frozenset[str]] = {}
+# Any other strings are parsed when first used, then stored here.
+_FALLBACK: dict[str, list[str]] = {}
+_FALLBACK_FILTER: dict[str, frozenset[str]] = {}
+
+
+@attrs.define
+class ResolveStats:
+    """Counts how selectors were resolved during a compile."""
+    table: int = 0  # Found in the precomputed table.
+    fallback_hits: int = 0  # An unusual string, which was already parsed.
+    fallback_parses: int = 0  # An unusual string, which had to be parsed.
+
+    def __str__(self) -> str:
+        total = self.table + self.fallback_hits + self.fallback_parses
+        return (
+            f'{total} lookups, {self.table} from table, '
+            f'{self.fallback_hits} cached fallbacks, {self.fallback_parses} parsed'
+        )
+
+
+STATS = ResolveStats()
+
 
-def load_conf(items: Iterable[editoritems.Item]) -> None:
-    """Read the config and build our dictionaries."""
+def load_conf(items: Iterable[editoritems.Item | ItemSummary]) -> None:
+    """Read the config and build our dictionaries.
+
+    This only requires the summary from the editoritems database, not the full items.
+    """
     cust_instances: dict[str, str]
-    EMPTY = editoritems.FSPath()
     for item in items:
+        if isinstance(item, editoritems.Item):
+            item = ItemSummary.from_item(item)
         # Extra definitions: key -> filename.
         # Make sure to do this first, so numbered instances are set in
         # ITEM_FOR_FILE.
         if item.cust_instances:
             CUST_INST_FILES[item.id.casefold()] = cust_instances = {}
-            for name, file in item.cust_instances.items():
-                fname = str(file)
+            for name, fname in item.cust_instances.items():
                 if fname == '.':
                     cust_instances[name] = ''
                 else:
@@ -249,11 +280,10 @@ def load_conf(items: Iterable[editoritems.Item]) -> None:
 
         # Normal instances: index -> filename
         INSTANCE_FILES[item.id.casefold()] = [
-            '' if inst.inst == EMPTY else str(inst.inst)
-            for inst in item.instances
+            '' if fname == '.' else fname
+            for fname in item.instances
         ]
-        for ind, inst in enumerate(item.instances):
-            fname = str(inst.inst)
+        for ind, fname in enumerate(item.instances):
             # Not real instances.
             if fname != '.' and not fname.casefold().startswith('instances/bee2_corridor/'):
                 ITEM_FOR_FILE[fname.casefold()] = (item.id, ind)
@@ -264,6 +294,26 @@ def load_conf(items: Iterable[editoritems.Item]) -> None:
         for key, val_string in
         SPECIAL_INST.items()
     })
+    _build_table()
+
+
+def _build_table() -> None:
+    """Compute the results for every known selector."""
+    _TABLE.clear()
+    _TABLE_FILTER.clear()
+    _FALLBACK.clear()
+    _FALLBACK_FILTER.clear()
+    for item_id, instances in INSTANCE_FILES.items():
+        _TABLE[f'<{item_id}>'] = instances.copy()
+        for ind, inst in enumerate(instances):
+            # Blank instances are skipped when given an index.
+            _TABLE[f'<{item_id}:{ind}>'] = [inst] if inst else []
+        for name, inst in CUST_INST_FILES.get(item_id, {}).items():
+            _TABLE[f'<{item_id}:bee2_{name.casefold()}>'] = [inst]
+    for name, instances in INST_SPECIAL.items():
+        _TABLE[f'[{name}]'] = instances.copy()
+    for key, instances in _TABLE.items():
+        _TABLE_FILTER[key] = _to_filter(instances)
 
 
 def set_chosen_corridor(
@@ -292,9 +342,8 @@ def set_chosen_corridor(
             for i in range(1, count + 1):
                 INST_SPECIAL[f'{prefix}{i}'] = []
             INSTANCE_FILES[item_id.casefold()][:count] = [''] * count
-    # Clear in case these were evaluated before.
-    _resolve.cache_clear()
-    resolve_filter.cache_clear()
+    # Recompute, in case these were evaluated before.
+    _build_table()
 
 
 def resolve(path: str, silent: bool = False) -> list[str]:
@@ -310,29 +359,65 @@ def resolve(path: str, silent: bool = False) -> list[str]:
     If silent is True, no error messages will be output (for use with hardcoded
     names).
     """
+    try:
+        result = _TABLE[path.casefold()]
+    except KeyError:
+        pass
+    else:
+        STATS.table += 1
+        return result
+    try:
+        result = _FALLBACK[path]
+    except KeyError:
+        pass
+    else:
+        STATS.fallback_hits += 1
+        return result
+
+    STATS.fallback_parses += 1
     if silent:
         # Ignore messages < ERROR (warning and info)
         log_level = LOGGER.level
         LOGGER.setLevel(logging.ERROR)
         try:
-            return _resolve(path)
+            result = _resolve(path)
         finally:
             LOGGER.setLevel(log_level)
     else:
-        return _resolve(path)
+        result = _resolve(path)
+    _FALLBACK[path] = result
+    return result
+
+
+def _to_filter(instances: list[str]) -> frozenset[str]:
+    """Convert a list of instances into the form used for filtering."""
+    return frozenset({
+        filename.casefold()
+        for filename in instances
+        if filename
+    })
 
 
-@lru_cache(maxsize=100)
 def resolve_filter(path: str, silent: bool = False) -> frozenset[str]:
     """Resolve an instance path into a list of instances, for filtering.
 
     This skips empty filenames, and filters them all.
     """
-    return frozenset({
-        filename.casefold()
-        for filename in resolve(path, silent)
-        if filename
-    })
+    try:
+        result = _TABLE_FILTER[path.casefold()]
+    except KeyError:
+        pass
+    else:
+        STATS.table += 1
+        return result
+    try:
+        result = _FALLBACK_FILTER[path]
+    except KeyError:
+        # resolve() updates the stats.
+        result = _FALLBACK_FILTER[path] = _to_filter(resolve(path, silent))
+    else:
+        STATS.fallback_hits += 1
+    return result
 
 
 @overload
@@ -361,12 +446,8 @@ def resolve_one[Default](path: str, default: str | Default = '', *, error: bool
     return instances[0]
 
 
-# Cache the return values, since they're constant.
-@lru_cache(maxsize=100)
 def _resolve(path: str) -> list[str]:
-    """Use a secondary function to allow caching values, while ignoring the
-    'silent' parameter.
-    """
+    """Parse a selector string. The result is cached by resolve()."""
     groups = _RE_DEFS.findall(path)
     if groups:
         out = []
@@ -456,8 +537,9 @@ def get_subitems(comma_list: str, item_inst: list[str], item_id: str) -> list[st
     return inst_out
 
 
-# Make this publicly accessible.
-resolve_cache_info: Callable[[], object] = _resolve.cache_info
+def resolve_cache_info() -> ResolveStats:
+    """Return statistics about how selectors were resolved."""
+    return STATS
 
 
 def get_cust_inst(item_id: str, inst: str) -> str | None:
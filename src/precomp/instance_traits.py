@@ -1,5 +1,5 @@
 """Adds various traits to instances, based on item classes."""
-from collections.abc import MutableMapping
+from collections.abc import Mapping, MutableMapping
 from weakref import WeakKeyDictionary
 
 import attrs
@@ -187,7 +187,7 @@ def get_item_id(inst: Entity) -> utils.ObjectID | None:
         return None
 
 
-def set_traits(vmf: VMF, id_to_item: dict[utils.ObjectID, Item], coll: Collisions) -> set[str]:
+def set_traits(vmf: VMF, id_to_item: Mapping[utils.ObjectID, Item], coll: Collisions) -> set[str]:
     """Scan through the map, apply traits to instances, and set initial collisions.
 
     This returns a set of strings listing the used instances, for debugging purposes.
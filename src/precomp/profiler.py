@@ -0,0 +1,187 @@
+"""Records timing and memory statistics for each phase of the compile.
+
+This allows finding which part of the compile is slow for a specific map or package set.
+The report is written as JSON next to the styled map. Tracking allocations with tracemalloc and
+running cProfile both slow down the compile, so those need to be enabled in compile.cfg.
+"""
+from __future__ import annotations
+from typing import Any
+
+from collections.abc import Iterator
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from srctools import VMF, AtomicWriter, logger
+import attrs
+import psutil
+
+from BEE2_config import ConfigFile
+import utils
+
+
+LOGGER = logger.get_logger(__name__)
+REPORT_VERSION = 1
+
+
+@attrs.define
+class PhaseStats:
+    """The statistics recorded for a single phase."""
+    name: str
+    wall: float = 0.0
+    cpu: float = 0.0
+    # Memory usage of the process after the phase, and the peak usage so far.
+    rss: int = 0
+    rss_peak: int = 0
+    # If tracemalloc is enabled, the change in allocated memory and the peak during this phase.
+    mem_delta: int | None = None
+    mem_peak: int | None = None
+    ents_before: int | None = None
+    ents_after: int | None = None
+    brushes_before: int | None = None
+    brushes_after: int | None = None
+
+
+@attrs.define
+class ConditionStats:
+    """Total time spent running conditions from a specific source."""
+    source: str
+    count: int = 0
+    wall: float = 0.0
+
+
+def count_map(vmf: VMF) -> tuple[int, int]:
+    """Count the number of entities and brushes in the map."""
+    brushes = len(vmf.brushes) + sum(len(ent.solids) for ent in vmf.entities)
+    return len(vmf.entities), brushes
+
+
+def _peak_rss(proc: psutil.Process) -> int:
+    """Return the peak memory usage of the process, if available."""
+    mem = proc.memory_info()
+    if utils.WIN:
+        # Only present on Windows, so the stubs for other platforms lack it.
+        return int(mem.peak_wset)  # type: ignore[attr-defined, unused-ignore]
+    try:
+        import resource
+    except ImportError:
+        return int(mem.rss)
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, Mac reports bytes.
+    return usage if utils.MAC else usage * 1024
+
+
+@attrs.define(eq=False)
+class CompileProfile:
+    """Collects statistics for the compile."""
+    trace_memory: bool = False
+    use_cprofile: bool = False
+    phases: list[PhaseStats] = attrs.Factory(list)
+    conditions: dict[str, ConditionStats] = attrs.Factory(dict)
+    _start: float = attrs.field(init=False, factory=time.perf_counter)
+    _proc: psutil.Process = attrs.field(init=False, factory=psutil.Process)
+    _cprofile: cProfile.Profile | None = attrs.field(init=False, default=None)
+
+    @classmethod
+    def from_config(cls, conf: ConfigFile) -> CompileProfile:
+        """Create the profile, using options set in compile.cfg."""
+        return cls(
+            trace_memory=conf.get_bool('General', 'profile_trace_memory'),
+            use_cprofile=conf.get_bool('General', 'profile_cprofile'),
+        )
+
+    def start(self) -> None:
+        """Begin profiling."""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.use_cprofile and self._cprofile is None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop(self) -> None:
+        """Stop profiling, this is safe to call multiple times."""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def phase(self, name: str, vmf: VMF | None = None) -> Iterator[PhaseStats]:
+        """Record statistics for the code run inside this context."""
+        stats = PhaseStats(name)
+        if vmf is not None:
+            stats.ents_before, stats.brushes_before = count_map(vmf)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            mem_start = tracemalloc.get_traced_memory()[0]
+        else:
+            mem_start = 0
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield stats
+        finally:
+            stats.cpu = time.process_time() - cpu_start
+            stats.wall = time.perf_counter() - wall_start
+            if tracing:
+                mem_cur, mem_peak = tracemalloc.get_traced_memory()
+                stats.mem_delta = mem_cur - mem_start
+                stats.mem_peak = mem_peak - mem_start
+            try:
+                stats.rss = int(self._proc.memory_info().rss)
+                stats.rss_peak = _peak_rss(self._proc)
+            except psutil.Error:
+                pass
+            if vmf is not None:
+                stats.ents_after, stats.brushes_after = count_map(vmf)
+            self.phases.append(stats)
+            LOGGER.debug('Phase "{}": {:.3f}s', name, stats.wall)
+
+    @contextlib.contextmanager
+    def condition(self, source: str) -> Iterator[None]:
+        """Record the time spent running a condition."""
+        try:
+            stats = self.conditions[source]
+        except KeyError:
+            stats = self.conditions[source] = ConditionStats(source)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats.wall += time.perf_counter() - start
+            stats.count += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Produce the JSON data for the report."""
+        return {
+            'version': REPORT_VERSION,
+            'bee_version': utils.BEE_VERSION,
+            'python': sys.version,
+            'total': time.perf_counter() - self._start,
+            'trace_memory': self.trace_memory,
+            'phases': [attrs.asdict(phase) for phase in self.phases],
+            # Slowest first.
+            'conditions': [
+                attrs.asdict(cond)
+                for cond in sorted(self.conditions.values(), key=lambda cond: cond.wall, reverse=True)
+            ],
+        }
+
+    def write_report(self, map_path: str) -> None:
+        """Write the report next to the specified map, and the cProfile dump if enabled."""
+        self.stop()
+        base = os.path.splitext(map_path)[0]
+        try:
+            with AtomicWriter(base + '.profile.json') as f:
+                json.dump(self.as_dict(), f, indent='\t')
+            if self._cprofile is not None:
+                self._cprofile.dump_stats(base + '.prof')
+        except OSError:
+            LOGGER.warning('Could not write compile profile:', exc_info=True)
+            return
+        LOGGER.info('Wrote compile profile to "{}.profile.json"', base)
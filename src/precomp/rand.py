@@ -1,7 +1,11 @@
 """Handles randomising values in a repeatable way."""
 from __future__ import annotations
+from typing import Any
+
+from collections.abc import Callable
 from random import Random
 from struct import Struct
+import _random
 import hashlib
 
 from srctools import (
@@ -74,9 +78,89 @@ def init_seed(vmf: VMF) -> None:
     light_names.sort()  # Ensure consistent order!
     for name in light_names:
         MAP_HASH.update(name)
+    _PREFIXES.clear()
     LOGGER.debug('Map random seed: {}', MAP_HASH.hexdigest())
 
 
+def _pack_vec(a: float, b: float, c: float) -> bytes:
+    """Pack a vector or angle, rounding off any imprecision."""
+    # Rounding is relatively slow, but doesn't alter integers which are by far the most common.
+    if a.is_integer() and b.is_integer() and c.is_integer():
+        return THREE_FLOATS.pack(a, b, c)
+    return THREE_FLOATS.pack(round(a, 6), round(b, 6), round(c, 6))
+
+
+def _encode_vec(val: Vec | FrozenVec) -> bytes:
+    """Encode a vector."""
+    return _pack_vec(val.x, val.y, val.z)
+
+
+def _encode_angle(val: Angle | FrozenAngle) -> bytes:
+    """Encode an angle."""
+    return _pack_vec(val.pitch, val.yaw, val.roll)
+
+
+def _encode_matrix(val: Matrix | FrozenMatrix) -> bytes:
+    """Encode a rotation matrix."""
+    return NINE_FLOATS.pack(
+        val[0, 0], val[0, 1], val[0, 2],
+        val[1, 0], val[1, 1], val[1, 2],
+        val[2, 0], val[2, 1], val[2, 2],
+    )
+
+
+def _encode_entity(val: Entity) -> bytes:
+    """Encode an entity, using its name and position."""
+    # The origin is hashed twice - the second was meant to be the angles, but changing it would alter seeds.
+    origin = _pack_vec(*Vec.from_str(val['origin']))
+    return val['targetname'].encode('ascii', 'replace') + origin + origin
+
+
+def _encode_value(
+    val: str | Entity | float | bytes | bytearray |
+        Vec | FrozenVec | Angle | FrozenAngle | Matrix | FrozenMatrix,
+) -> bytes:
+    """Encode any value, including subclasses of the supported types."""
+    match val:
+        case str():
+            return val.encode('utf8')
+        case Vec() | FrozenVec():
+            return _encode_vec(val)
+        case Angle() | FrozenAngle():
+            return _encode_angle(val)
+        case float():
+            return ONE_FLOAT.pack(val)
+        case int():
+            # If multi-digit, hashing puts it back into valid range.
+            return ONE_INT.pack(hash(val))
+        case Matrix() | FrozenMatrix():
+            return _encode_matrix(val)
+        case Entity():
+            return _encode_entity(val)
+        case _:
+            return memoryview(val).tobytes()
+
+
+# For exact types, skip the isinstance() checks.
+_ENCODERS: dict[type, Callable[[Any], bytes]] = {
+    str: lambda val: val.encode('utf8'),
+    bytes: lambda val: val,
+    float: ONE_FLOAT.pack,
+    int: lambda val: ONE_INT.pack(hash(val)),
+    Vec: _encode_vec,
+    FrozenVec: _encode_vec,
+    Angle: _encode_angle,
+    FrozenAngle: _encode_angle,
+    Matrix: _encode_matrix,
+    FrozenMatrix: _encode_matrix,
+    Entity: _encode_entity,
+}
+# Random.seed() only does type checks before calling this for integers.
+_SEED_INT = _random.Random.seed
+# For each name, MAP_HASH with that name fed in. Names are all constants, so this stays small.
+_PREFIXES: dict[bytes, hashlib._Hash] = {}
+
+
 def seed(
     name: bytes,
     *values: str | Entity | float | bytes | bytearray |
@@ -87,35 +171,25 @@ def seed(
     The name is used to make this unique among other calls, then the arguments
     are hashed in.
     """
-    algo = MAP_HASH.copy()
-    algo.update(name)
-    for val in values:
-        match val:
-            case str():
-                algo.update(val.encode('utf8'))
-            case Vec() | FrozenVec() | Angle() | FrozenAngle():
-                a, b, c = val
-                algo.update(THREE_FLOATS.pack(round(a, 6), round(b, 6), round(c, 6)))
-            case float():
-                algo.update(ONE_FLOAT.pack(val))
-            case int():
-                # If multi-digit, hashing puts it back into valid range.
-                algo.update(ONE_INT.pack(hash(val)))
-            case Matrix() | FrozenMatrix():
-                algo.update(NINE_FLOATS.pack(
-                    val[0, 0], val[0, 1], val[0, 2],
-                    val[1, 0], val[1, 1], val[1, 2],
-                    val[2, 0], val[2, 1], val[2, 2],
-                ))
-            case Entity():
-                algo.update(val['targetname'].encode('ascii', 'replace'))
-                x, y, z = round(Vec.from_str(val['origin']), 6)
-                algo.update(THREE_FLOATS.pack(x, y, z))
-                p, y, r = Vec.from_str(val['origin'])
-                algo.update(THREE_FLOATS.pack(round(p, 6), round(y, 6), round(r, 6)))
-            case _:
-                try:
-                    algo.update(val)
-                except TypeError as exc:
-                    raise TypeError(values) from exc
-    return Random(int.from_bytes(algo.digest(), 'little'))
+    try:
+        algo = _PREFIXES[name].copy()
+    except KeyError:
+        prefix = _PREFIXES[name] = MAP_HASH.copy()
+        prefix.update(name)
+        algo = prefix.copy()
+    if values:
+        # Hashing the concatenation is equivalent to feeding each in turn, but quicker.
+        try:
+            data = b''.join([
+                (_ENCODERS.get(type(val)) or _encode_value)(val)
+                for val in values
+            ])
+        except TypeError as exc:
+            raise TypeError(values) from exc
+        algo.update(data)
+    # Equivalent to Random(seed), but calling the C implementation directly.
+    rng = Random.__new__(Random)
+    _SEED_INT(rng, int.from_bytes(algo.digest(), 'little'))
+    # Random() resets this cached value, but it's not in the stubs since it's private.
+    rng.gauss_next = None  # type: ignore[attr-defined]
+    return rng
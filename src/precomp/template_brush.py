@@ -15,7 +15,7 @@ import attrs
 
 from srctools import Keyvalues, conv_bool
 from srctools.filesys import FileSystem, ZipFileSystem, RawFileSystem, VPKFileSystem
-from srctools.math import AnyAngle, AnyMatrix, FrozenVec, Vec, Angle, Matrix, to_matrix
+from srctools.math import AnyAngle, AnyMatrix, FrozenMatrix, FrozenVec, Vec, Angle, Matrix, to_matrix
 from srctools.vmf import Entity, EntityGroup, Solid, Side, VMF, UVAxis, ValidKVs, VisGroup
 from srctools.dmx import Element
 import srctools.logger
@@ -302,6 +302,103 @@ class ExportedTemplate:
     debug_marker: Callable[..., None] | None
 
 
+@attrs.frozen(eq=False)
+class RotatedSide:
+    """A template brush face, with the template orientation already applied.
+
+    Placing only requires offsetting the planes by the origin, and recomputing the UV offsets.
+    """
+    orig: Side
+    planes: tuple[Vec, Vec, Vec]
+    uaxis: Vec
+    vaxis: Vec
+
+
+@attrs.frozen(eq=False)
+class RotatedBrush:
+    """A template brush, with the template orientation already applied.
+
+    If the brush has displacements, sides is None and the brush is copied normally.
+    """
+    orig: Solid
+    sides: list[RotatedSide] | None
+
+
+@attrs.frozen(eq=False)
+class RotatedTemplate:
+    """The brushes for a set of template visgroups, rotated to a specific orientation."""
+    world: list[RotatedBrush]
+    detail: list[RotatedBrush]
+    overlays: list[Entity]
+
+
+def _rotate_brush(brush: Solid, orient: Matrix | FrozenMatrix) -> RotatedBrush:
+    """Precompute the rotated planes and UVs for a brush."""
+    if any(side.is_disp or side.strata_points is not None for side in brush.sides):
+        return RotatedBrush(brush, None)
+    return RotatedBrush(brush, [
+        RotatedSide(
+            side,
+            (side.planes[0] @ orient, side.planes[1] @ orient, side.planes[2] @ orient),
+            side.uaxis.vec() @ orient,
+            side.vaxis.vec() @ orient,
+        )
+        for side in brush.sides
+    ])
+
+
+def _place_brush(
+    vmf: VMF,
+    rotated: RotatedBrush,
+    origin: Vec | FrozenVec,
+    orient: Matrix | FrozenMatrix,
+    id_mapping: dict[int, int],
+) -> Solid:
+    """Copy a rotated brush into the map at the specified origin.
+
+    This produces exactly the same result as copying the original brush, then calling localise().
+    """
+    old_brush = rotated.orig
+    if rotated.sides is None:
+        brush = old_brush.copy(
+            vmf_file=vmf,
+            side_mapping=id_mapping,
+            keep_vis=False,
+        )
+        brush.localise(origin, orient)
+        return brush
+    sides = []
+    for rot_side in rotated.sides:
+        old = rot_side.orig
+        [plane_a, plane_b, plane_c] = rot_side.planes
+        uaxis = rot_side.uaxis
+        vaxis = rot_side.vaxis
+        old_u = old.uaxis
+        old_v = old.vaxis
+        side = Side(
+            vmf,
+            [plane_a + origin, plane_b + origin, plane_c + origin],
+            old.id,
+            old.lightmap,
+            old.smooth,
+            old.mat,
+            old.ham_rot,
+            UVAxis(uaxis.x, uaxis.y, uaxis.z, old_u.offset - uaxis.dot(origin) / old_u.scale, old_u.scale),
+            UVAxis(vaxis.x, vaxis.y, vaxis.z, old_v.offset - vaxis.dot(origin) / old_v.scale, old_v.scale),
+        )
+        id_mapping[old.id] = side.id
+        sides.append(side)
+    return Solid(
+        vmf,
+        -1,
+        sides,
+        set(),
+        group_id=old_brush.group_id,
+        is_cordon=old_brush.is_cordon,
+        editor_color=old_brush.editor_color,
+    )
+
+
 # Make_prism() generates faces aligned to world, copy the required UVs.
 realign_solid: Solid = VMF().make_prism(Vec(-16, -16, -16), Vec(16, 16, 16)).solid
 REALIGN_UVS: Mapping[FrozenVec, tuple[UVAxis, UVAxis]] = {
@@ -314,6 +411,8 @@ del realign_solid
 class Template:
     """Represents a template before it's imported into a map."""
     _data: dict[str, tuple[list[Solid], list[Solid], list[Entity]]]
+    # Visgroups (in iteration order) and matrix values -> the rotated brushes.
+    _rotated: dict[tuple[tuple[str, ...], tuple[float, ...]], RotatedTemplate]
 
     def __init__(
         self, *,
@@ -336,6 +435,7 @@ class Template:
     ) -> None:
         self.id = temp_id
         self._data = {}
+        self._rotated = {}
         self.debug = debug  # When true, dump info to the map when placed.
 
         # We ensure the '' group is always present.
@@ -412,6 +512,28 @@ class Template:
 
         return world_brushes, detail_brushes, overlays
 
+    def rotated(self, visgroups: Collection[str], orient: Matrix | FrozenMatrix) -> RotatedTemplate:
+        """Return the brushes for these visgroups, with the orientation applied.
+
+        This is cached, since templates are generally placed many times in only a few orientations.
+        The visgroups order is significant, since that determines the order of brushes.
+        """
+        key = (
+            tuple(visgroups),
+            tuple([orient[row, col] for row in range(3) for col in range(3)]),
+        )
+        try:
+            return self._rotated[key]
+        except KeyError:
+            pass
+        world, detail, overlays = self.visgrouped(visgroups)
+        rotated = self._rotated[key] = RotatedTemplate(
+            [_rotate_brush(brush, orient) for brush in world],
+            [_rotate_brush(brush, orient) for brush in detail],
+            overlays,
+        )
+        return rotated
+
     def visgrouped_solids(self, visgroups: str | Iterable[str] = ()) -> list[Solid]:
         """Given some visgroups, return the matching brushes.
 
@@ -802,6 +924,20 @@ def get_template(temp_name: str) -> Template:
     return temp
 
 
+def _find_template(temp_name: str | Template, additional_visgroups: Iterable[str]) -> tuple[Template, set[str]]:
+    """Look up the template to import, and determine the visgroups to use."""
+    if isinstance(temp_name, Template):
+        template = temp_name
+        chosen_groups: set[str] = set()
+    else:
+        temp_name, chosen_groups = parse_temp_name(temp_name)
+        template = get_template(temp_name)
+
+    chosen_groups.update(additional_visgroups)
+    chosen_groups.add('')
+    return template, chosen_groups
+
+
 def import_template(
     vmf: VMF,
     temp_name: str | Template,
@@ -837,17 +973,9 @@ def import_template(
       is skipped.
     """
     import vbsp
-    if isinstance(temp_name, Template):
-        template, temp_name = temp_name, temp_name.id
-        chosen_groups: set[str] = set()
-    else:
-        temp_name, chosen_groups = parse_temp_name(temp_name)
-        template = get_template(temp_name)
-
-    chosen_groups.update(additional_visgroups)
-    chosen_groups.add('')
-
-    orig_world, orig_detail, orig_over = template.visgrouped(chosen_groups)
+    template, chosen_groups = _find_template(temp_name, additional_visgroups)
+    orient = to_matrix(angles)
+    rotated = template.rotated(chosen_groups, orient)
 
     new_world: list[Solid] = []
     new_detail: list[Solid] = []
@@ -855,7 +983,6 @@ def import_template(
 
     # A map of the original -> new face IDs.
     id_mapping: dict[int, int] = {}
-    orient = to_matrix(angles)
 
     dbg_visgroup: VisGroup | None = None
     dbg_group: EntityGroup | None = None
@@ -886,19 +1013,13 @@ def import_template(
         )
 
     for orig_list, new_list in [
-        (orig_world, new_world),
-        (orig_detail, new_detail)
+        (rotated.world, new_world),
+        (rotated.detail, new_detail)
     ]:
-        for old_brush in orig_list:
-            brush = old_brush.copy(
-                vmf_file=vmf,
-                side_mapping=id_mapping,
-                keep_vis=False,
-            )
-            brush.localise(origin, orient)
-            new_list.append(brush)
+        for rot_brush in orig_list:
+            new_list.append(_place_brush(vmf, rot_brush, origin, orient, id_mapping))
 
-    for overlay in orig_over:
+    for overlay in rotated.overlays:
         new_overlay = overlay.copy(
             vmf_file=vmf,
             keep_vis=False,
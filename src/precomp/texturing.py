@@ -5,6 +5,7 @@ from typing import ClassVar, TYPE_CHECKING, Any
 from collections.abc import Sequence, Iterable
 from pathlib import Path
 from enum import Enum, StrEnum
+import functools
 import string
 import itertools
 import abc
@@ -13,6 +14,7 @@ import attrs
 import trio
 
 from srctools import FrozenMatrix, FrozenVec, Keyvalues, Vec, conv_bool, conv_float
+from srctools.filesys import FileSystem
 from srctools.game import Game
 from srctools.tokenizer import TokenSyntaxError
 from srctools.vmf import Entity, UVAxis, VisGroup, VMF, Side, Solid
@@ -20,9 +22,11 @@ from srctools.vmt import Material
 import srctools.logger
 
 from precomp import rand
+from precomp.antigel_cache import MANIFEST_NAME, AntigelManifest, SourceEntry
 from precomp.brushLoc import POS as BLOCK_TYPE
 import async_util
 import consts
+import fsys_index
 import utils
 
 if TYPE_CHECKING:
@@ -957,16 +961,51 @@ async def setup(game: Game, vmf: VMF, tiles: list[TileDef]) -> None:
     - Generate antigel materials.
     """
     material_folder = (game.path / '..' / 'bee2' / 'materials').resolve()
-    antigel_loc = material_folder / ANTIGEL_PATH
-    antigel_loc.mkdir(parents=True, exist_ok=True)
 
-    # Basetexture -> material name
-    tex_to_antigel: dict[str, str] = {}
-    # And all the filenames that exist already.
-    antigel_mats: set[str] = set()
+    async with trio.open_nursery() as nursery:
+        # Parse the filesystems (importantly the VPKs) in the background while we check the existing
+        # VMTs.
+        fsys_res = async_util.sync_result(nursery, fsys_index.get_filesystem, game)
+        manifest = await load_antigel_manifest(material_folder)
+
+    fsys, fsys_stats = fsys_res.result()
+    LOGGER.info('Filesystem index: {} VPKs indexed, {} parsed', fsys_stats.hits, fsys_stats.misses)
+    materials: set[str] = set()
+
+    for generator in GENERATORS.values():
+        generator.setup(vmf, tiles)
+
+        # No need to convert if it's overlay, or it's bullseye and those
+        # are incompatible.
+        if generator.category is GenCat.BULLSEYE and not generator.options['antigel_bullseye']:
+            continue
+        if generator.category is GenCat.OVERLAYS:
+            continue
+
+        for (mat_cat, mats) in generator.textures.items():
+            #  Skip these special mats.
+            if mat_cat not in ('glass', 'grating', 'goo', 'goo_cheap'):
+                # We don't care about the configured scale/rotation, just the mat.
+                materials |= {mat_conf.mat for mat_conf in mats}
+
+    await generate_antigel(fsys, material_folder, manifest, materials)
+
+
+async def load_antigel_manifest(material_folder: Path) -> AntigelManifest:
+    """Load the record of previously generated antigel materials.
+
+    If the manifest is missing, existing materials are parsed to determine which are already created.
+    """
+    antigel_loc = material_folder / ANTIGEL_PATH
+    await trio.Path(antigel_loc).mkdir(parents=True, exist_ok=True)
+    manifest = await trio.to_thread.run_sync(AntigelManifest.load, antigel_loc / MANIFEST_NAME)
+    if manifest is not None:
+        await trio.to_thread.run_sync(manifest.check_generated, material_folder)
+        return manifest
+    manifest = AntigelManifest(changed=True)
 
     async def check_existing(filename: Path) -> None:
-        """First, check existing materials to determine which are already created."""
+        """Check an existing material to determine the texture it uses."""
         try:
             with filename.open() as f:
                 exist_mat = await trio.to_thread.run_sync(Material.parse, f, str(filename))
@@ -991,77 +1030,100 @@ async def setup(game: Game, vmf: VMF, tiles: list[TileDef]) -> None:
         if texture is None:
             LOGGER.warning('No $basetexture in antigel material {}!', mat_name)
             return
-        tex_to_antigel[texture.casefold()] = mat_name
-        antigel_mats.add(mat_name.casefold())
+        manifest.add_generated(mat_name, texture, filename)
 
     async with trio.open_nursery() as nursery:
-        # Parse the filesystems (importantly the VPKs) in the background while we check the existing
-        # VMTs.
-        fsys_res = async_util.sync_result(nursery, game.get_filesystem)
         for vmt_file in antigel_loc.glob('*.vmt'):
             nursery.start_soon(check_existing, vmt_file)
+    return manifest
 
-    fsys = fsys_res.result()
-    materials: set[str] = set()
-
-    for generator in GENERATORS.values():
-        generator.setup(vmf, tiles)
 
-        # No need to convert if it's overlay, or it's bullseye and those
-        # are incompatible.
-        if generator.category is GenCat.BULLSEYE and not generator.options['antigel_bullseye']:
-            continue
-        if generator.category is GenCat.OVERLAYS:
-            continue
+async def generate_antigel(
+    fsys: FileSystem,
+    material_folder: Path,
+    manifest: AntigelManifest,
+    materials: Iterable[str],
+) -> None:
+    """Generate antigel materials for each of the specified materials, then save the manifest.
 
-        for (mat_cat, mats) in generator.textures.items():
-            #  Skip these special mats.
-            if mat_cat not in ('glass', 'grating', 'goo', 'goo_cheap'):
-                # We don't care about the configured scale/rotation, just the mat.
-                materials |= {mat_conf.mat for mat_conf in mats}
+    Materials are only parsed if they (or their patch parents) have changed since the last compile.
+    """
+    antigel_loc = material_folder / ANTIGEL_PATH
+    # Basetexture -> material name
+    tex_to_antigel: dict[str, str] = {
+        gen.texture.casefold(): mat_name
+        for mat_name, gen in manifest.generated.items()
+    }
+    # And all the filenames that exist already.
+    antigel_mats: set[str] = {mat_name.casefold() for mat_name in manifest.generated}
 
-    async def generate_mat(mat_name: str) -> None:
-        """Generate an antigel material."""
+    async def parse_mat(mat_name: str) -> SourceEntry | None:
+        """Parse a material to find its texture, recording the result in the manifest."""
+        filename = f'materials/{mat_name}.vmt'
+        parents: list[str] = []
         try:
-            with fsys[f'materials/{mat_name}.vmt'].open_str() as f:
+            with fsys[filename].open_str() as f:
                 mat = await trio.to_thread.run_sync(Material.parse, f, mat_name)
-            mat = await trio.to_thread.run_sync(mat.apply_patches, fsys)
+            mat = await trio.to_thread.run_sync(functools.partial(
+                mat.apply_patches, fsys,
+                parent_func=parents.append,
+            ))
         except FileNotFoundError:
             LOGGER.warning('Material {} does not exist?', mat_name)
-            return
+            manifest.discard(mat_name)
+            return None
         except TokenSyntaxError:
             LOGGER.warning('Material {} cannot be parsed for antigel:', mat_name, exc_info=True)
-            return
+            manifest.discard(mat_name)
+            return None
         try:
             texture = mat['$basetexture']
         except KeyError:
+            texture = None
+        return manifest.record(
+            fsys, mat_name, [filename, *parents],
+            texture, conv_bool(mat.get('%noportal', False)),
+        )
+
+    async def generate_mat(mat_name: str) -> None:
+        """Generate an antigel material."""
+        entry = manifest.lookup(fsys, mat_name)
+        if entry is None:
+            entry = await parse_mat(mat_name)
+            if entry is None:
+                return
+        texture = entry.texture
+        if texture is None:
             LOGGER.warning('No $basetexture in material {}?', mat_name)
             return
         if mat_name.casefold() in ANTIGEL_MATS:
             return
         try:
-            ANTIGEL_MATS[mat_name.casefold()] = tex_to_antigel[texture.casefold()]
-            return
+            antigel_mat = ANTIGEL_MATS[mat_name.casefold()] = tex_to_antigel[texture.casefold()]
         except KeyError:
             pass
-        noportal = conv_bool(mat.get('%noportal', False))
+        else:
+            ANTIGEL_MATS[antigel_mat.casefold()] = antigel_mat
+            return
         # We have to generate.
         antigel_filename = antigel_loc / Path(texture)
         antigel_mat = Path(antigel_filename).relative_to(material_folder).with_suffix('').as_posix()
-        if antigel_mat in antigel_mats:
+        if antigel_mat.casefold() in antigel_mats:
             antigel_filename_base = antigel_filename.name.rstrip(string.digits)
             for i in itertools.count(1):
                 antigel_filename = antigel_filename.with_name(f'{antigel_filename_base}{i:02}')
                 antigel_mat = Path(antigel_filename).relative_to(material_folder).with_suffix('').as_posix()
-                if antigel_mat not in antigel_mats:
+                if antigel_mat.casefold() not in antigel_mats:
                     break
         dest = trio.Path(antigel_filename.with_suffix('.vmt'))
-        antigel_mats.add(antigel_mat)  # Do first, make sure nobody else claims!
+        antigel_mats.add(antigel_mat.casefold())  # Do first, make sure nobody else claims!
         await dest.parent.mkdir(parents=True, exist_ok=True)
         await dest.write_text(ANTIGEL_TEMPLATE.format(
             path=texture,
-            noportal=int(noportal),
+            noportal=int(entry.noportal),
         ))
+        manifest.add_generated(antigel_mat, texture, Path(dest))
+        manifest.stats.generated += 1
         ANTIGEL_MATS[mat_name.casefold()] = tex_to_antigel[texture.casefold()] = antigel_mat
         ANTIGEL_MATS[antigel_mat.casefold()] = antigel_mat  # Make antigel conversion idempotent.
 
@@ -1069,6 +1131,17 @@ async def setup(game: Game, vmf: VMF, tiles: list[TileDef]) -> None:
         for mat_name in materials:
             nursery.start_soon(generate_mat, mat_name)
 
+    stats = manifest.stats
+    LOGGER.info(
+        'Antigel materials: {} unchanged, {} parsed, {} generated',
+        stats.hits, stats.misses, stats.generated,
+    )
+    if manifest.changed:
+        try:
+            await trio.to_thread.run_sync(manifest.save, antigel_loc / MANIFEST_NAME)
+        except OSError:
+            LOGGER.warning('Could not write antigel manifest!', exc_info=True)
+
 
 class Generator(abc.ABC):
     """Base for different texture generators."""
@@ -0,0 +1 @@
+"""Builders for synthetic data, shared by the tests and the benchmarks."""
@@ -0,0 +1,47 @@
+"""Build a synthetic game folder, containing VPKs full of materials."""
+from pathlib import Path
+
+from srctools.game import Game
+from srctools.vpk import VPK
+
+
+GAMEINFO = '''\
+"GameInfo"
+\t{
+\tgame "Benchmark"
+\tFileSystem
+\t\t{
+\t\tSteamAppId 620
+\t\tSearchPaths
+\t\t\t{
+\t\t\tGame |gameinfo_path|.
+\t\t\tGame extra
+\t\t\t}
+\t\t}
+\t}
+'''
+FOLDERS = ['brick', 'concrete', 'metal', 'glass', 'signage', 'effects', 'models/props', 'dev']
+
+
+def material_name(ind: int) -> str:
+    """Produce a material name, spread across several folders."""
+    return f'materials/{FOLDERS[ind % len(FOLDERS)]}/mat_{ind:05}.vmt'
+
+
+def build_game(root: Path, vpks: int, files: int) -> Game:
+    """Build a game folder with the specified VPKs, plus a loose file in a folder."""
+    game_folder = root / 'portal2'
+    game_folder.mkdir(parents=True, exist_ok=True)
+    (root / 'extra' / 'materials').mkdir(parents=True, exist_ok=True)
+    (root / 'bin' / 'bee2').mkdir(parents=True, exist_ok=True)
+    (game_folder / 'gameinfo.txt').write_text(GAMEINFO)
+    (root / 'extra' / 'materials' / 'loose.vmt').write_text('LightmappedGeneric {}')
+    for vpk_ind in range(1, vpks + 1):
+        with VPK(game_folder / f'pak{vpk_ind:02}_dir.vpk', mode='w', dir_data_limit=256) as vpk:
+            for ind in range(files):
+                # Occasionally write a larger file, which is split between the directory and archive.
+                padding = ' ' * (ind % 400) if ind % 7 == 0 else ''
+                text = f'LightmappedGeneric\n{{\n$basetexture "{FOLDERS[ind % len(FOLDERS)]}/tex_{ind}"\n{padding}}}\n'
+                # Put files in the same VPK alternately in the directory and archive.
+                vpk.add_file(material_name(ind), text.encode(), arch_index=None if vpk_ind % 2 else 0)
+    return Game(game_folder)
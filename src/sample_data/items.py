@@ -0,0 +1,128 @@
+"""Build a set of synthetic item definitions, similar to those in the default packages."""
+from editoritems import Item
+import utils
+
+
+PAK_ID = utils.obj_id('BENCH')
+ITEM_TEMPLATE = '''\
+"Item"
+	{{
+	"Type" "{item_id}"
+	"ItemClass" "ItemButtonFloor"
+	"Editor"
+		{{
+		"SubType"
+			{{
+			"Name" "Bench Item {ind} Weighted"
+			"Model" {{ "ModelName" "bench/item_{ind}_a.mdl" }}
+			"Model" {{ "ModelName" "bench/item_{ind}_b.mdl" }}
+			"Palette"
+				{{
+				"Tooltip" "BENCH ITEM {ind}"
+				"Image" "palette/bench/item_{ind}.png"
+				"Position" "{x} {y} 0"
+				}}
+			"Sounds"
+				{{
+				"SOUND_CREATED" "P2Editor.PlaceButton"
+				"SOUND_EDITING_ACTIVATE" "P2Editor.ExpandButton"
+				"SOUND_EDITING_DEACTIVATE" "P2Editor.CollapseButton"
+				"SOUND_DELETED" "P2Editor.RemoveButton"
+				}}
+			"Animations"
+				{{
+				"ANIM_IDLE" "0"
+				"ANIM_EDITING_ACTIVATE" "1"
+				"ANIM_EDITING_DEACTIVATE" "2"
+				}}
+			}}
+		"SubType"
+			{{
+			"Name" "Bench Item {ind} Cube"
+			"Model" {{ "ModelName" "bench/item_{ind}_c.mdl" }}
+			"Palette"
+				{{
+				"Tooltip" "BENCH ITEM {ind} CUBE"
+				"Image" "palette/bench/item_{ind}_cube.png"
+				"Position" "{x} {y} 1"
+				}}
+			}}
+		"MovementHandle" "HANDLE_4_DIRECTIONS"
+		"InvalidSurface" "CEILING"
+		}}
+	"Properties"
+		{{
+		"ButtonType" {{ "DefaultValue" "0" "Index" "0" }}
+		"ConnectionCount" {{ "DefaultValue" "0" "Index" "1" }}
+		"StartEnabled" {{ "DefaultValue" "1" "Index" "2" }}
+		"TimerDelay" {{ "DefaultValue" "3" "Index" "3" }}
+		}}
+	"Exporting"
+		{{
+		"Instances"
+			{{
+			"0" {{
+				"Name" "instances/bench/item_{ind}/weighted.vmf"
+				"EntityCount" "12" "BrushCount" "4" "BrushSideCount" "24"
+				}}
+			"1" {{ "Name" "instances/bench/item_{ind}/cube.vmf" "EntityCount" "10" "BrushCount" "4" "BrushSideCount" "24" }}
+			"2" {{ "Name" "instances/bench/item_{ind}/sphere.vmf" "EntityCount" "10" "BrushCount" "4" "BrushSideCount" "24" }}
+			"bee2_frame" "instances/bench/item_{ind}/frame.vmf"
+			"bee2_light" "instances/bench/item_{ind}/light.vmf"
+			}}
+		"TargetName" "button"
+		"Offset" "64 64 64"
+		"Inputs"
+			{{
+			"BEE2"
+				{{
+				"Type" "AND"
+				"Enable_cmd" "!self,Enable,,0,-1"
+				"Disable_cmd" "!self,Disable,,0,-1"
+				}}
+			}}
+		"Outputs"
+			{{
+			"CONNECTION_STANDARD"
+				{{
+				"Activate" "instance:button;OnPressed"
+				"Deactivate" "instance:button;OnUnPressed"
+				}}
+			}}
+		"OccupiedVoxels"
+			{{
+			"Voxel" {{ "Pos" "0 0 0" "CollideType" "COLLIDE_SOLID" "CollideAgainst" "COLLIDE_SOLID" }}
+			"Voxel" {{ "Pos" "1 0 0" "CollideType" "COLLIDE_SOLID" "CollideAgainst" "COLLIDE_SOLID" }}
+			"Voxel"
+				{{
+				"Pos" "0 0 0"
+				"Surface" {{ "Normal" "0 0 1" }}
+				}}
+			}}
+		"EmbeddedVoxels"
+			{{
+			"Voxel" {{ "Pos" "0 0 -1" }}
+			}}
+		"EmbedFace"
+			{{
+			"Solid" {{ "Center" "64 64 0" "Dimensions" "128 128 4" "Grid" "4x4" }}
+			}}
+		"ConnectionPoints"
+			{{
+			"Point" {{ "Dir" "1 0 0" "Pos" "7 3 0" "SignageOffset" "8 2 0" "Priority" "0" }}
+			"Point" {{ "Dir" "-1 0 0" "Pos" "0 3 0" "SignageOffset" "-2 2 0" "Priority" "0" }}
+			"Point" {{ "Dir" "0 1 0" "Pos" "3 7 0" "SignageOffset" "2 8 0" "Priority" "0" }}
+			"Point" {{ "Dir" "0 -1 0" "Pos" "3 0 0" "SignageOffset" "2 -2 0" "Priority" "0" }}
+			}}
+		}}
+	}}
+'''
+
+
+def build_items(count: int) -> list[Item]:
+    """Produce the item definitions."""
+    items, renderables = Item.parse('\n'.join([
+        ITEM_TEMPLATE.format(item_id=f'BENCH_ITEM_{ind}', ind=ind, x=ind % 4, y=(ind // 4) % 8)
+        for ind in range(count)
+    ]), PAK_ID)
+    return items
@@ -0,0 +1,250 @@
+"""A headless selector window, which records UI operations instead of displaying anything.
+
+This is given synthetic items spread over several groups, similar to large music or style
+package sets.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from typing import override
+
+from app import WidgetCache, img
+from app.mdown import MarkdownData
+from app.selector_win import (
+    AttrDef, DispFont, GroupHeaderBase, LayoutMetrics, Options, SelectorWinBase,
+)
+from packages import PackagesSet, SelitemData
+from transtoken import TransToken
+import utils
+
+
+# Metrics similar to the Tk UI.
+METRICS = LayoutMetrics(item_width=80, item_height=115, header_height=24, group_gap=5)
+COLUMNS = 6
+VIEW_HEIGHT = 600
+
+
+def build_items(count: int, groups: int) -> dict[utils.SpecialID, SelitemData]:
+    """Produce the synthetic item data, in a shuffled order."""
+    items: dict[utils.SpecialID, SelitemData] = {}
+    for ind in range(count):
+        # Spread items unevenly through the groups, with some ungrouped.
+        group = (ind * 7) % (groups + 1)
+        items[utils.special_id(f'BENCH_ITEM_{ind}')] = SelitemData.build(
+            long_name=TransToken.untranslated(f'Bench Item {ind}'),
+            short_name=TransToken.untranslated(f'Item {ind}'),
+            group=TransToken.untranslated(f'Group {group}') if group else TransToken.BLANK,
+            sort_key=f'{(ind * 31) % count:06}',
+        )
+    return items
+
+
+class Button:
+    """A fake button, recording the current state."""
+    def __init__(self, ind: int) -> None:
+        self.ind = ind
+        self.text = TransToken.BLANK
+        self.img: img.Handle | None = None
+        self.selected = False
+        self.pos: tuple[int, int] | None = None
+
+
+class GroupHeader(GroupHeaderBase):
+    """A fake group header."""
+    title = TransToken.BLANK
+    pos: tuple[int, int] | None = None
+
+    @override
+    def hide(self) -> None:
+        super().hide()
+        self.pos = None
+
+    @override
+    def _ui_reassign(self, group_id: str, title: TransToken, /) -> None:
+        super()._ui_reassign(group_id, title)
+        self.title = title
+
+    @override
+    def _ui_set_arrow(self, opened: bool, hovered: bool) -> None:
+        pass
+
+
+class HeadlessSelector(SelectorWinBase[Button, GroupHeader]):
+    """A selector window with no actual UI."""
+    def __init__(self, opt: Options, view_height: int = VIEW_HEIGHT, columns: int = COLUMNS) -> None:
+        super().__init__(opt)
+        self.group_cache = WidgetCache(lambda ind: GroupHeader(self), GroupHeader.hide)
+        self.view_top = 0
+        self.view_height = view_height
+        self.column_count = columns
+        # Group ID -> items in its menu, and the groups added to the main menu.
+        self.menus: dict[str, list[utils.SpecialID]] = {}
+        self.menu_groups: list[str] = []
+        self.buttons_created = 0
+
+    def placed(self) -> dict[utils.SpecialID, tuple[int, int]]:
+        """Return the position of each item which has a button."""
+        result = {}
+        for button, item_id in zip(self._item_buttons, self._button_items, strict=True):
+            if item_id is not None and button.pos is not None:
+                result[item_id] = button.pos
+        return result
+
+    @override
+    def _ui_calc_columns(self) -> int:
+        return self.column_count
+
+    @override
+    async def _ui_reposition_items(self) -> None:
+        layout = self._update_layout()
+        for group_key, y in layout.headers:
+            self.group_widgets[group_key].pos = (0, y)
+        for button, item_id, x, y in self._assign_buttons(self.view_top, self.view_top + self.view_height):
+            button.pos = (x, y)
+
+    @override
+    def _ui_win_hide(self, /) -> None:
+        pass
+
+    @override
+    def _ui_win_show(self, /) -> None:
+        pass
+
+    @override
+    def _ui_win_get_size(self, /) -> tuple[int, int]:
+        return 640, self.view_height
+
+    @override
+    def _ui_win_set_size(self, width: int, height: int, /) -> None:
+        pass
+
+    @override
+    def _ui_layout_metrics(self, /) -> LayoutMetrics:
+        return METRICS
+
+    @override
+    def _ui_button_create(self, ind: int, /) -> Button:
+        self.buttons_created += 1
+        return Button(ind)
+
+    @override
+    def _ui_button_set_text(self, button: Button, text: TransToken, /) -> None:
+        button.text = text
+
+    @override
+    def _ui_button_set_img(self, button: Button, image: img.Handle | None, /) -> None:
+        button.img = image
+
+    @override
+    def _ui_button_set_selected(self, button: Button, selected: bool, /) -> None:
+        button.selected = selected
+
+    @override
+    def _ui_button_hide(self, button: Button, /) -> None:
+        button.pos = None
+
+    @override
+    def _ui_scroll_to(self, y: int, /) -> None:
+        if not self.view_top <= y <= self.view_top + self.view_height - METRICS.item_height:
+            self.view_top = max(0, y - self.view_height // 2)
+
+    @override
+    def _ui_props_set_author(self, author: TransToken, /) -> None:
+        pass
+
+    @override
+    def _ui_props_set_name(self, name: TransToken, /) -> None:
+        pass
+
+    @override
+    def _ui_props_set_desc(self, desc: MarkdownData, /) -> None:
+        pass
+
+    @override
+    def _ui_props_set_icon(self, image: img.Handle, /) -> None:
+        pass
+
+    @override
+    def _ui_props_set_samp_button_enabled(self, enabled: bool, /) -> None:
+        pass
+
+    @override
+    def _ui_props_set_samp_button_icon(self, glyph: str, /) -> None:
+        pass
+
+    @override
+    def _ui_attr_set_text(self, attr: AttrDef, text: TransToken, /) -> None:
+        pass
+
+    @override
+    def _ui_attr_set_image(self, attr: AttrDef, image: img.Handle, /) -> None:
+        pass
+
+    @override
+    def _ui_attr_set_tooltip(self, attr: AttrDef, tooltip: TransToken, /) -> None:
+        pass
+
+    @override
+    def _ui_menu_clear(self) -> None:
+        self.menus.clear()
+        self.menu_groups.clear()
+
+    @override
+    def _ui_menu_clear_group(self, group: GroupHeader, items: Iterable[utils.SpecialID], /) -> None:
+        self.menus[group.id] = []
+
+    @override
+    def _ui_menu_set_font(self, item_id: utils.SpecialID, /, suggested: bool) -> None:
+        pass
+
+    @override
+    def _ui_menu_reset_suggested(self) -> None:
+        pass
+
+    @override
+    def _ui_menu_add(
+        self, group: GroupHeader,
+        item: utils.SpecialID,
+        func: Callable[[], object],
+        label: TransToken,
+        /,
+    ) -> None:
+        self.menus.setdefault(group.id, []).append(item)
+
+    @override
+    def _ui_group_add(self, group: GroupHeader, name: TransToken) -> None:
+        self.menu_groups.append(group.id)
+
+    @override
+    def _ui_enable_reset(self, enabled: bool, /) -> None:
+        pass
+
+    @override
+    def _ui_display_set(
+        self, *,
+        enabled: bool,
+        text: TransToken,
+        tooltip: TransToken,
+        font: DispFont,
+    ) -> None:
+        pass
+
+
+def make_window(items: dict[utils.SpecialID, SelitemData], **kwargs: int) -> HeadlessSelector:
+    """Construct a headless window displaying these items."""
+    def get_data(packset: PackagesSet, item_id: utils.SpecialID) -> SelitemData:
+        """Fetch item data."""
+        return items[item_id]
+
+    async def get_ids(packset: PackagesSet) -> list[utils.SpecialID]:
+        """Fetch the IDs."""
+        return list(items)
+
+    win = HeadlessSelector(Options(
+        func_get_data=get_data,
+        func_get_ids=get_ids,
+        save_id='headless',
+        store_last_selected=False,
+        has_def=False,
+    ), **kwargs)
+    return win
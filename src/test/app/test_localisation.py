@@ -0,0 +1,150 @@
+"""Test the localisation module."""
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+import weakref
+
+import pytest
+import trio
+
+from app import localisation, trans_cache
+from packages import PackagesSet
+from transtoken import CURRENT_LANG, Language, TransToken
+import utils
+
+
+class Widget:
+    """A fake widget, which can be weakly referenced."""
+    def __init__(self, name: str, visible: bool) -> None:
+        self.name = name
+        self.visible = visible
+        self.text = ''
+
+    def __repr__(self) -> str:
+        return f'<Widget {self.name}>'
+
+
+class CountingToken(TransToken):
+    """Records how many times the token was translated."""
+    translated: int = 0
+
+    def __str__(self) -> str:
+        CountingToken.translated += 1
+        return super().__str__()
+
+
+@pytest.fixture
+def language() -> Iterator[Language]:
+    """Set a language, restoring the original afterward."""
+    orig = CURRENT_LANG.value
+    lang = Language(lang_code='en', trans={})
+    CURRENT_LANG.value = lang
+    yield lang
+    CURRENT_LANG.value = orig
+
+
+def make_widgets(count: int) -> tuple[list[Widget], weakref.WeakKeyDictionary[Widget, TransToken]]:
+    """Produce a bunch of widgets, with every third one visible and sharing a few tokens."""
+    tokens = [CountingToken(utils.special_id('<NOTRANSLATE>'), utils.obj_id('TEST'), f'text_{i}', {}) for i in range(5)]
+    widgets = [Widget(f'wid_{i}', i % 3 == 0) for i in range(count)]
+    wdict: weakref.WeakKeyDictionary[Widget, TransToken] = weakref.WeakKeyDictionary({
+        wid: tokens[i % 5] for i, wid in enumerate(widgets)
+    })
+    return widgets, wdict
+
+
+async def test_retranslate(language: Language) -> None:
+    """Check widgets are all updated, visible ones first, translating each token once."""
+    widgets, wdict = make_widgets(60)
+    order: list[Widget] = []
+
+    def apply(wid: Widget, token: TransToken, translate: Callable[[TransToken], str]) -> None:
+        order.append(wid)
+        wid.text = translate(token)
+        # Destroy a hidden one before it's processed.
+        wdict.pop(widgets[4], None)
+
+    CountingToken.translated = 0
+    job = localisation.RetranslateJob(wdict, apply, lambda wid: wid.visible)
+    assert await localisation.retranslate([job], budget=0.0)
+    assert CountingToken.translated == 5
+    assert len(order) == 59
+    visible_count = sum(wid.visible for wid in order)
+    assert all(wid.visible for wid in order[:visible_count])
+    assert not any(wid.visible for wid in order[visible_count:])
+    for i, wid in enumerate(widgets):
+        assert wid.text == ('' if i == 4 else f'text_{i % 5}')
+    assert localisation.RETRANSLATE_PROGRESS.value == (60, 60)
+
+
+async def test_retranslate_restart(language: Language) -> None:
+    """If the language changes part way through, the update stops."""
+    widgets, wdict = make_widgets(20)
+    applied: list[Widget] = []
+
+    def apply(wid: Widget, token: TransToken, translate: Callable[[TransToken], str]) -> None:
+        applied.append(wid)
+        if len(applied) == 5:
+            CURRENT_LANG.value = Language(lang_code='de', trans={})
+
+    job = localisation.RetranslateJob(wdict, apply)
+    assert not await localisation.retranslate([job], budget=0.0)
+    assert len(applied) == 5
+
+
+def basemodui(**values: str) -> bytes:
+    """Produce a BaseModUI file."""
+    return '\n'.join([
+        f'"PORTAL2_PuzzleEditor_{key}" "{value}"'
+        for key, value in values.items()
+    ]).encode('utf_16_le')
+
+
+async def test_trans_cache_rebuild(
+    language: Language,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Check the cache in use is closed before it is rebuilt and written over."""
+    basemod = tmp_path / 'basemodui_english.txt'
+    basemod.write_bytes(basemodui(Item_cube='Cube'))
+
+    async def find_basemodui(games: Iterable[object], langs: list[str]) -> trio.Path:
+        """Use the test file."""
+        return trio.Path(basemod)
+
+    monkeypatch.setattr(localisation, 'find_basemodui', find_basemodui)
+    monkeypatch.setattr(localisation, '_LOADED_CACHE', None)
+    monkeypatch.setattr(utils, 'conf_location', lambda path: tmp_path / path)
+    cache_loc = tmp_path / 'cache/translations/en.bin'
+    cache_loc.parent.mkdir(parents=True)
+    packset = PackagesSet.blank()
+
+    # Built from scratch.
+    await localisation.load_aux_langs([], packset, language)
+    assert cache_loc.exists()
+    assert CURRENT_LANG.value.game_trans['PORTAL2_PuzzleEditor_Item_cube'] == 'Cube'
+
+    # Loaded from the file.
+    await localisation.load_aux_langs([], packset, language)
+    loaded = localisation._LOADED_CACHE
+    assert loaded is not None
+    assert not loaded.closed
+    assert CURRENT_LANG.value.game_trans is loaded.game
+
+    # The sources changed, so it's rebuilt while the old one is in use.
+    basemod.write_bytes(basemodui(Item_cube='Weighted Cube', Item_goo='Goo'))
+    await localisation.load_aux_langs([], packset, language)
+    assert loaded.closed
+    assert len(loaded.game) == 0
+    assert localisation._LOADED_CACHE is not loaded
+    assert CURRENT_LANG.value.game_trans['PORTAL2_PuzzleEditor_Item_cube'] == 'Weighted Cube'
+    with trans_cache.TransCache.load(cache_loc) as cache:
+        assert cache.game['PORTAL2_PuzzleEditor_Item_goo'] == 'Goo'
+    assert cache.closed
+
+    # Switching to the dummy language releases the cache.
+    current = localisation._LOADED_CACHE
+    assert current is not None
+    await localisation.load_aux_langs([], packset, localisation.DUMMY)
+    assert current.closed
+    assert localisation._LOADED_CACHE is None
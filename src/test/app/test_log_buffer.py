@@ -0,0 +1,63 @@
+"""Test batching messages for the log window."""
+import queue
+
+import pytest
+
+from app.log_buffer import LogBuffer, drain_queue
+from ipc_types import ARGS_SEND_LOGGING
+
+
+def test_render() -> None:
+    """Test messages are rendered in the same form the log window used to insert individually."""
+    buffer = LogBuffer()
+    buffer.add('INFO', 'First')
+    buffer.add('WARNING', 'Multiple\nlines\nhere')
+    assert len(buffer) == 2
+    assert buffer.render(False) == [
+        'First', ('INFO', ),
+        '\n', (),
+        'Multiple', ('WARNING', ),
+        '\n', ('INDENT', ), 'lines', ('WARNING', 'INDENT'),
+        '\n', ('INDENT', ), 'here', ('WARNING', 'INDENT'),
+    ]
+    assert len(buffer) == 0
+    assert buffer.render(True) == []
+    buffer.add('DEBUG', 'Next')
+    assert buffer.render(True) == ['\n', (), 'Next', ('DEBUG', )]
+
+
+def test_bounded() -> None:
+    """If too many messages arrive, older ones are dropped."""
+    buffer = LogBuffer(max_lines=3)
+    for i in range(10):
+        buffer.add('INFO', str(i))
+    assert buffer.dropped == 7
+    assert buffer.render(False)[::2] == ['7', '\n', '8', '\n', '9']
+
+
+def test_drain() -> None:
+    """Test logs are collected, and other messages passed through."""
+    log_queue: queue.Queue[ARGS_SEND_LOGGING] = queue.Queue()
+    buffer = LogBuffer()
+    handled: list[ARGS_SEND_LOGGING] = []
+    assert not drain_queue(log_queue, buffer, handled.append, 1.0)
+
+    log_queue.put(('log', 'INFO', 'one'))
+    log_queue.put(('visible', True))
+    log_queue.put(('log', 'ERROR', 'two'))
+    log_queue.put(('level', 'DEBUG'))
+    assert drain_queue(log_queue, buffer, handled.append, 1.0)
+    assert list(buffer.pending) == [('INFO', 'one'), ('ERROR', 'two')]
+    assert handled == [('visible', True), ('level', 'DEBUG')]
+    assert log_queue.empty()
+
+
+def test_drain_closed() -> None:
+    """A closed queue indicates the app quit."""
+    class ClosedQueue:
+        """Raises like a closed multiprocessing queue."""
+        def get_nowait(self) -> ARGS_SEND_LOGGING:
+            raise ValueError('Queue is closed')
+
+    with pytest.raises(BrokenPipeError):
+        drain_queue(ClosedQueue(), LogBuffer(), print, 1.0)  # type: ignore[arg-type]
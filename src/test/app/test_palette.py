@@ -1,15 +1,20 @@
 """Test palette saving and loading."""
 from __future__ import annotations
 
+from pathlib import Path
 from unittest.mock import create_autospec
+from uuid import UUID
 
 from pytest_regressions.data_regression import DataRegressionFixture
 from srctools import Keyvalues
 import pytest
 
+from app import paletteLoader
 from app.dialogs import Dialogs
 from app.paletteLoader import DEFAULT_PALETTES, GROUP_BUILTIN, Palette
 from transtoken import TransToken
+import config
+import utils
 
 
 def make_pos_block(pos: str, item_id: str, subtype: str) -> Keyvalues:
@@ -237,3 +242,95 @@ def test_builtin_regressions(pal_id: str, data_regression: DataRegressionFixture
         for (x, y), (item_id, subtype) in
         pal.items.items()
     })
+
+
+async def test_palette_index(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test unchanged palettes are loaded from the index, and only parsed when required."""
+    pal_dir = tmp_path / 'palettes'
+    pal_dir.mkdir()
+    index_loc = tmp_path / 'palette_index.vdf'
+    monkeypatch.setattr(paletteLoader, 'PAL_DIR', pal_dir)
+    monkeypatch.setattr(paletteLoader, 'PAL_INDEX_LOC', index_loc)
+    dialogs = create_autospec(Dialogs, instance=True)
+    uuid_a = UUID(hex='c510aee8759e4b61871d233806b5e73a')
+    uuid_b = UUID(hex='4b21b7e5a0f8469b8f1d5f45e3bb2a11')
+
+    Palette(
+        'Palette A', {(0, 0): (utils.obj_id('ITEM_CUBE'), 1)},
+        filename='pal_a.bee2_palette', uuid=uuid_a, group='Group',
+    ).save()
+    Palette(
+        'Palette B', {(2, 3): (utils.obj_id('ITEM_GOO'), 0)},
+        filename='pal_b.bee2_palette', uuid=uuid_b, settings=config.Config(),
+    ).save()
+
+    def file_palettes(palettes: list[Palette]) -> dict[UUID, Palette]:
+        """Find the palettes loaded from files."""
+        return {pal.uuid: pal for pal in palettes if pal.filename is not None}
+
+    pals = file_palettes(await paletteLoader.load_palettes(dialogs))
+    assert pals.keys() == {uuid_a, uuid_b}
+    assert pals[uuid_a]._loaded
+    assert pals[uuid_b]._loaded
+    assert set(paletteLoader.load_index(index_loc)) == {'pal_a.bee2_palette', 'pal_b.bee2_palette'}
+
+    # Reloading uses the index.
+    pals = file_palettes(await paletteLoader.load_palettes(dialogs))
+    pal_a, pal_b = pals[uuid_a], pals[uuid_b]
+    assert not pal_a._loaded
+    assert not pal_b._loaded
+    assert pal_a.name == TransToken.untranslated('Palette A')
+    assert pal_a.group == 'Group'
+    assert not pal_a.has_settings
+    assert pal_b.has_settings
+    assert pal_b.group == ''
+    assert not pal_b._loaded
+    assert pal_a.items == {(0, 0): ('ITEM_CUBE', 1)}
+    assert pal_a._loaded
+    assert pal_a.settings is None
+    assert pal_b.settings == config.Config()
+    assert pal_b.items == {(2, 3): ('ITEM_GOO', 0)}
+
+    # Changing a file causes it to be parsed again.
+    pal_b.items = {(1, 1): (utils.obj_id('ITEM_TURRET'), 0), (1, 2): (utils.obj_id('ITEM_TURRET'), 0)}
+    pal_b.save()
+    pals = file_palettes(await paletteLoader.load_palettes(dialogs))
+    assert not pals[uuid_a]._loaded
+    assert pals[uuid_b]._loaded
+    assert pals[uuid_b].items == {(1, 1): ('ITEM_TURRET', 0), (1, 2): ('ITEM_TURRET', 0)}
+
+    pal_a.delete_from_disk()
+    pals = file_palettes(await paletteLoader.load_palettes(dialogs))
+    assert pals.keys() == {uuid_b}
+    assert not pals[uuid_b]._loaded
+    assert set(paletteLoader.load_index(index_loc)) == {'pal_b.bee2_palette'}
+    dialogs.ask_custom.assert_not_called()
+
+
+async def test_palette_index_invalid(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """If a palette from the index can no longer be parsed, the file is never saved over."""
+    pal_dir = tmp_path / 'palettes'
+    pal_dir.mkdir()
+    monkeypatch.setattr(paletteLoader, 'PAL_DIR', pal_dir)
+    monkeypatch.setattr(paletteLoader, 'PAL_INDEX_LOC', tmp_path / 'palette_index.vdf')
+    dialogs = create_autospec(Dialogs, instance=True)
+    uuid = UUID(hex='c510aee8759e4b61871d233806b5e73a')
+    Palette(
+        'Palette', {(0, 0): (utils.obj_id('ITEM_CUBE'), 1)},
+        filename='pal.bee2_palette', uuid=uuid,
+    ).save()
+    await paletteLoader.load_palettes(dialogs)
+    [pal] = [pal for pal in await paletteLoader.load_palettes(dialogs) if pal.uuid == uuid]
+    assert not pal._loaded
+    assert not pal.readonly
+
+    # Corrupted after the index was read.
+    broken = '"Name" "Palette"\n"Positions" {'
+    (pal_dir / 'pal.bee2_palette').write_text(broken)
+    assert pal.items == {}
+    assert pal.settings is None
+    assert pal.readonly
+    pal.items = {(1, 1): (utils.obj_id('ITEM_GOO'), 0)}
+    pal.save(ignore_readonly=True)
+    assert (pal_dir / 'pal.bee2_palette').read_text() == broken
+    assert pal.filename != 'pal.bee2_palette'
@@ -0,0 +1,77 @@
+"""Test the item search index."""
+from app.search_index import SearchIndex
+from packages import PakRef
+from packages.item import Item, SubItemRef
+import utils
+
+
+def sub(item_id: str, ind: int = 0) -> SubItemRef:
+    """Shorthand to produce a reference."""
+    return SubItemRef(PakRef(Item, utils.obj_id(item_id)), ind)
+
+
+def test_search() -> None:
+    """Test searches intersect words, ranking exact matches first."""
+    index = SearchIndex()
+    index.set_item('CUBE', 1, {
+        sub('CUBE', 0): ['Weighted Storage Cube', 'Valve'],
+        sub('CUBE', 1): ['Weighted Companion Cube', 'Valve'],
+    })
+    index.set_item('BUTTON', 1, {
+        sub('BUTTON', 0): ['Weighted Button', 'Valve'],
+        sub('BUTTON', 1): ['Cube Button', 'Valve', 'Cubes'],
+    })
+    index.set_item('LASER', 1, {sub('LASER'): ['Laser Emitter', 'Carl']})
+
+    assert index.search('') is None
+    assert index.search('   ') is None
+    assert index.search('nothing') == []
+    assert set(index.search('valve') or ()) == {sub('CUBE', 0), sub('CUBE', 1), sub('BUTTON', 0), sub('BUTTON', 1)}
+    assert index.search('weighted cube') == [sub('CUBE', 0), sub('CUBE', 1)]
+    assert index.search('COMPANION') == [sub('CUBE', 1)]
+    assert index.search('las') == [sub('LASER')]
+    assert index.search('cube button') == [sub('BUTTON', 1)]
+    assert set(index.search('cube') or ()) == {sub('CUBE', 0), sub('CUBE', 1), sub('BUTTON', 1)}
+    # The exact match ranks higher than the prefix.
+    index.set_item('CATCHER', 1, {sub('CATCHER'): ['Lasers Catcher']})
+    assert index.search('laser') == [sub('LASER'), sub('CATCHER')]
+    assert index.search('lasers') == [sub('CATCHER')]
+
+
+def test_incremental() -> None:
+    """Test items can be replaced and removed."""
+    index = SearchIndex()
+    index.set_item('A', 'key1', {sub('A'): ['alpha', 'shared']})
+    index.set_item('B', 'key1', {sub('B'): ['beta', 'shared']})
+    assert index.is_current('A', 'key1')
+    assert not index.is_current('A', 'key2')
+    assert not index.is_current('C', 'key1')
+    assert len(index) == 3
+
+    index.set_item('A', 'key2', {sub('A'): ['gamma', 'shared']})
+    assert index.is_current('A', 'key2')
+    assert index.search('alpha') == []
+    assert index.search('gam') == [sub('A')]
+    assert set(index.search('shared') or ()) == {sub('A'), sub('B')}
+    assert len(index) == 3
+
+    index.remove_item('B')
+    index.remove_item('missing')
+    assert 'B' not in index
+    assert index.search('beta') == []
+    assert index.search('shared') == [sub('A')]
+    assert sorted(index.item_ids()) == ['A']
+    index.remove_item('A')
+    assert len(index) == 0
+    assert index.search('a') == []
+
+
+def test_tag_keys() -> None:
+    """Items are keyed by their tags, so reloading equal tags does not need to re-tokenise."""
+    index = SearchIndex()
+    tags = ((0, ('Weighted Cube', 'Valve')), (1, ('Companion Cube', 'Valve')))
+    index.set_item('CUBE', tags, {sub('CUBE', ind): subtype_tags for ind, subtype_tags in tags})
+    # Equal tags, built again from new item objects.
+    assert index.is_current('CUBE', tuple([(ind, tuple(map(str, subtype_tags))) for ind, subtype_tags in tags]))
+    assert not index.is_current('CUBE', ((0, ('Weighted Cube', 'Valve')), (1, ('Companion Cube', 'Carl'))))
+    assert index.search('companion valve') == [sub('CUBE', 1)]
@@ -0,0 +1,298 @@
+"""Test the layout and button pool used by selector windows."""
+import attrs
+import pytest
+import trio
+
+from app.selector_win import TRANS_GROUPLESS, ItemLayout, LayoutMetrics, NavKeys, SelectorIndex
+from packages import PackagesSet, SelitemData
+from sample_data.selector_win import METRICS, build_items, make_window
+from transtoken import TransToken
+import utils
+
+
+def test_layout_visible() -> None:
+    """Items in a vertical range are found, with the same positions as looking them up directly."""
+    groups = [
+        (group_key, [utils.special_id(item_id) for item_id in items])
+        for group_key, items in [('', ['A', 'B', 'C']), ('g1', ['D']), ('g2', [f'E{i}' for i in range(8)])]
+    ]
+    metrics = LayoutMetrics(item_width=10, item_height=20, header_height=5, group_gap=1)
+    layout = ItemLayout(groups, {'': True, 'g2': True}, True, 3, metrics)
+    # g1 is closed, only the header is shown.
+    assert layout.headers == [('', 0), ('g1', 26), ('g2', 31)]
+    assert layout.height == 5 + 20 + 1 + 5 + 5 + 3 * 20 + 1
+    assert layout.position('g1', 0) is None
+    assert layout.position('g2', 4) == (10, 36 + 20)
+
+    everything = list(layout.visible(0, layout.height))
+    assert [item_id for item_id, x, y in everything] == ['A', 'B', 'C', *[f'E{i}' for i in range(8)]]
+    for group_key, items in groups:
+        for ind, item_id in enumerate(items):
+            pos = layout.position(group_key, ind)
+            if group_key == 'g1':
+                assert pos is None
+            else:
+                assert pos is not None
+                assert (item_id, *pos) in everything
+
+    # Only the rows overlapping the range.
+    assert [item_id for item_id, x, y in layout.visible(25, 60)] == [f'E{i}' for i in range(6)]
+    assert [item_id for item_id, x, y in layout.visible(76, 77)] == ['E6', 'E7']
+    assert list(layout.visible(layout.height, layout.height + 100)) == []
+
+
+async def test_button_pool() -> None:
+    """Only visible items are given buttons, which are reused when scrolling."""
+    items = build_items(2000, 5)
+    win = make_window(items, view_height=500, columns=5)
+    await win._rebuild_items(PackagesSet.blank())
+    assert win.buttons_created == 0
+    assert sum(map(len, win.menus.values())) == 2000
+
+    await win._ui_reposition_items()
+    assert win._layout is not None
+    # Five rows in view, plus a row above and below.
+    created = win.buttons_created
+    assert 0 < created <= 5 * (500 // METRICS.item_height + 3)
+    placed = win.placed()
+    assert placed == {
+        item_id: (x, y)
+        for item_id, x, y in win._layout.visible(-METRICS.item_height, 500 + METRICS.item_height)
+    }
+
+    for top in range(0, win._layout.height, 250):
+        win.view_top = top
+        await win._ui_reposition_items()
+        assert win.placed() == {
+            item_id: (x, y)
+            for item_id, x, y in win._layout.visible(top - METRICS.item_height, top + 500 + METRICS.item_height)
+        }
+        for button, item_id in zip(win._item_buttons, win._button_items, strict=True):
+            if item_id is not None:
+                assert button.text is items[item_id].short_name
+                assert button.selected == (item_id == win.selected)
+    # Much less than the number of items.
+    assert win.buttons_created < 2 * created
+
+    # Clicking a button selects the item assigned to it.
+    button = next(button for button in win._item_buttons if button.pos is not None)
+    item_id = win._button_items[button.ind]
+    assert item_id is not None
+    win._evt_button_click(button.ind)
+    assert win.selected == item_id
+    assert button.selected
+
+
+async def test_groups_closed() -> None:
+    """Closing groups removes their items from view."""
+    items = build_items(200, 3)
+    win = make_window(items, view_height=10_000, columns=4)
+    await win._rebuild_items(PackagesSet.blank())
+    await win._ui_reposition_items()
+    assert set(win.placed()) == set(items)
+    for group_key in win.group_order:
+        win.group_visible[group_key] = False
+    await win._ui_reposition_items()
+    assert win.placed() == {}
+    assert [win.group_widgets[group_key].pos for group_key in win.group_order] == [
+        (0, ind * METRICS.header_height) for ind in range(len(win.group_order))
+    ]
+
+
+async def test_scroll_to() -> None:
+    """Selecting an item scrolls to it, then assigns it a button."""
+    items = build_items(1000, 2)
+    win = make_window(items, view_height=300)
+    await win._rebuild_items(PackagesSet.blank())
+    await win._ui_reposition_items()
+    target = win.item_list[-1]
+    assert target not in win.placed()
+
+    win.item_pos_dirty = trio.Event()
+    win.sel_item(target)
+    assert win.item_pos_dirty.is_set()
+    await win._ui_reposition_items()
+    assert target in win.placed()
+    assert win._id_to_button[target].selected
+    assert win._id_to_button[target].text is items[target].short_name
+
+
+def modify_items(items: dict[utils.SpecialID, SelitemData], change: str) -> None:
+    """Apply a modification to the item data, as reloading packages might."""
+    ids = list(items)
+    if change == 'sort':
+        items[ids[10]] = attrs.evolve(items[ids[10]], sort_key='999')
+        items[ids[11]] = attrs.evolve(items[ids[11]], sort_key='')
+    elif change == 'rename':
+        items[ids[12]] = attrs.evolve(items[ids[12]], short_name=TransToken.untranslated('Renamed'))
+    elif change == 'move':
+        # Move between existing groups.
+        target = next(data for data in items.values() if data.group_id and data.group_id != items[ids[13]].group_id)
+        items[ids[13]] = attrs.evolve(items[ids[13]], group=target.group, group_id=target.group_id)
+    elif change == 'add':
+        items[utils.special_id('NEW_ITEM')] = attrs.evolve(items[ids[14]], sort_key='0005')
+    elif change == 'remove':
+        del items[ids[15]]
+    elif change == 'new_group':
+        items[ids[16]] = attrs.evolve(items[ids[16]], group=TransToken.untranslated('New'), group_id='new')
+    elif change == 'ungrouped':
+        ungrouped = next(item_id for item_id, data in items.items() if not data.group_id)
+        del items[ungrouped]
+    else:
+        raise ValueError(change)
+
+
+@pytest.mark.parametrize('changes', [
+    ['sort'], ['rename'], ['move'], ['add'], ['remove'], ['new_group'], ['ungrouped'],
+    ['sort', 'rename', 'move', 'add', 'remove'],
+    ['sort', 'move', 'new_group', 'ungrouped'],
+])
+async def test_incremental_rebuild(changes: list[str]) -> None:
+    """Updating the window when items change produces the same result as building from scratch."""
+    items = build_items(300, 4)
+    win = make_window(items, view_height=400)
+    await win._rebuild_items(PackagesSet.blank())
+    win.view_top = 800
+    await win._ui_reposition_items()
+
+    for change in changes:
+        modify_items(items, change)
+    await win._rebuild_items(PackagesSet.blank())
+    await win._ui_reposition_items()
+
+    full = make_window(dict(items), view_height=400)
+    await full._rebuild_items(PackagesSet.blank())
+    full.view_top = 800
+    await full._ui_reposition_items()
+
+    assert win.item_list == full.item_list
+    assert win.group_order == full.group_order
+    assert win.grouped_items == full.grouped_items
+    assert win.group_names == full.group_names
+    assert win._index.positions == full._index.positions
+    assert win.menus == full.menus
+    assert win.menu_groups == full.menu_groups
+    assert {key: group.title for key, group in win.group_widgets.items()} == {
+        key: group.title for key, group in full.group_widgets.items()
+    }
+    assert {key: group.pos for key, group in win.group_widgets.items()} == {
+        key: group.pos for key, group in full.group_widgets.items()
+    }
+    assert win.placed() == full.placed()
+    for item_id, button in win._id_to_button.items():
+        assert button.text is items[item_id].short_name
+
+
+async def test_reload_unchanged(monkeypatch: pytest.MonkeyPatch) -> None:
+    """If the data is equal, nothing is rebuilt. Otherwise, only affected groups are updated."""
+    items = build_items(300, 4)
+    win = make_window(items, view_height=10_000)
+    await win._rebuild_items(PackagesSet.blank())
+    await win._ui_reposition_items()
+    buttons = dict(win._id_to_button)
+
+    cleared: list[str] = []
+    monkeypatch.setattr(win, '_ui_menu_clear', lambda: cleared.append('<all>'))
+    monkeypatch.setattr(win, '_ui_menu_clear_group', lambda group, items: cleared.append(group.id))
+
+    # Equal, but not the same objects.
+    items.update(build_items(300, 4))
+    await win._rebuild_items(PackagesSet.blank())
+    assert cleared == []
+    assert win._id_to_button == buttons
+
+    renamed = next(item_id for item_id in buttons if items[item_id].group_id)
+    items[renamed] = attrs.evolve(items[renamed], short_name=TransToken.untranslated('Renamed'))
+    await win._rebuild_items(PackagesSet.blank())
+    assert cleared == [items[renamed].group_id]
+    # Only the changed item lost its button.
+    assert win._id_to_button == {
+        item_id: button for item_id, button in buttons.items()
+        if item_id != renamed
+    }
+
+
+def nav_items() -> dict[utils.SpecialID, SelitemData]:
+    """Items in three groups, shuffled."""
+    items = {}
+    for group, count in [('', 2), ('B', 4), ('A', 5)]:
+        for ind in reversed(range(count)):
+            items[utils.special_id(f'{group or "U"}{ind}')] = SelitemData.build(
+                long_name=TransToken.untranslated(f'{group} {ind}'),
+                group=TransToken.untranslated(group),
+                sort_key=f'{group}{ind}',
+            )
+    return items
+
+
+def test_index() -> None:
+    """The index holds the order, groups and neighbours of items."""
+    items = nav_items()
+    items[utils.ID_NONE] = SelitemData.build(long_name=TransToken.untranslated('None'))
+    index = SelectorIndex(items)
+    assert index.item_list == ['<NONE>', 'U0', 'U1', 'A0', 'A1', 'A2', 'A3', 'A4', 'B0', 'B1', 'B2', 'B3']
+    assert index.group_order == ['', 'a', 'b']
+    assert index.grouped_items == {
+        '': ['<NONE>', 'U0', 'U1'],
+        'a': ['A0', 'A1', 'A2', 'A3', 'A4'],
+        'b': ['B0', 'B1', 'B2', 'B3'],
+    }
+    assert index.group_names == {'': TRANS_GROUPLESS, 'a': TransToken.untranslated('A'), 'b': TransToken.untranslated('B')}
+    assert index.positions[utils.ID_NONE] == (0, 0)
+    assert index.positions[utils.special_id('A3')] == (1, 3)
+    assert index.positions[utils.special_id('B0')] == (2, 0)
+    assert index.neighbours[utils.ID_NONE] == ('<NONE>', 'U0')
+    assert index.neighbours[utils.special_id('U1')] == ('U0', 'A0')
+    assert index.neighbours[utils.special_id('A4')] == ('A3', 'B0')
+    assert index.neighbours[utils.special_id('B3')] == ('B2', 'B3')
+
+
+async def test_index_reused() -> None:
+    """If packages are reloaded with equal data, the previous index is kept."""
+    items = nav_items()
+    win = make_window(items)
+    await win._rebuild_items(PackagesSet.blank())
+    first = win._index
+
+    await win._rebuild_items(PackagesSet.blank())
+    assert win._index is first
+
+    items[utils.special_id('U0')] = attrs.evolve(items[utils.special_id('U0')], sort_key='Z')
+    reloaded = PackagesSet.blank()
+    await win._rebuild_items(reloaded)
+    assert win._index is not first
+    assert win._index.item_list[-1] == 'U0'
+    assert await SelectorIndex.build(reloaded, win.func_get_ids, win.func_get_data, win._index) is win._index
+
+
+@pytest.mark.parametrize('start, key, closed, end', [
+    ('U1', NavKeys.RIGHT, '', 'A0'),
+    ('A0', NavKeys.LEFT, '', 'U1'),
+    ('U0', NavKeys.LEFT, '', 'U0'),
+    ('B3', NavKeys.RIGHT, '', 'B3'),
+    ('A1', NavKeys.RIGHT, '', 'A2'),
+    ('U1', NavKeys.DOWN, '', 'A1'),
+    ('A1', NavKeys.DOWN, '', 'A4'),
+    ('A4', NavKeys.DOWN, '', 'B1'),
+    ('B1', NavKeys.UP, '', 'A4'),
+    ('B2', NavKeys.UP, '', 'A2'),
+    ('B3', NavKeys.DOWN, '', 'B3'),
+    ('U0', NavKeys.UP, '', 'U0'),
+    ('A3', NavKeys.HOME, '', 'U0'),
+    ('A3', NavKeys.END, '', 'B3'),
+    # Closed groups are skipped.
+    ('U1', NavKeys.RIGHT, 'a', 'B0'),
+    ('B0', NavKeys.LEFT, 'a', 'U1'),
+    ('U1', NavKeys.DOWN, 'a', 'B1'),
+    ('B2', NavKeys.UP, 'a', 'U0'),
+    ('B1', NavKeys.UP, 'a', 'U1'),
+])
+async def test_key_navigate(start: str, key: NavKeys, closed: str, end: str) -> None:
+    """Test navigating with arrow keys."""
+    win = make_window(nav_items(), columns=3)
+    await win._rebuild_items(PackagesSet.blank())
+    if closed:
+        win.group_visible[closed] = False
+    win.sel_item(utils.special_id(start))
+    win.key_navigate(key)
+    assert win.selected == end
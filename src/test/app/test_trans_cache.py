@@ -0,0 +1,64 @@
+"""Test the compiled translation cache."""
+from pathlib import Path
+import gettext
+import io
+
+from babel.messages import Catalog
+from babel.messages.mofile import write_mo
+import pytest
+
+from app import trans_cache
+
+
+def make_mo() -> bytes:
+    """Build a .mo file with a variety of messages."""
+    catalog = Catalog(locale='ru')
+    catalog.add('Hello', 'Привет')
+    catalog.add('Goodbye', 'До свидания')
+    catalog.add(('{n} cube', '{n} cubes'), ('{n} куб', '{n} куба', '{n} кубов'))
+    catalog.add('Open', 'Открыть (меню)', context='menu')
+    with io.BytesIO() as f:
+        write_mo(f, catalog)
+        return f.getvalue()
+
+
+def test_roundtrip(tmp_path: Path) -> None:
+    """Check the cache produces the same results as GNUTranslations."""
+    mo_data = make_mo()
+    reference = gettext.GNUTranslations(io.BytesIO(mo_data))
+    game = {'PORTAL2_PuzzleEditor_Item_cube': 'Куб', 'PORTAL2_PuzzleEditor_Item_goo': 'Слизь'}  # noqa: RUF001
+    sources = {'langs': 'ru', 'pak:TEST': 'resources/i18n/ru.mo:1234'}
+
+    data = trans_cache.build(sources, game, {'TEST': trans_cache.parse_mo(mo_data)})
+    filename = tmp_path / 'ru.bin'
+    trans_cache.write(filename, data)
+    cache = trans_cache.TransCache.load(filename)
+
+    assert cache.sources == sources
+    assert cache.catalogs.keys() == {'TEST'}
+    assert dict(cache.game) == game
+    assert cache.game['PORTAL2_PuzzleEditor_Item_goo'] == 'Слизь'
+    assert 'PORTAL2_PuzzleEditor_Item_turret' not in cache.game
+    with pytest.raises(KeyError):
+        cache.game['PORTAL2_PuzzleEditor_Item_turret']
+
+    catalog = cache.catalogs['TEST']
+    for message in ['Hello', 'Goodbye', 'Missing', '{n} cube']:
+        assert catalog.gettext(message) == reference.gettext(message), message
+    for n in [0, 1, 2, 5, 11, 21, 22, 100]:
+        assert catalog.ngettext('{n} cube', '{n} cubes', n) == reference.ngettext('{n} cube', '{n} cubes', n), n
+        assert catalog.ngettext('Missing', 'Missings', n) == reference.ngettext('Missing', 'Missings', n), n
+    assert catalog.table['menu\x04Open'] == reference.pgettext('menu', 'Open')
+
+
+def test_invalid(tmp_path: Path) -> None:
+    """Check invalid files raise ValueError."""
+    filename = tmp_path / 'bad.bin'
+    filename.write_bytes(b'not a cache file at all')
+    with pytest.raises(ValueError, match='Invalid translation cache'):
+        trans_cache.TransCache.load(filename)
+    data = bytearray(trans_cache.build({}, {}, {}))
+    data[8] = 42  # Version.
+    filename.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match='Invalid translation cache'):
+        trans_cache.TransCache.load(filename)
@@ -0,0 +1,39 @@
+"""Test the noise generation for cutout tiles."""
+import random
+
+from srctools import Vec
+
+from perlin import SimplexNoise
+from precomp.conditions import cutoutTile
+
+
+def reference_noise(loc: Vec, noise_func: SimplexNoise) -> float:
+    """The original unbatched implementation of get_noise()."""
+    return sum(
+        (noise_func.noise3(loc.x + x, loc.y + y, loc.z) + 1) / 2
+        for x in (-1, 0, 1)
+        for y in (-1, 0, 1)
+    ) / 9
+
+
+def test_noise_many() -> None:
+    """Check batched noise evaluation exactly matches evaluating each location."""
+    random.seed('cutout_tile_test')
+    noise = SimplexNoise(period=4 * 40)
+    # Two overlapping floor sections, like convert_floor() evaluates.
+    sections = [
+        [Vec(x, y, 12) for x in range(20, 24) for y in range(5, 9)],
+        [Vec(x, y, 12) for x in range(24, 28) for y in range(6, 10)],
+        [Vec(-3.0, 8.5, -2.0), Vec(150, 150, 0)],
+    ]
+    cache: dict[tuple[float, float, float], float] = {}
+    for locs in sections:
+        expected = [reference_noise(loc, noise) for loc in locs]
+        assert cutoutTile.get_noise_many(locs, noise, cache) == expected
+        assert cutoutTile.get_noise_many(locs, noise) == expected
+    for loc in sections[0]:
+        assert cutoutTile.get_noise(loc, noise) == reference_noise(loc, noise)
+    assert cutoutTile.noise3_many(noise, [(1.5, 2.5, 3.5), (0.0, 0.0, 0.0)]) == [
+        noise.noise3(1.5, 2.5, 3.5),
+        noise.noise3(0.0, 0.0, 0.0),
+    ]
@@ -1,13 +1,16 @@
 """Test the main config logic."""
 from typing import override
 
+from pathlib import Path
 import io
+import time
 import uuid
 
 from pytest_regressions.file_regression import FileRegressionFixture
 from srctools import Keyvalues, bool_as_int
 import attrs
 import pytest
+import trio
 
 import config
 
@@ -130,6 +133,117 @@ def test_basic_store() -> None:
     assert spec.get_cur_conf(DefaultableData) is data_4
 
 
+def test_config_copy_on_write() -> None:
+    """Test updating a config leaves the original unchanged, sharing the maps for other classes."""
+    data_1 = DataSingle("value_1", "b")
+    data_2 = DataSingle("value_2", "a")
+    default = DefaultableData('hi')
+    conf = config.Config().with_value(data_1).with_value(default)
+
+    updated = conf.with_value(data_2)
+    assert conf.get(DataSingle) is data_1
+    assert updated.get(DataSingle) is data_2
+    assert dict(updated.items())[DefaultableData] is dict(conf.items())[DefaultableData]
+    # Storing the same or an equal value again does not copy.
+    assert updated.with_value(data_2) is updated
+    assert updated.with_value(DataSingle("value_2", "a")) is updated
+
+    copy = conf.copy()
+    assert copy is not conf
+    assert dict(copy.items()) == dict(conf.items())
+
+    discarded, popped = updated.discard(DataSingle, '')
+    assert popped is data_2
+    assert list(discarded.classes()) == [DefaultableData]
+    assert updated.get(DataSingle) is data_2
+
+
+
+def test_chunked_map() -> None:
+    """Test the chunked map only copies the changed chunk, and keeps insertion order."""
+    count = 3 * config.CHUNK_SIZE + 5
+    values = {f'id_{i}': DataSingle(str(i), 'x') for i in range(count)}
+    orig = config.ChunkedMap.from_map(values)
+    assert config.ChunkedMap.from_map(orig) is orig
+    assert list(orig) == list(values)
+    assert dict(orig) == values
+    assert len(orig) == count
+    assert 'id_5' in orig
+    assert 'missing' not in orig
+
+    new_val = DataSingle('new', 'y')
+    updated = orig.set('id_40', new_val)
+    assert updated['id_40'] is new_val
+    assert orig['id_40'] == DataSingle('40', 'x')
+    assert list(updated) == list(values)
+    # Only the chunk containing the value was copied.
+    shared = [old is new for old, new in zip(orig._chunks, updated._chunks, strict=True)]
+    assert shared.count(False) == 1
+    assert updated._index is orig._index
+    assert updated.set('id_40', DataSingle('new', 'y')) is updated
+
+    added = updated.set('extra', new_val)
+    assert list(added) == [*values, 'extra']
+    assert 'extra' not in updated
+
+    removed, popped = added.discard('id_3')
+    assert popped == DataSingle('3', 'x')
+    assert 'id_3' not in removed
+    assert 'id_3' in added
+    assert len(removed) == count
+    with pytest.raises(KeyError):
+        removed.discard('id_3')
+
+
+async def test_persist(autojump_clock: trio.abc.Clock, tmp_path: Path) -> None:
+    """Test changes are written in the background after a delay, and when cancelled."""
+    spec = config.ConfigSpec()
+    spec.register(DataSingle)
+    spec.register(DefaultableData)
+    filename = tmp_path / 'config.vdf'
+
+    def read() -> config.Config:
+        """Parse the written file."""
+        with filename.open(encoding='utf8') as f:
+            conf, upgraded, unknown = spec.parse_kv1(Keyvalues.parse(f))
+        assert not upgraded
+        assert unknown == []
+        return conf
+
+    async def wait_written() -> None:
+        """Writing happens in a thread, so the clock isn't aware of it. Wait in real time."""
+        while not filename.exists():
+            await trio.to_thread.run_sync(time.sleep, 0.01)
+
+    async with trio.open_nursery() as nursery:
+        nursery.start_soon(spec.persist, filename, 5.0)
+        await trio.sleep(1.0)
+        assert not filename.exists()
+        spec.store_conf(DataSingle('value_1', 'a'))
+        await trio.sleep(1.0)
+        spec.store_conf(DataSingle('value_2', 'b'))
+        assert spec.is_dirty
+        await trio.sleep(1.0)
+        assert not filename.exists()
+        # Both changes are written together.
+        await trio.sleep(5.0)
+        assert not spec.is_dirty
+        await wait_written()
+        assert read().get(DataSingle) == DataSingle('value_2', 'b')
+
+        # Storing an identical value is not a change.
+        spec.store_conf(DataSingle('value_2', 'b'))
+        assert not spec.is_dirty
+
+        # When cancelled, remaining changes are written immediately.
+        spec.store_conf(DefaultableData('hello'))
+        nursery.cancel_scope.cancel()
+    assert not spec.is_dirty
+    conf = read()
+    assert conf.get(DataSingle) == DataSingle('value_2', 'b')
+    assert conf.get(DefaultableData) == DefaultableData('hello')
+
+
 @pytest.mark.parametrize('triple', ['a', 'b'])
 @pytest.mark.parametrize('value', [
     'testing testing',
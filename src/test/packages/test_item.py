@@ -0,0 +1,63 @@
+"""Test parsing item definitions."""
+from pathlib import Path
+import os
+
+from srctools import Keyvalues
+from srctools.filesys import RawFileSystem
+import trio
+
+from app.errors import ErrorUI
+from packages import PackagesSet, ParseData
+from packages.item import _parse_folder_files
+import utils
+
+
+EDITORITEMS = '''
+Item
+{
+    "Type"		"TEST_ITEM"
+    "Editor"
+    {
+        "SubType"
+        {
+            "Name"		"{name}"
+        }
+    }
+}
+'''
+
+
+async def test_folder_cache(tmp_path: Path) -> None:
+    """Test parsed item folders are reused until the files change."""
+    folder = tmp_path / 'items' / 'test'
+    folder.mkdir(parents=True)
+    editor_file = folder / 'editoritems.txt'
+    editor_file.write_text(EDITORITEMS.replace('{name}', 'First'))
+    (folder / 'properties.txt').write_text('"Properties" { "authors" "Someone" }')
+
+    def make_data(packset: PackagesSet) -> ParseData:
+        """Produce the data for a package load."""
+        return ParseData(
+            packset, ErrorUI(), RawFileSystem(tmp_path),
+            'TEST_ITEM', Keyvalues.root(), utils.obj_id('TEST_PAK'), False,
+        )
+
+    packset = PackagesSet()
+    first = await trio.to_thread.run_sync(_parse_folder_files, make_data(packset), 'test')
+    assert first.editor.id == 'TEST_ITEM'
+    assert first.editor.subtypes[0].name.token == 'First'
+    assert first.props['authors'] == 'Someone'
+
+    # A new package set with new filesystems reuses the result.
+    packset = PackagesSet()
+    second = await trio.to_thread.run_sync(_parse_folder_files, make_data(packset), 'test')
+    assert second is first
+    assert second.packset() is packset
+
+    # Changing the file causes it to be parsed again.
+    editor_file.write_text(EDITORITEMS.replace('{name}', 'Second'))
+    stat = editor_file.stat()
+    os.utime(editor_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+    third = await trio.to_thread.run_sync(_parse_folder_files, make_data(packset), 'test')
+    assert third is not first
+    assert third.editor.subtypes[0].name.token == 'Second'
@@ -0,0 +1,156 @@
+"""Test the packlist dependency cache."""
+from pathlib import Path
+import os
+
+from srctools.const import FileType
+from srctools.filesys import CACHE_KEY_INVALID, FileSystemChain, RawFileSystem
+
+from postcomp.dep_cache import CachedPackList
+
+
+def make_packlist(folder: Path) -> CachedPackList:
+    """Create a packlist reading from the folder."""
+    fsys = FileSystemChain()
+    fsys.add_sys(RawFileSystem(folder))
+    return CachedPackList(fsys)
+
+
+def write_mat(folder: Path, name: str, text: str) -> None:
+    """Write a material to the folder."""
+    path = folder / 'materials' / f'{name}.vmt'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_material_cache(tmp_path: Path) -> None:
+    """Check unchanged materials replay their dependencies from the cache."""
+    game = tmp_path / 'game'
+    write_mat(game, 'test/wall', '"LightmappedGeneric" {"$basetexture" "test/wall_tex"}')
+    cache_loc = tmp_path / 'cache.dmx'
+
+    first = make_packlist(game)
+    first.pack_file('test/wall', FileType.MATERIAL)
+    first.eval_dependencies()
+    first.save_dependency_cache(cache_loc)
+    assert first.cache_stats.misses == 1
+    assert first.cache_stats.hits == 0
+    assert 'materials/test/wall_tex.vtf' in first
+
+    second = make_packlist(game)
+    second.load_dependency_cache(cache_loc)
+    second.pack_file('test/wall', FileType.MATERIAL)
+    second.eval_dependencies()
+    assert second.cache_stats.hits == 1
+    assert second.cache_stats.misses == 0
+    assert set(second.filenames()) == set(first.filenames())
+
+
+def test_material_changed(tmp_path: Path) -> None:
+    """Check editing a material causes it to be reparsed."""
+    game = tmp_path / 'game'
+    write_mat(game, 'test/wall', '"LightmappedGeneric" {"$basetexture" "test/old_tex"}')
+    cache_loc = tmp_path / 'cache.dmx'
+
+    first = make_packlist(game)
+    first.pack_file('test/wall', FileType.MATERIAL)
+    first.eval_dependencies()
+    first.save_dependency_cache(cache_loc)
+
+    mat_path = game / 'materials/test/wall.vmt'
+    write_mat(game, 'test/wall', '"LightmappedGeneric" {"$basetexture" "test/new_tex"}')
+    # Ensure the modification time differs, even on coarse filesystems.
+    stat = os.stat(mat_path)
+    os.utime(mat_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+
+    second = make_packlist(game)
+    second.load_dependency_cache(cache_loc)
+    second.pack_file('test/wall', FileType.MATERIAL)
+    second.eval_dependencies()
+    assert second.cache_stats.misses == 1
+    assert second.cache_stats.hits == 0
+    assert 'materials/test/new_tex.vtf' in second
+    assert 'materials/test/old_tex.vtf' not in second
+
+
+def test_patch_parent_changed(tmp_path: Path) -> None:
+    """Check editing the parent of a patch material invalidates the patch."""
+    game = tmp_path / 'game'
+    write_mat(game, 'test/parent', '"LightmappedGeneric" {"$basetexture" "test/old_tex"}')
+    write_mat(game, 'test/child', '"patch" {"include" "materials/test/parent.vmt" "insert" {"$reflectivity" "[1 1 1]"}}')
+    cache_loc = tmp_path / 'cache.dmx'
+
+    first = make_packlist(game)
+    first.pack_file('test/child', FileType.MATERIAL)
+    first.eval_dependencies()
+    first.save_dependency_cache(cache_loc)
+    assert 'materials/test/old_tex.vtf' in first
+
+    parent_path = game / 'materials/test/parent.vmt'
+    write_mat(game, 'test/parent', '"LightmappedGeneric" {"$basetexture" "test/new_tex"}')
+    stat = os.stat(parent_path)
+    os.utime(parent_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+
+    second = make_packlist(game)
+    second.load_dependency_cache(cache_loc)
+    second.pack_file('test/child', FileType.MATERIAL)
+    second.eval_dependencies()
+    assert 'materials/test/new_tex.vtf' in second
+    assert 'materials/test/old_tex.vtf' not in second
+
+
+def test_invalid_cache(tmp_path: Path) -> None:
+    """An unparsable cache file is ignored."""
+    cache_loc = tmp_path / 'cache.dmx'
+    cache_loc.write_bytes(b'not a DMX file')
+    packlist = make_packlist(tmp_path)
+    packlist.load_dependency_cache(cache_loc)
+    assert packlist.dep_cache == {}
+
+
+def test_missing_file_added(tmp_path: Path) -> None:
+    """Check files which were missing when analysing invalidate the cache once they're added."""
+    game = tmp_path / 'game'
+    write_mat(game, 'test/child', '"patch" {"include" "materials/test/parent.vmt" "insert" {"$reflectivity" "[1 1 1]"}}')
+    cache_loc = tmp_path / 'cache.dmx'
+
+    first = make_packlist(game)
+    first.pack_file('test/child', FileType.MATERIAL)
+    first.eval_dependencies()
+    first.save_dependency_cache(cache_loc)
+    assert first.dep_cache['materials/test/child.vmt'].sources == (('materials/test/parent.vmt', CACHE_KEY_INVALID), )
+
+    write_mat(game, 'test/parent', '"LightmappedGeneric" {"$basetexture" "test/parent_tex"}')
+    second = make_packlist(game)
+    second.load_dependency_cache(cache_loc)
+    second.pack_file('test/child', FileType.MATERIAL)
+    second.eval_dependencies()
+    # Both the child and the newly found parent are analysed.
+    assert second.cache_stats.misses == 2
+    assert second.cache_stats.hits == 0
+    assert 'materials/test/parent_tex.vtf' in second
+
+
+def test_prune_unused(tmp_path: Path) -> None:
+    """Check entries not used in a compile are discarded when saving."""
+    game = tmp_path / 'game'
+    write_mat(game, 'test/first', '"LightmappedGeneric" {"$basetexture" "test/first_tex"}')
+    write_mat(game, 'test/second', '"LightmappedGeneric" {"$basetexture" "test/second_tex"}')
+    cache_loc = tmp_path / 'cache.dmx'
+
+    first = make_packlist(game)
+    first.pack_file('test/first', FileType.MATERIAL)
+    first.pack_file('test/second', FileType.MATERIAL)
+    first.eval_dependencies()
+    first.save_dependency_cache(cache_loc)
+    assert first.dep_cache.keys() == {'materials/test/first.vmt', 'materials/test/second.vmt'}
+
+    second = make_packlist(game)
+    second.load_dependency_cache(cache_loc)
+    second.pack_file('test/first', FileType.MATERIAL)
+    second.eval_dependencies()
+    second.save_dependency_cache(cache_loc)
+    assert second.cache_stats.hits == 1
+
+    third = make_packlist(game)
+    third.load_dependency_cache(cache_loc)
+    assert third.dep_cache.keys() == {'materials/test/first.vmt'}
@@ -0,0 +1,125 @@
+"""Test the manifest of generated antigel materials."""
+from pathlib import Path
+import os
+
+from srctools.filesys import FileSystemChain, RawFileSystem
+from srctools.vmt import Material
+import pytest
+
+from precomp import texturing
+from precomp.antigel_cache import MANIFEST_NAME, AntigelManifest
+
+
+MATERIALS = ['tile/white_patch', 'tile/black']
+
+
+def write_mat(game: Path, name: str, text: str) -> None:
+    """Write a source material, ensuring the modification time changes."""
+    path = game / 'materials' / f'{name}.vmt'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    old_time = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(text)
+    os.utime(path, ns=(old_time + 10**9, old_time + 10**9))
+
+
+@pytest.fixture
+def game(tmp_path: Path) -> Path:
+    """Create the source materials. The patch material gets its texture from its parent."""
+    game = tmp_path / 'game'
+    write_mat(game, 'tile/white', 'LightmappedGeneric { $basetexture "tile/white_a" }')
+    write_mat(game, 'tile/white_patch', '''\
+Patch {
+    include "materials/tile/white.vmt"
+    insert { %noportal 1 }
+}''')
+    write_mat(game, 'tile/black', 'LightmappedGeneric { $basetexture "tile/black" %noportal 1 }')
+    return game
+
+
+async def compile_antigel(game: Path, materials: list[str] = MATERIALS) -> AntigelManifest:
+    """Generate antigel materials as a compile would, returning the manifest."""
+    texturing.ANTIGEL_MATS.clear()
+    material_folder = game.parent / 'bee2' / 'materials'
+    manifest = await texturing.load_antigel_manifest(material_folder)
+    fsys = FileSystemChain(RawFileSystem(game))
+    await texturing.generate_antigel(fsys, material_folder, manifest, materials)
+    return manifest
+
+
+def antigel_texture(game: Path, mat_name: str) -> str:
+    """Parse the generated antigel material for a source material, to find its texture."""
+    antigel = texturing.ANTIGEL_MATS[mat_name]
+    with (game.parent / 'bee2' / 'materials' / f'{antigel}.vmt').open() as f:
+        mat = Material.parse(f)
+    [block] = mat.blocks
+    assert block['%noportal'] == '1'
+    return block['$basetexture']
+
+
+async def test_generate(game: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test materials are only parsed on the first compile."""
+    manifest = await compile_antigel(game)
+    assert (manifest.stats.hits, manifest.stats.misses, manifest.stats.generated) == (0, 2, 2)
+    assert antigel_texture(game, 'tile/white_patch') == 'tile/white_a'
+    assert antigel_texture(game, 'tile/black') == 'tile/black'
+    assert (game.parent / 'bee2/materials' / texturing.ANTIGEL_PATH / MANIFEST_NAME).exists()
+    first = dict(texturing.ANTIGEL_MATS)
+
+    def no_parse(*args: object, **kwargs: object) -> Material:
+        """Parsing should not be required."""
+        raise AssertionError('Material parsed!')
+
+    monkeypatch.setattr(Material, 'parse', no_parse)
+    manifest = await compile_antigel(game)
+    assert (manifest.stats.hits, manifest.stats.misses, manifest.stats.generated) == (2, 0, 0)
+    assert not manifest.changed
+    assert texturing.ANTIGEL_MATS == first
+
+
+async def test_edit_parent(game: Path) -> None:
+    """Editing the parent of a patch material regenerates it."""
+    await compile_antigel(game)
+    write_mat(game, 'tile/white', 'LightmappedGeneric { $basetexture "tile/white_b" }')
+
+    manifest = await compile_antigel(game)
+    assert (manifest.stats.hits, manifest.stats.misses, manifest.stats.generated) == (1, 1, 1)
+    assert antigel_texture(game, 'tile/white_patch') == 'tile/white_b'
+    assert antigel_texture(game, 'tile/black') == 'tile/black'
+
+    manifest = await compile_antigel(game)
+    assert (manifest.stats.hits, manifest.stats.misses, manifest.stats.generated) == (2, 0, 0)
+    assert antigel_texture(game, 'tile/white_patch') == 'tile/white_b'
+
+
+async def test_remove_source(game: Path) -> None:
+    """Removing a source material discards its antigel material, and restoring it regenerates."""
+    await compile_antigel(game)
+    (game / 'materials/tile/black.vmt').unlink()
+
+    manifest = await compile_antigel(game)
+    assert 'tile/black' not in texturing.ANTIGEL_MATS
+    assert 'tile/black' not in manifest.sources
+    assert antigel_texture(game, 'tile/white_patch') == 'tile/white_a'
+
+    write_mat(game, 'tile/black', 'LightmappedGeneric { $basetexture "tile/black_2" %noportal 1 }')
+    manifest = await compile_antigel(game)
+    assert (manifest.stats.hits, manifest.stats.misses, manifest.stats.generated) == (1, 1, 1)
+    assert antigel_texture(game, 'tile/black') == 'tile/black_2'
+
+
+async def test_generated_modified(game: Path) -> None:
+    """If a generated material is deleted or the manifest is lost, materials are regenerated."""
+    await compile_antigel(game)
+    antigel = texturing.ANTIGEL_MATS['tile/black']
+    (game.parent / 'bee2' / 'materials' / f'{antigel}.vmt').unlink()
+
+    manifest = await compile_antigel(game)
+    assert (manifest.stats.hits, manifest.stats.generated) == (2, 1)
+    assert texturing.ANTIGEL_MATS['tile/black'] == antigel
+    assert antigel_texture(game, 'tile/black') == 'tile/black'
+
+    (game.parent / 'bee2/materials' / texturing.ANTIGEL_PATH / MANIFEST_NAME).write_bytes(b'invalid')
+    manifest = await compile_antigel(game)
+    assert manifest.stats.misses == 2
+    assert antigel_texture(game, 'tile/white_patch') == 'tile/white_a'
+    assert antigel_texture(game, 'tile/black') == 'tile/black'
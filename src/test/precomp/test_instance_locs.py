@@ -0,0 +1,90 @@
+"""Test resolving instance selectors."""
+from typing import Any
+
+from collections.abc import Iterator
+import copy
+
+import pytest
+
+from editoritems import Item
+from precomp import instanceLocs
+import utils
+
+
+ITEM_TEXT = '''
+Item
+{
+    "Type"		"TEST_ITEM"
+    "Editor"
+    {
+        "SubType"
+        {
+            "Name"		"instance item"
+        }
+    }
+    "Exporting"
+    {
+    "Instances"
+        {
+        "0" "instances/test/First.vmf"
+        "1" "instances/test/second.vmf"
+        "3" "instances/test/fourth.vmf"
+        "bee2_Custom" "instances/test/custom.vmf"
+        "blank" "."
+        }
+    }
+}
+'''
+
+
+@pytest.fixture
+def loaded() -> Iterator[None]:
+    """Load the test item, then restore the original state afterward."""
+    state: list[dict[str, Any]] = [
+        instanceLocs.INSTANCE_FILES, instanceLocs.ITEM_FOR_FILE,
+        instanceLocs.CUST_INST_FILES, instanceLocs.INST_SPECIAL,
+    ]
+    saved = copy.deepcopy(state)
+    [[item], _] = Item.parse(ITEM_TEXT, utils.obj_id('TEST_PAK'))
+    instanceLocs.load_conf([item])
+    yield
+    for orig, backup in zip(state, saved, strict=True):
+        orig.clear()
+        orig.update(backup)
+    instanceLocs.load_conf([])
+
+
+def test_table_matches(loaded: None) -> None:
+    """Check every entry in the table matches parsing the selector."""
+    assert '<test_item:1>' in instanceLocs._TABLE
+    assert '[glass_128]' in instanceLocs._TABLE
+    for key, result in instanceLocs._TABLE.items():
+        assert instanceLocs._resolve(key) == result, key
+        assert instanceLocs.resolve(key.upper()) == result, key
+        assert instanceLocs.resolve_filter(key) == frozenset(
+            filename.casefold() for filename in result if filename
+        ), key
+
+
+def test_lookups(loaded: None, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the various kinds of selectors, and the statistics."""
+    stats = instanceLocs.ResolveStats()
+    monkeypatch.setattr(instanceLocs, 'STATS', stats)
+    assert instanceLocs.resolve('<TEST_ITEM>') == [
+        'instances/test/First.vmf', 'instances/test/second.vmf',
+        '', 'instances/test/fourth.vmf',
+    ]
+    assert instanceLocs.resolve('<test_item:2>') == []
+    assert instanceLocs.resolve('<TEST_ITEM:bee2_custom>') == ['instances/test/custom.vmf']
+    assert instanceLocs.resolve_filter('<Test_Item:bee2_blank>') == frozenset()
+    assert stats == instanceLocs.ResolveStats(table=4)
+
+    # These use the fallback.
+    assert instanceLocs.resolve('<TEST_ITEM:0, 3>') == ['instances/test/First.vmf', 'instances/test/fourth.vmf']
+    assert instanceLocs.resolve_filter('<TEST_ITEM:0, 3>') == {'instances/test/first.vmf', 'instances/test/fourth.vmf'}
+    assert instanceLocs.resolve('instances/Raw/Path.vmf') == ['instances/Raw/Path.vmf']
+    assert instanceLocs.resolve('<MISSING_ITEM>') == []
+    assert stats == instanceLocs.ResolveStats(table=4, fallback_hits=1, fallback_parses=3)
+    assert instanceLocs.resolve_filter('<TEST_ITEM:0, 3>') == {'instances/test/first.vmf', 'instances/test/fourth.vmf'}
+    assert instanceLocs.resolve('instances/Raw/Path.vmf') == ['instances/Raw/Path.vmf']
+    assert stats == instanceLocs.ResolveStats(table=4, fallback_hits=3, fallback_parses=3)
@@ -0,0 +1,65 @@
+"""Test the compile profiler."""
+from pathlib import Path
+import json
+
+from srctools import VMF, Vec
+
+from precomp.profiler import CompileProfile
+
+
+def test_phase_counts() -> None:
+    """Test phases record the entity and brush counts."""
+    vmf = VMF()
+    profile = CompileProfile()
+    with profile.phase('first', vmf) as stats:
+        vmf.create_ent('info_target')
+        vmf.add_brush(vmf.make_prism(Vec(0, 0, 0), Vec(64, 64, 64)).solid)
+        ent = vmf.create_ent('func_detail')
+        ent.solids.append(vmf.make_prism(Vec(0, 0, 0), Vec(64, 64, 64)).solid)
+    with profile.phase('second'):
+        pass
+
+    assert profile.phases == [stats, profile.phases[1]]
+    assert stats.name == 'first'
+    assert stats.ents_before == 0
+    assert stats.ents_after == 2
+    assert stats.brushes_before == 0
+    assert stats.brushes_after == 2
+    assert stats.wall >= 0.0
+    assert stats.mem_delta is None  # Not tracing.
+    assert profile.phases[1].ents_before is None
+
+
+def test_trace_memory() -> None:
+    """Test tracemalloc statistics are recorded if enabled."""
+    profile = CompileProfile(trace_memory=True)
+    profile.start()
+    try:
+        with profile.phase('alloc') as stats:
+            data = [bytearray(1024) for _ in range(64)]
+    finally:
+        profile.stop()
+    assert stats.mem_delta is not None
+    assert stats.mem_delta >= 64 * 1024
+    assert stats.mem_peak is not None
+    assert stats.mem_peak >= stats.mem_delta
+    del data
+
+
+def test_report(tmp_path: Path) -> None:
+    """Test the JSON report is written next to the map, and conditions are combined."""
+    profile = CompileProfile()
+    for source in ['a.cfg', 'b.cfg', 'a.cfg']:
+        with profile.condition(source):
+            pass
+    with profile.phase('phase'):
+        pass
+    profile.write_report(str(tmp_path / 'preview.vmf'))
+
+    report = json.loads((tmp_path / 'preview.profile.json').read_text())
+    assert [phase['name'] for phase in report['phases']] == ['phase']
+    assert sorted(
+        (cond['source'], cond['count'])
+        for cond in report['conditions']
+    ) == [('a.cfg', 2), ('b.cfg', 1)]
+    assert not (tmp_path / 'preview.prof').exists()
@@ -0,0 +1,142 @@
+"""Test the seeded random number generation."""
+from __future__ import annotations
+
+from collections.abc import Iterator
+from random import Random
+import hashlib
+
+from srctools import VMF, Angle, Entity, FrozenAngle, FrozenMatrix, FrozenVec, Matrix, Vec
+import pytest
+
+from precomp import instanceLocs, rand
+
+
+NAMES = [b'tile', b'temp', b'rand_vec', b'antline', b'', b'voice_quote_block']
+
+
+def reference_seed(map_hash: hashlib._Hash, name: bytes, *values: object) -> Random:
+    """The original implementation of seed(), which results must match exactly."""
+    algo = map_hash.copy()
+    algo.update(name)
+    for val in values:
+        match val:
+            case str():
+                algo.update(val.encode('utf8'))
+            case Vec() | FrozenVec() | Angle() | FrozenAngle():
+                a, b, c = val
+                algo.update(rand.THREE_FLOATS.pack(round(a, 6), round(b, 6), round(c, 6)))
+            case float():
+                algo.update(rand.ONE_FLOAT.pack(val))
+            case int():
+                algo.update(rand.ONE_INT.pack(hash(val)))
+            case Matrix() | FrozenMatrix():
+                algo.update(rand.NINE_FLOATS.pack(
+                    val[0, 0], val[0, 1], val[0, 2],
+                    val[1, 0], val[1, 1], val[1, 2],
+                    val[2, 0], val[2, 1], val[2, 2],
+                ))
+            case Entity():
+                algo.update(val['targetname'].encode('ascii', 'replace'))
+                x, y, z = round(Vec.from_str(val['origin']), 6)
+                algo.update(rand.THREE_FLOATS.pack(x, y, z))
+                p, y, r = Vec.from_str(val['origin'])
+                algo.update(rand.THREE_FLOATS.pack(round(p, 6), round(y, 6), round(r, 6)))
+            case _:
+                algo.update(val)  # type: ignore[arg-type]
+    return Random(int.from_bytes(algo.digest(), 'little'))
+
+
+@pytest.fixture
+def map_hash(monkeypatch: pytest.MonkeyPatch) -> Iterator[hashlib._Hash]:
+    """Replace the map hash with one specific to each test."""
+    map_hash = hashlib.sha256(b'test_rand')
+    monkeypatch.setattr(rand, 'MAP_HASH', map_hash)
+    rand._PREFIXES.clear()
+    yield map_hash
+    rand._PREFIXES.clear()
+
+
+def make_value(rng: Random, vmf: VMF) -> object:
+    """Produce a random value of any supported type."""
+    def coord() -> float:
+        """Mostly produce grid positions, but sometimes arbitrary floats."""
+        match rng.randrange(4):
+            case 0:
+                return rng.uniform(-16384, 16384)
+            case 1:
+                return rng.randrange(-64, 64) / 8
+            case _:
+                return float(rng.randrange(-128, 128) * 16)
+
+    match rng.randrange(14):
+        case 0:
+            return ''.join(rng.choices('abcdef_0123é', k=rng.randrange(12)))
+        case 1:
+            return coord()
+        case 2:
+            return rng.randrange(-2**40, 2**31)
+        case 3:
+            return rng.random() < 0.5
+        case 4:
+            return rng.randbytes(rng.randrange(8))
+        case 5:
+            return bytearray(rng.randbytes(rng.randrange(8)))
+        case 6:
+            return Vec(coord(), coord(), coord())
+        case 7:
+            return FrozenVec(coord(), coord(), coord())
+        case 8:
+            return Angle(coord(), coord(), coord())
+        case 9:
+            return FrozenAngle(coord(), coord(), coord())
+        case 10:
+            return Matrix.from_angle(coord(), coord(), coord())
+        case 11:
+            return FrozenMatrix.from_angle(coord(), coord(), coord())
+        case 12:
+            return vmf.create_ent(
+                'func_instance',
+                targetname=rng.choice(['', 'inst_1', 'ünicode']),
+                origin=f'{coord()} {coord()} {coord()}',
+            )
+        case _:
+            return coord() + 0.1234567
+
+
+def test_matches_reference(map_hash: hashlib._Hash) -> None:
+    """Check seeds exactly match the original implementation, for a large variety of values."""
+    rng = Random(42)
+    vmf = VMF()
+    for i in range(20_000):
+        name = rng.choice(NAMES)
+        values = [make_value(rng, vmf) for _ in range(rng.randrange(5))]
+        try:
+            expected = reference_seed(map_hash, name, *values).getstate()
+        except Exception as exc:
+            # Out of range integers, these should fail identically.
+            with pytest.raises(type(exc)):
+                rand.seed(name, *values)  # type: ignore[arg-type]
+        else:
+            assert rand.seed(name, *values).getstate() == expected, (i, name, values)  # type: ignore[arg-type]
+
+
+def test_map_hash_changes(map_hash: hashlib._Hash, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Check cached prefixes are discarded when the map is seeded."""
+    monkeypatch.setattr(instanceLocs, 'resolve_one', lambda path, error: 'light.vmf')
+    vmf = VMF()
+    vmf.create_ent('func_instance', file='LIGHT.vmf', origin='128 64 -192')
+    first = rand.seed(b'tile', Vec(1, 2, 3)).random()
+    rand.init_seed(vmf)
+    second = rand.seed(b'tile', Vec(1, 2, 3)).random()
+    assert first != second
+    expected = hashlib.sha256(b'test_rand')
+    expected.update(rand.THREE_INTS.pack(2, 1, -3))
+    assert second == reference_seed(expected, b'tile', Vec(1, 2, 3)).random()
+
+
+def test_invalid_type(map_hash: hashlib._Hash) -> None:
+    """Unsupported values raise TypeError, as before."""
+    with pytest.raises(TypeError):
+        rand.seed(b'tile', [1, 2, 3])  # type: ignore[arg-type]
+    with pytest.raises(TypeError):
+        rand.seed(b'tile', None)  # type: ignore[arg-type]
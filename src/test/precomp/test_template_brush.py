@@ -0,0 +1,79 @@
+"""Test template placement."""
+import io
+import itertools
+
+from srctools import VMF, Matrix, Solid, Vec
+
+from precomp import template_brush
+
+
+ORIGINS = [Vec(0, 0, 0), Vec(64, -128, 32), Vec(-1024.5, 385.25, 17.125)]
+ANGLES = [
+    Matrix(),
+    Matrix.from_angle(0, 90, 0),
+    Matrix.from_angle(-90, 180, 0),
+    Matrix.from_angle(90, 0, 270),
+    Matrix.from_angle(35.5, 12.25, -63),
+]
+
+
+def make_template() -> template_brush.Template:
+    """Build a template with a few irregularly textured brushes."""
+    vmf = VMF()
+    world: list[Solid] = []
+    detail: list[Solid] = []
+    for i in range(4):
+        prism = vmf.make_prism(Vec(-64, -32, -8) * i, Vec(64, 16 + i, 48), 'tile/white_wall_tile003a')
+        for j, face in enumerate(prism.solid):
+            face.uaxis.offset = 3.5 * i + j
+            face.vaxis.scale = 0.125 * (j + 1)
+            face.lightmap = 8 * (i + 1)
+        (detail if i % 2 else world).append(prism.solid)
+    return template_brush.Template(
+        temp_id='TEST_TEMPLATE',
+        visgroup_names=set(),
+        world={'': world},
+        detail={'': detail},
+        overlays={},
+    )
+
+
+def place_reference(vmf: VMF, brushes: list[Solid], origin: Vec, orient: Matrix) -> dict[int, int]:
+    """Place brushes in the way that import_template() originally did."""
+    id_mapping: dict[int, int] = {}
+    for old_brush in brushes:
+        brush = old_brush.copy(vmf_file=vmf, side_mapping=id_mapping, keep_vis=False)
+        brush.localise(origin, orient)
+        vmf.add_brush(brush)
+    return id_mapping
+
+
+def export(vmf: VMF) -> str:
+    """Export a VMF to a string."""
+    with io.StringIO() as f:
+        vmf.export(f)
+        return f.getvalue()
+
+
+def test_matches_copy() -> None:
+    """Check the cached placement produces exactly the same brushes as copying them."""
+    template = make_template()
+    world, detail, _ = template.visgrouped(())
+
+    ref_vmf = VMF()
+    ref_ids = []
+    for orient, origin in itertools.product(ANGLES, ORIGINS):
+        ref_ids.append(place_reference(ref_vmf, world + detail, origin, orient))
+
+    vmf = VMF()
+    results = []
+    for orient, origin in itertools.product(ANGLES, ORIGINS):
+        results.append(template_brush.import_template(
+            vmf, template, origin, orient,
+            force_type=template_brush.TEMP_TYPES.world,
+        ))
+
+    assert [temp.orig_ids for temp in results] == ref_ids
+    assert export(vmf) == export(ref_vmf)
+    # Each orientation was only rotated once.
+    assert len(template._rotated) == len(ANGLES)
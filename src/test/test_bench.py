@@ -0,0 +1,40 @@
+"""Test the benchmark harness."""
+from bench import Results, compare
+from bench.compiler import MapParams, build_map
+
+
+def test_compare() -> None:
+    """Check regressions are detected, ignoring tiny or missing timings."""
+    results = Results('test')
+    results.add('slower', 0.5)
+    results.add('faster', 0.05)
+    results.add('same', 0.2)
+    results.add('tiny', 0.001)
+    results.add('new', 1.0)
+    baseline = {'slower': 0.25, 'faster': 0.1, 'same': 0.19, 'tiny': 0.0001, 'removed': 1.0}
+
+    [regress] = compare(baseline, results, 0.1)
+    assert regress.name == 'slower'
+    assert regress.ratio == 2.0
+    assert compare(baseline, results, 1.5) == []
+
+
+def test_synthetic_map() -> None:
+    """Check the synthetic map contains everything requested."""
+    vmf = build_map(MapParams(
+        name='test', width=6, length=8, height=3,
+        items=10, antlines=2, fizzlers=1, glass=1, goo=4,
+    ))
+    files = [inst['file'] for inst in vmf.by_class['func_instance']]
+    assert files.count('instances/bench/item.vmf') == 10
+    assert files.count('instances/bench/indicator_toggle.vmf') == 2
+    assert files.count('instances/bench/fizzler_base.vmf') == 1
+    assert files.count('instances/bench/fizzler_model.vmf') == 2
+    assert files.count('instances/bench/glass_128.vmf') == 6 * 3
+    # Each antline is two segments.
+    assert len(vmf.by_class['info_overlay']) == 4
+    goo = [
+        brush for brush in vmf.brushes
+        if any(face.mat == 'nature/toxicslime_a2_bridge_intro' for face in brush.sides)
+    ]
+    assert len(goo) == 4
@@ -0,0 +1,80 @@
+"""Test the editoritems database passed to the compiler."""
+import io
+import pickle
+
+import attrs
+import pytest
+
+from editoritems import Item
+from editoritems_db import HEADER, ItemDatabase, ItemSummary, write_database
+from sample_data.items import build_items
+import utils
+
+
+def export(item: Item) -> str:
+    """Export an item, to compare them."""
+    buf = io.StringIO()
+    item.export_one(buf)
+    return buf.getvalue()
+
+
+def test_round_trip() -> None:
+    """Test items are decoded only when accessed, and match the originals."""
+    items = build_items(20)
+    database = ItemDatabase(write_database(items))
+    assert list(database) == [item.id for item in items]
+    assert len(database) == 20
+    assert 'BENCH_ITEM_4' in database
+    assert 'BENCH_ITEM_40' not in database
+    assert database.decoded == 0
+
+    assert [
+        attrs.evolve(summary, offset=0, length=0)
+        for summary in database.summaries()
+    ] == [ItemSummary.from_item(item) for item in items]
+    [summary] = [summary for summary in database.summaries() if summary.id == 'BENCH_ITEM_3']
+    assert summary.instances == (
+        'instances/bench/item_3/weighted.vmf',
+        'instances/bench/item_3/cube.vmf',
+        'instances/bench/item_3/sphere.vmf',
+    )
+    assert summary.cust_instances == {
+        'frame': 'instances/bench/item_3/frame.vmf',
+        'light': 'instances/bench/item_3/light.vmf',
+    }
+    assert database.decoded == 0
+
+    item = database[utils.obj_id('BENCH_ITEM_3')]
+    assert database.decoded == 1
+    assert database[utils.obj_id('BENCH_ITEM_3')] is item
+    assert database.decoded == 1
+    # Identical to pickling the item directly.
+    assert export(item) == export(pickle.loads(pickle.dumps(items[3])))
+    assert item.conn_config is not None
+    assert items[3].conn_config is not None
+    assert repr(item.conn_config.enable_cmd) == repr(items[3].conn_config.enable_cmd)
+
+    with pytest.raises(KeyError):
+        database[utils.obj_id('BENCH_ITEM_40')]
+    assert dict(database) == {item.id: item for item in database.values()}
+    assert database.decoded == 20
+
+
+def test_duplicates() -> None:
+    """Duplicate item IDs are rejected."""
+    items = build_items(3)
+    with pytest.raises(ValueError, match='BENCH_ITEM_1'):
+        write_database([*items, items[1]])
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'BEE2EDIT',
+    pickle.dumps(build_items(1)),
+    HEADER.pack(b'BEE2EDIT', 1000, 0),
+    HEADER.pack(b'BEE2EDIT', 1, 5) + pickle.dumps({}),
+], ids=['empty', 'truncated', 'pickle', 'version', 'index'])
+def test_invalid(data: bytes) -> None:
+    """Invalid databases are rejected."""
+    with pytest.raises(ValueError, match=r'(?i)editor'):
+        ItemDatabase(data)
@@ -0,0 +1,94 @@
+"""Test the persistent index of game filesystems."""
+from pathlib import Path
+import os
+
+from srctools.filesys import FileSystemChain, RawFileSystem, VPKFileSystem
+from srctools.vpk import VPK
+import pytest
+
+from sample_data.game import build_game, material_name
+import fsys_index
+
+
+def assert_same_fsys(indexed: FileSystemChain, plain: FileSystemChain, names: list[str]) -> None:
+    """Check the indexed filesystem behaves the same as the original."""
+    assert [
+        (type(sys) is RawFileSystem, os.path.normcase(sys.path), prefix)
+        for sys, prefix in indexed.systems
+    ] == [
+        (type(sys) is RawFileSystem, os.path.normcase(sys.path), prefix)
+        for sys, prefix in plain.systems
+    ]
+    for name in names:
+        try:
+            expected = plain[name]
+        except FileNotFoundError:
+            assert name not in indexed
+            continue
+        file = indexed[name]
+        assert FileSystemChain.get_system(file).path == FileSystemChain.get_system(expected).path
+        assert file.path == expected.path
+        assert file.cache_key() == expected.cache_key()
+        with file.open_bin() as f1, expected.open_bin() as f2:
+            assert f1.read() == f2.read(), name
+    assert sorted(file.path for file in indexed.walk_folder('materials/metal')) == sorted(
+        file.path for file in plain.walk_folder('materials/metal')
+    )
+
+
+def test_index(tmp_path: Path) -> None:
+    """Test building the index, then using it."""
+    game = build_game(tmp_path, 2, 200)
+    index_file = tmp_path / 'bin' / 'bee2' / 'fsys_index.bin'
+    names = [material_name(i) for i in range(0, 220, 3)] + ['materials/loose.vmt', 'MATERIALS/Brick/MAT_00008.vmt']
+    plain = game.get_filesystem()
+
+    cold, stats = fsys_index.get_filesystem(game, index_file)
+    assert stats == fsys_index.IndexStats(hits=0, misses=2)
+    assert index_file.exists()
+    assert not any(isinstance(sys, fsys_index.IndexedVPKFileSystem) for sys, _ in cold.systems)
+    assert_same_fsys(cold, plain, names)
+
+    warm, stats = fsys_index.get_filesystem(game, index_file)
+    assert stats == fsys_index.IndexStats(hits=2, misses=0)
+    vpk_systems = [sys for sys, _ in warm.systems if isinstance(sys, VPKFileSystem)]
+    assert len(vpk_systems) == 2
+    assert all(isinstance(sys, fsys_index.IndexedVPKFileSystem) for sys in vpk_systems)
+    assert_same_fsys(warm, plain, names)
+    # Lookups did not require parsing the VPKs.
+    assert all(sys._vpk is None for sys in vpk_systems)  # type: ignore[attr-defined]
+    # But it can still be accessed.
+    assert len(vpk_systems[0].vpk) == 200
+
+
+def test_vpk_changed(tmp_path: Path) -> None:
+    """Test VPKs are reindexed when changed, and removed VPKs are discarded."""
+    game = build_game(tmp_path, 2, 50)
+    index_file = tmp_path / 'bin' / 'bee2' / 'fsys_index.bin'
+    fsys_index.get_filesystem(game, index_file)
+
+    with VPK(game.path / 'pak01_dir.vpk', mode='a') as vpk:
+        vpk.add_file('materials/new_file.vmt', b'UnlitGeneric {}')
+    fsys, stats = fsys_index.get_filesystem(game, index_file)
+    assert stats == fsys_index.IndexStats(hits=1, misses=1)
+    with fsys.open_str('materials/new_file.vmt') as f:
+        assert f.read() == 'UnlitGeneric {}'
+    assert_same_fsys(fsys, game.get_filesystem(), ['materials/new_file.vmt', material_name(4)])
+
+    (game.path / 'pak02_dir.vpk').unlink()
+    fsys, stats = fsys_index.get_filesystem(game, index_file)
+    assert stats == fsys_index.IndexStats(hits=1, misses=0)
+    assert list(fsys_index.load_index(index_file)) == [os.path.normcase(game.path / 'pak01_dir.vpk')]
+
+
+@pytest.mark.parametrize('data', [b'', b'not a pickle', b'\x80\x05K\x01.'])
+def test_invalid_index(tmp_path: Path, data: bytes) -> None:
+    """An invalid index is ignored and rebuilt."""
+    game = build_game(tmp_path, 1, 20)
+    index_file = tmp_path / 'bin' / 'bee2' / 'fsys_index.bin'
+    index_file.write_bytes(data)
+    fsys, stats = fsys_index.get_filesystem(game, index_file)
+    assert stats == fsys_index.IndexStats(hits=0, misses=1)
+    assert_same_fsys(fsys, game.get_filesystem(), [material_name(3)])
+    fsys, stats = fsys_index.get_filesystem(game, index_file)
+    assert stats == fsys_index.IndexStats(hits=1, misses=0)
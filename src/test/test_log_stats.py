@@ -0,0 +1,79 @@
+"""Test the structured log sink."""
+from pathlib import Path
+import logging
+
+from srctools.logger import LoggerAdapter
+import pytest
+
+from log_stats import ModuleStats, StatsHandler, format_report, install_from_env, read_records, summarise
+
+
+def test_records(tmp_path: Path) -> None:
+    """Check records are written, and the statistics match those computed from the file."""
+    filename = tmp_path / 'test.jsonl'
+    handler = StatsHandler(filename)
+    loggers = {}
+    for name in ['test_log_stats.noisy', 'test_log_stats.quiet']:
+        logger = loggers[name] = logging.getLogger(name)
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        logger.addHandler(handler)
+    try:
+        noisy = LoggerAdapter(loggers['test_log_stats.noisy'])
+        for i in range(10):
+            noisy.debug('Message {}', i)
+        noisy.warning('Warning {}!', 'here')
+        loggers['test_log_stats.quiet'].info('Percent %s', 'formatting')
+    finally:
+        for logger in loggers.values():
+            logger.removeHandler(handler)
+        handler.close()
+
+    with open(filename, encoding='utf8') as f:
+        records = list(read_records(f))
+    assert len(records) == 12
+    assert records[0]['logger'] == 'test_log_stats.noisy'
+    assert records[0]['func'] == 'test_records'
+    assert records[0]['level'] == 'DEBUG'
+    assert records[0]['chars'] == len('Message 0')
+    assert records[-1]['chars'] == len('Percent formatting')
+    assert records[0]['t'] <= records[-1]['t']
+
+    stats = summarise(records)
+    assert stats == handler.stats
+    assert stats['test_log_stats.noisy'].count == 11
+    assert stats['test_log_stats.noisy'].levels == {'DEBUG': 10, 'WARNING': 1}
+    assert stats['test_log_stats.quiet'].levels == {'INFO': 1}
+
+
+def test_report() -> None:
+    """Check modules are sorted by the requested key."""
+    stats = {
+        'frequent': ModuleStats(count=20, format_ns=1_000, chars=100),
+        'slow': ModuleStats(count=2, format_ns=5_000_000, chars=50),
+        'long': ModuleStats(count=5, format_ns=2_000, chars=5000),
+    }
+    for key, expected in [('count', 'frequent'), ('time', 'slow'), ('size', 'long')]:
+        header, first, *rest = format_report(stats, key).splitlines()
+        assert first.startswith(expected)
+        assert len(rest) == 2
+    [header, first] = format_report(stats, 'time', limit=1).splitlines()
+    assert first.split()[:4] == ['slow', '2', '7.4', '5.000']
+
+
+@pytest.mark.parametrize('enabled', ['1', '0'])
+def test_install_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, enabled: str) -> None:
+    """Check the handler is only installed when enabled, ahead of the other handlers."""
+    monkeypatch.setenv('BEE_LOG_STATS', enabled)
+    handler = install_from_env(tmp_path / 'app.log')
+    if enabled == '0':
+        assert handler is None
+        return
+    assert handler is not None
+    root = logging.getLogger()
+    try:
+        assert root.handlers[0] is handler
+    finally:
+        root.removeHandler(handler)
+        handler.close()
+    assert (tmp_path / 'app.jsonl').exists()
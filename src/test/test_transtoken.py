@@ -1,4 +1,8 @@
 """Test the localisation system."""
+import gc
+import sys
+import weakref
+
 from srctools import EmptyMapping
 
 from transtoken import TransToken, NS_GAME, NS_UI, NS_UNTRANSLATED
@@ -54,3 +58,63 @@ def test_token_parse() -> None:
     assert TransToken.parse(owner, "[[PACKAGE The Blah device\n") == TransToken(
         owner, owner, "[[PACKAGE The Blah device\n", EmptyMapping
     )
+
+
+def test_token_interning() -> None:
+    """Test parsed tokens without parameters are shared."""
+    pack = utils.obj_id("SOME_PACKAGE")
+    first = TransToken.parse(pack, "[[OTHER]] Shared text")
+    assert TransToken.parse(pack, "[[other]] Shared text") is first
+    assert TransToken.parse(utils.obj_id("ANOTHER"), "[[OTHER]] Shared text") is not first
+    assert TransToken.untranslated("Blah") is TransToken.untranslated("Blah")
+    assert TransToken.from_valve("PORTAL2_Blah") is TransToken.from_valve("PORTAL2_Blah")
+    # Adding parameters makes a new token.
+    formatted = first.format(n=1)
+    assert formatted is not first
+    assert first.parameters is EmptyMapping
+
+
+def test_token_interning_subclass() -> None:
+    """Parsing with a subclass produces and shares tokens of that class."""
+    class SubToken(TransToken):
+        """A subclass with no additional fields."""
+
+    pack = utils.obj_id("SOME_PACKAGE")
+    sub = SubToken.parse(pack, "Subclass text")
+    assert type(sub) is SubToken
+    assert SubToken.parse(pack, "Subclass text") is sub
+    assert type(TransToken.parse(pack, "Subclass text")) is TransToken
+
+
+def test_token_interning_freed() -> None:
+    """Shared tokens and their text are freed once no longer used."""
+    pack = utils.obj_id("SOME_PACKAGE")
+    # Build the text at runtime, so it isn't a constant.
+    text = "".join(["Text from an ", "unloaded package"])
+    tok = TransToken.parse(pack, text)
+    assert tok.token is text
+    # Interned strings are immortal, with a huge refcount.
+    assert sys.getrefcount(text) < 100
+    ref = weakref.ref(tok)
+    del tok
+    gc.collect()
+    assert ref() is None
+
+
+def test_token_params() -> None:
+    """Test the compact parameter mapping behaves like a dict."""
+    pack = utils.obj_id("PACK")
+    tok = TransToken(pack, pack, "{a} {b}", {"a": 1, "b": "two"})
+    assert tok.parameters == {"a": 1, "b": "two"}
+    assert dict(tok.parameters) == {"a": 1, "b": "two"}
+    assert tok.parameters["b"] == "two"
+    assert "a" in tok.parameters
+    assert "c" not in tok.parameters
+    assert len(tok.parameters) == 2
+    assert str(tok) == "1 two"
+    # Order of parameters is irrelevant.
+    other = TransToken(pack, pack, "{a} {b}", {"b": "two", "a": 1})
+    assert tok == other
+    assert hash(tok) == hash(other)
+    assert tok.format(b=3).parameters == {"a": 1, "b": 3}
+    assert tok != TransToken(pack, pack, "{a} {b}", {"a": 1})
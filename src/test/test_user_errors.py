@@ -0,0 +1,53 @@
+"""Test the data structures used for the error display."""
+import pickle
+
+import pytest
+
+from user_errors import TILES_HEADER, Kind, TileArrays, pack_tiles, unpack_tiles
+
+
+def test_tile_append() -> None:
+    """Test adding tiles to the arrays."""
+    tiles = TileArrays()
+    assert len(tiles) == 0
+    tiles.append('n', (1.0, 2.0, 3.0), 1.0, 0.25)
+    tiles.append('d', (-4.5, 5.0, 6.0), 2.0, 3.0)
+    assert len(tiles) == 2
+    assert list(tiles.positions) == [1.0, 2.0, 3.0, -4.5, 5.0, 6.0]
+    assert list(tiles.sizes) == [1.0, 0.25, 2.0, 3.0]
+    assert list(tiles.orients) == [0, 5]
+
+    with pytest.raises(ValueError, match='not found'):
+        tiles.append('x', (0.0, 0.0, 0.0), 1.0, 1.0)  # type: ignore[arg-type]
+
+
+def test_pack_roundtrip() -> None:
+    """Test packing and unpacking tiles, with various name lengths to check alignment."""
+    white = TileArrays()
+    white.append('u', (1.0, 2.0, 3.0), 4.0, 5.0)
+    goo = TileArrays()
+    for i in range(5):
+        goo.append('d', (i, 2 * i, 0.75), 1.0, float(i))
+    empty = TileArrays()
+
+    data = pack_tiles({'white': white, 'goopartial': empty, 'goo': goo})
+    assert len(data) % 4 == 0
+    assert data[:TILES_HEADER.size] == TILES_HEADER.pack(b'BEE2', 1, 3)
+
+    result = unpack_tiles(data)
+    assert list(result) == ['white', 'goopartial', 'goo']
+    expected: list[tuple[Kind, TileArrays]] = [('white', white), ('goopartial', empty), ('goo', goo)]
+    for kind, orig in expected:
+        assert result[kind].positions == orig.positions
+        assert result[kind].sizes == orig.sizes
+        assert result[kind].orients == orig.orients
+
+
+def test_pickle() -> None:
+    """The error info is pickled to pass to the server."""
+    tiles = TileArrays()
+    tiles.append('e', (1.0, 2.0, 3.0), 4.0, 5.0)
+    result = pickle.loads(pickle.dumps(tiles))
+    assert result.positions == tiles.positions
+    assert result.sizes == tiles.sizes
+    assert result.orients == tiles.orients
@@ -6,14 +6,15 @@ We take care not to directly import gettext and babel, so the compiler can omit
 """
 from __future__ import annotations
 from typing import (
-    Any, ClassVar, Final, LiteralString, Never, NoReturn, Protocol, cast, override,
+    Any, ClassVar, Final, LiteralString, Never, NoReturn, Protocol, Self, cast, override,
 )
 
-from collections.abc import Callable, Iterable, Mapping, Sequence
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from enum import Enum
 from html import escape as html_escape
 from pathlib import Path
 import string
+import weakref
 
 from srctools import EmptyMapping, logger
 from trio_util import AsyncValue
@@ -91,9 +92,92 @@ class HTMLFormatter(string.Formatter):
 HTML_FORMAT = HTMLFormatter()
 
 
+class TokenParams(Mapping[str, object]):
+    """An immutable mapping of parameters for a token.
+
+    Tokens usually have only a few parameters, so these are stored in a single flat tuple
+    of alternating keys and values, which is much smaller than a dict.
+    """
+    __slots__ = ('_items', '_hash')
+    _items: tuple[object, ...]
+    _hash: int | None
+
+    def __init__(self, params: Mapping[str, object]) -> None:
+        items: list[object] = []
+        for key, value in params.items():
+            items += (key, value)
+        self._items = tuple(items)
+        self._hash = None
+
+    def __repr__(self) -> str:
+        return f'TokenParams({dict(self)!r})'
+
+    def __getitem__(self, key: str) -> object:
+        items = self._items
+        for i in range(0, len(items), 2):
+            if items[i] == key:
+                return items[i + 1]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(cast('tuple[str, ...]', self._items[::2]))
+
+    def __len__(self) -> int:
+        return len(self._items) // 2
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TokenParams):
+            return dict(self.items()) == dict(other.items())
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        """Hash the parameters. This is cached, since tokens are often used as keys."""
+        if self._hash is None:
+            self._hash = hash(frozenset(self.items()))
+        return self._hash
+
+    def __reduce__(self) -> tuple[object, ...]:
+        return TokenParams, (dict(self.items()), )
+
+
 def _param_convert(params: Mapping[str, object]) -> Mapping[str, object]:
-    """If a blank dict is passed, use EmptyMapping to save memory."""
-    return EmptyMapping if len(params) == 0 else params
+    """If a blank dict is passed, use EmptyMapping to save memory. Otherwise, use a compact mapping."""
+    if len(params) == 0:
+        return EmptyMapping
+    elif isinstance(params, TokenParams):
+        return params
+    else:
+        return TokenParams(params)
+
+
+# Tokens without parameters are shared, since packages repeat the same text many times.
+# Tokens are immutable, so this is safe.
+# The strings themselves are not passed to sys.intern(), since that makes them immortal.
+_INTERNED: weakref.WeakValueDictionary[
+    tuple[type[TransToken], str, str, str], TransToken,
+] = weakref.WeakValueDictionary()
+_intern_requests = 0
+
+
+def intern_stats() -> tuple[int, int]:
+    """Return the number of tokens requested from the intern table, and the number currently stored."""
+    return _intern_requests, len(_INTERNED)
+
+
+def _intern[Tok: TransToken](
+    cls: type[Tok],
+    namespace: utils.SpecialID, orig_pack: utils.SpecialID, token: str,
+) -> Tok:
+    """Fetch a shared token of this class without parameters."""
+    global _intern_requests
+    _intern_requests += 1
+    key = (cls, namespace, orig_pack, token)
+    try:
+        return cast(Tok, _INTERNED[key])
+    except KeyError:
+        tok = cls(namespace, orig_pack, token, EmptyMapping)
+        _INTERNED[key] = tok
+        return tok
 
 
 @attrs.frozen(eq=False)
@@ -111,8 +195,11 @@ class TransToken:
     BLANK: ClassVar[TransToken]   # Quick access to blank token.
 
     @classmethod
-    def parse(cls, package: utils.SpecialID, text: str) -> TransToken:
-        """Parse a string to find a translation token, if any."""
+    def parse(cls, package: utils.SpecialID, text: str) -> Self:
+        """Parse a string to find a translation token, if any.
+
+        Identical tokens are shared, instead of creating a new one each time.
+        """
         orig_pack = package
         if text.startswith('[['):  # "[[package]] default"
             try:
@@ -125,13 +212,13 @@ class TransToken:
                     'Unparsable translation token - expected "[[package]] text", got:\n{!r}',
                     text
                 )
-                return cls(package, orig_pack, text, EmptyMapping)
+                return _intern(cls, package, orig_pack, text)
             else:
-                return cls(package, orig_pack, token, EmptyMapping)
+                return _intern(cls, package, orig_pack, token)
         elif text.startswith(PETI_KEY_PREFIX):
-            return cls(NS_GAME, orig_pack, text, EmptyMapping)
+            return _intern(cls, NS_GAME, orig_pack, text)
         else:
-            return cls(package, orig_pack, text, EmptyMapping)
+            return _intern(cls, package, orig_pack, text)
 
     @classmethod
     def ui(cls, token: LiteralString, /, **kwargs: str) -> TransToken:
@@ -153,7 +240,7 @@ class TransToken:
     @classmethod
     def from_valve(cls, text: str) -> TransToken:
         """Make a token for a string that should be looked up in Valve's translation files."""
-        return cls(NS_GAME, NS_GAME, text, EmptyMapping)
+        return _intern(TransToken, NS_GAME, NS_GAME, text)
 
     @classmethod
     def untranslated(cls, text: str) -> TransToken:
@@ -161,7 +248,7 @@ class TransToken:
 
         In this case, the token is the literal text to use.
         """
-        return cls(NS_UNTRANSLATED, NS_UNTRANSLATED, text, EmptyMapping)
+        return _intern(TransToken, NS_UNTRANSLATED, NS_UNTRANSLATED, text)
 
     @classmethod
     def list_and(cls, children: Iterable[TransToken], sort: bool = False) -> ListTransToken:
@@ -227,16 +314,15 @@ class TransToken:
             return (
                 self.namespace == other.namespace and
                 self.token == other.token and
-                self.parameters == other.parameters
+                # Usually both are the shared empty mapping, skip comparing those.
+                (self.parameters is other.parameters or self.parameters == other.parameters)
             )
         return NotImplemented
 
     def __hash__(self) -> int:
         """Allow hashing the token."""
-        return hash((
-            self.namespace, self.token,
-            frozenset(self.parameters.items()),
-        ))
+        # Parameters are either blank, or a TokenParams which caches its hash.
+        return hash((self.namespace, self.token, self.parameters or None))
 
     def _convert_token(self, lang: Language) -> str:
         """Return the translated version of our token."""
@@ -319,7 +405,7 @@ class PluralTransToken(TransToken):
                 self.namespace == other.namespace and
                 self.token == other.token and
                 self.token_plural == other.token_plural and
-                self.parameters == other.parameters
+                (self.parameters is other.parameters or self.parameters == other.parameters)
             )
         return NotImplemented
 
@@ -107,10 +107,17 @@ class Tracer(trio.abc.Instrument):
             prev, _ = start
             elapsed += cur_time - prev
 
+        self.task_finished(task, elapsed)
         if elapsed > 0.1:
             self.slow.append((elapsed, f'Task time={elapsed:.06}: {task!r}, args={self.get_args(task)}'))
         self.args.pop(task, None)
 
+    def task_finished(self, task: trio.lowlevel.Task, elapsed: float) -> None:
+        """Called with the total time a task spent running, when it exits.
+
+        This does nothing by default, subclasses can override to collect additional statistics.
+        """
+
     def get_args(self, task: trio.lowlevel.Task) -> object:
         """Get the args for a task."""
         args = self.args.pop(task, srctools.EmptyMapping)
@@ -3,9 +3,8 @@ from typing import Final, assert_never, override
 
 from tkinter import font as tk_font, ttk
 import tkinter as tk
-from collections.abc import Callable, Mapping
+from collections.abc import Callable, Iterable, Mapping
 from contextlib import aclosing
-import math
 
 import trio
 
@@ -13,7 +12,7 @@ from app import WidgetCache, img
 from app.mdown import MarkdownData
 from app.selector_win import (
     LOGGER, TRANS_ATTR_DESC, TRANS_SUGGESTED, TRANS_SUGGESTED_MAC, TRANS_WINDOW_TITLE,
-    AttrDef, DispFont, GroupHeaderBase, NavKeys, Options, SelectorWinBase,
+    AttrDef, DispFont, GroupHeaderBase, LayoutMetrics, NavKeys, Options, SelectorWinBase,
 )
 from consts import SEL_ICON_SIZE
 from packages import AttrTypes
@@ -22,7 +21,7 @@ from ui_tk import tk_tools
 from ui_tk.img import TK_IMG
 from ui_tk.rich_textbox import RichText
 from ui_tk.tooltip import add_tooltip, set_tooltip
-from ui_tk.wid_transtoken import set_menu_text, set_text, set_win_title
+from ui_tk.wid_transtoken import clear_stored_menu, set_menu_text, set_text, set_win_title
 import utils
 
 
@@ -123,6 +122,10 @@ class SelectorWin(SelectorWinBase[ttk.Button, GroupHeader]):
     pal_frame: ttk.Frame
 
     wid_scroll: tk_tools.HidingScroll
+    # The last position reported by the canvas, to detect scrolling.
+    _scroll_view: tuple[str, str]
+    # The height of group headers, once measured.
+    _header_height: int
     # Holds all the widgets which provide info for the current item.
     prop_frm: ttk.Frame
     # Border around the selected item icon.
@@ -224,7 +227,9 @@ class SelectorWin(SelectorWinBase[ttk.Button, GroupHeader]):
             command=self.wid_canvas.yview,
         )
         self.wid_scroll.grid(row=0, column=1, sticky="NS")
-        self.wid_canvas['yscrollcommand'] = self.wid_scroll.set
+        self._scroll_view = ('', '')
+        self._header_height = 0
+        self.wid_canvas['yscrollcommand'] = self._evt_canvas_scrolled
 
         tk_tools.add_mousewheel(self.wid_canvas, self.win)
 
@@ -550,71 +555,66 @@ class SelectorWin(SelectorWinBase[ttk.Button, GroupHeader]):
         self.desc_label['wraplength'] = self.win.winfo_width() - 10
         super().evt_window_resized(event)
 
+    def _evt_canvas_scrolled(self, first: str, last: str) -> None:
+        """When the canvas scrolls, update the scrollbar and assign buttons to newly visible items."""
+        self.wid_scroll.set(first, last)
+        # Repositioning reconfigures the canvas, which calls this even if it doesn't move.
+        if (first, last) != self._scroll_view:
+            self._scroll_view = (first, last)
+            if self._visible:
+                self.item_pos_dirty.set()
+
     @override
     def _ui_calc_columns(self) -> int:
         return (self.wid_canvas.winfo_width() - 10) // ITEM_WIDTH
 
+    @override
+    def _ui_layout_metrics(self) -> LayoutMetrics:
+        if not self._header_height and self.group_widgets:
+            # Headers all use the same font, so measure any of them.
+            header = next(iter(self.group_widgets.values()))
+            header.frame.update_idletasks()
+            self._header_height = header.frame.winfo_reqheight()
+        return LayoutMetrics(ITEM_WIDTH, ITEM_HEIGHT, self._header_height, 5)
+
     @override
     async def _ui_reposition_items(self) -> None:
-        """Reposition all the items to fit in the current geometry.
+        """Reposition the items to fit in the current geometry.
 
-        Called whenever items change or the window is resized.
+        Called whenever items change, the window is resized or scrolled. Only items in view are
+        given buttons.
         """
-        # The offset for the current group
-        y_off = 0
-
         self._suggest_lbl.reset()
+        layout = self._update_layout()
 
-        # If only the '' group is present, force it to be visible, and hide
-        # the header.
-        no_groups = self.group_order == ['']
-
-        for group_key in self.group_order:
+        # If only the '' group is present, it is forced to be visible, and the header is hidden.
+        if self.group_order == ['']:
+            self.group_widgets[''].frame.place_forget()
+        for group_key, y in layout.headers:
             await trio.lowlevel.checkpoint()
-            items = self.grouped_items[group_key]
-            group_wid = self.group_widgets[group_key]
+            self.group_widgets[group_key].frame.place(
+                x=0,
+                y=y,
+                width=self.column_count * ITEM_WIDTH,
+            )
 
-            if no_groups:
-                group_wid.frame.place_forget()
-            else:
-                group_wid.frame.place(
-                    x=0,
-                    y=y_off,
-                    width=self.column_count * ITEM_WIDTH,
-                )
-                group_wid.frame.update_idletasks()
-                y_off += group_wid.frame.winfo_reqheight()
-
-                if not self.group_visible.get(group_key):
-                    # Hide everything!
-                    for item_id in items:
-                        await trio.lowlevel.checkpoint()
-                        self._ui_button_hide(self._id_to_button[item_id])
-                    continue
-
-            # Place each item
-            for i, item_id in enumerate(items):
-                await trio.lowlevel.checkpoint()
-                button = self._id_to_button[item_id]
-                x = (i % self.column_count) * ITEM_WIDTH + 1
-                y = y_off + (i // self.column_count) * ITEM_HEIGHT
-                if item_id in self.suggested:
-                    sugg_lbl = self._suggest_lbl.fetch()
-                    sugg_lbl.place(x=x, y=y)
-                    sugg_lbl['width'] = button.winfo_width()
-                button.place(x=x, y=y + 20)
-                button.lift()  # Over the suggested label.
-
-            # Increase the offset by the total height of this item section
-            y_off += math.ceil(len(items) / self.column_count) * ITEM_HEIGHT + 5
+        top = round(self.wid_canvas.canvasy(0))
+        bottom = top + self.wid_canvas.winfo_height()
+        for button, item_id, x, y in self._assign_buttons(top, bottom):
+            if item_id in self.suggested:
+                sugg_lbl = self._suggest_lbl.fetch()
+                sugg_lbl.place(x=x + 1, y=y)
+                sugg_lbl['width'] = button.winfo_width()
+            button.place(x=x + 1, y=y + 20)
+            button.lift()  # Over the suggested label.
 
         # Set the size of the canvas and frame to the amount we've used
         self.wid_canvas['scrollregion'] = (
             0, 0,
             self.column_count * ITEM_WIDTH,
-            y_off,
+            layout.height,
         )
-        self.pal_frame['height'] = y_off
+        self.pal_frame['height'] = layout.height
         self._suggest_lbl.hide_unused()
 
     @override
@@ -646,9 +646,13 @@ class SelectorWin(SelectorWinBase[ttk.Button, GroupHeader]):
         button.place_forget()
 
     @override
-    def _ui_button_scroll_to(self, button: ttk.Button) -> None:
+    def _ui_scroll_to(self, y: int) -> None:
         """Scroll to an item so it's visible."""
-        height = self.wid_canvas.bbox('all')[3]  # Returns (x, y, width, height)
+        if self._layout is None or self._layout.height <= 0:
+            return
+        height = self._layout.height
+        # The scroll region may not have been updated yet.
+        self.wid_canvas['scrollregion'] = (0, 0, self.column_count * ITEM_WIDTH, height)
 
         bottom, top = self.wid_canvas.yview()
         # The sizes are returned in fractions, but we use the pixel values
@@ -656,7 +660,8 @@ class SelectorWin(SelectorWinBase[ttk.Button, GroupHeader]):
         bottom *= height
         top *= height
 
-        y = button.winfo_y()
+        # The button is placed below the suggested label.
+        y += 20
 
         if bottom <= y - 8 and y + SEL_ICON_SIZE + 8 <= top:
             return  # Already in view
@@ -724,6 +729,14 @@ class SelectorWin(SelectorWinBase[ttk.Button, GroupHeader]):
         # Ungrouped items appear directly in the menu.
         self.context_menus = {'': self.context_menu}
 
+    @override
+    def _ui_menu_clear_group(self, group: GroupHeader, items: Iterable[utils.SpecialID]) -> None:
+        """Remove all items from a group's menu."""
+        clear_stored_menu(group.menu)
+        group.menu.delete(0, 'end')
+        for item_id in items:
+            self._menu_index.pop(item_id, None)
+
     @override
     def _ui_menu_set_font(self, item_id: utils.SpecialID, suggested: bool) -> None:
         """Set the font of an item, and its parent group."""
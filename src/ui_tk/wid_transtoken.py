@@ -1,14 +1,13 @@
 """Manage applying translation tokens to TK widgets."""
 from __future__ import annotations
+from typing import Any
 
 from tkinter import ttk
 import tkinter as tk
-from contextlib import aclosing
+from collections.abc import Callable
 from weakref import WeakKeyDictionary
 
-import trio.lowlevel
-
-from app.localisation import gradual_iter
+from app.localisation import RETRANSLATE_PROGRESS, RetranslateJob, retranslate
 from transtoken import CURRENT_LANG, TransToken
 
 
@@ -68,33 +67,56 @@ def clear_stored_menu(menu: tk.Menu) -> None:
     _applied_menu_tokens.pop(menu, None)
 
 
-async def update_task() -> None:
-    """Apply new languages to all stored widgets."""
-    # Using gradual_iter() yields to the event loop in-between each conversion.
-    while True:
-        await CURRENT_LANG.wait_transition()
-        async with aclosing(gradual_iter(_applied_text_tokens)) as agen1:
-            async for text_widget, token in agen1:
-                text_widget['text'] = str(token)
+def _is_mapped(widget: tk.Misc) -> bool:
+    """Check if a widget is currently displayed."""
+    try:
+        return bool(widget.winfo_ismapped())
+    except tk.TclError:  # Destroyed.
+        return False
+
+
+def _apply_text(widget: TextWidget, token: TransToken, translate: Callable[[TransToken], str]) -> None:
+    """Reapply the text for a widget."""
+    widget['text'] = translate(token)
+
 
-        await trio.lowlevel.checkpoint()
+def _apply_menu(
+    menu: tk.Menu, menu_map: dict[int, TransToken],
+    translate: Callable[[TransToken], str],
+) -> None:
+    """Reapply the text for each item in a menu."""
+    for index, token in menu_map.items():
+        menu.entryconfigure(index, label=translate(token))
 
-        async with aclosing(gradual_iter(_applied_menu_tokens)) as agen2:
-            async for menu, menu_map in agen2:
-                for index, token in menu_map.items():
-                    menu.entryconfigure(index, label=str(token))
 
-        await trio.lowlevel.checkpoint()
+def _apply_title(window: tk.Wm, token: TransToken, translate: Callable[[TransToken], str]) -> None:
+    """Reapply a window title."""
+    window.wm_title(translate(token))
 
-        for window, token in _window_titles.items():
-            window.wm_title(str(token))
+
+_JOBS: list[RetranslateJob[Any, Any]] = [
+    RetranslateJob(_window_titles, _apply_title),
+    RetranslateJob(_applied_menu_tokens, _apply_menu),
+    RetranslateJob(_applied_text_tokens, _apply_text, _is_mapped),
+]
+
+
+async def update_task() -> None:
+    """Apply new languages to all stored widgets."""
+    # This yields to the event loop in-between batches, doing visible widgets first.
+    while True:
+        await CURRENT_LANG.wait_transition()
+        while not await retranslate(_JOBS):
+            pass  # Language changed again, start over.
 
 
 def stats() -> str:
     """Output debingging statistics."""
+    done, total = RETRANSLATE_PROGRESS.value
     return (
         f'TransTokens:\n'
         f'- label["text"]: {len(_applied_text_tokens)}\n'
         f'- Menus: {len(_applied_menu_tokens)}\n'
         f'- Windows: {len(_window_titles)}\n'
+        f'- Retranslated: {done}/{total}\n'
     )
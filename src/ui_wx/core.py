@@ -85,6 +85,8 @@ async def init_app(core_nursery: trio.Nursery) -> None:
         # So configs will not get saved - we might have half-loaded them.
         await trio.lowlevel.checkpoint()
         loadScreen.main_loader.destroy()
+        # Now the configs are fully loaded, save changes as they're made.
+        core_nursery.start_soon(config.APP.persist, config.APP_LOC)
 
         try:
             await trio.sleep_forever()
@@ -3,8 +3,7 @@ from typing import Final, assert_never, override
 
 
 from contextlib import aclosing
-from collections.abc import Callable, Mapping
-import itertools
+from collections.abc import Callable, Iterable, Mapping
 
 import wx.html
 import trio
@@ -12,7 +11,7 @@ import trio
 from app import WidgetCache, img
 from app.mdown import MarkdownData
 from app.selector_win import (
-    DispFont, GroupHeaderBase, SelectorWinBase, AttrDef, Options, NavKeys,
+    DispFont, GroupHeaderBase, LayoutMetrics, SelectorWinBase, AttrDef, Options, NavKeys,
     TRANS_ATTR_DESC, TRANS_SUGGESTED, TRANS_WINDOW_TITLE,
 )
 from consts import SEL_ICON_SIZE
@@ -36,6 +35,11 @@ ITEM_HEIGHT = SEL_ICON_SIZE + 64
 # Space between, and the total space for each widget.
 ITEM_SEP = 2
 ITEM_WIDTH_ALLOC = ITEM_WIDTH + ITEM_SEP * 2
+# Each row has an additional border above and below.
+ITEM_HEIGHT_ALLOC = ITEM_HEIGHT + ITEM_SEP * 4
+# Minimum height of group headers, and the space around them.
+GROUP_HEIGHT = 24
+GROUP_BORDER = 8
 
 KEY_TO_NAV: Final[Mapping[str, NavKeys]] = {
     'Up': NavKeys.UP,
@@ -132,7 +136,7 @@ class GroupHeader(GroupHeaderBase):
         # The right-click cascade widget. Default to the root one, will be reassigned after.
         self.menu = win.context_menu
         self.menu_item = None
-        self.panel.SetMinSize((10, 24))
+        self.panel.SetMinSize((10, GROUP_HEIGHT))
 
         self.title = TransToken.BLANK
         self.suggested = False
@@ -246,9 +250,6 @@ class SelectorWin(SelectorWinBase[ItemSlot, GroupHeader]):
 
     wid_samp_button: wx.Button | None
 
-    # The overall sizer for the item list.
-    itemlist_sizer: wx.BoxSizer
-
     # A map from group name -> header widget
     group_widgets: dict[str, GroupHeader]
     # Recycles existing group headers.
@@ -315,10 +316,9 @@ class SelectorWin(SelectorWinBase[ItemSlot, GroupHeader]):
         self.wid_panel_info = wx.Panel(self.splitter)
         self.splitter.SplitVertically(wid_itemlist, self.wid_panel_info)
 
-        self.itemlist_sizer = wx.BoxSizer(wx.VERTICAL)
-        wid_itemlist.SetSizer(self.itemlist_sizer)
         wid_itemlist.SetScrollRate(0, 10)
         wid_itemlist.Bind(wx.EVT_SIZE, self.evt_window_resized)
+        wid_itemlist.Bind(wx.EVT_SCROLLWIN, self._evt_itemlist_scrolled)
 
         self.sizer_info = sizer_info = wx.BoxSizer(wx.VERTICAL)
         self.wid_panel_info.SetSizer(sizer_info)
@@ -539,55 +539,48 @@ class SelectorWin(SelectorWinBase[ItemSlot, GroupHeader]):
         width = self.wid_itemlist.GetClientSize().Width
         return (width - 8) // ITEM_WIDTH_ALLOC
 
-    @override
-    async def _ui_reposition_items(self) -> None:
-        # If only the '' group is present, force it to be visible, and hide
-        # the header.
-        no_groups = self.group_order == ['']
+    def _evt_itemlist_scrolled(self, evt: wx.ScrollWinEvent) -> None:
+        """When scrolled, assign buttons to newly visible items."""
+        evt.Skip()
+        if self._visible:
+            self.item_pos_dirty.set()
 
-        prev_scroll_pos = self.wid_itemlist.GetScrollPos(wx.VERTICAL) / self.wid_itemlist.GetScrollRange(wx.VERTICAL)
+    @override
+    def _ui_layout_metrics(self) -> LayoutMetrics:
+        # Headers enlarge themselves if the title doesn't fit.
+        header_height = max(
+            (group.panel.GetMinHeight() for group in self.group_widgets.values()),
+            default=GROUP_HEIGHT,
+        )
+        return LayoutMetrics(ITEM_WIDTH_ALLOC, ITEM_HEIGHT_ALLOC, header_height + 2 * GROUP_BORDER)
 
-        self.itemlist_sizer.Clear(delete_windows=False)
-        group_flags = wx.SizerFlags().Expand().Border(wx.ALL, 8)
-        row_flags = wx.SizerFlags().Left().Border(wx.TOP | wx.BOTTOM, 2)
-        item_flags = wx.SizerFlags().Border(wx.ALL, 2)
+    @override
+    async def _ui_reposition_items(self) -> None:
+        layout = self._update_layout()
+        width = self.wid_itemlist.GetClientSize().Width
+        # Children are positioned relative to the scrolled view.
+        _, pixels_per = self.wid_itemlist.GetScrollPixelsPerUnit()
+        top = self.wid_itemlist.GetViewStart()[1] * pixels_per
 
-        for group_key in self.group_order:
+        # If only the '' group is present, it is forced to be visible, and the header is hidden.
+        if self.group_order == ['']:
+            self.group_widgets[''].hide()
+        for group_key, y in layout.headers:
             await trio.lowlevel.checkpoint()
-            items = self.grouped_items[group_key]
             group_wid = self.group_widgets[group_key]
+            group_wid.panel.SetSize(
+                GROUP_BORDER, y + GROUP_BORDER - top,
+                width - 2 * GROUP_BORDER, layout.metrics.header_height - 2 * GROUP_BORDER,
+            )
+            group_wid.panel.Show()
 
-            if no_groups:
-                group_wid.hide()
-            else:
-                self.itemlist_sizer.Add(group_wid.panel, group_flags)
-                if not self.group_visible.get(group_key):
-                    # Hide everything!
-                    for item_id in items:
-                        await trio.lowlevel.checkpoint()
-                        self._id_to_button[item_id].Hide()
-                    continue
-
-            # Place each item
-            for row in itertools.batched(items, self.column_count):
-                await trio.lowlevel.checkpoint()
-                row_sizer = wx.BoxSizer(wx.HORIZONTAL)
-                self.itemlist_sizer.Add(row_sizer, row_flags)
-                for item_id in row:
-                    button = self._id_to_button[item_id]
-                    button.suggested = item_id in self.suggested
-                    button.Show()
-                    row_sizer.Add(button, item_flags)
-
-        self.wid_itemlist.SetVirtualSize(10, 10)
-        self.itemlist_sizer.Layout()
-        self.wid_itemlist.FitInside()
-        # Restore the scrollbar position.
-        _, pixels_per = self.wid_itemlist.GetScrollPixelsPerUnit()
-        self.wid_itemlist.Scroll(
-            wx.DefaultCoord,
-            round(prev_scroll_pos * self.wid_itemlist.GetVirtualSize().Height / pixels_per),
-        )
+        bottom = top + self.wid_itemlist.GetClientSize().Height
+        for button, item_id, x, y in self._assign_buttons(top, bottom):
+            button.suggested = item_id in self.suggested
+            button.SetPosition((x + ITEM_SEP, y + 2 * ITEM_SEP - top))
+            button.Show()
+
+        self.wid_itemlist.SetVirtualSize(width, layout.height)
 
     @override
     def _ui_button_create(self, ind: int, /) -> ItemSlot:
@@ -615,24 +608,22 @@ class SelectorWin(SelectorWinBase[ItemSlot, GroupHeader]):
         item.Hide()
 
     @override
-    def _ui_button_scroll_to(self, item: ItemSlot, /) -> None:
+    def _ui_scroll_to(self, y: int, /) -> None:
         # Scroll-related things is done in scroll units, just convert to pixels
         # for the computations here though.
         _, pixels_per = self.wid_itemlist.GetScrollPixelsPerUnit()
         # This is the size of the viewport.
-        view_height = self.wid_itemlist.GetScrollPageSize(wx.VERTICAL) * pixels_per
+        view_height = self.wid_itemlist.GetClientSize().Height
+        top_off = self.wid_itemlist.GetViewStart()[1] * pixels_per
+        if self._layout is not None:
+            # The virtual size may not have been updated yet.
+            self.wid_itemlist.SetVirtualSize(self.wid_itemlist.GetClientSize().Width, self._layout.height)
 
-        # This is relative to the viewport
-        y = item.GetPosition().y
-        item_height = item.GetMinHeight()
-
-        if 8 <= y <= view_height - item_height - 8:
+        if top_off + 8 <= y <= top_off + view_height - ITEM_HEIGHT - 8:
             return  # Already in view
 
-        # Center in the view. We need to add
-        top_off = self.wid_itemlist.GetScrollPos(wx.VERTICAL) * pixels_per
-
-        offset = top_off + y + (item_height - view_height) / 2
+        # Center in the view.
+        offset = y + (ITEM_HEIGHT - view_height) / 2
         self.wid_itemlist.Scroll(wx.DefaultCoord, round(offset / pixels_per))
 
     @override
@@ -700,6 +691,16 @@ class SelectorWin(SelectorWinBase[ItemSlot, GroupHeader]):
         group.menu.Bind(wx.EVT_MENU, lambda evt: func(), menu_item)
         menu_item.SetBitmap(RADIO_MENU_BITMAP, True)
 
+    @override
+    def _ui_menu_clear_group(self, group: GroupHeader, items: Iterable[utils.SpecialID], /) -> None:
+        wid_transtoken.clear_stored_menu(group.menu)
+        for item_id in items:
+            menu_item = self._menu_items.pop(item_id, None)
+            if menu_item is not None:
+                group.menu.Unbind(wx.EVT_MENU, id=menu_item.GetId())
+        for menu_item in list(group.menu.GetMenuItems()):
+            group.menu.Delete(menu_item)
+
     @override
     def _ui_menu_set_font(self, item_id: utils.SpecialID, /, suggested: bool) -> None:
         try:
@@ -1,13 +1,13 @@
 """Manage applying translation tokens to Wx widgets."""
 from __future__ import annotations
+from typing import Any
 
-from contextlib import aclosing
+from collections.abc import Callable
 from weakref import WeakKeyDictionary
 
-import trio.lowlevel
 import wx
 
-from app.localisation import gradual_iter
+from app.localisation import RETRANSLATE_PROGRESS, RetranslateJob, retranslate
 from transtoken import TransToken, CURRENT_LANG
 
 
@@ -86,42 +86,62 @@ def set_entry_value(entry: wx.TextEntry, token: TransToken) -> None:
         _entry_values[entry] = token
 
 
-async def update_task() -> None:
-    """Apply new languages to all stored widgets."""
-    # Using gradual_iter() yields to the event loop in-between each conversion.
-    while True:
-        await CURRENT_LANG.wait_transition()
-        async with aclosing(gradual_iter(_control_labels)) as agen1:
-            async for control, token in agen1:
-                control.SetLabel(str(token))
+def _is_shown(window: wx.Window) -> bool:
+    """Check if a window is currently displayed."""
+    return bool(window) and window.IsShownOnScreen()
+
+
+def _apply_label(control: wx.Control, token: TransToken, translate: Callable[[TransToken], str]) -> None:
+    """Reapply the label for a control."""
+    control.SetLabel(translate(token))
+
+
+def _apply_menu(
+    menu: wx.Menu, menu_map: dict[int, TransToken],
+    translate: Callable[[TransToken], str],
+) -> None:
+    """Reapply the labels for each item in a menu."""
+    for menu_id, token in menu_map.items():
+        menu.SetLabel(menu_id, translate(token))
 
-        await trio.lowlevel.checkpoint()
 
-        async with aclosing(gradual_iter(_menu_labels)) as agen2:
-            async for menu, menu_map in agen2:
-                for menu_id, token in menu_map.items():
-                    menu.SetLabel(menu_id, str(token))
+def _apply_tooltip(window: wx.Window, token: TransToken, translate: Callable[[TransToken], str]) -> None:
+    """Reapply a tooltip."""
+    window.SetToolTip(translate(token))
 
-        await trio.lowlevel.checkpoint()
 
-        async with aclosing(gradual_iter(_tooltips)) as agen3:
-            async for window, token in agen3:
-                window.SetToolTip(str(token))
+def _apply_entry(entry: wx.TextEntry, token: TransToken, translate: Callable[[TransToken], str]) -> None:
+    """Reapply the value of a textbox."""
+    entry.SetValue(translate(token))
 
-        await trio.lowlevel.checkpoint()
 
-        async with aclosing(gradual_iter(_entry_values)) as agen4:
-            async for entry, token in agen4:
-                entry.SetValue(str(token))
+def _apply_title(window: wx.TopLevelWindow, token: TransToken, translate: Callable[[TransToken], str]) -> None:
+    """Reapply a window title."""
+    window.SetTitle(translate(token))
 
-        await trio.lowlevel.checkpoint()
 
-        for window, token in _window_titles.items():
-            window.SetTitle(str(token))
+_JOBS: list[RetranslateJob[Any, Any]] = [
+    RetranslateJob(_window_titles, _apply_title),
+    RetranslateJob(_menu_labels, _apply_menu),
+    RetranslateJob(_control_labels, _apply_label, _is_shown),
+    RetranslateJob(_entry_values, _apply_entry, _is_shown),
+    # Tooltips aren't visible until hovered over.
+    RetranslateJob(_tooltips, _apply_tooltip, lambda window: False),
+]
+
+
+async def update_task() -> None:
+    """Apply new languages to all stored widgets."""
+    # This yields to the event loop in-between batches, doing visible widgets first.
+    while True:
+        await CURRENT_LANG.wait_transition()
+        while not await retranslate(_JOBS):
+            pass  # Language changed again, start over.
 
 
 def stats() -> str:
     """Output debingging statistics."""
+    done, total = RETRANSLATE_PROGRESS.value
     return (
         f'TransTokens:\n'
         f'- Controls: {len(_control_labels)}\n'
@@ -129,4 +149,5 @@ def stats() -> str:
         f'- Menus: {len(_menu_labels)}\n'
         f'- Entries: {len(_entry_values)}\n'
         f'- Windows: {len(_window_titles)}\n'
+        f'- Retranslated: {done}/{total}\n'
     )
@@ -2,10 +2,13 @@
 
 UserError is imported all over, so this needs to have minimal imports to avoid cycles.
 """
-from typing import ClassVar, Literal, TypedDict
+from typing import ClassVar, Final, Literal, TypedDict
 
-from collections.abc import Collection, Iterable
+from array import array
+from collections.abc import Collection, Iterable, Mapping
 from pathlib import Path
+import struct
+import sys
 
 from srctools import FrozenVec, Vec, logger
 import attrs
@@ -30,12 +33,95 @@ TEX_SET: set[Kind] = {
 }
 
 
-class SimpleTile(TypedDict):
-    """A super simplified version of tiledef data for the error window. This can be converted right to JSON."""
-    position: TuplePos
-    orient: Literal["n", "s", "e", "w", "u", "d"]
-    width: float
-    height: float
+type Orient = Literal["n", "s", "e", "w", "u", "d"]
+# The index of each orient character is what is stored in the packed data.
+ORIENTS: Final = 'nsewud'
+# Header for the packed tile data - magic, version and number of kinds.
+TILES_HEADER: Final = struct.Struct('<4sII')
+TILES_MAGIC: Final = b'BEE2'
+TILES_VERSION: Final = 1
+
+
+@attrs.define(eq=False)
+class TileArrays:
+    """A super simplified version of tiledef data for the error window.
+
+    To keep this compact when pickling and serving to the webpage, each attribute is stored in
+    a typed array, instead of a list of individual tiles.
+    """
+    # X, Y, Z triples, in 128-unit voxels.
+    positions: array[float] = attrs.Factory(lambda: array('f'))
+    # Width, height pairs.
+    sizes: array[float] = attrs.Factory(lambda: array('f'))
+    # Index into ORIENTS.
+    orients: bytearray = attrs.Factory(bytearray)
+
+    def __len__(self) -> int:
+        return len(self.orients)
+
+    def append(self, orient: Orient, position: TuplePos, width: float, height: float) -> None:
+        """Add a tile."""
+        self.positions.extend(position)
+        self.sizes.append(width)
+        self.sizes.append(height)
+        self.orients.append(ORIENTS.index(orient))
+
+
+def _pad4(data: bytearray) -> None:
+    """Pad the data to a multiple of 4 bytes, so typed arrays can be aligned."""
+    data += bytes(-len(data) % 4)
+
+
+def pack_tiles(faces: Mapping[Kind, TileArrays]) -> bytes:
+    """Pack tile data into a binary form, which the webpage can directly view as typed arrays.
+
+    After the header, for each kind this contains the length-prefixed name, the tile count,
+    then the positions, sizes and orients arrays. Each section is 4-byte aligned.
+    All values are little-endian.
+    """
+    data = bytearray(TILES_HEADER.pack(TILES_MAGIC, TILES_VERSION, len(faces)))
+    for kind, tiles in faces.items():
+        name = kind.encode('ascii')
+        data.append(len(name))
+        data += name
+        _pad4(data)
+        data += struct.pack('<I', len(tiles))
+        for arr in [tiles.positions, tiles.sizes]:
+            if sys.byteorder == 'big':
+                arr = array('f', arr)
+                arr.byteswap()
+            data += arr.tobytes()
+        data += tiles.orients
+        _pad4(data)
+    return bytes(data)
+
+
+def unpack_tiles(data: bytes) -> dict[Kind, TileArrays]:
+    """Reverse pack_tiles(), for testing."""
+    magic, version, count = TILES_HEADER.unpack_from(data)
+    if magic != TILES_MAGIC or version != TILES_VERSION:
+        raise ValueError(f'Unknown tiles data: {magic!r} v{version}')
+    offset = TILES_HEADER.size
+    faces: dict[Kind, TileArrays] = {}
+    for _ in range(count):
+        name_len = data[offset]
+        kind: Kind = data[offset + 1: offset + 1 + name_len].decode('ascii')  # type: ignore[assignment]
+        offset += 1 + name_len
+        offset += -offset % 4
+        [tile_count] = struct.unpack_from('<I', data, offset)
+        offset += 4
+        tiles = faces[kind] = TileArrays()
+        tiles.positions.frombytes(data[offset: offset + 12 * tile_count])
+        offset += 12 * tile_count
+        tiles.sizes.frombytes(data[offset: offset + 8 * tile_count])
+        offset += 8 * tile_count
+        if sys.byteorder == 'big':
+            tiles.positions.byteswap()
+            tiles.sizes.byteswap()
+        tiles.orients += data[offset: offset + tile_count]
+        offset += tile_count
+        offset += -offset % 4
+    return faces
 
 
 class BarrierHole(TypedDict):
@@ -61,7 +147,7 @@ class ErrorInfo:
     language_file: Path | None = None
     # Logging context
     context: str = ''
-    faces: dict[Kind, list[SimpleTile]] = attrs.Factory(dict)
+    faces: dict[Kind, TileArrays] = attrs.Factory(dict)
     # Voxels of interest in the map.
     voxels: list[TuplePos] = attrs.Factory(list)
     # Points of interest in the map.
@@ -106,7 +192,7 @@ class UserError(BaseException):
     This will result in the compile switching to compile a map which displays
     a HTML page to the user via the Steam Overlay.
     """
-    simple_tiles: ClassVar[dict[Kind, list[SimpleTile]]] = {kind: [] for kind in TEX_SET}
+    simple_tiles: ClassVar[dict[Kind, TileArrays]] = {kind: TileArrays() for kind in TEX_SET}
 
     def __init__(
         self,
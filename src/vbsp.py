@@ -50,10 +50,11 @@ from precomp import (
     rand,
     cubes,
     errors,
+    profiler,
 )
 import config
 import consts
-import editoritems
+import editoritems_db
 import user_errors
 
 
@@ -89,7 +90,7 @@ IGNORED_OVERLAYS: set[Entity] = set()
 
 async def load_settings() -> tuple[
     antlines.IndicatorStyle,
-    dict[utils.ObjectID, editoritems.Item],
+    editoritems_db.ItemDatabase,
     corridor.ExportedConf,
 ]:
     """Load in all our settings from vbsp_config."""
@@ -117,7 +118,7 @@ async def load_settings() -> tuple[
         async with trio.open_nursery() as nursery:
             res_vconf = async_util.sync_result(nursery, load_keyvalues, "bee2/vbsp_config.cfg")
             res_packlist = async_util.sync_result(nursery, load_keyvalues, 'bee2/pack_list.cfg')
-            res_editor = async_util.sync_result(nursery, load_pickle, 'bee2/editor.bin')
+            res_editor = async_util.sync_result(nursery, editoritems_db.ItemDatabase.load, 'bee2/editor.bin')
             res_corr = async_util.sync_result(nursery, load_pickle, 'bee2/corridors.bin')
             res_dmx_conf = async_util.sync_result(nursery, load_dmx_config, 'bee2/config.dmx')
             # Load in templates locations.
@@ -146,22 +147,12 @@ async def load_settings() -> tuple[
         for var in stylevar_block:
             settings['style_vars'][var.name.casefold()] = srctools.conv_bool(var.value)
 
-    # Load out a copy of the item configuration, checking types as we go.
-    # The pickle could have produced anything.
-    id_to_item: dict[utils.ObjectID, editoritems.Item] = {}
-
-    editor_list = res_editor.result()
-    if not isinstance(editor_list, list):
-        raise ValueError(f'Invalid list of editor items, got: {editor_list!r}')
-    for item in editor_list:
-        if isinstance(item, editoritems.Item):
-            id_to_item[item.id] = item
-        else:
-            raise ValueError(f'Invalid editor item, got: {item!r}')
+    # The item configuration. This checks types, and only decodes items when they're used.
+    id_to_item = res_editor.result()
 
     # Send that data to the relevant modules.
-    instanceLocs.load_conf(id_to_item.values())
-    connections.read_configs(id_to_item.values())
+    instanceLocs.load_conf(id_to_item.summaries())
+    connections.read_configs(id_to_item)
 
     # Antline texturing settings.
     indicators = antlines.IndicatorStyle.parse(
@@ -1623,93 +1614,111 @@ async def main(argv: list[str]) -> None:
 
     is_publishing = False
     vmf: VMF | None = None
+    profile = profiler.CompileProfile.from_config(BEE2_config)
+    profile.start()
     try:
         LOGGER.info("PeTI map detected!")
 
         LOGGER.info("Loading settings...")
-        async with trio.open_nursery() as nursery:
-            res_game = async_util.sync_result(nursery, Game, game_dir)
-            res_settings = ResultCapture.start_soon(nursery, load_settings)
-            vmf_res = async_util.sync_result(nursery, load_map, path)
-            voice_data_res = ResultCapture.start_soon(nursery, voice_line.load)
+        with profile.phase('load'):
+            async with trio.open_nursery() as nursery:
+                res_game = async_util.sync_result(nursery, Game, game_dir)
+                res_settings = ResultCapture.start_soon(nursery, load_settings)
+                vmf_res = async_util.sync_result(nursery, load_map, path)
+                voice_data_res = ResultCapture.start_soon(nursery, voice_line.load)
 
         ind_style, id_to_item, corridor_conf = res_settings.result()
         vmf = vmf_res.result()
 
         coll = Collisions()
 
-        used_inst = instance_traits.set_traits(vmf, id_to_item, coll)
-        # Must be before corridors!
-        initial_voice_attrs = brushLoc.POS.read_from_map(vmf, id_to_item)
+        with profile.phase('set_traits', vmf):
+            used_inst = instance_traits.set_traits(vmf, id_to_item, coll)
+        with profile.phase('read_from_map', vmf):
+            # Must be before corridors!
+            initial_voice_attrs = brushLoc.POS.read_from_map(vmf, id_to_item)
 
         rand.init_seed(vmf)
 
-        info = corridor.analyse_and_modify(
-            vmf, corridor_conf,
-            elev_override=BEE2_config.get_bool('General', 'spawn_elev'),
-        )
+        with profile.phase('corridors', vmf):
+            info = corridor.analyse_and_modify(
+                vmf, corridor_conf,
+                elev_override=BEE2_config.get_bool('General', 'spawn_elev'),
+            )
         is_publishing = info.is_publishing
         info.set_attr(*initial_voice_attrs)
 
-        ant, side_to_antline = antlines.parse_antlines(vmf)
+        with profile.phase('antlines', vmf):
+            ant, side_to_antline = antlines.parse_antlines(vmf)
 
         write_itemid_list(vmf, used_inst)
 
-        # Requires instance traits!
-        connections.calc_connections(
-            vmf, ant,
-            shape_frame_mat=texturing.OVERLAYS.get_all('shapeframe', False),
-            enable_shape_frame=settings['style_vars']['enableshapesignageframe'],
-            ind_style=ind_style,
-        )
-        change_ents(vmf)
+        with profile.phase('connections', vmf):
+            # Requires instance traits!
+            connections.calc_connections(
+                vmf, ant,
+                shape_frame_mat=texturing.OVERLAYS.get_all('shapeframe', False),
+                enable_shape_frame=settings['style_vars']['enableshapesignageframe'],
+                ind_style=ind_style,
+            )
+            change_ents(vmf)
 
-        fizzler.parse_map(vmf, info)
-        barriers.parse_map(vmf, connections.ITEMS)
-        # We have barriers, pass to our error display.
-        errors.load_barriers(barriers.BARRIERS)
+        with profile.phase('fizzlers_barriers', vmf):
+            fizzler.parse_map(vmf, info)
+            barriers.parse_map(vmf, connections.ITEMS)
+            # We have barriers, pass to our error display.
+            errors.load_barriers(barriers.BARRIERS)
 
-        tiling.gen_tile_temp()
-        tiling.analyse_map(vmf, side_to_antline)
+        with profile.phase('tiling_analyse', vmf):
+            tiling.gen_tile_temp()
+            tiling.analyse_map(vmf, side_to_antline)
 
-        del side_to_antline
-        # We have tiles, pass to our error display.
-        errors.load_tiledefs(tiling.TILES.values(), brushLoc.POS)
+            del side_to_antline
+            # We have tiles, pass to our error display.
+            errors.load_tiledefs(tiling.TILES.values(), brushLoc.POS)
 
-        await texturing.setup(res_game.result(), vmf, list(tiling.TILES.values()))
+        with profile.phase('texturing', vmf):
+            await texturing.setup(res_game.result(), vmf, list(tiling.TILES.values()))
 
-        conditions.check_all(vmf, coll, info, voice_data_res.result())
-        add_extra_ents(vmf, info)
+        with profile.phase('conditions', vmf):
+            conditions.check_all(vmf, coll, info, voice_data_res.result(), profile)
+            add_extra_ents(vmf, info)
 
-        LOGGER.info('Generating tiles...')
-        if texturing.NEW_TILE_GEN:
-            tiling_gen.generate_brushes(vmf)
-        else:
-            tiling.generate_brushes(vmf)
-        LOGGER.info('Generating goop...')
-        tiling.generate_goo(vmf)
-        tiling.bind_overlays()
-
-        faithplate.gen_faithplates(vmf, info.has_attr('superposition'))
-        change_overlays(vmf)
-        fix_worldspawn(vmf, info)
-
-        if utils.DEV_MODE:
-            coll.export_debug(vmf, vis_name='collisions')
-        coll.export_vscript(vmf)
-
-        # Ensure all VMF outputs use the correct separator.
-        for ent in vmf.entities:
-            for out in ent.outputs:
-                out.comma_sep = False
-        # Set this so VRAD can know.
-        vmf.spawn['BEE2_is_preview'] = info.is_preview
-        # Ensure VRAD knows that the map is PeTI, it can't figure that out
-        # from parameters.
-        vmf.spawn['BEE2_is_peti'] = True
+        with profile.phase('tiling_generate', vmf):
+            LOGGER.info('Generating tiles...')
+            if texturing.NEW_TILE_GEN:
+                tiling_gen.generate_brushes(vmf)
+            else:
+                tiling.generate_brushes(vmf)
+            LOGGER.info('Generating goop...')
+            tiling.generate_goo(vmf)
+            tiling.bind_overlays()
+
+        with profile.phase('finalise', vmf):
+            faithplate.gen_faithplates(vmf, info.has_attr('superposition'))
+            change_overlays(vmf)
+            fix_worldspawn(vmf, info)
+
+            if utils.DEV_MODE:
+                coll.export_debug(vmf, vis_name='collisions')
+            coll.export_vscript(vmf)
+
+            # Ensure all VMF outputs use the correct separator.
+            for ent in vmf.entities:
+                for out in ent.outputs:
+                    out.comma_sep = False
+            # Set this so VRAD can know.
+            vmf.spawn['BEE2_is_preview'] = info.is_preview
+            # Ensure VRAD knows that the map is PeTI, it can't figure that out
+            # from parameters.
+            vmf.spawn['BEE2_is_peti'] = True
+
+        LOGGER.info('Decoded {}/{} item definitions.', id_to_item.decoded, len(id_to_item))
 
         # Save and run VBSP. If this leaks, this will raise UserError, and we'll compile again.
-        save(vmf, new_path)
+        with profile.phase('save', vmf):
+            save(vmf, new_path)
+        profile.write_report(new_path)
         if not skip_vbsp:
             run_vbsp(
                 vbsp_args=new_args,
@@ -1725,6 +1734,8 @@ async def main(argv: list[str]) -> None:
         LOGGER.error('"User" error detected, aborting compile: ', exc_info=True)
 
         error.info = attrs.evolve(error.info, vmf_fname_orig=path)
+        # Record how far we got.
+        profile.write_report(new_path)
 
         # Try to preserve the current map.
         if vmf is not None:
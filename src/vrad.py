@@ -13,7 +13,7 @@ from srctools import Vec
 from srctools.bsp import BSP, BSP_LUMPS
 from srctools.const import SurfFlags
 from srctools.filesys import RawFileSystem, ZipFileSystem, FileSystem
-from srctools.packlist import PackList
+from srctools.packlist import FileMode
 from srctools.game import find_gameinfo
 from srctools.logger import get_logger
 import srctools.run
@@ -23,7 +23,8 @@ from hammeraddons.bsp_transform import run_transformations
 from hammeraddons.plugin import PluginFinder, Source as PluginSource
 
 from BEE2_config import ConfigFile
-from postcomp import music, screenshot
+from postcomp import dep_cache, music, screenshot
+import fsys_index
 import utils
 
 
@@ -208,7 +209,8 @@ async def main(argv: list[str]) -> None:
     # Grab the currently mounted filesystems in P2.
     game = find_gameinfo(argv)
     root_folder = game.path.parent
-    fsys = game.get_filesystem()
+    fsys, fsys_stats = fsys_index.get_filesystem(game)
+    LOGGER.info('Filesystem index: {} VPKs indexed, {} parsed', fsys_stats.hits, fsys_stats.misses)
 
     # Special case - move the BEE2 filesystem FIRST, so we always pack files found there.
     for child_sys in fsys.systems[:]:
@@ -230,16 +232,19 @@ async def main(argv: list[str]) -> None:
     for child_sys in fsys.systems[:]:
         LOGGER.debug('- {}: {!r}', child_sys[1], child_sys[0])
 
-    packlist = PackList(fsys)
+    packlist = dep_cache.CachedPackList(fsys)
     LOGGER.info('Reading soundscripts...')
-    packlist.load_soundscript_manifest(root_folder / 'bin/bee2/sndscript_cache.dmx')
+    sndscript_cache = root_folder / 'bin/bee2/sndscript_cache.dmx'
+    packlist.load_soundscript_manifest(sndscript_cache)
 
     # We need to add all soundscripts in scripts/bee2_snd/
-    # This way we can pack those, if required.
+    # This way we can pack those, if required. These use the same cache as the manifest,
+    # so unchanged scripts are only parsed if actually used.
     for folder in ['scripts/bee2_snd/', 'scripts/bee_snd/']:
         for soundscript in fsys.walk_folder(folder):
             if soundscript.path.endswith('.txt'):
-                packlist.load_soundscript(soundscript, always_include=False)
+                packlist.soundscript.add_cached_file(soundscript.path, soundscript, FileMode.UNKNOWN)
+    packlist.soundscript.save_cache(sndscript_cache)
 
     LOGGER.info('Reading particles....')
     packlist.load_particle_manifest(root_folder / 'bin/bee2/particle_cache.dmx')
@@ -264,7 +269,11 @@ async def main(argv: list[str]) -> None:
         LOGGER.warning('Packing disabled!')
 
     LOGGER.info('Analysing file dependencies....')
+    dep_cache_loc = root_folder / 'bin/bee2/dependency_cache.dmx'
+    packlist.load_dependency_cache(dep_cache_loc)
     packlist.eval_dependencies()
+    packlist.save_dependency_cache(dep_cache_loc)
+    packlist.log_cache_stats()
 
     packlist.write_soundscript_manifest()
     packlist.write_particles_manifest(f'maps/{Path(path).stem}_particles.txt')